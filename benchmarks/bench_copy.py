@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+Benchmark for the copy() methods of CIMClass and CIMInstance.
+
+The copies share their property, method and qualifier dictionaries with the
+original object until one of them is modified (copy-on-write). This script
+measures the cost of copying a class and an instance with 200 properties,
+with and without a subsequent modification of the copy, and compares it to
+the cost of an eager copy of the dictionaries.
+
+Usage: python benchmarks/bench_copy.py [NUMBER]
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+import os
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from pywbem import CIMClass, CIMInstance, CIMProperty, CIMQualifier, \
+                   Uint32  # noqa: E402
+from pywbem.cim_obj import NocaseDict  # noqa: E402
+
+NUM_PROPERTIES = 200
+
+
+def make_class():
+    """Return a CIMClass with NUM_PROPERTIES qualified properties."""
+    props = NocaseDict()
+    for i in range(NUM_PROPERTIES):
+        name = 'Prop%03d' % i
+        props[name] = CIMProperty(
+            name, None, 'uint32',
+            qualifiers={'Description': CIMQualifier('Description',
+                                                    'Property %d' % i)})
+    return CIMClass('PyWBEM_Bench', properties=props,
+                    qualifiers={'Description': CIMQualifier('Description',
+                                                            'Benchmark')})
+
+
+def make_instance():
+    """Return a CIMInstance with NUM_PROPERTIES properties."""
+    props = NocaseDict()
+    for i in range(NUM_PROPERTIES):
+        props['Prop%03d' % i] = Uint32(i)
+    return CIMInstance('PyWBEM_Bench', properties=props)
+
+
+def eager_copy(obj):
+    """Copy obj the way copy() did before it was copy-on-write."""
+    result = obj.copy()
+    for name in ('properties', 'methods', 'qualifiers'):
+        nd = getattr(obj, name, None)
+        if nd is not None:
+            copied = NocaseDict()
+            copied._data = nd._data.copy()  # pylint: disable=protected-access
+            setattr(result, name, copied)
+    return result
+
+
+def modify(obj):
+    """Modify one property of obj, which unshares its property storage."""
+    obj.properties['Prop000'] = CIMProperty('Prop000', Uint32(42))
+
+
+def run(number):
+    """Run the benchmark and print the results."""
+    objs = [('CIMClass', make_class()), ('CIMInstance', make_instance())]
+    cases = [
+        ('copy()', lambda o: o.copy()),
+        ('copy() + modify', lambda o: modify(o.copy())),
+        ('eager copy', eager_copy),
+        ('eager copy + modify', lambda o: modify(eager_copy(o))),
+    ]
+    print('Copying objects with %d properties, %d times each' %
+          (NUM_PROPERTIES, number))
+    for objname, obj in objs:
+        for casename, func in cases:
+            secs = timeit.timeit(lambda: func(obj), number=number)
+            print('  %-12s %-20s %8.2f us/copy' %
+                  (objname, casename, secs / number * 1e6))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
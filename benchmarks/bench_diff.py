@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+Benchmark for comparing two snapshots of CIM instances.
+
+Two snapshots with the same instances are built, and a small fraction of the
+instances of the second snapshot is changed. The script measures the
+construction of a snapshot, which must not be slowed down by the fingerprint
+support of the CIM objects, and the comparison of the snapshots with the `==`
+operator (instances matched by position or by the string form of their
+paths), and with `diff_instances()` (instances matched by path), for the first
+diff and for a repeated diff where the fingerprints of the old snapshot are
+already cached.
+
+Usage: python benchmarks/bench_diff.py [NUM_INSTANCES]
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from pywbem import CIMInstance, CIMInstanceName, Uint32, Uint64, \
+                   diff_instances  # noqa: E402
+from pywbem.cim_obj import NocaseDict  # noqa: E402
+
+NUM_PROPERTIES = 20
+CHANGE_EVERY = 100
+
+
+def make_snapshot(num_instances, changed=False):
+    """Return a list of instances, with some of them changed if requested."""
+    insts = []
+    for i in range(num_instances):
+        name = u'Disk%06d' % i
+        props = NocaseDict([(u'Name', name)])
+        for j in range(NUM_PROPERTIES - 2):
+            props[u'Prop%02d' % j] = Uint32(j)
+        size = i
+        if changed and i % CHANGE_EVERY == 0:
+            size += 1
+        props[u'Size'] = Uint64(size)
+        path = CIMInstanceName(u'PyWBEM_Disk', {u'Name': name},
+                               namespace=u'root/cimv2')
+        insts.append(CIMInstance(u'PyWBEM_Disk', properties=props,
+                                 path=path))
+    return insts
+
+
+def timed(func):
+    """Call func and return its duration in seconds."""
+    start = time.time()
+    func()
+    return time.time() - start
+
+
+def naive_diff(old, new):
+    """
+    Diff two snapshots the way it is done without diff_instances(): Index the
+    old instances by the string form of their paths and compare the matching
+    instances with the == operator. Return the changed new instances.
+    """
+    index = dict((str(inst.path), inst) for inst in old)
+    changed = []
+    for inst in new:
+        old_inst = index.get(str(inst.path))
+        if old_inst is not None and old_inst != inst:
+            changed.append(inst)
+    return changed
+
+
+def run(num_instances):
+    """Run the benchmark and print the results."""
+    print('Comparing snapshots of %d instances with %d properties, '
+          '1 in %d changed' % (num_instances, NUM_PROPERTIES, CHANGE_EVERY))
+
+    secs = timed(lambda: make_snapshot(num_instances))
+    print('  construction of a snapshot:  %8.3f s' % secs)
+
+    old = make_snapshot(num_instances)
+    new = make_snapshot(num_instances, changed=True)
+    secs = timed(lambda: [o == n for o, n in zip(old, new)])
+    print('  == by position:              %8.3f s' % secs)
+
+    old = make_snapshot(num_instances)
+    new = make_snapshot(num_instances, changed=True)
+    secs = timed(lambda: naive_diff(old, new))
+    print('  == by str(path):             %8.3f s' % secs)
+
+    old = make_snapshot(num_instances)
+    new = make_snapshot(num_instances, changed=True)
+    result = []
+    secs = timed(lambda: result.append(diff_instances(old, new)))
+    print('  diff_instances(), first:     %8.3f s (%d changed)' %
+          (secs, len(result[0].changed)))
+
+    newer = make_snapshot(num_instances)
+    secs = timed(lambda: diff_instances(new, newer))
+    print('  diff_instances(), repeated:  %8.3f s' % secs)
+
+    secs = timed(lambda: [o != n for o, n in zip(new, newer)])
+    print('  != by position, cached:      %8.3f s' % secs)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
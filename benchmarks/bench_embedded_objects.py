@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+Benchmark for parsing CIM-XML of instances with embedded instances.
+
+The specified number of instances is created, as in the indications of a
+lifecycle indication subscription. Each instance has a property with an
+embedded instance, and an array property with two embedded instances. The
+CIM-XML of the instances is parsed back into instances, with tuple trees
+created from a DOM of the XML, and with tuple trees created directly by
+xml_to_tupletree(). The script measures both, and checks that they return
+the same instances.
+
+Usage: python benchmarks/bench_embedded_objects.py [NUM_INSTANCES]
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+import os
+import time
+from xml.dom import minidom
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from pywbem import CIMInstance, CIMProperty  # noqa: E402
+from pywbem.cim_obj import NocaseDict  # noqa: E402
+from pywbem import tupleparse, tupletree  # noqa: E402
+
+
+def make_embedded(i):
+    """Create and return an embedded instance."""
+    props = NocaseDict()
+    props['InstanceID'] = 'job%d' % i
+    props['ElementName'] = 'Job <%d> of "backup" & restore' % i
+    props['Names'] = ['a', 'b', 'c']
+    props['Description'] = 'An embedded instance with some text. ' * 3
+    return CIMInstance('CIM_ConcreteJob', properties=props)
+
+
+def make_xml(num_instances):
+    """Create the instances and return the CIM-XML strings."""
+    xml_strings = []
+    for i in range(num_instances):
+        props = NocaseDict()
+        props['IndicationIdentifier'] = 'ind%d' % i
+        props['SourceInstance'] = CIMProperty(
+            'SourceInstance', make_embedded(i), type='string',
+            embedded_object='instance')
+        props['PreviousInstances'] = CIMProperty(
+            'PreviousInstances', [make_embedded(i), make_embedded(i + 1)],
+            type='string', embedded_object='instance')
+        inst = CIMInstance('CIM_InstModification', properties=props)
+        xml_strings.append(inst.tocimxml().toxml())
+    return xml_strings
+
+
+def dom_to_tupletree(xml_string):
+    """Create a tuple tree from a DOM of the XML, as previously done by
+    xml_to_tupletree()."""
+    return tupletree.dom_to_tupletree(minidom.parseString(xml_string))
+
+
+def parse(xml_strings, func):
+    """Parse the CIM-XML strings with the tuple tree function, and return the
+    instances and the duration in seconds."""
+    orig_func = tupleparse.xml_to_tupletree
+    tupleparse.xml_to_tupletree = func
+    try:
+        start = time.time()
+        instances = [tupleparse.parse_instance(func(xml))
+                     for xml in xml_strings]
+        return instances, time.time() - start
+    finally:
+        tupleparse.xml_to_tupletree = orig_func
+
+
+def run(num_instances):
+    """Run the benchmark and print the results."""
+    xml_strings = make_xml(num_instances)
+    size = sum(len(xml) for xml in xml_strings)
+    print('Parsing %d instances with embedded instances (%.1f MB of CIM-XML)' %
+          (num_instances, size / 1e6))
+    results = []
+    for name, func in [('DOM', dom_to_tupletree),
+                       ('xml_to_tupletree', tupletree.xml_to_tupletree)]:
+        instances, secs = parse(xml_strings, func)
+        results.append((instances, secs))
+        print('  %-18s %8.3f s  (%8.0f instances/s, %5.2f MB/s)' %
+              (name + ':', secs, num_instances / secs, size / 1e6 / secs))
+    if results[0][0] != results[1][0]:
+        print('Error: The instances differ')
+        return 1
+    print('  speedup:  %.2fx' % (results[0][1] / results[1][1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
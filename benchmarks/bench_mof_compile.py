@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+Benchmark for compiling large synthetic MOF schemas.
+
+For each size, a MOF file with the given number of classes is generated in a
+temporary directory. Each class except the first one is derived from an
+earlier class and has a reference to another earlier class. Each class is
+followed by some instances of it. The script measures the compilation of the
+MOF file into a local repository, with the directory in the search path of the
+MOF compiler. The time per class shows whether the compilation scales linearly
+with the size of the schema.
+
+Usage: python benchmarks/bench_mof_compile.py [NUM_CLASSES ...]
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from pywbem.mof_compiler import MOFCompiler, \
+                                MOFWBEMConnection  # noqa: E402
+
+INSTANCES_PER_CLASS = 5
+
+QUALIFIERS_MOF = """\
+Qualifier Key : boolean = false, Scope(property, reference),
+    Flavor(DisableOverride, ToSubclass);
+Qualifier Description : string = null, Scope(any),
+    Flavor(EnableOverride, ToSubclass, Translatable);
+"""
+
+ROOT_CLASS_MOF = """\
+   [Description ("Generated root class.")]
+class PyWBEM_Class0 {
+      [Key]
+   string Name;
+   uint32 Value0;
+};
+"""
+
+CLASS_MOF = """\
+   [Description ("Generated class %(i)d.")]
+class PyWBEM_Class%(i)d : PyWBEM_Class%(superclass)d {
+   PyWBEM_Class%(ref)d REF Other%(i)d;
+   uint32 Value%(i)d;
+};
+"""
+
+INSTANCE_MOF = """\
+instance of PyWBEM_Class%(i)d {
+   Name = "%(name)s";
+   Value%(i)d = %(value)d;
+};
+"""
+
+
+def make_schema(directory, num_classes):
+    """Generate the schema and return the path name of its MOF file."""
+    schema = os.path.join(directory, 'schema.mof')
+    with open(schema, 'w') as fp:
+        fp.write(QUALIFIERS_MOF)
+        for i in range(num_classes):
+            if i == 0:
+                fp.write(ROOT_CLASS_MOF)
+            else:
+                fp.write(CLASS_MOF % dict(i=i, superclass=(i - 1) // 2,
+                                          ref=(i * 7) // 8))
+            for j in range(INSTANCES_PER_CLASS):
+                fp.write(INSTANCE_MOF % dict(i=i, name='inst%d_%d' % (i, j),
+                                             value=j))
+    return schema
+
+
+def compile_schema(schema):
+    """Compile the schema and return the duration in seconds."""
+    mofcomp = MOFCompiler(MOFWBEMConnection(),
+                          search_paths=[os.path.dirname(schema)],
+                          log_func=lambda msg: None)
+    start = time.time()
+    mofcomp.compile_file(schema, 'root/cimv2')
+    return time.time() - start
+
+
+def run(sizes):
+    """Run the benchmark and print the results."""
+    print('Compiling schemas with %d instances per class' %
+          INSTANCES_PER_CLASS)
+    for num_classes in sizes:
+        tmpdir = tempfile.mkdtemp()
+        try:
+            secs = compile_schema(make_schema(tmpdir, num_classes))
+        finally:
+            shutil.rmtree(tmpdir)
+        print('  %6d classes:  %8.3f s  (%6.1f us per class)' %
+              (num_classes, secs, secs * 1e6 / num_classes))
+
+
+if __name__ == '__main__':
+    run([int(arg) for arg in sys.argv[1:]] or [1000, 2000, 4000, 8000])
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+Benchmark for the lexical analysis of large MOF files with many instances.
+
+A MOF file of the specified size in MB is generated in a temporary directory.
+It consists of instance declarations, as in an inventory export. The script
+measures the tokenization of the MOF file by the LEX analyzer of PLY with the
+token functions of the MOF compiler, and by the lexical analyzer of the MOF
+compiler, and checks that both return the same number of tokens.
+
+Usage: python benchmarks/bench_mof_lexer.py [SIZE_MB]
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from pywbem import mof_compiler  # noqa: E402
+
+INSTANCE_MOF = """\
+// Disk %(i)d
+instance of PyWBEM_Disk as $Disk%(i)d {
+    DeviceID = "disk%(i)d";
+    ElementName = "Disk %(i)d of \\"rack\\" %(rack)d";
+    BlockSize = %(block_size)d;
+    NumberOfBlocks = 0x%(blocks)X;
+    Ratio = %(ratio).3f;
+    Tags = {"ssd", "rack%(rack)d", "tier-%(tier)d"};
+    OperationalStatus = {2, 5};
+    Online = TRUE;
+    Location = null;
+};
+
+"""
+
+
+def make_mof(directory, size_mb):
+    """Generate the MOF file and return its path name."""
+    moffile = os.path.join(directory, 'inventory.mof')
+    size = size_mb * 1000 * 1000
+    with open(moffile, 'w') as fp:
+        fp.write('/*\n * Generated inventory export.\n */\n\n')
+        written = 0
+        i = 0
+        while written < size:
+            mof = INSTANCE_MOF % dict(i=i, rack=i // 40, tier=i % 3,
+                                      block_size=512 << (i % 4),
+                                      blocks=i * 2048, ratio=i % 1000 / 1000.0)
+            fp.write(mof)
+            written += len(mof)
+            i += 1
+    return moffile
+
+
+def tokenize(lexer, mof):
+    """Tokenize the MOF and return the number of tokens and the duration in
+    seconds."""
+    lexer.input(mof)
+    token = lexer.token
+    count = 0
+    start = time.time()
+    while token():
+        count += 1
+    return count, time.time() - start
+
+
+def run(size_mb):
+    """Run the benchmark and print the results."""
+    tmpdir = tempfile.mkdtemp()
+    try:
+        with open(make_mof(tmpdir, size_mb)) as fp:
+            mof = fp.read()
+    finally:
+        shutil.rmtree(tmpdir)
+    print('Tokenizing a MOF file of %.1f MB' % (len(mof) / 1e6))
+    results = []
+    for name, lexer in [('PLY LEX analyzer', mof_compiler._lex()),
+                        ('MOF compiler lexer', mof_compiler._lexer())]:
+        count, secs = tokenize(lexer, mof)
+        results.append((count, secs))
+        print('  %-20s %9d tokens  %8.3f s  (%5.2f MB/s)' %
+              (name + ':', count, secs, len(mof) / 1e6 / secs))
+    if results[0][0] != results[1][0]:
+        print('Error: The numbers of tokens differ')
+        return 1
+    print('  speedup:  %.2fx' % (results[0][1] / results[1][1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
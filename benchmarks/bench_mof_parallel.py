@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+Benchmark for compiling a MOF schema with MOF files parsed in worker
+processes.
+
+A schema similar to the DMTF CIM schema is generated in a temporary
+directory: A top-level MOF file includes a MOF file with qualifier
+declarations, and one MOF file for each class. The script measures the
+compilation of the top-level MOF file into a local repository, without
+worker processes and with the specified numbers of worker processes.
+
+Usage: python benchmarks/bench_mof_parallel.py [NUM_CLASSES [PROCESSES ...]]
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from pywbem.mof_compiler import MOFCompiler, \
+                                MOFWBEMConnection  # noqa: E402
+
+QUALIFIERS_MOF = """\
+Qualifier Key : boolean = false, Scope(property, reference),
+    Flavor(DisableOverride, ToSubclass);
+Qualifier Description : string = null, Scope(any),
+    Flavor(EnableOverride, ToSubclass, Translatable);
+Qualifier MaxLen : uint32 = null, Scope(property, method, parameter),
+    Flavor(EnableOverride, ToSubclass);
+Qualifier ValueMap : string[], Scope(property, method, parameter),
+    Flavor(EnableOverride, ToSubclass);
+Qualifier In : boolean = true, Scope(parameter),
+    Flavor(DisableOverride, ToSubclass);
+Qualifier Out : boolean = false, Scope(parameter),
+    Flavor(DisableOverride, ToSubclass);
+"""
+
+CLASS_MOF = """\
+// ==================================================================
+// %(name)s
+// ==================================================================
+   [Description (
+       "A generated class. The description spans multiple lines, "
+       "as in the DMTF CIM schema.")]
+class %(name)s%(superclass)s {
+
+      [Key, Description ( "The key of the class." )]
+   string InstanceID%(i)d;
+
+      [MaxLen ( 256 ), Description ( "The name of the element." )]
+   string ElementName%(i)d;
+
+      [ValueMap { "0", "1", "2", ".." }]
+   uint16 State%(i)d = 0;
+
+   uint64 Size%(i)d;
+
+      [Description ( "A method." )]
+   uint32 RequestStateChange%(i)d(
+         [In, Description ( "The requested state." )]
+      uint16 RequestedState,
+         [In ( false ), Out, Description ( "The job." )]
+      string Job);
+};
+"""
+
+
+def make_schema(directory, num_classes):
+    """Generate the schema and return the path name of its top-level MOF
+    file."""
+    with open(os.path.join(directory, 'qualifiers.mof'), 'w') as fp:
+        fp.write(QUALIFIERS_MOF)
+    includes = ['qualifiers.mof']
+    for i in range(num_classes):
+        name = 'PyWBEM_Class%04d' % i
+        superclass = i and ' : PyWBEM_Class%04d' % ((i - 1) // 2) or ''
+        with open(os.path.join(directory, name + '.mof'), 'w') as fp:
+            fp.write(CLASS_MOF % dict(name=name, superclass=superclass, i=i))
+        includes.append(name + '.mof')
+    schema = os.path.join(directory, 'schema.mof')
+    with open(schema, 'w') as fp:
+        for include in includes:
+            fp.write('#pragma include ("%s")\n' % include)
+    return schema
+
+
+def compile_schema(schema, processes):
+    """Compile the schema and return the duration in seconds."""
+    mofcomp = MOFCompiler(MOFWBEMConnection(),
+                          search_paths=[os.path.dirname(schema)],
+                          log_func=lambda msg: None, processes=processes)
+    start = time.time()
+    mofcomp.compile_file(schema, 'root/cimv2')
+    return time.time() - start
+
+
+def run(num_classes, processes_list):
+    """Run the benchmark and print the results."""
+    print('Compiling a schema of %d classes in %d MOF files' %
+          (num_classes, num_classes + 2))
+    tmpdir = tempfile.mkdtemp()
+    try:
+        schema = make_schema(tmpdir, num_classes)
+        serial = compile_schema(schema, 1)
+        print('  without worker processes:    %8.3f s' % serial)
+        for processes in processes_list:
+            secs = compile_schema(schema, processes)
+            print('  %3d worker processes:        %8.3f s (%.2fx)' %
+                  (processes, secs, serial / secs))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1500,
+        [int(arg) for arg in sys.argv[2:]] or [2, 4])
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+Benchmark for writing many CIM instances as MOF.
+
+The specified number of instances is created, as in an inventory export. The
+script measures writing their MOF to an in-memory text stream with the
+tomof() method of each instance, and with a MOF writer, and checks that both
+produce the same MOF.
+
+Usage: python benchmarks/bench_mof_writer.py [NUM_INSTANCES]
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+import os
+import time
+
+import six
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from pywbem import CIMInstance, CIMProperty, Uint16, Uint32, \
+                   Uint64  # noqa: E402
+from pywbem.cim_obj import NocaseDict  # noqa: E402
+from pywbem.mof_compiler import MOFWriter  # noqa: E402
+
+
+def make_instances(num_instances):
+    """Create and return the instances."""
+    instances = []
+    for i in range(num_instances):
+        props = NocaseDict()
+        props['DeviceID'] = 'disk%d' % i
+        props['ElementName'] = 'Disk %d of "rack" %d' % (i, i // 40)
+        props['BlockSize'] = Uint32(512 << (i % 4))
+        props['NumberOfBlocks'] = Uint64(i * 2048)
+        props['Tags'] = ['ssd', 'rack%d' % (i // 40), 'tier-%d' % (i % 3)]
+        props['OperationalStatus'] = [Uint16(2), Uint16(5)]
+        props['Online'] = True
+        props['Location'] = CIMProperty('Location', None, type='string')
+        instances.append(CIMInstance('PyWBEM_Disk', properties=props))
+    return instances
+
+
+def write_tomof(instances):
+    """Write the MOF with tomof(), and return it and the duration in
+    seconds."""
+    stream = six.StringIO()
+    start = time.time()
+    for inst in instances:
+        stream.write(inst.tomof())
+        stream.write('\n')
+    return stream.getvalue(), time.time() - start
+
+
+def write_writer(instances):
+    """Write the MOF with a MOF writer, and return it and the duration in
+    seconds."""
+    stream = six.StringIO()
+    start = time.time()
+    MOFWriter(stream).write_instances(instances)
+    return stream.getvalue(), time.time() - start
+
+
+def run(num_instances):
+    """Run the benchmark and print the results."""
+    instances = make_instances(num_instances)
+    print('Writing %d instances as MOF' % num_instances)
+    results = []
+    for name, func in [('tomof()', write_tomof),
+                       ('MOF writer', write_writer)]:
+        mof, secs = func(instances)
+        results.append((mof, secs))
+        print('  %-12s %8.3f s  (%8.0f instances/s, %6.2f MB/s)' %
+              (name + ':', secs, num_instances / secs, len(mof) / 1e6 / secs))
+    if results[0][0] != results[1][0]:
+        print('Error: The MOF differs')
+        return 1
+    print('  speedup:  %.2fx' % (results[0][1] / results[1][1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000))
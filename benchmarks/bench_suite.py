@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+Offline benchmark suite for the WBEM client and the MOF compiler.
+
+The operations are performed against a local mock CIMOM (see
+`testsuite/mock_cimom.py`) that returns generated CIM-XML replies (see
+`testsuite/cimxml_replies.py`), so no WBEM server is needed. The suite also measures
+the serialization of requests, the parsing of replies without the network,
+and the compilation of MOF.
+
+Each benchmark is run several times, and the minimum and median durations
+are reported. The minimum durations can be saved as a baseline in a JSON
+file, and compared with a baseline that was saved before on the same
+machine. A benchmark that is slower than its baseline by more than the
+tolerance is reported as a regression, and causes exit code 1.
+
+Usage: python benchmarks/bench_suite.py [options]
+       (see --help for the options)
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+import os
+import time
+import json
+import shutil
+import platform
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..',
+                                'testsuite'))
+
+# pylint: disable=wrong-import-position
+from pywbem import WBEMConnection, CIMInstanceName, \
+                   tocimxml  # noqa: E402
+from pywbem.tupletree import xml_to_tupletree  # noqa: E402
+from pywbem.tupleparse import parse_cim  # noqa: E402
+from pywbem.mof_compiler import MOFCompiler, \
+                                MOFWBEMConnection  # noqa: E402
+
+import cimxml_replies  # noqa: E402
+from mock_cimom import MockCIMOM  # noqa: E402
+from bench_mof_compile import make_schema  # noqa: E402
+
+# Number of calls of the operations that return one object
+NUM_CALLS = 100
+
+INSTANCE_NAME = CIMInstanceName('PyWBEM_Disk', {'DeviceID': 'disk42',
+                                                'SystemName': 'system0'})
+
+
+def bench_enumerate_instances(cimom, num_instances, embedded=False):
+    """EnumerateInstances of the specified number of instances."""
+    cimom.replies['EnumerateInstances'] = \
+        cimxml_replies.enumerate_instances_reply(num_instances, embedded)
+    conn = WBEMConnection(cimom.url, no_verification=True)
+
+    def func():
+        """Benchmarked function."""
+        assert len(conn.EnumerateInstances('PyWBEM_Disk')) == num_instances
+    return func, num_instances
+
+
+def bench_enumerate_instances_embedded(cimom, num_instances):
+    """EnumerateInstances of instances with embedded instances."""
+    return bench_enumerate_instances(cimom, num_instances, embedded=True)
+
+
+def bench_get_instance(cimom, num_instances):
+    # pylint: disable=unused-argument
+    """Repeated GetInstance of the same instance."""
+    cimom.replies['GetInstance'] = cimxml_replies.get_instance_reply()
+    conn = WBEMConnection(cimom.url, no_verification=True)
+
+    def func():
+        """Benchmarked function."""
+        for _ in range(NUM_CALLS):
+            conn.GetInstance(INSTANCE_NAME, PropertyList=['DeviceID', 'Tags'])
+    return func, NUM_CALLS
+
+
+def bench_associators(cimom, num_instances):
+    """Associators with deeply nested references in the instance paths."""
+    num_objects = max(num_instances // 10, 1)
+    cimom.replies['Associators'] = cimxml_replies.associators_reply(
+        num_objects, depth=3)
+    conn = WBEMConnection(cimom.url, no_verification=True)
+
+    def func():
+        """Benchmarked function."""
+        assert len(conn.Associators(INSTANCE_NAME)) == num_objects
+    return func, num_objects
+
+
+def bench_invoke_method(cimom, num_instances):
+    # pylint: disable=unused-argument
+    """Repeated InvokeMethod with embedded instances in the output
+    parameters."""
+    cimom.replies['Scrub'] = cimxml_replies.invoke_method_reply('Scrub', 10)
+    conn = WBEMConnection(cimom.url, no_verification=True)
+
+    def func():
+        """Benchmarked function."""
+        for _ in range(NUM_CALLS):
+            conn.InvokeMethod('Scrub', INSTANCE_NAME, Mode='full')
+    return func, NUM_CALLS
+
+
+def bench_serialize_request(cimom, num_instances):
+    # pylint: disable=unused-argument
+    """Serialization of instances to CIM-XML, as in requests."""
+    reply = cimxml_replies.enumerate_instances_reply(num_instances)
+    instances = [inst for inst in _parse_reply(reply)]
+
+    def func():
+        """Benchmarked function."""
+        for inst in instances:
+            tocimxml(inst).toxml()
+    return func, num_instances
+
+
+def bench_parse_reply(cimom, num_instances):
+    # pylint: disable=unused-argument
+    """Parsing of a CIM-XML reply of EnumerateInstances, without the
+    network."""
+    reply = cimxml_replies.enumerate_instances_reply(num_instances)
+
+    def func():
+        """Benchmarked function."""
+        assert len(_parse_reply(reply)) == num_instances
+    return func, num_instances
+
+
+def bench_mof_compile(cimom, num_instances):
+    # pylint: disable=unused-argument
+    """Compilation of a generated MOF schema with classes and instances."""
+    num_classes = max(num_instances // 5, 1)
+    tmpdir = tempfile.mkdtemp()
+    schema = make_schema(tmpdir, num_classes)
+    with open(schema) as fp:
+        mof = fp.read()
+    shutil.rmtree(tmpdir)
+
+    def func():
+        """Benchmarked function."""
+        mofcomp = MOFCompiler(MOFWBEMConnection(), log_func=lambda msg: None)
+        mofcomp.compile_string(mof, 'root/cimv2')
+    return func, num_classes
+
+
+def _parse_reply(reply):
+    """Parse a reply of an intrinsic operation and return the objects in its
+    IRETURNVALUE element."""
+    tup_tree = parse_cim(xml_to_tupletree(reply))
+    imethodresponse = tup_tree[2][2][0][2]
+    return imethodresponse[2][2]
+
+
+BENCHMARKS = [
+    ('EnumerateInstances', bench_enumerate_instances),
+    ('EnumerateInstances-embedded', bench_enumerate_instances_embedded),
+    ('GetInstance', bench_get_instance),
+    ('Associators', bench_associators),
+    ('InvokeMethod', bench_invoke_method),
+    ('serialize-request', bench_serialize_request),
+    ('parse-reply', bench_parse_reply),
+    ('mof-compile', bench_mof_compile),
+]
+
+
+def measure(func, repeat):
+    """Call the function the specified number of times, and return the
+    minimum and median durations in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        durations.append(time.time() - start)
+    durations.sort()
+    return durations[0], durations[len(durations) // 2]
+
+
+def compare(results, baseline, tolerance):
+    """Compare the results with the baseline, print the comparison, and
+    return the number of regressions."""
+    regressions = 0
+    print('Comparison with baseline (tolerance %d%%):' % (tolerance * 100))
+    for name, secs in results:
+        base_secs = baseline['results'].get(name)
+        if base_secs is None:
+            print('  %-28s no baseline' % name)
+            continue
+        ratio = secs / base_secs
+        status = ''
+        if ratio > 1 + tolerance:
+            status = 'REGRESSION'
+            regressions += 1
+        print(('  %-28s %6.2fx  %s' % (name, ratio, status)).rstrip())
+    return regressions
+
+
+def parse_args(argv):
+    """Parse the command line arguments."""
+    argparser = argparse.ArgumentParser(
+        description='Offline benchmark suite for pywbem.')
+    argparser.add_argument(
+        '-n', '--instances', type=int, default=1000,
+        help='Number of instances in the replies of the enumeration '
+        'operations (1 to 500000, default: 1000).')
+    argparser.add_argument(
+        '-r', '--repeat', type=int, default=5,
+        help='Number of runs of each benchmark (default: 5).')
+    argparser.add_argument(
+        '-k', '--select', metavar='SUBSTRING',
+        help='Run only the benchmarks whose names contain the substring.')
+    argparser.add_argument(
+        '--certfile', metavar='FILE',
+        help='PEM file with the private key and certificate of the mock '
+        'CIMOM. If specified, HTTPS is used instead of HTTP.')
+    argparser.add_argument(
+        '--save', metavar='FILE',
+        help='Save the minimum durations as a baseline in a JSON file.')
+    argparser.add_argument(
+        '--compare', metavar='FILE',
+        help='Compare the minimum durations with a baseline JSON file.')
+    argparser.add_argument(
+        '--tolerance', type=float, default=0.25,
+        help='Tolerated slowdown relative to the baseline before a benchmark '
+        'is reported as a regression (default: 0.25, i.e. 25%%).')
+    return argparser.parse_args(argv)
+
+
+def run(args):
+    """Run the benchmarks and print the results."""
+    print('Running benchmarks with %d instances, best of %d runs, on '
+          'Python %s' % (args.instances, args.repeat,
+                         platform.python_version()))
+    results = []
+    errors = 0
+    with MockCIMOM({}, certfile=args.certfile) as cimom:
+        for name, bench in BENCHMARKS:
+            if args.select and args.select not in name:
+                continue
+            try:
+                func, count = bench(cimom, args.instances)
+                min_secs, median_secs = measure(func, args.repeat)
+            except Exception as exc:  # pylint: disable=broad-except
+                print('  %-28s error: %s: %s' %
+                      (name + ':', exc.__class__.__name__, exc))
+                errors += 1
+                continue
+            results.append((name, min_secs))
+            print('  %-28s %8.3f s  median %8.3f s  (%9.0f objects/s)' %
+                  (name + ':', min_secs, median_secs, count / min_secs))
+    if args.save:
+        with open(args.save, 'w') as fp:
+            json.dump({'python': platform.python_version(),
+                       'instances': args.instances,
+                       'results': dict(results)},
+                      fp, indent=2, sort_keys=True)
+        print('Baseline saved in %s' % args.save)
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+        if baseline['instances'] != args.instances:
+            print('Error: The baseline was measured with %d instances' %
+                  baseline['instances'])
+            return 1
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run(parse_args(sys.argv[1:])))
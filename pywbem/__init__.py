@@ -84,6 +84,14 @@ from .cim_types import *
 from .cim_constants import *
 from .cim_operations import *
 from .cim_obj import *
+from .cim_table import *
+from .cim_binary import *
+from .cim_diff import *
+from .cim_tracker import *
+from .cim_statistics import *
+from .cim_hooks import *
+from .cim_capture import *
+from .cim_cache import *
 from .tupleparse import *
 from .cim_http import *
 from .exceptions import *
@@ -0,0 +1,824 @@
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+A compact binary representation of CIM objects, for caching them on disk and
+for transferring them between processes.
+
+The binary format is much more compact than pickling CIM objects, and faster
+to produce and to consume than CIM-XML. It is not meant for exchanging data
+with other programs, and it is not a replacement for CIM-XML.
+
+A binary stream consists of a header (a magic string and the format
+version), followed by any number of records. Each record contains one
+top-level object (e.g. a :class:`~pywbem.CIMInstance` object, or a list of
+them). Names (e.g. class, property and qualifier names, and CIM data types)
+are stored in a string table that is shared by all records of a stream, so
+a name that is repeated in the stream is stored only once. String values are
+stored in the records, so that the string table does not grow with the
+number of records of a long stream. Numeric values are stored as
+variable-length integers or IEEE floating point numbers, together with their
+CIM data type.
+
+The following objects can be represented, including as nested objects (e.g.
+embedded instances, or references):
+
+* :class:`~pywbem.CIMInstance`, :class:`~pywbem.CIMInstanceName`,
+  :class:`~pywbem.CIMClass`, :class:`~pywbem.CIMClassName`,
+  :class:`~pywbem.CIMProperty`, :class:`~pywbem.CIMMethod`,
+  :class:`~pywbem.CIMParameter`, :class:`~pywbem.CIMQualifier`,
+  :class:`~pywbem.CIMQualifierDeclaration`
+* Values of CIM data types (see :ref:`CIM data types`), and Python
+  :class:`py:int` and :class:`py:float` values (as they may be used in
+  keybindings)
+* `None`, and :class:`py:list` and :class:`py:tuple` objects (which become
+  lists) of the above
+
+The :class:`~pywbem.CIMInstance`, :class:`~pywbem.CIMInstanceName`,
+:class:`~pywbem.CIMClass` and :class:`~pywbem.CIMQualifierDeclaration`
+classes use the binary representation when they are pickled.
+
+Example::
+
+    with open('instances.bin', 'wb') as fp:
+        writer = pywbem.CIMBinaryWriter(fp)
+        for inst in conn.EnumerateInstances('CIM_Foo'):
+            writer.write(inst)
+
+    with open('instances.bin', 'rb') as fp:
+        instances = list(pywbem.CIMBinaryReader(fp))
+"""
+
+from __future__ import absolute_import
+
+import struct
+from io import BytesIO
+from datetime import datetime, timedelta
+
+import six
+
+from .cim_types import CIMDateTime, MinutesFromUTC, Uint8, Sint8, Uint16, \
+                       Sint16, Uint32, Sint32, Uint64, Sint64, Real32, \
+                       Real64, _Longint
+from .cim_obj import CIMInstance, CIMInstanceName, CIMClass, CIMClassName, \
+                     CIMProperty, CIMMethod, CIMParameter, CIMQualifier, \
+                     CIMQualifierDeclaration, NocaseDict
+from .exceptions import ParseError
+
+__all__ = ['CIMBinaryWriter', 'CIMBinaryReader', 'tobinary', 'frombinary']
+
+#: Magic string at the begin of a binary stream.
+_MAGIC = b'PYWBEM.B'
+
+#: Version of the binary format that is written. Readers reject streams
+#: with a different version, because the format is not meant for long-term
+#: storage.
+BINARY_FORMAT_VERSION = 1
+
+# Type codes of the encoded values. Each encoded value starts with one of
+# these codes, so encoded values are self-describing.
+_NULL = 0
+_FALSE = 1
+_TRUE = 2
+_STRING = 3
+_UINT8 = 4
+_SINT8 = 5
+_UINT16 = 6
+_SINT16 = 7
+_UINT32 = 8
+_SINT32 = 9
+_UINT64 = 10
+_SINT64 = 11
+_REAL32 = 12
+_REAL64 = 13
+_DATETIME = 14
+_INTERVAL = 15
+_INT = 16
+_FLOAT = 17
+_LIST = 18
+_INSTANCENAME = 19
+_INSTANCE = 20
+_CLASSNAME = 21
+_CLASS = 22
+_PROPERTY = 23
+_METHOD = 24
+_PARAMETER = 25
+_QUALIFIER = 26
+_QUALIFIERDECL = 27
+_BYTES = 28
+
+_INT_TYPES = {
+    Uint8: _UINT8, Sint8: _SINT8, Uint16: _UINT16, Sint16: _SINT16,
+    Uint32: _UINT32, Sint32: _SINT32, Uint64: _UINT64, Sint64: _SINT64,
+}
+_INT_CLASSES = dict([(code, cls) for cls, code in _INT_TYPES.items()])
+
+# Real32 values are stored with double precision as well, because they are
+# represented as Python floats and would otherwise not round-trip exactly.
+_REAL64_STRUCT = struct.Struct('<d')
+
+
+class _Encoder(object):
+    """
+    Encodes objects into records. The string table of the encoder (for
+    names) is kept across records.
+    """
+
+    def __init__(self):
+        self._strings = {}
+        self._buf = None
+        self._dispatch = {
+            type(None): self._w_null,
+            bool: self._w_bool,
+            six.text_type: self._w_text,
+            six.binary_type: self._w_bytes,
+            Real32: self._w_real32,
+            Real64: self._w_real64,
+            float: self._w_float,
+            CIMDateTime: self._w_datetime,
+            list: self._w_list,
+            tuple: self._w_list,
+            CIMInstanceName: self._w_instancename,
+            CIMInstance: self._w_instance,
+            CIMClassName: self._w_classname,
+            CIMClass: self._w_class,
+            CIMProperty: self._w_property,
+            CIMMethod: self._w_method,
+            CIMParameter: self._w_parameter,
+            CIMQualifier: self._w_qualifier,
+            CIMQualifierDeclaration: self._w_qualifierdecl,
+        }
+        for cls in _INT_TYPES:
+            self._dispatch[cls] = self._w_cimint
+        for cls in six.integer_types:
+            self._dispatch[cls] = self._w_int
+
+    def encode(self, obj):
+        """Return the record payload for an object, as a bytearray."""
+        self._buf = bytearray()
+        num_strings = len(self._strings)
+        try:
+            self._w_value(obj)
+            return self._buf
+        except Exception:
+            # The record is not written, so the string table must not keep
+            # the strings that were added for it.
+            for strng, index in list(self._strings.items()):
+                if index >= num_strings:
+                    del self._strings[strng]
+            raise
+        finally:
+            self._buf = None
+
+    def _w_uint(self, num):
+        buf = self._buf
+        while num > 0x7F:
+            buf.append((num & 0x7F) | 0x80)
+            num >>= 7
+        buf.append(num)
+
+    def _w_sint(self, num):
+        # Zigzag encoding, so that small negative numbers are short
+        self._w_uint(num << 1 if num >= 0 else ((-num) << 1) - 1)
+
+    def _w_str(self, strng):
+        """Write a name that is stored in the string table, or `None`."""
+        if strng is None:
+            self._buf.append(0)
+            return
+        index = self._strings.get(strng)
+        if index is not None:
+            self._w_uint(index + 2)
+            return
+        self._strings[strng] = len(self._strings)
+        if isinstance(strng, six.text_type):
+            strng = strng.encode('utf-8')
+        self._buf.append(1)
+        self._w_uint(len(strng))
+        self._buf += strng
+
+    def _w_value(self, value):
+        try:
+            writer = self._dispatch[type(value)]
+        except KeyError:
+            raise TypeError('Cannot encode object of type %s in binary '\
+                            'format' % type(value))
+        writer(value)
+
+    def _w_null(self, value):  # pylint: disable=unused-argument
+        self._buf.append(_NULL)
+
+    def _w_bool(self, value):
+        self._buf.append(_TRUE if value else _FALSE)
+
+    def _w_text(self, value):
+        self._buf.append(_STRING)
+        value = value.encode('utf-8')
+        self._w_uint(len(value))
+        self._buf += value
+
+    def _w_bytes(self, value):
+        self._buf.append(_BYTES)
+        self._w_uint(len(value))
+        self._buf += value
+
+    def _w_cimint(self, value):
+        self._buf.append(_INT_TYPES[type(value)])
+        self._w_sint(value)
+
+    def _w_int(self, value):
+        self._buf.append(_INT)
+        self._w_sint(value)
+
+    def _w_real32(self, value):
+        self._buf.append(_REAL32)
+        self._buf += _REAL64_STRUCT.pack(value)
+
+    def _w_real64(self, value):
+        self._buf.append(_REAL64)
+        self._buf += _REAL64_STRUCT.pack(value)
+
+    def _w_float(self, value):
+        self._buf.append(_FLOAT)
+        self._buf += _REAL64_STRUCT.pack(value)
+
+    def _w_datetime(self, value):
+        if value.is_interval:
+            delta = value.timedelta
+            self._buf.append(_INTERVAL)
+            self._w_uint(delta.days)
+            self._w_uint(delta.seconds)
+            self._w_uint(delta.microseconds)
+        else:
+            dtm = value.datetime
+            self._buf.append(_DATETIME)
+            for num in (dtm.year, dtm.month, dtm.day, dtm.hour, dtm.minute,
+                        dtm.second, dtm.microsecond):
+                self._w_uint(num)
+            offset = dtm.utcoffset()
+            if offset is None:
+                self._w_value(None)
+            else:
+                self._w_int(offset.days * 24 * 60 + offset.seconds // 60)
+
+    def _w_list(self, value):
+        self._buf.append(_LIST)
+        self._w_uint(len(value))
+        w_value = self._w_value
+        for item in value:
+            w_value(item)
+
+    def _w_objects(self, dict_):
+        """Write the values of a NocaseDict of CIM objects that have a
+        `name` attribute that is the dictionary key."""
+        self._w_uint(len(dict_))
+        w_value = self._w_value
+        for obj in dict_.values():
+            w_value(obj)
+
+    def _w_items(self, dict_):
+        """Write the items of a NocaseDict of names and values."""
+        self._w_uint(len(dict_))
+        for key, value in dict_.items():
+            self._w_str(key)
+            self._w_value(value)
+
+    def _w_instancename(self, obj):
+        self._buf.append(_INSTANCENAME)
+        self._w_str(obj.classname)
+        self._w_str(obj.namespace)
+        self._w_str(obj.host)
+        self._w_items(obj.keybindings)
+
+    def _w_instance(self, obj):
+        self._buf.append(_INSTANCE)
+        self._w_str(obj.classname)
+        self._w_value(obj.path)
+        self._w_value(obj.property_list)
+        self._w_objects(obj.properties)
+        self._w_objects(obj.qualifiers)
+
+    def _w_classname(self, obj):
+        self._buf.append(_CLASSNAME)
+        self._w_str(obj.classname)
+        self._w_str(obj.namespace)
+        self._w_str(obj.host)
+
+    def _w_class(self, obj):
+        self._buf.append(_CLASS)
+        self._w_str(obj.classname)
+        self._w_str(obj.superclass)
+        self._w_objects(obj.properties)
+        self._w_objects(obj.methods)
+        self._w_objects(obj.qualifiers)
+
+    def _w_property(self, obj):
+        self._buf.append(_PROPERTY)
+        self._w_str(obj.name)
+        self._w_str(obj.type)
+        self._w_value(obj.value)
+        self._w_value(obj.is_array)
+        self._w_str(obj.reference_class)
+        self._w_str(obj.embedded_object)
+        self._w_str(obj.class_origin)
+        self._w_value(obj.propagated)
+        self._w_value(obj.array_size)
+        self._w_objects(obj.qualifiers)
+
+    def _w_method(self, obj):
+        self._buf.append(_METHOD)
+        self._w_str(obj.name)
+        self._w_str(obj.return_type)
+        self._w_str(obj.class_origin)
+        self._w_value(obj.propagated)
+        self._w_objects(obj.parameters)
+        self._w_objects(obj.qualifiers)
+
+    def _w_parameter(self, obj):
+        self._buf.append(_PARAMETER)
+        self._w_str(obj.name)
+        self._w_str(obj.type)
+        self._w_str(obj.reference_class)
+        self._w_value(obj.is_array)
+        self._w_value(obj.array_size)
+        self._w_value(obj._value)  # pylint: disable=protected-access
+        self._w_objects(obj.qualifiers)
+
+    def _w_qualifier(self, obj):
+        self._buf.append(_QUALIFIER)
+        self._w_str(obj.name)
+        self._w_str(obj.type)
+        self._w_value(obj.value)
+        self._w_value(obj.propagated)
+        self._w_value(obj.overridable)
+        self._w_value(obj.tosubclass)
+        self._w_value(obj.toinstance)
+        self._w_value(obj.translatable)
+
+    def _w_qualifierdecl(self, obj):
+        self._buf.append(_QUALIFIERDECL)
+        self._w_str(obj.name)
+        self._w_str(obj.type)
+        self._w_value(obj.value)
+        self._w_value(obj.is_array)
+        self._w_value(obj.array_size)
+        self._w_items(obj.scopes)
+        self._w_value(obj.overridable)
+        self._w_value(obj.tosubclass)
+        self._w_value(obj.toinstance)
+        self._w_value(obj.translatable)
+
+
+class _Decoder(object):
+    """
+    Decodes records into objects. The string table of the decoder (for
+    names) is kept across records.
+
+    The CIM objects are created without invoking their constructors, because
+    the encoded objects have already been checked by the constructors when
+    they were originally created.
+    """
+
+    def __init__(self):
+        self._strings = []
+        self._data = None
+        self._pos = 0
+        self._dispatch = {
+            _NULL: lambda: None,
+            _FALSE: lambda: False,
+            _TRUE: lambda: True,
+            _STRING: self._r_text,
+            _BYTES: self._r_bytes,
+            _REAL32: self._r_real32,
+            _REAL64: self._r_real64,
+            _FLOAT: self._r_float,
+            _INT: self._r_sint,
+            _DATETIME: self._r_datetime,
+            _INTERVAL: self._r_interval,
+            _LIST: self._r_list,
+            _INSTANCENAME: self._r_instancename,
+            _INSTANCE: self._r_instance,
+            _CLASSNAME: self._r_classname,
+            _CLASS: self._r_class,
+            _PROPERTY: self._r_property,
+            _METHOD: self._r_method,
+            _PARAMETER: self._r_parameter,
+            _QUALIFIER: self._r_qualifier,
+            _QUALIFIERDECL: self._r_qualifierdecl,
+        }
+        for code, cls in _INT_CLASSES.items():
+            self._dispatch[code] = self._cimint_reader(cls)
+
+    def decode(self, payload):
+        """Return the object in a record payload."""
+        self._data = bytearray(payload)
+        self._pos = 0
+        try:
+            obj = self._r_value()
+            if self._pos != len(self._data):
+                raise ParseError('Binary CIM record has %d bytes of '\
+                                 'trailing data' %\
+                                 (len(self._data) - self._pos))
+            return obj
+        except (IndexError, struct.error):
+            raise ParseError('Binary CIM record is truncated')
+        finally:
+            self._data = None
+
+    def _r_uint(self):
+        data = self._data
+        pos = self._pos
+        byte = data[pos]
+        pos += 1
+        num = byte & 0x7F
+        shift = 7
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            num |= (byte & 0x7F) << shift
+            shift += 7
+        self._pos = pos
+        return num
+
+    def _r_sint(self):
+        num = self._r_uint()
+        return num >> 1 if not num & 1 else -((num + 1) >> 1)
+
+    def _r_str(self):
+        """Read a name that is stored in the string table, or `None`."""
+        index = self._r_uint()
+        if index >= 2:
+            try:
+                return self._strings[index - 2]
+            except IndexError:
+                raise ParseError('Invalid string table index %d in binary '\
+                                 'CIM record' % (index - 2))
+        if index == 0:
+            return None
+        length = self._r_uint()
+        end = self._pos + length
+        if end > len(self._data):
+            raise IndexError()
+        strng = self._data[self._pos:end].decode('utf-8')
+        self._pos = end
+        self._strings.append(strng)
+        return strng
+
+    def _r_bytes(self):
+        length = self._r_uint()
+        end = self._pos + length
+        if end > len(self._data):
+            raise IndexError()
+        value = bytes(self._data[self._pos:end])
+        self._pos = end
+        return value
+
+    def _r_text(self):
+        return self._r_bytes().decode('utf-8')
+
+    def _r_value(self):
+        code = self._data[self._pos]
+        self._pos += 1
+        try:
+            reader = self._dispatch[code]
+        except KeyError:
+            raise ParseError('Invalid type code %d in binary CIM record' %\
+                             code)
+        return reader()
+
+    def _cimint_reader(self, cls):
+        """Return a reader function for a CIM integer type."""
+        new = _Longint.__new__
+        def reader():
+            # The value range has been checked when the value was created.
+            return new(cls, self._r_sint())
+        return reader
+
+    def _r_real32(self):
+        value = _REAL64_STRUCT.unpack_from(self._data, self._pos)[0]
+        self._pos += 8
+        return Real32(value)
+
+    def _r_real64(self):
+        value = _REAL64_STRUCT.unpack_from(self._data, self._pos)[0]
+        self._pos += 8
+        return Real64(value)
+
+    def _r_float(self):
+        value = _REAL64_STRUCT.unpack_from(self._data, self._pos)[0]
+        self._pos += 8
+        return value
+
+    def _r_datetime(self):
+        r_uint = self._r_uint
+        year, month, day, hour, minute, second, microsecond = \
+            [r_uint() for _ in six.moves.range(7)]
+        offset = self._r_value()
+        tzi = MinutesFromUTC(offset) if offset is not None else None
+        return CIMDateTime(datetime(year, month, day, hour, minute, second,
+                                    microsecond, tzi))
+
+    def _r_interval(self):
+        r_uint = self._r_uint
+        return CIMDateTime(timedelta(days=r_uint(), seconds=r_uint(),
+                                     microseconds=r_uint()))
+
+    def _r_list(self):
+        r_value = self._r_value
+        return [r_value() for _ in six.moves.range(self._r_uint())]
+
+    def _r_objects(self):
+        """Read a NocaseDict of CIM objects that are keyed by their name."""
+        dict_ = NocaseDict()
+        data = dict_._data  # pylint: disable=protected-access
+        r_value = self._r_value
+        for _ in six.moves.range(self._r_uint()):
+            obj = r_value()
+            data[obj.name.lower()] = (obj.name, obj)
+        return dict_
+
+    def _r_items(self):
+        """Read a NocaseDict of names and values."""
+        dict_ = NocaseDict()
+        data = dict_._data  # pylint: disable=protected-access
+        for _ in six.moves.range(self._r_uint()):
+            key = self._r_str()
+            data[key.lower()] = (key, self._r_value())
+        return dict_
+
+    def _r_instancename(self):
+        # pylint: disable=protected-access
+        # The members that are used by the comparison key are set directly,
+        # like the constructors of the CIM objects do.
+        obj = CIMInstanceName.__new__(CIMInstanceName)
+        obj._classname = self._r_str()
+        obj._namespace = self._r_str()
+        obj._host = self._r_str()
+        obj._keybindings = self._r_items()
+        return obj
+
+    def _r_instance(self):
+        # pylint: disable=protected-access
+        obj = CIMInstance.__new__(CIMInstance)
+        obj._classname = self._r_str()
+        obj._path = self._r_value()
+        obj.property_list = self._r_value()
+        obj._properties = self._r_objects()
+        obj._qualifiers = self._r_objects()
+        return obj
+
+    def _r_classname(self):
+        obj = CIMClassName.__new__(CIMClassName)
+        obj.classname = self._r_str()
+        obj.namespace = self._r_str()
+        obj.host = self._r_str()
+        return obj
+
+    def _r_class(self):
+        obj = CIMClass.__new__(CIMClass)
+        obj.classname = self._r_str()
+        obj.superclass = self._r_str()
+        obj.properties = self._r_objects()
+        obj.methods = self._r_objects()
+        obj.qualifiers = self._r_objects()
+        return obj
+
+    def _r_property(self):
+        # pylint: disable=protected-access
+        obj = CIMProperty.__new__(CIMProperty)
+        obj._name = self._r_str()
+        obj._type = self._r_str()
+        obj._value = self._r_value()
+        obj._is_array = self._r_value()
+        obj._reference_class = self._r_str()
+        obj.embedded_object = self._r_str()
+        obj._class_origin = self._r_str()
+        obj._propagated = self._r_value()
+        obj._array_size = self._r_value()
+        obj._qualifiers = self._r_objects()
+        return obj
+
+    def _r_method(self):
+        obj = CIMMethod.__new__(CIMMethod)
+        obj.name = self._r_str()
+        obj.return_type = self._r_str()
+        obj.class_origin = self._r_str()
+        obj.propagated = self._r_value()
+        obj.parameters = self._r_objects()
+        obj.qualifiers = self._r_objects()
+        return obj
+
+    def _r_parameter(self):
+        # pylint: disable=protected-access
+        obj = CIMParameter.__new__(CIMParameter)
+        obj.name = self._r_str()
+        obj.type = self._r_str()
+        obj.reference_class = self._r_str()
+        obj.is_array = self._r_value()
+        obj.array_size = self._r_value()
+        obj._value = self._r_value()
+        obj.qualifiers = self._r_objects()
+        return obj
+
+    def _r_qualifier(self):
+        obj = CIMQualifier.__new__(CIMQualifier)
+        obj.name = self._r_str()
+        obj.type = self._r_str()
+        obj.value = self._r_value()
+        obj.propagated = self._r_value()
+        obj.overridable = self._r_value()
+        obj.tosubclass = self._r_value()
+        obj.toinstance = self._r_value()
+        obj.translatable = self._r_value()
+        return obj
+
+    def _r_qualifierdecl(self):
+        obj = CIMQualifierDeclaration.__new__(CIMQualifierDeclaration)
+        obj.name = self._r_str()
+        obj.type = self._r_str()
+        obj.value = self._r_value()
+        obj.is_array = self._r_value()
+        obj.array_size = self._r_value()
+        obj.scopes = self._r_items()
+        obj.overridable = self._r_value()
+        obj.tosubclass = self._r_value()
+        obj.toinstance = self._r_value()
+        obj.translatable = self._r_value()
+        return obj
+
+
+class CIMBinaryWriter(object):
+    """
+    Writes CIM objects in the binary format to a binary file-like object.
+
+    The header of the binary stream is written when the writer is created.
+    """
+
+    def __init__(self, stream):
+        """
+        Parameters:
+
+          stream (file-like object):
+            A file-like object opened for writing in binary mode. Only its
+            ``write()`` method is used.
+        """
+        self._stream = stream
+        self._encoder = _Encoder()
+        stream.write(_MAGIC + struct.pack('<B', BINARY_FORMAT_VERSION))
+
+    def write(self, obj):
+        """
+        Write one object as a record.
+
+        Parameters:
+
+          obj:
+            The object to be written. See :mod:`pywbem.cim_binary` for the
+            supported types.
+
+        Raises:
+
+          TypeError: The object (or an object nested in it) cannot be
+            represented in the binary format.
+        """
+        payload = self._encoder.encode(obj)
+        length = bytearray()
+        num = len(payload)
+        while num > 0x7F:
+            length.append((num & 0x7F) | 0x80)
+            num >>= 7
+        length.append(num)
+        self._stream.write(bytes(length + payload))
+
+
+class CIMBinaryReader(object):
+    """
+    Reads CIM objects in the binary format from a binary file-like object.
+
+    Iterating over the reader returns the objects of all remaining records.
+    """
+
+    def __init__(self, stream):
+        """
+        Parameters:
+
+          stream (file-like object):
+            A file-like object opened for reading in binary mode. Only its
+            ``read()`` method is used.
+
+        Raises:
+
+          :exc:`~pywbem.ParseError`: The stream does not start with a valid
+            header, or has an unsupported format version.
+        """
+        self._stream = stream
+        self._decoder = _Decoder()
+        header = stream.read(len(_MAGIC) + 1)
+        if len(header) != len(_MAGIC) + 1 or header[:len(_MAGIC)] != _MAGIC:
+            raise ParseError('Not a binary CIM stream')
+        version = bytearray(header)[-1]
+        if version != BINARY_FORMAT_VERSION:
+            raise ParseError('Unsupported binary CIM format version %d '\
+                             '(expecting %d)' % \
+                             (version, BINARY_FORMAT_VERSION))
+
+    def read(self):
+        """
+        Read the object in the next record.
+
+        Returns:
+
+          The object, or raises :exc:`py:EOFError` if there are no more
+          records.
+
+        Raises:
+
+          :exc:`py:EOFError`: There are no more records.
+          :exc:`~pywbem.ParseError`: The record is invalid or truncated.
+        """
+        num = 0
+        shift = 0
+        while True:
+            byte = self._stream.read(1)
+            if not byte:
+                if shift == 0:
+                    raise EOFError('No more records in binary CIM stream')
+                raise ParseError('Binary CIM stream is truncated')
+            byte = bytearray(byte)[0]
+            num |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        payload = self._stream.read(num)
+        if len(payload) != num:
+            raise ParseError('Binary CIM stream is truncated')
+        return self._decoder.decode(payload)
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.read()
+            except EOFError:
+                return
+
+
+def tobinary(obj):
+    """
+    Return the binary representation of an object, as a complete binary
+    stream with one record.
+
+    Parameters:
+
+      obj:
+        The object to be converted. See :mod:`pywbem.cim_binary` for the
+        supported types.
+
+    Returns:
+
+      :term:`byte string`: The binary representation.
+
+    Raises:
+
+      TypeError: The object (or an object nested in it) cannot be
+        represented in the binary format.
+    """
+    stream = BytesIO()
+    CIMBinaryWriter(stream).write(obj)
+    return stream.getvalue()
+
+
+def frombinary(data):
+    """
+    Return the object in the first record of a binary stream.
+
+    Parameters:
+
+      data (:term:`byte string`):
+        The binary stream, e.g. as returned by :func:`~pywbem.tobinary`.
+
+    Returns:
+
+      The object.
+
+    Raises:
+
+      :exc:`~pywbem.ParseError`: The data is not a valid binary stream, or
+        does not contain any record.
+    """
+    try:
+        return CIMBinaryReader(BytesIO(data)).read()
+    except EOFError:
+        raise ParseError('Binary CIM stream does not contain any record')
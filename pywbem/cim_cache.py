@@ -0,0 +1,303 @@
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+The :class:`~pywbem.ResponseCache` class is an operation hook (see
+:mod:`pywbem.cim_hooks`) that caches the CIM-XML responses of read-only
+operations for a limited time. Repeated operations with the same parameters
+are answered from the cache, without sending a request to the WBEM server.
+
+The responses are cached by WBEM server URL, credentials (user and client
+certificate), operation name, namespace and parameters (including the object
+path), so that a cache that is used by the connections of multiple users does
+not return the responses for one user to another user. The cache keeps the raw CIM-XML
+responses rather than the CIM objects, so that each operation returns new CIM
+objects that can be modified by the caller.
+
+Each cached response expires after a time to live (TTL), which can be
+specified for each class. When the size of the cached responses exceeds a
+maximum number of Bytes, the least recently used responses are discarded.
+
+The following read-only operations are cached: `GetInstance`,
+`EnumerateInstances`, `EnumerateInstanceNames`, `Associators`,
+`AssociatorNames`, `References`, `ReferenceNames`, `GetClass`,
+`EnumerateClasses`, `EnumerateClassNames`, `GetQualifier` and
+`EnumerateQualifiers`. Operations that modify instances, classes or qualifier
+declarations (e.g. `ModifyInstance`, `CreateInstance` or `DeleteInstance`)
+on a connection with the cache discard all cached responses for their
+namespace. Changes made through other connections or other clients, or by
+extrinsic methods, are not detected; they become visible when the cached
+responses expire.
+
+Example::
+
+    cache = pywbem.ResponseCache(ttl=10, class_ttls={'CIM_Job': 1})
+    conn.hooks.append(cache)
+"""
+
+from __future__ import absolute_import
+
+import threading
+from timeit import default_timer
+
+import six
+
+from .cim_hooks import OperationHook
+from .cim_operations import _request_key
+
+__all__ = ['ResponseCache']
+
+# The cached operations, with the name of the parameter that determines the
+# class for the TTL
+_CACHED_OPERATIONS = {
+    'GetInstance': 'InstanceName',
+    'EnumerateInstances': 'ClassName',
+    'EnumerateInstanceNames': 'ClassName',
+    'Associators': 'ObjectName',
+    'AssociatorNames': 'ObjectName',
+    'References': 'ObjectName',
+    'ReferenceNames': 'ObjectName',
+    'GetClass': 'ClassName',
+    'EnumerateClasses': 'ClassName',
+    'EnumerateClassNames': 'ClassName',
+    'GetQualifier': None,
+    'EnumerateQualifiers': None,
+}
+
+# The operations that discard the cached responses of their namespace
+_INVALIDATING_OPERATIONS = set([
+    'CreateInstance', 'ModifyInstance', 'DeleteInstance',
+    'CreateClass', 'ModifyClass', 'DeleteClass',
+    'SetQualifier', 'DeleteQualifier',
+])
+
+def _identity(connection):
+    """
+    Return the WBEM server URL and the credentials of a connection, for the
+    keys of the cached responses.
+    """
+    creds = connection.creds
+    if creds is not None:
+        creds = tuple(creds)
+    x509 = connection.x509 or {}
+    return (connection.url, creds, x509.get('cert_file'),
+            x509.get('key_file'))
+
+# Indexes in the links of the list of cache entries, ordered by use
+_PREV, _NEXT, _KEY, _REPLY, _EXPIRES, _NAMESPACE = range(6)
+
+
+class ResponseCache(OperationHook):
+    # pylint: disable=too-many-instance-attributes
+    """
+    An operation hook that caches the CIM-XML responses of read-only
+    operations, with a time to live and a maximum size.
+
+    Attributes:
+
+      hits (:term:`integer`):
+        Number of operations that were answered from the cache.
+
+      misses (:term:`integer`):
+        Number of cacheable operations that were not answered from the
+        cache.
+
+      evictions (:term:`integer`):
+        Number of cached responses that were discarded because the cache
+        was full.
+
+      invalidations (:term:`integer`):
+        Number of cached responses that were discarded because of
+        operations that modified their namespace, or because of
+        :meth:`invalidate`.
+    """
+
+    def __init__(self, ttl=10.0, class_ttls=None, max_bytes=10000000):
+        """
+        Parameters:
+
+          ttl (:term:`number`):
+            Default time to live of the cached responses, in seconds.
+
+          class_ttls (:class:`py:dict`):
+            Time to live of the cached responses in seconds, by class name
+            (case insensitive). The class of an operation is the class in
+            its `ClassName`, `InstanceName` or `ObjectName` parameter. A time
+            to live of 0 disables caching for the class. The default time to
+            live is used for classes that are not in the dictionary.
+
+          max_bytes (:term:`integer`):
+            Maximum size of the cached responses, in Bytes.
+        """
+        self.ttl = ttl
+        self.class_ttls = dict([(name.lower(), secs) for name, secs in
+                                six.iteritems(class_ttls or {})])
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Circular doubly linked list of the entries, most recently used
+        # first
+        self._root = []
+        self._root[:] = [self._root, self._root, None, None, None, None]
+        self._size = 0
+        # Incremented by each invalidation, so that responses of operations
+        # that were in progress during an invalidation are not cached
+        self._generation = 0
+
+    def __repr__(self):
+        return '%s(ttl=%r, max_bytes=%r, entries=%d, size=%d, hits=%d, ' \
+               'misses=%d)' % \
+               (self.__class__.__name__, self.ttl, self.max_bytes,
+                len(self._entries), self._size, self.hits, self.misses)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """
+        :term:`integer`: The size of the cached responses, in Bytes.
+        """
+        return self._size
+
+    @property
+    def hit_rate(self):
+        """
+        :term:`number`: The fraction of the cacheable operations that were
+        answered from the cache (from 0 to 1), or `None` if there were no
+        cacheable operations.
+        """
+        total = self.hits + self.misses
+        if not total:
+            return None
+        return float(self.hits) / total
+
+    def _class_ttl(self, context):
+        """Return the time to live for the operation."""
+        param = _CACHED_OPERATIONS[context.operation]
+        value = context.params.get(param) if param else None
+        if value is None:
+            return self.ttl
+        classname = getattr(value, 'classname', value)
+        return self.class_ttls.get(classname.lower(), self.ttl)
+
+    def _unlink(self, link):
+        """Remove the entry from the list and the dictionary."""
+        link[_PREV][_NEXT] = link[_NEXT]
+        link[_NEXT][_PREV] = link[_PREV]
+        del self._entries[link[_KEY]]
+        self._size -= len(link[_REPLY])
+
+    def before(self, context):
+        """
+        Answer a cacheable operation from the cache, or discard the cached
+        responses of the namespace of a modifying operation.
+        """
+        if context.operation in _INVALIDATING_OPERATIONS:
+            self.invalidate(context.namespace)
+            return
+        if context.operation not in _CACHED_OPERATIONS or \
+                context.object is not None:
+            return
+        ttl = self._class_ttl(context)
+        if not ttl:
+            return
+        key = _request_key(context.operation, context.namespace,
+                           context.params)
+        if key is None:
+            return
+        key = (_identity(context.connection), key)
+        now = default_timer()
+        with self._lock:
+            link = self._entries.get(key)
+            if link is not None and link[_EXPIRES] <= now:
+                self._unlink(link)
+                link = None
+            if link is not None:
+                self.hits += 1
+                # Move the entry to the front of the list
+                link[_PREV][_NEXT] = link[_NEXT]
+                link[_NEXT][_PREV] = link[_PREV]
+                first = self._root[_NEXT]
+                link[_PREV] = self._root
+                link[_NEXT] = first
+                first[_PREV] = self._root[_NEXT] = link
+                context.reply = link[_REPLY]
+                return
+            self.misses += 1
+            context.data[self] = (key, now + ttl, self._generation)
+
+    def after(self, context):
+        """
+        Cache the response of a cacheable operation that was not answered
+        from the cache, or discard the cached responses of the namespace of
+        a modifying operation.
+        """
+        if context.operation in _INVALIDATING_OPERATIONS:
+            self.invalidate(context.namespace)
+            return
+        pending = context.data.get(self)
+        if pending is None:
+            return
+        key, expires, generation = pending
+        reply = context.reply
+        if len(reply) > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            link = self._entries.get(key)
+            if link is not None:
+                self._unlink(link)
+            first = self._root[_NEXT]
+            link = [self._root, first, key, reply, expires,
+                    context.namespace]
+            first[_PREV] = self._root[_NEXT] = link
+            self._entries[key] = link
+            self._size += len(reply)
+            while self._size > self.max_bytes:
+                self._unlink(self._root[_PREV])
+                self.evictions += 1
+
+    def error(self, context):
+        """
+        Discard the cached responses of the namespace of a failed modifying
+        operation, which may have been partially performed.
+        """
+        if context.operation in _INVALIDATING_OPERATIONS:
+            self.invalidate(context.namespace)
+
+    def invalidate(self, namespace=None):
+        """
+        Discard the cached responses for a namespace, or all cached
+        responses.
+
+        Parameters:
+
+          namespace (:term:`string`):
+            The namespace. `None` discards all cached responses.
+        """
+        with self._lock:
+            self._generation += 1
+            links = [link for link in six.itervalues(self._entries)
+                     if namespace is None or link[_NAMESPACE] == namespace]
+            for link in links:
+                self._unlink(link)
+            self.invalidations += len(links)
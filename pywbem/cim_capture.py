@@ -0,0 +1,232 @@
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+The :class:`~pywbem.DebugCapture` class is an operation hook (see
+:mod:`pywbem.cim_hooks`) that keeps the raw CIM-XML requests and responses
+of a selection of the WBEM operations performed through a
+:class:`~pywbem.WBEMConnection` object: A random sample of the operations,
+operations that took longer than a threshold, and failed operations.
+
+Unlike the debug mode of a connection (:attr:`~pywbem.WBEMConnection.debug`),
+which keeps only the last request and response, and prettifies and checks
+every response, the capture keeps the most recent captured operations in a
+bounded buffer, and does no work for operations that are not captured. The
+requests and responses are prettified only when they are accessed.
+
+Example::
+
+    capture = pywbem.DebugCapture(sample_rate=0.01, slow_threshold=2.0)
+    conn.hooks.append(capture)
+    ...
+    for op in capture.operations():
+        print(op.reason, op.operation, op.timings['total'])
+        print(op.pretty_reply)
+"""
+
+from __future__ import absolute_import
+
+import re
+import time
+import random
+import threading
+from collections import deque
+from xml.dom import minidom
+
+from .cim_hooks import OperationHook
+
+__all__ = ['DebugCapture', 'CapturedOperation']
+
+
+def _prettify(xml):
+    """
+    Return the CIM-XML in the byte string or unicode string as prettified
+    XML, without empty lines.
+    """
+    pretty_xml = minidom.parseString(xml).toprettyxml(indent='  ')
+    return re.sub(r'>( *[\r\n]+)+( *)<', r'>\n\2<', pretty_xml)
+
+
+class CapturedOperation(object):
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """
+    A WBEM operation captured by :class:`~pywbem.DebugCapture`.
+
+    Attributes:
+
+      reason (:term:`string`):
+        The reason why the operation was captured: ``'failed'``, ``'slow'``
+        or ``'sampled'``.
+
+      time (:term:`number`):
+        The time at which the operation ended, in seconds since the epoch.
+
+      operation (:term:`string`):
+        Name of the intrinsic operation, or of the CIM method for extrinsic
+        method calls.
+
+      namespace (:term:`string`):
+        Namespace of the operation.
+
+      request (:term:`byte string`):
+        The raw CIM-XML request, or `None` if the operation failed before it
+        was built.
+
+      reply (:term:`byte string`):
+        The raw CIM-XML response, or `None` if the operation failed before it
+        was received.
+
+      timings (:class:`py:dict`):
+        The durations of the phases of the operation in seconds, and the
+        sizes of the request and response (see
+        :attr:`~pywbem.OperationContext.timings`).
+
+      exception (:exc:`py:Exception`):
+        The exception raised by a failed operation, or `None`.
+    """
+
+    def __init__(self, reason, context):
+        self.reason = reason
+        self.time = time.time()
+        self.operation = context.operation
+        self.namespace = context.namespace
+        self.request = context.request
+        self.reply = context.reply
+        self.timings = context.timings.copy()
+        self.exception = context.exception
+        self._pretty_request = None
+        self._pretty_reply = None
+
+    def __repr__(self):
+        return '%s(reason=%r, operation=%r, namespace=%r, exception=%r)' % \
+               (self.__class__.__name__, self.reason, self.operation,
+                self.namespace, self.exception)
+
+    @property
+    def pretty_request(self):
+        """
+        :term:`unicode string`: The CIM-XML request as prettified XML, or
+        `None` if there is no request.
+        """
+        if self._pretty_request is None and self.request is not None:
+            self._pretty_request = _prettify(self.request)
+        return self._pretty_request
+
+    @property
+    def pretty_reply(self):
+        """
+        :term:`unicode string`: The CIM-XML response as prettified XML, or
+        `None` if there is no response. If the response is not well-formed
+        XML, the raw response is returned as a unicode string.
+        """
+        if self._pretty_reply is None and self.reply is not None:
+            try:
+                self._pretty_reply = _prettify(self.reply)
+            except Exception:  # pylint: disable=broad-except
+                reply = self.reply
+                if isinstance(reply, bytes):
+                    reply = reply.decode('utf-8', 'replace')
+                self._pretty_reply = reply
+        return self._pretty_reply
+
+
+class DebugCapture(OperationHook):
+    """
+    An operation hook that captures the raw CIM-XML requests and responses of
+    a selection of the WBEM operations, for debugging.
+
+    The captured operations are kept in a buffer with a maximum size; when it
+    is full, the oldest captured operation is discarded.
+    """
+
+    def __init__(self, sample_rate=0.0, slow_threshold=None,
+                 capture_failed=True, max_operations=100):
+        """
+        Parameters:
+
+          sample_rate (:term:`number`):
+            Fraction of the operations (from 0 to 1) that is captured at
+            random, regardless of their duration and result.
+
+          slow_threshold (:term:`number`):
+            Duration in seconds. Operations that take at least this long are
+            captured. `None` disables capturing slow operations.
+
+          capture_failed (:class:`py:bool`):
+            Capture operations that raise an exception.
+
+          max_operations (:term:`integer`):
+            Maximum number of captured operations that are kept.
+        """
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.capture_failed = capture_failed
+        self._lock = threading.Lock()
+        self._operations = deque(maxlen=max_operations)
+
+    def __repr__(self):
+        return '%s(sample_rate=%r, slow_threshold=%r, capture_failed=%r, ' \
+               'max_operations=%r)' % \
+               (self.__class__.__name__, self.sample_rate,
+                self.slow_threshold, self.capture_failed,
+                self._operations.maxlen)
+
+    def _reason(self, context):
+        """Return the reason for capturing the operation, or `None`."""
+        if context.exception is not None:
+            if self.capture_failed:
+                return 'failed'
+        elif self.slow_threshold is not None and \
+                context.timings.get('total', 0) >= self.slow_threshold:
+            return 'slow'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def _capture(self, context):
+        """Capture the operation, if it is selected."""
+        reason = self._reason(context)
+        if reason is not None:
+            operation = CapturedOperation(reason, context)
+            with self._lock:
+                self._operations.append(operation)
+
+    def after(self, context):
+        """Capture the operation if it is slow or sampled."""
+        self._capture(context)
+
+    def error(self, context):
+        """Capture the failed operation."""
+        self._capture(context)
+
+    def operations(self):
+        """
+        Return the captured operations that are kept.
+
+        Returns:
+
+            :class:`py:list` of :class:`~pywbem.CapturedOperation`: The
+            captured operations, oldest first.
+        """
+        with self._lock:
+            return list(self._operations)
+
+    def clear(self):
+        """
+        Discard the captured operations.
+        """
+        with self._lock:
+            self._operations.clear()
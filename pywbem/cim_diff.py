@@ -0,0 +1,230 @@
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+The :func:`~pywbem.diff_instances` function compares two lists of CIM
+instances, for example two snapshots of the instances of a class that were
+enumerated at different points in time. The instances are matched by their
+instance paths, and the result reports the instances that were added or
+removed, and for the instances that were changed, the properties that were
+added, removed or changed.
+
+The instances are compared using comparison keys, which are hashable objects
+built from the property values that are compared without calling back into
+Python code. The hash values of the keys are cached on the instances as
+structural fingerprints: An old instance whose cached fingerprint differs from
+that of the new instance is known to be changed without comparing it further.
+"""
+
+# pylint: disable=protected-access
+
+from __future__ import absolute_import
+
+__all__ = ['diff_instances', 'InstanceDiff', 'InstanceChange']
+
+
+class InstanceChange(object):
+    # pylint: disable=too-few-public-methods
+    """
+    A changed instance, as reported by :func:`~pywbem.diff_instances`.
+
+    Attributes:
+
+      path (:class:`~pywbem.CIMInstanceName`):
+        Instance path of the new instance.
+
+      old (:class:`~pywbem.CIMInstance`):
+        The old instance.
+
+      new (:class:`~pywbem.CIMInstance`):
+        The new instance.
+
+      added_properties (:class:`py:list` of :term:`unicode string`):
+        Names of the properties that exist only in the new instance.
+
+      removed_properties (:class:`py:list` of :term:`unicode string`):
+        Names of the properties that exist only in the old instance.
+
+      changed_properties (:class:`py:list` of :term:`unicode string`):
+        Names of the properties that exist in both instances but are not
+        equal (e.g. have different values).
+
+    If all three lists are empty, the instances differ in other aspects,
+    e.g. in their instance qualifiers.
+    """
+
+    def __init__(self, old, new, added_properties, removed_properties,
+                 changed_properties):
+        # pylint: disable=too-many-arguments
+        self.path = new.path
+        self.old = old
+        self.new = new
+        self.added_properties = added_properties
+        self.removed_properties = removed_properties
+        self.changed_properties = changed_properties
+
+    def __repr__(self):
+        return '%s(path=%r, added_properties=%r, removed_properties=%r, ' \
+               'changed_properties=%r)' % \
+               (self.__class__.__name__, self.path, self.added_properties,
+                self.removed_properties, self.changed_properties)
+
+
+class InstanceDiff(object):
+    # pylint: disable=too-few-public-methods
+    """
+    The result of :func:`~pywbem.diff_instances`.
+
+    The object is true if there is any difference between the two lists of
+    instances.
+
+    Attributes:
+
+      added (:class:`py:list` of :class:`~pywbem.CIMInstance`):
+        The new instances that have no matching old instance, in the order of
+        the new instances.
+
+      removed (:class:`py:list` of :class:`~pywbem.CIMInstance`):
+        The old instances that have no matching new instance, in the order of
+        the old instances.
+
+      changed (:class:`py:list` of :class:`~pywbem.InstanceChange`):
+        The instances that exist in both lists but are not equal, in the order
+        of the new instances.
+    """
+
+    def __init__(self, added, removed, changed):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    __nonzero__ = __bool__  # Python 2
+
+    def __repr__(self):
+        return '%s(added=%d, removed=%d, changed=%d)' % \
+               (self.__class__.__name__, len(self.added), len(self.removed),
+                len(self.changed))
+
+
+def _path_index(instances):
+    """
+    Return a dictionary of instances by the fingerprints of their paths.
+    The values are lists, to accommodate different paths with the same
+    fingerprint.
+    """
+    index = {}
+    for inst in instances:
+        if inst.path is None:
+            raise ValueError('Instance of class %r has no path' % \
+                             inst.classname)
+        fp = inst.path._fingerprint()
+        try:
+            index[fp].append(inst)
+        except KeyError:
+            index[fp] = [inst]
+    return index
+
+
+def _diff_properties(old, new):
+    """
+    Return the :class:`~pywbem.InstanceChange` object for two instances with
+    the same path, or `None` if the instances are equal.
+    """
+    if old is new:
+        return None
+    new_key = new._comparison_key()[0]
+    old_fp = old._cached_fingerprint()
+    if old_fp is None or old_fp == hash(new_key):
+        if old._comparison_key()[0] == new_key:
+            return None
+
+    old_props = old.properties
+    new_props = new.properties
+    added = []
+    changed = []
+    for name, new_prop in new_props.iteritems():
+        try:
+            old_prop = old_props[name]
+        except KeyError:
+            added.append(name)
+            continue
+        if old_prop is new_prop:
+            continue
+        if old_prop._comparison_key()[0] != new_prop._comparison_key()[0]:
+            changed.append(name)
+    removed = [name for name, _ in old_props.iteritems()
+               if name not in new_props]
+    return InstanceChange(old, new, added, removed, changed)
+
+
+def diff_instances(old, new):
+    """
+    Compare two lists of CIM instances, matching the instances by their
+    instance paths.
+
+    The instance paths are compared as for the `==` operator of
+    :class:`~pywbem.CIMInstanceName`. Instances with equal paths are compared
+    as for the `==` operator of :class:`~pywbem.CIMInstance`.
+
+    As a side effect, the structural fingerprints of the instances are cached
+    on them. This speeds up a later comparison of the same instances (with
+    this function or with the `==` and `!=` operators), as long as they are
+    not modified.
+
+    Parameters:
+
+      old (:term:`py:iterable` of :class:`~pywbem.CIMInstance`):
+        The old instances. Each instance must have a path.
+
+      new (:term:`py:iterable` of :class:`~pywbem.CIMInstance`):
+        The new instances. Each instance must have a path.
+
+    Returns:
+
+      :class:`~pywbem.InstanceDiff`: The differences between the instances.
+
+    Raises:
+
+      ValueError: An instance does not have a path.
+    """
+    old = list(old)
+    index = _path_index(old)
+    matched = set()
+    added = []
+    changed = []
+
+    for new_inst in new:
+        if new_inst.path is None:
+            raise ValueError('Instance of class %r has no path' % \
+                             new_inst.classname)
+        candidates = index.get(new_inst.path._fingerprint(), ())
+        for i, old_inst in enumerate(candidates):
+            if old_inst.path == new_inst.path:
+                del candidates[i]
+                break
+        else:
+            added.append(new_inst)
+            continue
+        matched.add(id(old_inst))
+        change = _diff_properties(old_inst, new_inst)
+        if change is not None:
+            changed.append(change)
+
+    removed = [inst for inst in old if id(inst) not in matched]
+    return InstanceDiff(added, removed, changed)
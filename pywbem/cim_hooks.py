@@ -0,0 +1,192 @@
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+Operation hooks intercept the WBEM operations performed through a
+:class:`~pywbem.WBEMConnection` object, e.g. for metrics, tracing, sampling
+or caching of responses. They are added to the
+:attr:`~pywbem.WBEMConnection.hooks` list of a connection.
+
+A hook is an object of a subclass of :class:`~pywbem.OperationHook`, that
+overrides some of its methods. For each operation (intrinsic operations, and
+extrinsic method calls via :meth:`~pywbem.WBEMConnection.InvokeMethod`), the
+hooks are called as follows:
+
+* :meth:`~pywbem.OperationHook.before` of each hook, in the order of the
+  list, after the CIM-XML request has been built and before it is sent.
+* :meth:`~pywbem.OperationHook.after` of each hook, in the reverse order of
+  the list, after the response has been processed successfully.
+* :meth:`~pywbem.OperationHook.error` of each hook, in the reverse order of
+  the list, if the operation raised an exception. The exception is raised
+  again after the hooks have been called.
+
+The hooks receive an :class:`~pywbem.OperationContext` object with the
+operation name, namespace and parameters, the raw CIM-XML request and
+response, and the durations of the phases of the operation (see
+:mod:`pywbem.cim_statistics`). The same context object is passed to all hooks
+of an operation.
+
+If a hook sets the :attr:`~pywbem.OperationContext.reply` attribute in its
+:meth:`~pywbem.OperationHook.before` method, the request is not sent, and the
+reply is processed as if it had been received from the WBEM server.
+
+Exceptions raised by hooks are not handled; they are raised to the caller of
+the operation. When no hooks are added, the operations do not create context
+objects.
+"""
+
+from __future__ import absolute_import
+
+__all__ = ['OperationHook', 'OperationContext']
+
+
+class OperationContext(object):
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """
+    The context of a WBEM operation, that is passed to the methods of the
+    operation hooks.
+
+    Attributes:
+
+      connection (:class:`~pywbem.WBEMConnection`):
+        The connection that performs the operation.
+
+      operation (:term:`string`):
+        Name of the intrinsic operation (e.g. ``'EnumerateInstances'``), or
+        of the CIM method for extrinsic method calls.
+
+      namespace (:term:`string`):
+        Namespace of the operation.
+
+      params (:class:`py:dict`):
+        Parameters of the intrinsic operation, or input parameters of the
+        extrinsic method, by name. Parameters of intrinsic operations that
+        are not sent have a value of `None`.
+
+      object (:class:`~pywbem.CIMInstanceName` or :class:`~pywbem.CIMClassName`):
+        For extrinsic method calls, the path of the object the method is
+        invoked on. `None` for intrinsic operations.
+
+      request (:term:`byte string`):
+        The CIM-XML request, as sent to the WBEM server.
+
+      reply (:term:`byte string`):
+        The CIM-XML response, as received from the WBEM server. `None` until
+        the response has been received.
+
+      timings (:class:`py:dict`):
+        The durations of the phases of the operation in seconds, by phase,
+        and the ``'request_bytes'`` and ``'reply_bytes'`` items with the sizes
+        of the request and response. Phases that have not been reached (yet)
+        are missing.
+
+      result:
+        In :meth:`~pywbem.OperationHook.after`, the parsed response of the
+        operation, as a tuple tree. `None` otherwise.
+
+      exception (:exc:`py:Exception`):
+        In :meth:`~pywbem.OperationHook.error`, the exception raised by the
+        operation. `None` otherwise.
+
+      data (:class:`py:dict`):
+        An initially empty dictionary for hooks that need to pass data from
+        :meth:`~pywbem.OperationHook.before` to the other methods.
+    """
+
+    def __init__(self, connection, operation, namespace, params, timings,
+                 hooks, obj=None):
+        # pylint: disable=too-many-arguments
+        self.connection = connection
+        self.operation = operation
+        self.namespace = namespace
+        self.params = params
+        self.object = obj
+        self.request = None
+        self.reply = None
+        self.timings = timings
+        self.result = None
+        self.exception = None
+        self.data = {}
+        self._hooks = hooks
+
+    def __repr__(self):
+        return '%s(operation=%r, namespace=%r)' % \
+               (self.__class__.__name__, self.operation, self.namespace)
+
+    def _before(self, request):
+        """Call the before() methods of the hooks for the request."""
+        self.request = request
+        for hook in self._hooks:
+            hook.before(self)
+
+    def _after(self, result):
+        """Call the after() methods of the hooks for the result."""
+        self.result = result
+        for hook in reversed(self._hooks):
+            hook.after(self)
+
+    def _error(self, exception):
+        """Call the error() methods of the hooks for the exception."""
+        self.exception = exception
+        for hook in reversed(self._hooks):
+            hook.error(self)
+
+
+class OperationHook(object):
+    """
+    Base class for operation hooks. The methods of this class do nothing.
+
+    Hooks that are added to the :attr:`~pywbem.WBEMConnection.hooks` list of
+    a connection must not change the parameters of the operations.
+    """
+
+    def before(self, context):
+        """
+        Called before the request of an operation is sent.
+
+        Parameters:
+
+          context (:class:`~pywbem.OperationContext`):
+            The context of the operation. Its ``request`` attribute is set.
+            Setting its ``reply`` attribute to a CIM-XML response prevents
+            the request from being sent.
+        """
+        pass
+
+    def after(self, context):
+        """
+        Called after an operation has succeeded.
+
+        Parameters:
+
+          context (:class:`~pywbem.OperationContext`):
+            The context of the operation. Its ``reply``, ``timings`` and
+            ``result`` attributes are set.
+        """
+        pass
+
+    def error(self, context):
+        """
+        Called after an operation has raised an exception.
+
+        Parameters:
+
+          context (:class:`~pywbem.OperationContext`):
+            The context of the operation. Its ``exception`` attribute is set.
+            The ``request``, ``reply`` and ``timings`` attributes are set as
+            far as the operation got.
+        """
+        pass
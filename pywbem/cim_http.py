@@ -37,12 +37,15 @@ import re
 import os
 import sys
 import socket
+import errno
 import getpass
 from stat import S_ISSOCK
 import platform
 import base64
+import select
 import threading
 from datetime import datetime
+from timeit import default_timer
 
 import six
 from six.moves import http_client as httplib
@@ -249,10 +252,109 @@ def get_default_ca_certs():
             get_default_ca_certs._path = None
     return get_default_ca_certs._path
 
+def _add_timing(timings, phase, start):
+    """Add the duration since the start time to a phase in the timings."""
+    timings[phase] = timings.get(phase, 0.0) + default_timer() - start
+
+class HTTPConnectionPool(object):
+    """
+    A pool of open HTTP connections to WBEM servers, that are kept open after
+    a request (HTTP keep-alive) and are used again by later requests to the
+    same WBEM server with the same settings, in order to save connecting
+    (and for HTTPS, the TLS handshake).
+
+    A pool can be used by multiple threads. A connection in the pool is used
+    by only one request at a time.
+    """
+
+    def __init__(self, max_idle=10, idle_timeout=10):
+        """
+        Parameters:
+
+          max_idle (:term:`integer`):
+            Maximum number of idle connections that are kept for each WBEM
+            server and settings.
+
+          idle_timeout (:term:`number`):
+            Time in seconds after which an idle connection is no longer used,
+            because the WBEM server may close it at any time.
+        """
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    def get(self, key):
+        """
+        Return an idle connection for the key, or `None` if there is no
+        idle connection that is still usable.
+        """
+        now = default_timer()
+        while True:
+            with self._lock:
+                clients = self._idle.get(key)
+                if not clients:
+                    return None
+                client, idle_since = clients.pop()
+            if now - idle_since < self.idle_timeout and \
+                    not self._is_dropped(client):
+                return client
+            client.close()
+
+    def put(self, key, client):
+        """
+        Add a connection whose response has been read completely to the
+        idle connections for the key, or close it if there are enough idle
+        connections.
+        """
+        with self._lock:
+            clients = self._idle.setdefault(key, [])
+            if len(clients) < self.max_idle:
+                clients.append((client, default_timer()))
+                return
+        client.close()
+
+    def clear(self):
+        """
+        Close all idle connections.
+        """
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+        for clients in six.itervalues(idle):
+            for client, _ in clients:
+                client.close()
+
+    @staticmethod
+    def _is_dropped(client):
+        """
+        Return a boolean indicating whether the idle connection has been
+        closed by the WBEM server, which makes its socket readable.
+        """
+        if client.sock is None:
+            return True
+        try:
+            return bool(select.select([client.sock], [], [], 0)[0])
+        except (select.error, socket.error, ValueError):
+            return True
+
+def _is_dropped_error(exc):
+    """
+    Return a boolean indicating whether an exception raised when receiving
+    the response to a request shows that the WBEM server closed the
+    connection without returning any data.
+    """
+    if isinstance(exc, httplib.BadStatusLine):
+        # This includes RemoteDisconnected on Python 3
+        return exc.line is None or \
+            exc.line.strip().strip("'") in ('', 'None')
+    return bool(exc.args) and exc.args[0] in (errno.ECONNRESET, errno.EPIPE)
+
 # pylint: disable=too-many-branches,too-many-statements,too-many-arguments
 def wbem_request(url, data, creds, headers=None, debug=False, x509=None,
                  verify_callback=None, ca_certs=None,
-                 no_verification=False, timeout=None):
+                 no_verification=False, timeout=None, timings=None,
+                 pool=None, idempotent=False):
     # pylint: disable=too-many-arguments,unused-argument
     # pylint: disable=too-many-locals
     """
@@ -315,6 +417,26 @@ def wbem_request(url, data, creds, headers=None, debug=False, x509=None,
         Note that not all situations can be handled within this timeout, so
         for some issues, this method may take longer to raise an exception.
 
+      timings (:class:`py:dict`):
+        If not `None`, the durations of the phases of the request in seconds
+        are added to the items of this dictionary: ``'connect'`` for
+        connecting to the WBEM server, ``'server'`` for sending the request
+        and receiving the HTTP headers of the response, and ``'transfer'``
+        for receiving the body of the response.
+
+      pool (:class:`HTTPConnectionPool`):
+        If not `None`, the connection is returned to this pool if the WBEM
+        server keeps it open after the response, and an idle connection from
+        this pool is used for an idempotent request if there is one.
+
+      idempotent (:class:`py:bool`):
+        Boolean indicating whether the request can safely be sent more than
+        once (e.g. because it is a read-only operation). Only idempotent
+        requests use idle connections from the pool, because the WBEM server
+        may close an idle connection when the request arrives. If that
+        happens without the server returning any data for the request, the
+        request is sent again once, on a new connection.
+
     Returns:
         The CIM-XML formatted response data from the WBEM server, as a
         :term:`unicode string` object.
@@ -502,34 +624,43 @@ def wbem_request(url, data, creds, headers=None, debug=False, x509=None,
     elif no_verification:
         ca_certs = None
 
-    local = False
-    if use_ssl:
-        client = HTTPSConnection(host=host,
-                                 port=port,
-                                 key_file=key_file,
-                                 cert_file=cert_file,
-                                 ca_certs=ca_certs,
-                                 verify_callback=verify_callback,
-                                 timeout=timeout)
-    else:
+    def new_client():
+        """Return a new connection to the WBEM server."""
+        if use_ssl:
+            return HTTPSConnection(host=host,
+                                   port=port,
+                                   key_file=key_file,
+                                   cert_file=cert_file,
+                                   ca_certs=ca_certs,
+                                   verify_callback=verify_callback,
+                                   timeout=timeout)
         if url.startswith('http'):
-            client = HTTPConnection(host=host,  # pylint: disable=redefined-variable-type
-                                    port=port,
-                                    timeout=timeout)
+            return HTTPConnection(host=host,
+                                  port=port,
+                                  timeout=timeout)
+        if url.startswith('file:'):
+            url_ = url[5:]
         else:
-            if url.startswith('file:'):
-                url_ = url[5:]
+            url_ = url
+        try:
+            status = os.stat(url_)
+            if S_ISSOCK(status.st_mode):
+                return FileHTTPConnection(url_)
             else:
-                url_ = url
-            try:
-                status = os.stat(url_)
-                if S_ISSOCK(status.st_mode):
-                    client = FileHTTPConnection(url_)
-                    local = True
-                else:
-                    raise ConnectionError('File URL is not a socket: %s' % url)
-            except OSError as exc:
-                raise ConnectionError('Error with file URL %s: %s' % (url, exc))
+                raise ConnectionError('File URL is not a socket: %s' % url)
+        except OSError as exc:
+            raise ConnectionError('Error with file URL %s: %s' % (url, exc))
+
+    pool_key = (url, cert_file, key_file, ca_certs, verify_callback, timeout)
+    client = None
+    if pool is not None and idempotent:
+        client = pool.get(pool_key)
+    pooled = client is not None
+    if not pooled:
+        client = new_client()
+
+    # Unix domain sockets are local
+    local = not use_ssl and not url.startswith('http')
 
     locallogin = None
     if host in ('localhost', 'localhost6', '127.0.0.1', '::1'):
@@ -540,7 +671,8 @@ def wbem_request(url, data, creds, headers=None, debug=False, x509=None,
         except (KeyError, ImportError):
             locallogin = None
 
-    with HTTPTimeout(timeout, client):
+    http_timeout = HTTPTimeout(timeout, client)
+    with http_timeout:
 
         while num_tries < try_limit:
             num_tries = num_tries + 1
@@ -586,16 +718,46 @@ def wbem_request(url, data, creds, headers=None, debug=False, x509=None,
                 # authentication challenge.
 
                 try:
+                    if timings is not None and client.sock is None:
+                        # Connect explicitly, to measure it separately.
+                        start = default_timer()
+                        client.connect()
+                        _add_timing(timings, 'connect', start)
+                    start = default_timer()
                     # endheaders() is the first method in this sequence that
                     # actually sends something to the server.
-                    client.endheaders()
-                    client.send(data)
+                    if sys.version_info[0:2] >= (2, 7):
+                        # Send the headers and the data together, so that the
+                        # Nagle algorithm does not delay the data until the
+                        # server acknowledges the headers, on connections
+                        # from the pool.
+                        client.endheaders(data)
+                    else:
+                        client.endheaders()
+                        client.send(data)
                 except Exception as exc: # socket.error as exc:
                     # TODO AM: Verify these errno numbers on Windows vs. Linux.
                     if exc.args[0] != 104 and exc.args[0] != 32:
                         raise ConnectionError("Socket error: %s" % exc)
 
-                response = client.getresponse()
+                try:
+                    response = client.getresponse()
+                except (httplib.BadStatusLine,) + SocketErrors as exc:
+                    if not (pooled and _is_dropped_error(exc)):
+                        raise
+                    # The WBEM server closed the connection from the pool
+                    # without returning any data, most likely because it
+                    # closed the idle connection when the request arrived.
+                    # The request can safely be sent again, so it is sent
+                    # again once, on a new connection.
+                    client.close()
+                    client = new_client()
+                    # pylint: disable=protected-access
+                    http_timeout._http_conn = client
+                    pooled = False
+                    continue
+                if timings is not None:
+                    _add_timing(timings, 'server', start)
 
                 if response.status != 200:
                     if response.status == 401:
@@ -674,7 +836,10 @@ def wbem_request(url, data, creds, headers=None, debug=False, x509=None,
 
                     raise ConnectionError('HTTP error: %s' % response.reason)
 
+                start = default_timer()
                 body = response.read()
+                if timings is not None:
+                    _add_timing(timings, 'transfer', start)
 
             except httplib.BadStatusLine as exc:
                 # Background: BadStatusLine is documented to be raised only
@@ -700,6 +865,9 @@ def wbem_request(url, data, creds, headers=None, debug=False, x509=None,
 
             break
 
+    if pool is not None and not response.will_close:
+        pool.put(pool_key, client)
+
     return body
 
 
@@ -68,7 +68,9 @@ Deprecated: In v0.9.0, support for comparing two NocaseDict instances with the
 
 from __future__ import print_function, absolute_import
 
+import re
 from datetime import datetime, timedelta
+from operator import attrgetter
 import warnings
 
 import six
@@ -119,8 +121,23 @@ class NocaseDict(object):
       * For loops: `for key in d`
 
       * Determining length: `len(d)`
+
+    Copies of the dictionary (made with :meth:`copy` or by initializing a
+    new dictionary from an existing one) share the underlying storage with
+    the original dictionary until one of them is modified (copy-on-write), so
+    making a copy is cheap regardless of the size of the dictionary.
     """
 
+    # Indicates that the `_data` dictionary may be shared with other
+    # NocaseDict objects and must be copied before it is modified. This is a
+    # class attribute so that unpickled objects from older versions have it.
+    _shared = False
+
+    # The _FingerprintToken of the CIM object containing the dictionary, or
+    # None (see _comparison_key()). The dictionary itself does not cache a
+    # fingerprint.
+    _fp_token = None
+
     def __init__(self, *args, **kwargs):
         """
         Initialize the new dictionary from at most one positional argument and
@@ -140,7 +157,9 @@ class NocaseDict(object):
 
           * If one positional argument of dictionary (mapping) or `NocaseDict`_
             type is provided, its key/value pairs are put into the new
-            dictionary (without copying them).
+            dictionary (without copying them). A `NocaseDict`_ argument
+            shares its storage with the new dictionary until one of them is
+            modified.
 
           * Otherwise, `TypeError` is raised.
 
@@ -160,8 +179,11 @@ class NocaseDict(object):
                 # Initialize from dict/mapping object
                 self.update(args[0])
             elif isinstance(args[0], NocaseDict):
-                # Initialize from another NocaseDict object
-                self._data = args[0]._data.copy() # pylint: disable=protected-access
+                # Initialize from another NocaseDict object, sharing its
+                # storage until one of them is modified.
+                # pylint: disable=protected-access
+                self._data = args[0]._data
+                self._shared = args[0]._shared = True
             elif args[0] is None:
                 # Leave empty
                 pass
@@ -210,6 +232,10 @@ class NocaseDict(object):
             raise TypeError('NocaseDict key %s must be string type, ' \
                             'but is %s' %  (key, builtin_type(key)))
         k = key.lower()
+        if self._shared:
+            self._unshare()
+        if self._fp_token is not None:
+            self._fp_token.valid = False
         self._data[k] = (key, value)
 
     def __delitem__(self, key):
@@ -224,10 +250,21 @@ class NocaseDict(object):
         k = key
         if isinstance(key, six.string_types):
             k = k.lower()
-        try:
-            del self._data[k]
-        except KeyError:
+        if k not in self._data:
             raise KeyError('Key %r not found' % key)
+        if self._shared:
+            self._unshare()
+        if self._fp_token is not None:
+            self._fp_token.valid = False
+        del self._data[k]
+
+    def _unshare(self):
+        """
+        Give this dictionary its own copy of the storage that it shares with
+        other dictionaries, before it is modified.
+        """
+        self._data = self._data.copy()
+        self._shared = False
 
     def __len__(self):
         """
@@ -283,7 +320,7 @@ class NocaseDict(object):
         """
         Return a copied list of the dictionary values.
         """
-        return list(self.itervalues())
+        return [item[1] for item in six.itervalues(self._data)]
 
     def items(self):
         """
@@ -306,8 +343,8 @@ class NocaseDict(object):
         """
         Return an iterator through the dictionary values.
         """
-        for item in six.iteritems(self._data):
-            yield item[1][1]
+        for item in six.itervalues(self._data):
+            yield item[1]
 
     def iteritems(self):
         """
@@ -367,7 +404,10 @@ class NocaseDict(object):
         """
         Remove all items from the dictionary.
         """
-        self._data.clear()
+        if self._fp_token is not None:
+            self._fp_token.valid = False
+        self._data = {}
+        self._shared = False
 
     def popitem(self):
         """
@@ -384,11 +424,52 @@ class NocaseDict(object):
         """
         Return a shallow copy of the dictionary (i.e. the keys and values are
         not copied).
+
+        The copy shares its storage with this dictionary until one of them is
+        modified (copy-on-write), so this method takes constant time.
         """
         result = NocaseDict()
-        result._data = self._data.copy() # pylint: disable=protected-access
+        result._data = self._data # pylint: disable=protected-access
+        result._shared = self._shared = True
         return result
 
+    def __getstate__(self):
+        """
+        Return the state of the dictionary for pickling, without the
+        fingerprint token.
+        """
+        state = self.__dict__.copy()
+        state.pop('_fp_token', None)
+        return state
+
+    def _comparison_key(self, token=None):
+        """
+        Return the comparison key of the dictionary as a tuple (key, stable),
+        see :func:`_comparison_key`.
+
+        If a token is specified, the dictionary is part of a CIM object whose
+        fingerprint is being computed, and modifying the dictionary
+        invalidates the token.
+        """
+        if token is not None:
+            old_token = self._fp_token
+            if old_token is not None and old_token is not token:
+                old_token.valid = False
+            self._fp_token = token
+        if not self._data:
+            return _EMPTY_KEY, True
+        stable = True
+        items = []
+        for key, item in self._data.items():
+            value = item[1]
+            if isinstance(value, _CIMFingerprintMixin):
+                value_key, value_stable = value._comparison_key(token)
+            else:
+                value_key, value_stable = _comparison_key(value, token)
+            stable = stable and value_stable
+            items.append((key, value_key))
+        return frozenset(items), stable
+
     def __eq__(self, other):
         """
         Invoked when two dictionaries are compared with the `==` operator.
@@ -396,6 +477,24 @@ class NocaseDict(object):
         The comparison is based on matching key/value pairs.
         The keys are looked up case-insensitively.
         """
+        # pylint: disable=protected-access
+        if isinstance(other, NocaseDict):
+            if self._data is other._data:
+                return True  # same (shared) storage
+            if len(self._data) != len(other._data):
+                return False
+            other_data = other._data
+            for key, item in six.iteritems(self._data):
+                try:
+                    other_value = other_data[key][1]
+                except KeyError:
+                    return False
+                try:
+                    if not item[1] == other_value:
+                        return False
+                except TypeError:
+                    return False # not comparable -> considered not equal
+            return True
         for key, self_value in self.iteritems():
             if not key in other:
                 return False
@@ -491,6 +590,41 @@ def _intended_value(intended, unspecified, actual, name, msg):
             raise ValueError(msg + ", but specifies %s=%r (must be %r)"\
                              % (name, actual, intended))
 
+def _reduce_binary(obj, cls, protocol):
+    """
+    Implementation of ``__reduce_ex__()`` for CIM object classes that have a
+    binary representation in :mod:`pywbem.cim_binary`. It is used for
+    pickling and by :func:`py:copy.deepcopy`, but not by
+    :func:`py:copy.copy` (see :func:`_copy_shallow`).
+
+    Objects of user-defined subclasses are reduced in the default way,
+    because they may have additional attributes.
+    """
+    if type(obj) is not cls:  # pylint: disable=unidiomatic-typecheck
+        return object.__reduce_ex__(obj, protocol)
+    from .cim_binary import tobinary, frombinary  # defer due to cyclic deps.
+    return frombinary, (tobinary(obj),)
+
+def _copy_shallow(obj, cls):
+    """
+    Implementation of ``__copy__()`` for the CIM object classes that
+    implement ``__reduce_ex__()`` with :func:`_reduce_binary`, which would
+    otherwise make :func:`py:copy.copy` return a deep copy.
+
+    The copy is made with the ``copy()`` method of the object. Objects of
+    user-defined subclasses are copied in the default way (a new object
+    sharing the attribute values), because ``copy()`` returns an object of
+    the base class.
+    """
+    if type(obj) is cls:  # pylint: disable=unidiomatic-typecheck
+        return obj.copy()
+    result = type(obj).__new__(type(obj))
+    members = result.__dict__
+    members.update(obj.__dict__)
+    members.pop('_fp', None)
+    members.pop('_fp_token', None)
+    return result
+
 def cmpname(name1, name2):
     """
     Compare two CIM names, case-insensitively.
@@ -543,6 +677,212 @@ def cmpitem(item1, item2):
         return 0
     return 1
 
+class _FingerprintToken(object):
+    # pylint: disable=too-few-public-methods
+    """
+    The validity of the fingerprints that have been cached together for an
+    object and the `NocaseDict`_ and CIM objects it contains (e.g. for an
+    instance, its path, properties and their qualifiers). Modifying one of
+    these objects invalidates these fingerprints, but no others.
+    """
+    __slots__ = ['valid']
+
+    def __init__(self):
+        self.valid = True
+
+def _lower(name):
+    """Return a CIM name in lower case, passing `None` through."""
+    if name is None:
+        return None
+    return name.lower()
+
+class _EqualityKey(object):
+    # pylint: disable=too-few-public-methods
+    """
+    Comparison key for values that are not hashable and have no comparison
+    key of their own (e.g. :class:`CIMClass` objects). It delegates the
+    comparison to the `==` operator of the value, and has a constant hash
+    value, which is consistent with any equality.
+    """
+    __slots__ = ['value']
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, _EqualityKey) and self.value == other.value
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return 0
+
+# Markers for the comparison keys of the different kinds of CIM objects, so
+# that they cannot be equal to each other or to the key of a list.
+_DATETIME_KEY = object()
+_INSTANCENAME_KEY = object()
+_INSTANCE_KEY = object()
+
+_EMPTY_KEY = frozenset()
+
+_HASHABLE_TYPES = six.string_types + six.integer_types + \
+                  (six.binary_type, float)
+
+def _comparison_key(value, token=None):
+    """
+    Return the comparison key of a CIM value, CIM object or `NocaseDict`_
+    object, as a tuple (key, stable).
+
+    The comparison key is a hashable object built from the value, such that
+    the comparison keys of two values are equal if and only if the values are
+    equal as for their `==` operator. Comparing the keys does not require
+    calling back into Python code, so it is much faster than comparing the
+    values. The hash value of the key is the fingerprint of the value, which
+    is cached by :class:`_CIMFingerprintMixin` objects.
+
+    `token` is the :class:`_FingerprintToken` for caching the fingerprints
+    of the value and the objects it contains, or `None` for a new token.
+
+    `stable` indicates whether the fingerprint may be cached. This is not the
+    case for values that contain lists (e.g. array values) or CIM objects
+    without a comparison key of their own (e.g. qualifiers), because they can
+    be modified in place without notice.
+    """
+    if value is None or isinstance(value, _HASHABLE_TYPES):
+        return value, True
+    if isinstance(value, (_CIMFingerprintMixin, NocaseDict)):
+        return value._comparison_key(token)  # pylint: disable=protected-access
+    if isinstance(value, list):
+        return tuple([_comparison_key(v)[0] for v in value]), False
+    if isinstance(value, CIMDateTime):
+        return (_DATETIME_KEY, value.datetime, value.timedelta), True
+    return _EqualityKey(value), False
+
+def _fingerprints_differ(obj1, obj2):
+    """
+    Return a boolean indicating whether two objects of the same type have
+    valid cached fingerprints that differ, which proves that the objects are
+    not equal.
+    """
+    # pylint: disable=protected-access
+    fp1 = obj1._cached_fingerprint()
+    fp2 = obj2._cached_fingerprint()
+    return fp1 is not None and fp2 is not None and fp1 != fp2
+
+def _key_attribute(name):
+    """
+    Return a property for an attribute of a :class:`_CIMFingerprintMixin`
+    object that is used by its comparison key. The value is stored in the
+    attribute with a leading underscore, which constructors set directly.
+    Setting the property invalidates the cached fingerprint of the object.
+    """
+    private_name = '_' + name
+
+    def fset(self, value):
+        """Set the attribute and invalidate the cached fingerprint."""
+        token = self._fp_token
+        if token is not None:
+            token.valid = False
+        setattr(self, private_name, value)
+
+    return property(attrgetter(private_name), fset)
+
+
+class _CIMFingerprintMixin(object):
+    """
+    Mixin class for CIM objects that have a comparison key (see
+    :func:`_comparison_key`) and cache its hash value as a structural
+    fingerprint, which is used to short-circuit the `==` and `!=` operators
+    for unequal objects.
+
+    Fingerprints are computed only on request (e.g. by
+    :func:`~pywbem.diff_instances`). Once computed, they are cached on the
+    object and on the `NocaseDict`_ and CIM objects it contains, with a
+    common :class:`_FingerprintToken`. Modifying one of these objects
+    invalidates the token.
+
+    Subclasses define the attributes that are used by their comparison key
+    with :func:`_key_attribute`, so that setting them invalidates the token,
+    and implement `_compute_comparison_key()`, which takes a token and
+    returns a tuple (key, stable).
+    """
+
+    # Cached fingerprint and its _FingerprintToken, or None.
+    _fp = None
+    _fp_token = None
+
+    def __getstate__(self):
+        """
+        Return the state of the object for pickling and copying, without the
+        cached fingerprint.
+        """
+        state = self.__dict__.copy()
+        state.pop('_fp', None)
+        state.pop('_fp_token', None)
+        return state
+
+    def _comparison_key(self, token=None):
+        """
+        Return the comparison key of the object as a tuple (key, stable), and
+        cache its fingerprint if it is stable.
+        """
+        if token is None:
+            token = _FingerprintToken()
+        key, stable = self._compute_comparison_key(token)
+        # An object has a single token. If it had another one, the
+        # fingerprints of that token are invalidated, because the object may
+        # be contained in other objects that would not notice its
+        # modification.
+        old_token = self._fp_token
+        if old_token is not None and old_token is not token:
+            old_token.valid = False
+        if stable:
+            self._fp = hash(key)
+            self._fp_token = token
+        return key, stable
+
+    def _compute_comparison_key(self, token):
+        """
+        Compute the comparison key of the object, as a tuple (key, stable),
+        caching the fingerprints of the objects it contains with the token.
+        """
+        raise NotImplementedError
+
+    def _cached_fingerprint(self):
+        """
+        Return the cached fingerprint of the object, or `None` if there is no
+        valid cached fingerprint.
+        """
+        token = self._fp_token
+        if token is not None and token.valid:
+            return self._fp
+        return None
+
+    def _fingerprint(self):
+        """
+        Return the fingerprint of the object, using the cached fingerprint if
+        it is valid.
+        """
+        fp = self._cached_fingerprint()
+        if fp is None:
+            fp = hash(self._comparison_key()[0])
+        return fp
+
+    def __eq__(self, other):
+        # pylint: disable=unidiomatic-typecheck
+        if self._fp_token is not None and type(other) is type(self) and \
+                _fingerprints_differ(self, other):
+            return False
+        return self._cmp(other) == 0
+
+    def __ne__(self, other):
+        # pylint: disable=unidiomatic-typecheck
+        if self._fp_token is not None and type(other) is type(self) and \
+                _fingerprints_differ(self, other):
+            return True
+        return self._cmp(other) != 0
+
 def _convert_unicode(obj):
     """
     Convert the input object into a Unicode string (`unicode`for Python 2,
@@ -623,6 +963,29 @@ def _indent_str(indent):
     """
     return ' '.ljust(indent, ' ')
 
+# MOF escape sequences used by mofstr(), for the characters that need to be
+# escaped. The remaining control characters U+0001 to U+001F use the generic
+# escape sequence.
+_mof_escapes = {
+    u'\\': u'\\\\',
+    u'"': u'\\"',
+    u'\b': u'\\b',
+    u'\t': u'\\t',
+    u'\n': u'\\n',
+    u'\f': u'\\f',
+    u'\r': u'\\r',
+}
+for _cp in range(1, 32):
+    _mof_escapes.setdefault(six.unichr(_cp), u'\\x%04X' % _cp)
+del _cp
+
+_mof_escape_re = re.compile(u'[\\\\"\x01-\x1f]')
+
+def _mof_escape(match):
+    """Return the MOF escape sequence for the character of a match of
+    `_mof_escape_re`."""
+    return _mof_escapes[match.group()]
+
 def mofstr(strvalue, indent=MOF_INDENT, maxline=MAX_MOF_LINE):
     # Note: This is a raw docstring because it shows many backslashes, and
     # that avoids having to double them.
@@ -689,60 +1052,16 @@ def mofstr(strvalue, indent=MOF_INDENT, maxline=MAX_MOF_LINE):
     line) is specified via the `indent` argument.
     """
 
-    escaped_str = strvalue
-
-    # Escape backslash (\)
-    escaped_str = escaped_str.replace('\\', '\\\\')
-
-    # Escape \b, \t, \n, \f, \r
-    # Note, the Python escape sequences happen to be the same as in MOF
-    escaped_str = escaped_str.replace('\b', '\\b').\
-                              replace('\t', '\\t').\
-                              replace('\n', '\\n').\
-                              replace('\f', '\\f').\
-                              replace('\r', '\\r')
-
-    # Escape remaining control characters (U+0001...U+001F), skipping
-    # U+0008, U+0009, U+000A, U+000C, U+000D that are already handled.
-    # We hard code it to be faster, plus we can easily skip already handled
-    # chars.
-    # The generic code would be (not skipping already handled chars):
-    #     for cp in range(1, 32):
-    #         c = six.unichr(cp)
-    #         esc = '\\x%04X' % cp
-    #         escaped_str = escaped_str.replace(c, esc)
-    escaped_str = escaped_str.replace(u'\u0001', '\\x0001').\
-                              replace(u'\u0002', '\\x0002').\
-                              replace(u'\u0003', '\\x0003').\
-                              replace(u'\u0004', '\\x0004').\
-                              replace(u'\u0005', '\\x0005').\
-                              replace(u'\u0006', '\\x0006').\
-                              replace(u'\u0007', '\\x0007').\
-                              replace(u'\u000B', '\\x000B').\
-                              replace(u'\u000E', '\\x000E').\
-                              replace(u'\u000F', '\\x000F').\
-                              replace(u'\u0010', '\\x0010').\
-                              replace(u'\u0011', '\\x0011').\
-                              replace(u'\u0012', '\\x0012').\
-                              replace(u'\u0013', '\\x0013').\
-                              replace(u'\u0014', '\\x0014').\
-                              replace(u'\u0015', '\\x0015').\
-                              replace(u'\u0016', '\\x0016').\
-                              replace(u'\u0017', '\\x0017').\
-                              replace(u'\u0018', '\\x0018').\
-                              replace(u'\u0019', '\\x0019').\
-                              replace(u'\u001A', '\\x001A').\
-                              replace(u'\u001B', '\\x001B').\
-                              replace(u'\u001C', '\\x001C').\
-                              replace(u'\u001D', '\\x001D').\
-                              replace(u'\u001E', '\\x001E').\
-                              replace(u'\u001F', '\\x001F')
-
-    # Escape double quote
-    escaped_str = escaped_str.replace('"', '\\"')
+    # Escape backslash, double quote and the control characters U+0001 to
+    # U+001F in a single pass. Note, the Python escape sequences for \b, \t,
+    # \n, \f, \r happen to be the same as in MOF.
+    escaped_str = _mof_escape_re.sub(_mof_escape, strvalue)
 
     # Break into multiple strings for better readability
     blankfind = maxline - indent - 2
+    if len(escaped_str) <= blankfind:
+        return '"' + escaped_str + '"'
+
     _is = _indent_str(indent)
     ret_str_list = list()
     # TODO does not account for the extra char that may be appended
@@ -766,6 +1085,39 @@ def mofstr(strvalue, indent=MOF_INDENT, maxline=MAX_MOF_LINE):
     ret_str = ('\n'+_is).join(ret_str_list)
     return ret_str
 
+_INTEGER_TYPES = frozenset(['uint8', 'sint8', 'uint16', 'sint16', 'uint32',
+                            'sint32', 'uint64', 'sint64'])
+_REAL_TYPES = frozenset(['real32', 'real64'])
+
+def _value2mof(value, type_, embedded_object, indent):
+    """
+    Return the MOF representation of a scalar property value.
+
+    Parameters:
+
+      value (:term:`CIM data type`): The value.
+
+      type_ (:term:`string`): The CIM data type of the property.
+
+      embedded_object (:term:`string`): The embedded object kind of the
+        property, or `None`.
+
+      indent (:term:`integer`): Number of spaces to indent continuation
+        lines of string values.
+    """
+
+    if type_ == 'string':
+        if embedded_object is not None:
+            value = value.tocimxml().toxml()
+        return mofstr(value, indent=indent)
+    # The numeric CIM data types are converted to the built-in types, whose
+    # string representation does not depend on __repr__().
+    if type_ in _INTEGER_TYPES:
+        return str(int(value))
+    if type_ in _REAL_TYPES:
+        return str(float(value))
+    return str(value)
+
 def moftype(cim_type, refclass):
     """
     Converts a CIM data type name to MOF syntax.
@@ -774,7 +1126,7 @@ def moftype(cim_type, refclass):
     return (refclass + ' REF') if cim_type == 'reference' else cim_type
 
 
-class CIMInstanceName(_CIMComparisonMixin):
+class CIMInstanceName(_CIMFingerprintMixin, _CIMComparisonMixin):
     """
     A CIM instance path (aka *instance name*).
 
@@ -849,10 +1201,16 @@ class CIMInstanceName(_CIMComparisonMixin):
         if classname is None:
             raise ValueError('Instance path must have a class name')
 
-        self.classname = classname
-        self.keybindings = NocaseDict(keybindings)
-        self.host = host
-        self.namespace = namespace
+        # Initialize members, without invalidating a fingerprint
+        self._classname = classname
+        self._keybindings = NocaseDict(keybindings)
+        self._host = host
+        self._namespace = namespace
+
+    classname = _key_attribute('classname')
+    keybindings = _key_attribute('keybindings')
+    host = _key_attribute('host')
+    namespace = _key_attribute('namespace')
 
     def _cmp(self, other):
         """
@@ -877,6 +1235,15 @@ class CIMInstanceName(_CIMComparisonMixin):
                 cmpname(self.classname, other.classname) or
                 cmpitem(self.keybindings, other.keybindings))
 
+    def _compute_comparison_key(self, token):
+        """
+        Compute the comparison key of the :class:`~pywbem.CIMInstanceName`
+        object, from the same attributes that are compared by :meth:`_cmp`.
+        """
+        keybindings_key, stable = self._keybindings._comparison_key(token)
+        return (_INSTANCENAME_KEY, _lower(self._host), _lower(self._namespace),
+                _lower(self._classname), keybindings_key), stable
+
     def __str__(self):
         """
         Return the untyped WBEM URI of the CIM instance path represented
@@ -946,13 +1313,30 @@ class CIMInstanceName(_CIMComparisonMixin):
         Return a copy of the :class:`~pywbem.CIMInstanceName` object.
         """
 
-        result = CIMInstanceName(self.classname)
-        result.keybindings = self.keybindings.copy()
-        result.host = self.host
-        result.namespace = self.namespace
+        # The attributes of this object have been checked by the constructor
+        # already, so the copy is made without invoking it again.
+        result = CIMInstanceName.__new__(CIMInstanceName)
+        result._classname = self._classname
+        result._keybindings = self._keybindings.copy()
+        result._host = self._host
+        result._namespace = self._namespace
 
         return result
 
+    def __copy__(self):
+        """
+        Support for :func:`py:copy.copy`, returning the same shallow copy as
+        :meth:`copy`.
+        """
+        return _copy_shallow(self, CIMInstanceName)
+
+    def __reduce_ex__(self, protocol):
+        """
+        Support for pickling and :func:`py:copy.deepcopy`, using the compact
+        binary representation of :mod:`pywbem.cim_binary`.
+        """
+        return _reduce_binary(self, CIMInstanceName, protocol)
+
     def update(self, *args, **kwargs):
         """
         Add the named arguments and keyword arguments to the keybindings,
@@ -1153,7 +1537,7 @@ class CIMInstanceName(_CIMComparisonMixin):
         return tocimxmlstr(self, indent)
 
 
-class CIMInstance(_CIMComparisonMixin):
+class CIMInstance(_CIMFingerprintMixin, _CIMComparisonMixin):
     """
     A CIM instance, optionally including its instance path.
 
@@ -1240,10 +1624,11 @@ class CIMInstance(_CIMComparisonMixin):
             `None` means that the properties are not filtered.
         """
 
-        self.classname = _ensure_unicode(classname)
-        self.qualifiers = NocaseDict(qualifiers)
+        # Initialize members, without invalidating a fingerprint
+        self._classname = _ensure_unicode(classname)
+        self._qualifiers = NocaseDict(qualifiers)
         # TODO: Add support for accepting qualifiers as plain dict
-        self.path = path
+        self._path = path
         if property_list is not None:
             self.property_list = [_ensure_unicode(x).lower() \
                 for x in property_list]
@@ -1253,11 +1638,16 @@ class CIMInstance(_CIMComparisonMixin):
         # Assign initialised property values and run through
         # __setitem__ to enforce CIM data types for each property.
 
-        self.properties = NocaseDict()
+        self._properties = NocaseDict()
         if properties:
             for key, value in properties.items():
                 self.__setitem__(key, value)
 
+    classname = _key_attribute('classname')
+    properties = _key_attribute('properties')
+    qualifiers = _key_attribute('qualifiers')
+    path = _key_attribute('path')
+
     def _cmp(self, other):
         """
         Comparator function for two :class:`~pywbem.CIMInstance` objects.
@@ -1277,6 +1667,17 @@ class CIMInstance(_CIMComparisonMixin):
                 cmpitem(self.properties, other.properties) or
                 cmpitem(self.qualifiers, other.qualifiers))
 
+    def _compute_comparison_key(self, token):
+        """
+        Compute the comparison key of the :class:`~pywbem.CIMInstance`
+        object, from the same attributes that are compared by :meth:`_cmp`.
+        """
+        path_key, path_stable = _comparison_key(self._path, token)
+        props_key, props_stable = self._properties._comparison_key(token)
+        quals_key, quals_stable = self._qualifiers._comparison_key(token)
+        return (_INSTANCE_KEY, _lower(self._classname), path_key, props_key,
+                quals_key), path_stable and props_stable and quals_stable
+
     def __str__(self):
         """
         Return a short string representation of the
@@ -1345,16 +1746,45 @@ class CIMInstance(_CIMComparisonMixin):
     def copy(self):
         """
         Return copy of the :class:`~pywbem.CIMInstance` object.
-        """
 
-        result = CIMInstance(self.classname)
-        result.properties = self.properties.copy()
-        result.qualifiers = self.qualifiers.copy()
-        result.path = (self.path is not None and \
-                       [self.path.copy()] or [None])[0]
+        The `properties` and `qualifiers` dictionaries of the copy share their
+        storage with those of the original object until one of them is
+        modified (copy-on-write), so adding, replacing or removing a property
+        or qualifier in one object does not affect the other object, and
+        making the copy is cheap regardless of the number of properties.
+        The :class:`~pywbem.CIMProperty` and :class:`~pywbem.CIMQualifier`
+        objects themselves are not copied; replace them (e.g. using
+        ``inst[name] = value``) instead of modifying them in place, if the
+        other object is not supposed to see the change. The instance path is
+        copied.
+        """
+
+        # The attributes of this object have been checked by the constructor
+        # already, so the copy is made without invoking it again.
+        result = CIMInstance.__new__(CIMInstance)
+        result._classname = self._classname
+        result._properties = self._properties.copy()
+        result._qualifiers = self._qualifiers.copy()
+        result._path = (self._path is not None and \
+                        [self._path.copy()] or [None])[0]
+        result.property_list = None
 
         return result
 
+    def __copy__(self):
+        """
+        Support for :func:`py:copy.copy`, returning the same shallow copy as
+        :meth:`copy`.
+        """
+        return _copy_shallow(self, CIMInstance)
+
+    def __reduce_ex__(self, protocol):
+        """
+        Support for pickling and :func:`py:copy.deepcopy`, using the compact
+        binary representation of :mod:`pywbem.cim_binary`.
+        """
+        return _reduce_binary(self, CIMInstance, protocol)
+
     def update(self, *args, **kwargs):
         """
         Add the named arguments and keyword arguments to the properties,
@@ -1526,12 +1956,12 @@ class CIMInstance(_CIMComparisonMixin):
               Number of spaces the initial line of the output is indented.
         """
 
-        ret_str = 'instance of %s {\n' % self.classname
+        mof = ['instance of %s {\n' % self.classname]
         for prop in self.properties.values():
-            ret_str += prop.tomof(True, (indent+MOF_INDENT))
+            mof.append(prop.tomof(True, (indent+MOF_INDENT)))
 
-        ret_str += '};\n'
-        return ret_str
+        mof.append('};\n')
+        return ''.join(mof)
 
 
 class CIMClassName(_CIMComparisonMixin):
@@ -1844,8 +2274,16 @@ class CIMClass(_CIMComparisonMixin):
     def copy(self):
         """
         Return a copy of the :class:`~pywbem.CIMClass` object.
+
+        The `properties`, `methods` and `qualifiers` dictionaries of the copy
+        share their storage with those of the original object until one of
+        them is modified (copy-on-write), so making the copy is cheap
+        regardless of the size of the class. As for
+        :meth:`CIMInstance.copy`, the property, method and qualifier objects
+        themselves are not copied.
         """
-        result = CIMClass(self.classname)
+        result = CIMClass.__new__(CIMClass)
+        result.classname = self.classname
         result.properties = self.properties.copy()
         result.methods = self.methods.copy()
         result.superclass = self.superclass
@@ -1853,6 +2291,20 @@ class CIMClass(_CIMComparisonMixin):
 
         return result
 
+    def __copy__(self):
+        """
+        Support for :func:`py:copy.copy`, returning the same shallow copy as
+        :meth:`copy`.
+        """
+        return _copy_shallow(self, CIMClass)
+
+    def __reduce_ex__(self, protocol):
+        """
+        Support for pickling and :func:`py:copy.deepcopy`, using the compact
+        binary representation of :mod:`pywbem.cim_binary`.
+        """
+        return _reduce_binary(self, CIMClass, protocol)
+
     def tocimxml(self):
         """
         Return the CIM-XML representation of the
@@ -1903,35 +2355,34 @@ class CIMClass(_CIMComparisonMixin):
         indent = MOF_INDENT
 
         # Qualifiers definition or empty line
-        ret_str = '%s\n' % (_makequalifiers(self.qualifiers,
-                                            indent))
+        mof = ['%s\n' % (_makequalifiers(self.qualifiers, indent))]
 
-        ret_str += 'class %s ' % self.classname
+        mof.append('class %s ' % self.classname)
 
         # Superclass
 
         if self.superclass is not None:
-            ret_str += ': %s ' % self.superclass
+            mof.append(': %s ' % self.superclass)
 
-        ret_str += '{\n'
+        mof.append('{\n')
 
         # Properties; indent one level from class definition
 
         for prop_val in self.properties.values():
 
-            ret_str += prop_val.tomof(False, indent)
+            mof.append(prop_val.tomof(False, indent))
 
         # Methods, indent one level from class definition
         for method in self.methods.values():
-            ret_str += '\n%s' % method.tomof(indent)
+            mof.append('\n%s' % method.tomof(indent))
 
-        ret_str += '};\n'
+        mof.append('};\n')
 
-        return ret_str
+        return ''.join(mof)
 
 
 # pylint: disable=too-many-statements,too-many-instance-attributes
-class CIMProperty(_CIMComparisonMixin):
+class CIMProperty(_CIMFingerprintMixin, _CIMComparisonMixin):
     """
     A CIM property.
 
@@ -2367,31 +2818,53 @@ class CIMProperty(_CIMComparisonMixin):
                 reference_class = _intended_value(
                     None, None, reference_class, 'reference_class', msg)
 
-        # Initialize members
-        self.name = name
-        self.value = value
-        self.type = type_
-        self.class_origin = class_origin
-        self.array_size = array_size
-        self.propagated = propagated
-        self.is_array = is_array
-        self.reference_class = reference_class
-        self.qualifiers = NocaseDict(qualifiers)
+        # Initialize members, without invalidating a fingerprint
+        self._name = name
+        self._value = value
+        self._type = type_
+        self._class_origin = class_origin
+        self._array_size = array_size
+        self._propagated = propagated
+        self._is_array = is_array
+        self._reference_class = reference_class
+        self._qualifiers = NocaseDict(qualifiers)
         self.embedded_object = embedded_object
 
+    name = _key_attribute('name')
+    value = _key_attribute('value')
+    type = _key_attribute('type')
+    class_origin = _key_attribute('class_origin')
+    array_size = _key_attribute('array_size')
+    propagated = _key_attribute('propagated')
+    is_array = _key_attribute('is_array')
+    reference_class = _key_attribute('reference_class')
+    qualifiers = _key_attribute('qualifiers')
+
     def copy(self):
         """
         Return a copy of the :class:`~pywbem.CIMProperty` object.
-        """
-        return CIMProperty(self.name,
-                           self.value,
-                           type=self.type,
-                           class_origin=self.class_origin,
-                           array_size=self.array_size,
-                           propagated=self.propagated,
-                           is_array=self.is_array,
-                           reference_class=self.reference_class,
-                           qualifiers=self.qualifiers.copy())
+
+        The `qualifiers` dictionary of the copy shares its storage with that of
+        the original object until one of them is modified (copy-on-write).
+        An array value is copied into a new list.
+        """
+        # The attributes of this object have been checked by the constructor
+        # already, so the copy is made without invoking it again.
+        result = CIMProperty.__new__(CIMProperty)
+        result._name = self._name
+        value = self._value
+        if isinstance(value, list):
+            value = list(value)
+        result._value = value
+        result._type = self._type
+        result._class_origin = self._class_origin
+        result._array_size = self._array_size
+        result._propagated = self._propagated
+        result._is_array = self._is_array
+        result._reference_class = self._reference_class
+        result._qualifiers = self._qualifiers.copy()
+        result.embedded_object = self.embedded_object
+        return result
 
     def __str__(self):
         """
@@ -2522,16 +2995,7 @@ class CIMProperty(_CIMComparisonMixin):
             line of the generated MOF.
         """
 
-        if self.type == 'string':
-            if self.embedded_object is not None:
-                val_ = value_.tocimxml().toxml()
-            else:
-                val_ = value_
-            _mof = mofstr(val_, indent=indent)
-
-        else:
-            _mof = str(value_)
-        return _mof
+        return _value2mof(value_, self.type, self.embedded_object, indent)
 
     def _array_val2mof(self, indent, fold):
         """
@@ -2595,7 +3059,7 @@ class CIMProperty(_CIMComparisonMixin):
             if is_instance:
                 mof += 'NULL'
         elif self.is_array:
-            mof += ' = {'
+            mof += '{' if is_instance else ' = {'
             # output as single line if within width limits
             arr_str = self._array_val2mof(indent, False)
             # If too large, redo with on array element per line
@@ -2631,6 +3095,29 @@ class CIMProperty(_CIMComparisonMixin):
         if not isinstance(other, CIMProperty):
             raise TypeError("other must be CIMProperty, but is: %s" %\
                             type(other))
+        # Fast path for the common case of equal properties, which does not
+        # invoke the comparison functions for each attribute. As in cmpitem(),
+        # the values are not compared with `==` if one of them is `None`.
+        # The attributes are read directly, which is faster than reading
+        # them through their properties.
+        # pylint: disable=protected-access
+        value = self._value
+        other_value = other._value
+        if (value is other_value or
+                value is not None and other_value is not None and
+                value == other_value) and \
+                self._type == other._type and \
+                self._is_array == other._is_array and \
+                self._array_size == other._array_size and \
+                self._propagated == other._propagated and \
+                self._class_origin == other._class_origin and \
+                (self._name == other._name or
+                 cmpname(self._name, other._name) == 0) and \
+                (self._reference_class == other._reference_class or
+                 cmpname(self._reference_class,
+                         other._reference_class) == 0) \
+                and self._qualifiers == other._qualifiers:
+            return 0
         return (cmpname(self.name, other.name) or
                 cmpitem(self.value, other.value) or
                 cmpitem(self.type, other.type) or
@@ -2641,6 +3128,26 @@ class CIMProperty(_CIMComparisonMixin):
                 cmpitem(self.class_origin, other.class_origin) or
                 cmpitem(self.qualifiers, other.qualifiers))
 
+    def _compute_comparison_key(self, token):
+        """
+        Compute the comparison key of the :class:`~pywbem.CIMProperty`
+        object, from the same attributes that are compared by :meth:`_cmp`.
+        """
+        # This is invoked for every property of an instance, so the common
+        # case of a simple value is handled inline.
+        value = self._value
+        if value is None or isinstance(value, _HASHABLE_TYPES):
+            stable = True
+        else:
+            value, stable = _comparison_key(value, token)
+        quals_key, quals_stable = self._qualifiers._comparison_key(token)
+        reference_class = self._reference_class
+        if reference_class is not None:
+            reference_class = reference_class.lower()
+        return (_lower(self._name), value, self._type, reference_class,
+                self._is_array, self._array_size, self._propagated,
+                self._class_origin, quals_key), stable and quals_stable
+
 
 class CIMMethod(_CIMComparisonMixin):
     """
@@ -3719,6 +4226,20 @@ class CIMQualifierDeclaration(_CIMComparisonMixin):
                                        toinstance=self.toinstance,
                                        translatable=self.translatable)
 
+    def __copy__(self):
+        """
+        Support for :func:`py:copy.copy`, returning the same shallow copy as
+        :meth:`copy`.
+        """
+        return _copy_shallow(self, CIMQualifierDeclaration)
+
+    def __reduce_ex__(self, protocol):
+        """
+        Support for pickling and :func:`py:copy.deepcopy`, using the compact
+        binary representation of :mod:`pywbem.cim_binary`.
+        """
+        return _reduce_binary(self, CIMQualifierDeclaration, protocol)
+
     def tocimxml(self):
         """
         Return the CIM-XML representation of the
@@ -36,6 +36,8 @@ WBEMConnection method                                   Purpose
                                                         (including instances of its subclasses).
 :meth:`~pywbem.WBEMConnection.EnumerateInstances`       Enumerate the instances of a class (including instances of its
                                                         subclasses)
+:meth:`~pywbem.WBEMConnection.EnumerateInstanceTable`   Enumerate the instances of a class into a columnar
+                                                        :class:`~pywbem.InstanceTable`
 :meth:`~pywbem.WBEMConnection.GetInstance`              Retrieve an instance
 :meth:`~pywbem.WBEMConnection.ModifyInstance`           Modify the property values of an instance
 :meth:`~pywbem.WBEMConnection.CreateInstance`           Create an instance
@@ -79,8 +81,11 @@ WBEMConnection method                                   Purpose
 from __future__ import absolute_import
 
 import re
+import sys
+import copy
+import threading
 from datetime import datetime, timedelta
-from xml.dom import minidom
+from timeit import default_timer
 from xml.parsers.expat import ExpatError
 import warnings
 
@@ -90,11 +95,15 @@ from . import cim_xml
 from .cim_constants import DEFAULT_NAMESPACE
 from .cim_types import CIMType, CIMDateTime, atomic_to_cim_xml
 from .cim_obj import CIMInstance, CIMInstanceName, CIMClass, \
-                     CIMClassName, NocaseDict, _ensure_unicode, tocimxml, \
-                     tocimobj
-from .cim_http import get_object_header, wbem_request
-from .tupleparse import parse_cim
-from .tupletree import dom_to_tupletree
+                     CIMClassName, NocaseDict, _ensure_unicode, \
+                     _ensure_bytes, tocimxml, tocimobj
+from .cim_http import get_object_header, wbem_request, HTTPConnectionPool
+from .cim_table import InstanceTable
+from .cim_statistics import Statistics
+from .cim_hooks import OperationContext
+from .cim_capture import _prettify
+from .tupleparse import parse_cim, fill_instance_table
+from .tupletree import xml_to_tupletree
 from .exceptions import Error, ParseError, AuthError, ConnectionError, \
                         TimeoutError, CIMError
 
@@ -114,6 +123,17 @@ else:
 _ILL_FORMED_UTF8_RE = re.compile(
     b'(\xED[\xA0-\xBF][\x80-\xBF])')    # U+D800...U+DFFF
 
+# Maximum number of requests in the request cache of a connection
+_REQUEST_CACHE_SIZE = 1000
+
+# Intrinsic operations that do not modify the state of the WBEM server, and
+# can therefore be coalesced
+_READ_ONLY_OPERATIONS = frozenset([
+    'GetInstance', 'EnumerateInstances', 'EnumerateInstanceNames',
+    'Associators', 'AssociatorNames', 'References', 'ReferenceNames',
+    'ExecQuery', 'GetClass', 'EnumerateClasses', 'EnumerateClassNames',
+    'GetQualifier', 'EnumerateQualifiers'])
+
 
 def _check_classname(val):
     """
@@ -124,6 +144,88 @@ def _check_classname(val):
     if not isinstance(val, six.string_types):
         raise ValueError("string expected for classname, not %r" % val)
 
+def _param_key(value):
+    """
+    Return a hashable key for a parameter value of an intrinsic operation,
+    or `None` if requests with that parameter value are not cached.
+
+    The key includes the types of the values, because values that compare
+    equal (e.g. `True`, `1` and `Uint8(1)`) may have different CIM-XML
+    representations.
+    """
+    if isinstance(value, (six.string_types, bool) + six.integer_types):
+        return (type(value), value)
+    if isinstance(value, (list, tuple)):
+        key = tuple([_param_key(v) for v in value])
+        if None in key:
+            return None
+        return (list, key)
+    if isinstance(value, CIMClassName):
+        return (CIMClassName, value.classname, value.host, value.namespace)
+    if isinstance(value, CIMInstanceName):
+        keybindings = []
+        for name, val in value.keybindings.items():
+            key = _param_key(val)
+            if key is None:
+                return None
+            keybindings.append((name.lower(), key))
+        keybindings.sort()
+        return (CIMInstanceName, value.classname, value.host, value.namespace,
+                tuple(keybindings))
+    return None
+
+def _request_key(methodname, namespace, params):
+    """
+    Return the key of an intrinsic operation request in the request cache,
+    or `None` if the request is not cached.
+
+    The key consists of the operation name, the namespace and the parameters
+    (except for parameters that are `None`, which are not sent), sorted by
+    parameter name.
+    """
+    key = [methodname, namespace]
+    for name in sorted(params):
+        value = params[name]
+        if value is None:
+            continue
+        value_key = _param_key(value)
+        if value_key is None:
+            return None
+        key.append((name, value_key))
+    return tuple(key)
+
+def _copy_result(value):
+    """
+    Return a copy of the result of an intrinsic operation (a tuple tree with
+    CIM objects), that can be modified without affecting the original
+    result. The CIM objects are deep copies, so that their properties,
+    qualifiers and values (including array values) are not shared with the
+    original result either. Strings are immutable and are not copied.
+    """
+    if isinstance(value, tuple):
+        return tuple([_copy_result(v) for v in value])
+    if isinstance(value, list):
+        return [_copy_result(v) for v in value]
+    if value is None or isinstance(value, six.string_types):
+        return value
+    return copy.deepcopy(value)
+
+
+class _InflightCall(object):
+    # pylint: disable=too-few-public-methods
+    """
+    An intrinsic operation in progress, whose result is shared by the
+    concurrent identical operations (see
+    :attr:`WBEMConnection.coalesce_requests`).
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exc_info = None
+        # Number of threads waiting for the result
+        self.waiters = 0
+
 def check_utf8_xml_chars(utf8_xml, meaning):
     """
     Examine a UTF-8 encoded XML string and raise a `pywbem.ParseError`
@@ -332,6 +434,14 @@ class WBEMConnection(object):
     the :attr:`last_raw_request` and :attr:`last_raw_reply` instance variables
     of the connection object.
 
+    A connection object can be shared by multiple threads, which perform
+    operations concurrently: The last request and reply are kept separately
+    for each thread, the HTTP connections to the WBEM server are kept in a
+    pool from which each operation takes its own connection, and the
+    statistics and caches of the connection are protected by locks. The
+    instance variables (e.g. :attr:`debug`) should not be changed while
+    other threads perform operations.
+
     The methods of this class may raise the following exceptions:
 
     * Exceptions indicating processing errors:
@@ -375,30 +485,65 @@ class WBEMConnection(object):
         Debug logging can be enabled for future operations by setting this
         instance variable to `True`.
 
+        Debug logging prettifies and checks every response. For capturing
+        the requests and responses of a sample of the operations, or of slow
+        or failed operations, add a :class:`~pywbem.DebugCapture` object to
+        the `hooks` list instead.
+
       last_request (:term:`unicode string`):
         CIM-XML data of the last request sent to the WBEM server
-        on this connection, formatted as prettified XML. Prior to sending the
-        very first request on this connection object, it is `None`.
+        on this connection by the current thread, formatted as prettified
+        XML. Prior to sending the very first request on this connection
+        object, it is `None`.
 
       last_raw_request (:term:`unicode string`):
         CIM-XML data of the last request sent to the WBEM server
-        on this connection, formatted as it was sent. Prior to sending the
-        very first request on this connection object, it is `None`.
+        on this connection by the current thread, formatted as it was sent.
+        Prior to sending the very first request on this connection object,
+        it is `None`.
 
       last_reply (:term:`unicode string`):
         CIM-XML data of the last response received from the WBEM server
-        on this connection, formatted as prettified XML. Prior to receiving
-        the very first response on this connection object, it is `None`.
+        on this connection by the current thread, formatted as prettified
+        XML. Prior to receiving the very first response on this connection
+        object, it is `None`.
 
       last_raw_reply (:term:`unicode string`):
         CIM-XML data of the last response received from the WBEM server
-        on this connection, formatted as it was received. Prior to receiving
-        the very first response on this connection object, it is `None`.
+        on this connection by the current thread, formatted as it was
+        received. Prior to receiving the very first response on this
+        connection object, it is `None`.
+
+      statistics (:class:`~pywbem.Statistics`):
+        Statistics about the WBEM operations performed on this connection,
+        by operation name and namespace.
+
+        The statistics are initially disabled. They can be enabled for future
+        operations by setting the ``enabled`` attribute of this object to
+        `True`.
+
+      hooks (:class:`py:list` of :class:`~pywbem.OperationHook`):
+        Operation hooks that are called for each WBEM operation performed on
+        this connection (see :mod:`pywbem.cim_hooks`).
+
+        The list is initially empty. Hooks can be added to it and removed
+        from it between operations.
+
+      coalesce_requests (:class:`py:bool`):
+        A boolean indicating whether concurrent identical read-only
+        operations (e.g. `GetClass` or `EnumerateInstances` with the same
+        parameters) in multiple threads are coalesced: Only the first of them
+        sends a request, and the others wait for its result and return
+        deep copies of it (or raise its exception). The other operations are not
+        recorded in the statistics and do not call the hooks.
+
+        The initial value of this instance variable is `False`. Operations in
+        debug mode are not coalesced.
     """
 
     def __init__(self, url, creds=None, default_namespace=DEFAULT_NAMESPACE,
                  x509=None, verify_callback=None, ca_certs=None,
-                 no_verification=False, timeout=None):
+                 no_verification=False, timeout=None, keep_alive=True):
         """
         Parameters:
 
@@ -551,6 +696,18 @@ class WBEMConnection(object):
             Note that not all situations can be handled within this timeout, so
             for some issues, operations may take longer before raising an
             exception.
+
+          keep_alive (:class:`py:bool`):
+            Keep the HTTP connections to the WBEM server open after a
+            response if the server supports it (HTTP keep-alive), and use
+            them for later read-only operations (e.g. `GetInstance`), which
+            saves connecting and the TLS handshake. Other operations always
+            use a new HTTP connection, because they must not be sent again
+            if the server closes an idle connection when the request arrives.
+            The idle connections are closed by :meth:`close`.
+
+            If `False`, each operation uses a new HTTP connection that is
+            closed after the response.
         """
 
         self.url = url
@@ -561,12 +718,86 @@ class WBEMConnection(object):
         self.no_verification = no_verification
         self.default_namespace = default_namespace
         self.timeout = timeout
+        self.keep_alive = keep_alive
 
         self.debug = False
-        self.last_raw_request = None
-        self.last_raw_reply = None
-        self.last_request = None
-        self.last_reply = None
+
+        # Serialized requests of intrinsic operations, by request key. The
+        # single dictionary operations on it are atomic, so it is not locked.
+        self._request_cache = {}
+
+        self.statistics = Statistics()
+        self.hooks = []
+
+        self.coalesce_requests = False
+
+        self._init_thread_support()
+
+    def _init_thread_support(self):
+        """
+        Initialize the members that support the use of the connection by
+        multiple threads, which are not pickled or copied.
+        """
+        # The last request and reply of each thread
+        self._thread_state = threading.local()
+        # Idle HTTP connections to the WBEM server
+        self._connection_pool = HTTPConnectionPool()
+        # Intrinsic operations in progress, by request key
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def __getstate__(self):
+        """
+        Return the state of the object for pickling and copying, without the
+        members that support the use of the connection by multiple threads,
+        including the last requests and replies and the idle HTTP
+        connections.
+        """
+        state = self.__dict__.copy()
+        for name in ('_thread_state', '_connection_pool', '_inflight',
+                     '_inflight_lock'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_thread_support()
+
+    def close(self):
+        """
+        Close the idle HTTP connections to the WBEM server that are kept
+        open for later operations (see the `keep_alive` parameter).
+
+        The connection can still be used for operations after it has been
+        closed.
+        """
+        self._connection_pool.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _thread_state_property(name):
+        # pylint: disable=no-self-argument,protected-access
+        """Return a property for an item of the thread specific state."""
+
+        def fget(self):
+            """Return the item for the current thread."""
+            return getattr(self._thread_state, name, None)
+
+        def fset(self, value):
+            """Set the item for the current thread."""
+            setattr(self._thread_state, name, value)
+
+        return property(fget, fset)
+
+    last_request = _thread_state_property('last_request')
+    last_raw_request = _thread_state_property('last_raw_request')
+    last_reply = _thread_state_property('last_reply')
+    last_raw_reply = _thread_state_property('last_raw_reply')
+    del _thread_state_property
 
     def __str__(self):
         """
@@ -621,67 +852,229 @@ class WBEMConnection(object):
             DeprecationWarning)
         return self._imethodcall(methodname, namespace, **params)
 
-    def _imethodcall(self, methodname, namespace, **params):
+    def _imethodcall(self, methodname, namespace, _table=None,
+                     _reply_filter=None, **params):
         """
         Perform an intrinsic CIM-XML operation.
+
+        If `_table` is an :class:`~pywbem.InstanceTable` object, the instances
+        in the response are appended to it by the tuple parser, instead of
+        being returned as :class:`~pywbem.CIMInstance` objects.
+
+        If `_reply_filter` is not `None`, it is called with the raw CIM-XML
+        response (as a byte string) and returns the CIM-XML response that is
+        parsed instead.
+
+        These two parameters have a leading underscore, so that they cannot
+        be mistaken for the CIM operation parameters in `params`.
+        """
+        if self.coalesce_requests and not self.debug and _table is None and \
+                _reply_filter is None and methodname in _READ_ONLY_OPERATIONS:
+            key = _request_key(methodname, namespace, params)
+            if key is not None:
+                return self._coalesced_imethodcall(key, methodname,
+                                                   namespace, params)
+        return self._perform_operation(
+            methodname, namespace, params, None, self._do_imethodcall,
+            methodname, namespace, _table, _reply_filter, params)
+
+    def _coalesced_imethodcall(self, key, methodname, namespace, params):
         """
+        Perform an intrinsic CIM-XML operation, or wait for the result of an
+        identical operation that is in progress in another thread.
 
-        # Create HTTP headers
+        The first thread performs the operation, and the other threads get
+        deep copies of its result, or its exception. Only the operation of
+        the first thread is recorded in the statistics and calls the
+        operation hooks; the other threads return without either.
+        """
+        with self._inflight_lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _InflightCall()
+                self._inflight[key] = call
+            else:
+                call.waiters += 1
 
-        headers = ['CIMOperation: MethodCall',
-                   'CIMMethod: %s' % methodname,
-                   get_object_header(namespace)]
+        if not leader:
+            call.done.wait()
+            if call.exc_info is not None:
+                six.reraise(*call.exc_info)
+            return _copy_result(call.result)
 
-        # Create parameter list
+        try:
+            result = self._perform_operation(
+                methodname, namespace, params, None, self._do_imethodcall,
+                methodname, namespace, None, None, params)
+            # Once the call has been removed, no more threads can start
+            # waiting for it, so the result is copied only if there are
+            # waiting threads. The caller may modify the result while the
+            # waiting threads copy it, so they copy a private copy of it.
+            with self._inflight_lock:
+                del self._inflight[key]
+                waiters = call.waiters
+            if waiters:
+                call.result = _copy_result(result)
+            return result
+        except Exception:  # pylint: disable=broad-except
+            call.exc_info = sys.exc_info()
+            raise
+        finally:
+            with self._inflight_lock:
+                if self._inflight.get(key) is call:
+                    del self._inflight[key]
+            call.done.set()
+
+    def _perform_operation(self, methodname, namespace, params, localobject,
+                           func, *args):
+        # pylint: disable=too-many-arguments
+        """
+        Perform an operation by calling `func`, and record its statistics
+        and call the operation hooks.
+
+        `func` is called with a dictionary for the measurements of the
+        operation, the :class:`~pywbem.OperationContext` object for the hooks
+        (or `None` if there are no hooks), and the specified arguments. The
+        other parameters describe the operation for the statistics and the
+        hooks.
+        """
+        measurements = {}
+        context = None
+        if self.hooks:
+            context = OperationContext(self, methodname, namespace, params,
+                                       measurements, list(self.hooks),
+                                       localobject)
+        start = default_timer()
+        try:
+            result = func(measurements, context, *args)
+        except Exception:  # pylint: disable=broad-except
+            exc_info = sys.exc_info()
+            measurements['total'] = default_timer() - start
+            if self.statistics.enabled:
+                self.statistics._record(methodname, namespace, measurements,
+                                        True)
+            if context is not None:
+                context._error(exc_info[1])
+            six.reraise(*exc_info)
+        measurements['total'] = default_timer() - start
+        if self.statistics.enabled:
+            self.statistics._record(methodname, namespace, measurements,
+                                    False)
+        if context is not None:
+            context._after(result)
+        return result
+
+    def _do_imethodcall(self, measurements, context, methodname, namespace,
+                        table, reply_filter, params):
+        # pylint: disable=too-many-arguments
+        """
+        Perform an intrinsic CIM-XML operation, for :meth:`_imethodcall`.
 
-        plist = [cim_xml.IPARAMVALUE(x[0], tocimxml(x[1])) \
-                 for x in params.items() if x[1] is not None]
+        The durations of the phases of the operation and the sizes of the
+        request and response are stored in the `measurements` dictionary.
+        """
 
-        # Build XML request
+        start = default_timer()
 
-        req_xml = cim_xml.CIM(
-            cim_xml.MESSAGE(
-                cim_xml.SIMPLEREQ(
-                    cim_xml.IMETHODCALL(
-                        methodname,
-                        cim_xml.LOCALNAMESPACEPATH(
-                            [cim_xml.NAMESPACE(ns)
-                             for ns in namespace.split('/')]),
-                        plist)),
-                '1001', '1.0'),
-            '2.0', '2.0')
+        # Repeated requests are taken from the request cache. In debug mode,
+        # the request is always built, for the last_request attribute.
 
-        if self.debug:
-            self.last_raw_request = req_xml.toxml()
-            self.last_request = req_xml.toprettyxml(indent='  ')
-            # Reset replies in case we fail before they are set
-            self.last_raw_reply = None
-            self.last_reply = None
+        cache_key = None
+        if not self.debug:
+            cache_key = _request_key(methodname, namespace, params)
+        cached_request = self._request_cache.get(cache_key) \
+                         if cache_key is not None else None
 
-        # Send request and receive response
+        if cached_request is not None:
+            headers, req_data = cached_request
+        else:
 
-        try:
-            reply_xml = wbem_request(
-                self.url, req_xml.toxml(), self.creds, headers,
-                x509=self.x509,
-                verify_callback=self.verify_callback,
-                ca_certs=self.ca_certs,
-                no_verification=self.no_verification,
-                timeout=self.timeout)
-        except (AuthError, ConnectionError, TimeoutError, Error):
-            raise
-        # TODO 3/16 AM: Clean up exception handling. The next two lines are a
-        # workaround in order not to ignore TypeError and other exceptions
-        # that may be raised.
-        except Exception:
-            raise
+            # Create HTTP headers
+
+            headers = ['CIMOperation: MethodCall',
+                       'CIMMethod: %s' % methodname,
+                       get_object_header(namespace)]
+
+            # Create parameter list
+
+            plist = [cim_xml.IPARAMVALUE(x[0], tocimxml(x[1])) \
+                     for x in params.items() if x[1] is not None]
+
+            # Build XML request
+
+            req_xml = cim_xml.CIM(
+                cim_xml.MESSAGE(
+                    cim_xml.SIMPLEREQ(
+                        cim_xml.IMETHODCALL(
+                            methodname,
+                            cim_xml.LOCALNAMESPACEPATH(
+                                [cim_xml.NAMESPACE(ns)
+                                 for ns in namespace.split('/')]),
+                            plist)),
+                    '1001', '1.0'),
+                '2.0', '2.0')
+
+            req_data = _ensure_bytes(req_xml.toxml())
+
+            if self.debug:
+                self.last_raw_request = req_xml.toxml()
+                self.last_request = req_xml.toprettyxml(indent='  ')
+                # Reset replies in case we fail before they are set
+                self.last_raw_reply = None
+                self.last_reply = None
+
+            if cache_key is not None:
+                if len(self._request_cache) >= _REQUEST_CACHE_SIZE:
+                    self._request_cache.clear()
+                self._request_cache[cache_key] = (headers, req_data)
+
+        measurements['build'] = default_timer() - start
+        measurements['request_bytes'] = len(req_data)
+
+        # Send request and receive response, unless a hook provides the
+        # response
+
+        if context is not None:
+            context._before(req_data)
+        if context is not None and context.reply is not None:
+            reply_xml = context.reply
+        else:
+            try:
+                reply_xml = wbem_request(
+                    self.url, req_data, self.creds, headers,
+                    x509=self.x509,
+                    verify_callback=self.verify_callback,
+                    ca_certs=self.ca_certs,
+                    no_verification=self.no_verification,
+                    timeout=self.timeout,
+                    timings=measurements,
+                    pool=self._connection_pool if self.keep_alive else None,
+                    idempotent=methodname in _READ_ONLY_OPERATIONS)
+            except (AuthError, ConnectionError, TimeoutError, Error):
+                raise
+            # TODO 3/16 AM: Clean up exception handling. The next two lines
+            # are a workaround in order not to ignore TypeError and other
+            # exceptions that may be raised.
+            except Exception:
+                raise
+            if context is not None:
+                context.reply = reply_xml
+
+        measurements['reply_bytes'] = len(reply_xml)
 
         # Set the raw response before parsing (which can fail)
         if self.debug:
             self.last_raw_reply = reply_xml
 
+        if reply_filter is not None:
+            if isinstance(reply_xml, six.text_type):
+                reply_xml = reply_xml.encode('utf-8')
+            reply_xml = reply_filter(reply_xml)
+
+        start = default_timer()
         try:
-            reply_dom = minidom.parseString(reply_xml)
+            tup_tree = xml_to_tupletree(reply_xml)
         except ParseError as exc:
             msg = str(exc)
             parsing_error = True
@@ -701,11 +1094,12 @@ class WBEMConnection(object):
             parsing_error = True
         else:
             parsing_error = False
+            measurements['parse'] = default_timer() - start
 
         if parsing_error or self.debug:
             # Here we just improve the quality of the exception information,
             # so we do this only if it already has failed. Because the check
-            # function we invoke catches more errors than minidom.parseString,
+            # function we invoke catches more errors than the XML parser,
             # we call it also when debug is turned on.
             try:
                 check_utf8_xml_chars(reply_xml, "CIM-XML response")
@@ -714,17 +1108,19 @@ class WBEMConnection(object):
             else:
                 if parsing_error:
                     # We did not catch it in the check function, but
-                    # minidom.parseString() failed.
+                    # xml_to_tupletree() failed.
                     raise ParseError(msg) # data from previous exception
 
         if self.debug:
-            pretty_reply = reply_dom.toprettyxml(indent='  ')
-            self.last_reply = re.sub(r'>( *[\r\n]+)+( *)<', r'>\n\2<',
-                                     pretty_reply) # remove extra empty lines
+            self.last_reply = _prettify(reply_xml)
 
         # Parse response
 
-        tup_tree = parse_cim(dom_to_tupletree(reply_dom))
+        start = default_timer()
+        if table is not None:
+            fill_instance_table(tup_tree, table)
+        tup_tree = parse_cim(tup_tree)
+        measurements['objects'] = default_timer() - start
 
         if tup_tree[0] != 'CIM':
             raise ParseError('Expecting CIM element, got %s' % tup_tree[0])
@@ -787,6 +1183,27 @@ class WBEMConnection(object):
         """
         Perform an extrinsic CIM-XML method call.
         """
+        if Params is not None:
+            all_params = dict(Params)
+            all_params.update(params)
+        else:
+            all_params = params
+        return self._perform_operation(
+            methodname, getattr(localobject, 'namespace', None), all_params,
+            localobject, self._do_methodcall,
+            methodname, localobject, Params, params)
+
+    def _do_methodcall(self, measurements, context, methodname, localobject,
+                       Params, params):
+        # pylint: disable=too-many-arguments
+        """
+        Perform an extrinsic CIM-XML method call, for :meth:`_methodcall`.
+
+        The durations of the phases of the method call and the sizes of the
+        request and response are stored in the `measurements` dictionary.
+        """
+
+        start = default_timer()
 
         # METHODCALL only takes a LOCALCLASSPATH or LOCALINSTANCEPATH
         if hasattr(localobject, 'host') and localobject.host is not None:
@@ -878,6 +1295,8 @@ class WBEMConnection(object):
                 '1001', '1.0'),
             '2.0', '2.0')
 
+        req_data = _ensure_bytes(req_xml.toxml())
+
         if self.debug:
             self.last_raw_request = req_xml.toxml()
             self.last_request = req_xml.toprettyxml(indent='  ')
@@ -885,30 +1304,46 @@ class WBEMConnection(object):
             self.last_raw_reply = None
             self.last_reply = None
 
-        # Send request and receive response
+        measurements['build'] = default_timer() - start
+        measurements['request_bytes'] = len(req_data)
 
-        try:
-            reply_xml = wbem_request(
-                self.url, req_xml.toxml(), self.creds, headers,
-                x509=self.x509,
-                verify_callback=self.verify_callback,
-                ca_certs=self.ca_certs,
-                no_verification=self.no_verification,
-                timeout=self.timeout)
-        except (AuthError, ConnectionError, TimeoutError, Error):
-            raise
-        # TODO 3/16 AM: Clean up exception handling. The next two lines are a
-        # workaround in order not to ignore TypeError and other exceptions
-        # that may be raised.
-        except Exception:
-            raise
+        # Send request and receive response, unless a hook provides the
+        # response
+
+        if context is not None:
+            context._before(req_data)
+        if context is not None and context.reply is not None:
+            reply_xml = context.reply
+        else:
+            try:
+                reply_xml = wbem_request(
+                    self.url, req_data, self.creds, headers,
+                    x509=self.x509,
+                    verify_callback=self.verify_callback,
+                    ca_certs=self.ca_certs,
+                    no_verification=self.no_verification,
+                    timeout=self.timeout,
+                    timings=measurements,
+                    pool=self._connection_pool if self.keep_alive else None)
+            except (AuthError, ConnectionError, TimeoutError, Error):
+                raise
+            # TODO 3/16 AM: Clean up exception handling. The next two lines
+            # are a workaround in order not to ignore TypeError and other
+            # exceptions that may be raised.
+            except Exception:
+                raise
+            if context is not None:
+                context.reply = reply_xml
+
+        measurements['reply_bytes'] = len(reply_xml)
 
         # Set the raw response before parsing and checking (which can fail)
         if self.debug:
             self.last_raw_reply = reply_xml
 
+        start = default_timer()
         try:
-            reply_dom = minidom.parseString(reply_xml)
+            tt = xml_to_tupletree(reply_xml)
         except ParseError as exc:
             msg = str(exc)
             parsing_error = True
@@ -928,11 +1363,12 @@ class WBEMConnection(object):
             parsing_error = True
         else:
             parsing_error = False
+            measurements['parse'] = default_timer() - start
 
         if parsing_error or self.debug:
             # Here we just improve the quality of the exception information,
             # so we do this only if it already has failed. Because the check
-            # function we invoke catches more errors than minidom.parseString,
+            # function we invoke catches more errors than the XML parser,
             # we call it also when debug is turned on.
             try:
                 check_utf8_xml_chars(reply_xml, "CIM-XML response")
@@ -941,17 +1377,17 @@ class WBEMConnection(object):
             else:
                 if parsing_error:
                     # We did not catch it in the check function, but
-                    # minidom.parseString() failed.
+                    # xml_to_tupletree() failed.
                     raise ParseError(msg) # data from previous exception
 
         if self.debug:
-            pretty_reply = reply_dom.toprettyxml(indent='  ')
-            self.last_reply = re.sub(r'>( *[\r\n]+)+( *)<', r'>\n\2<',
-                                     pretty_reply) # remove extra empty lines
+            self.last_reply = _prettify(reply_xml)
 
         # Parse response
 
-        tt = parse_cim(dom_to_tupletree(reply_dom))
+        start = default_timer()
+        tt = parse_cim(tt)
+        measurements['objects'] = default_timer() - start
 
         if tt[0] != 'CIM':
             raise ParseError('Expecting CIM element, got %s' % tt[0])
@@ -1260,6 +1696,96 @@ class WBEMConnection(object):
 
         return instances
 
+    def EnumerateInstanceTable(self, ClassName, namespace=None,
+                               LocalOnly=None, DeepInheritance=None,
+                               IncludeClassOrigin=None, PropertyList=None,
+                               **extra):
+        # pylint: disable=invalid-name
+        """
+        Enumerate the instances of a class (including instances of its
+        subclasses) in a namespace, and return them in columnar form.
+
+        This method performs the EnumerateInstances operation
+        (see :term:`DSP0200`), like
+        :meth:`~pywbem.WBEMConnection.EnumerateInstances`. The difference is
+        that the instances in the response are put directly into an
+        :class:`~pywbem.InstanceTable` object by the tuple parser, without
+        creating :class:`~pywbem.CIMInstance` objects. This is faster and
+        more compact for large result sets that are analyzed by property.
+
+        Qualifiers are not represented in an
+        :class:`~pywbem.InstanceTable`, so this method does not have an
+        `IncludeQualifiers` parameter.
+
+        Parameters:
+
+          ClassName (:term:`string` or :class:`~pywbem.CIMClassName`):
+            Name of the class to be enumerated, in any lexical case.
+            If specified as a :class:`~pywbem.CIMClassName` object, its host
+            component will be ignored.
+
+          namespace (:term:`string`):
+            Name of the CIM namespace to be used, in any lexical case.
+
+            If `None`, the namespace of the `ClassName` parameter will be used,
+            if specified as a :class:`~pywbem.CIMClassName` object. If that is
+            also `None`, the default namespace of the connection will be used.
+
+          LocalOnly (:class:`py:bool`):
+            See :meth:`~pywbem.WBEMConnection.EnumerateInstances`.
+
+          DeepInheritance (:class:`py:bool`):
+            See :meth:`~pywbem.WBEMConnection.EnumerateInstances`.
+
+          IncludeClassOrigin (:class:`py:bool`):
+            See :meth:`~pywbem.WBEMConnection.EnumerateInstances`.
+
+          PropertyList (:term:`py:iterable` of :term:`string`):
+            See :meth:`~pywbem.WBEMConnection.EnumerateInstances`.
+
+        Keyword Arguments:
+
+          extra :
+            Additional keyword arguments are passed as additional operation
+            parameters to the WBEM server.
+            Note that :term:`DSP0200` does not define any additional parameters
+            for this operation.
+
+        Returns:
+
+            An :class:`~pywbem.InstanceTable` object with one row per
+            enumerated instance. The instance paths in its path column have
+            their namespace set.
+
+        Raises:
+
+            Exceptions described in :class:`~pywbem.WBEMConnection`.
+        """
+
+        if namespace is None and isinstance(ClassName, CIMClassName):
+            namespace = ClassName.namespace
+        namespace = self._iparam_namespace_from(namespace)
+        classname = self._iparam_classname(ClassName)
+
+        table = InstanceTable(classname.classname, namespace)
+
+        self._imethodcall(
+            'EnumerateInstances',
+            namespace,
+            _table=table,
+            ClassName=classname,
+            LocalOnly=LocalOnly,
+            DeepInheritance=DeepInheritance,
+            IncludeClassOrigin=IncludeClassOrigin,
+            PropertyList=PropertyList,
+            **extra)
+
+        for path in table.paths:
+            if path is not None:
+                path.namespace = namespace
+
+        return table
+
     def GetInstance(self, InstanceName, LocalOnly=None, IncludeQualifiers=None,
                     IncludeClassOrigin=None, PropertyList=None, **extra):
         # pylint: disable=invalid-name,line-too-long
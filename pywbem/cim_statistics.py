@@ -0,0 +1,295 @@
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+The :class:`~pywbem.Statistics` class collects statistics about the WBEM
+operations performed through a :class:`~pywbem.WBEMConnection` object, for
+each combination of operation name and namespace. The statistics of a
+connection are available in its
+:attr:`~pywbem.WBEMConnection.statistics` attribute, and are collected
+only when enabled.
+
+For each operation, the number of calls and of failed calls, the number of
+Bytes of the requests and responses, and the durations of the following
+phases of the calls are collected:
+
+* ``'build'`` - Building the CIM-XML request (or taking it from the request
+  cache).
+* ``'connect'`` - Connecting to the WBEM server.
+* ``'server'`` - Sending the request and waiting for the HTTP headers of the
+  response. This is mostly the processing time of the WBEM server.
+* ``'transfer'`` - Receiving the body of the response.
+* ``'parse'`` - Parsing the CIM-XML response.
+* ``'objects'`` - Creating the CIM objects from the parsed response.
+* ``'total'`` - The entire call.
+
+The total durations of the phases and a limited number of the most recent
+durations (for percentiles) are kept. Collecting the statistics of a call
+takes a few microseconds.
+"""
+
+from __future__ import absolute_import
+
+import math
+import threading
+from collections import deque
+
+__all__ = ['Statistics', 'OperationStatistic']
+
+PHASES = ('build', 'connect', 'server', 'transfer', 'parse', 'objects',
+          'total')
+
+
+class OperationStatistic(object):
+    """
+    The statistics of one operation in one namespace, as returned by
+    :meth:`~pywbem.Statistics.snapshot`.
+
+    Attributes:
+
+      name (:term:`string`):
+        Name of the operation (e.g. ``'EnumerateInstances'``), or of the CIM
+        method for extrinsic method calls.
+
+      namespace (:term:`string`):
+        Namespace of the operation.
+
+      count (:term:`integer`):
+        Number of calls.
+
+      exception_count (:term:`integer`):
+        Number of calls that raised an exception.
+
+      request_bytes (:term:`integer`):
+        Total number of Bytes of the CIM-XML requests.
+
+      reply_bytes (:term:`integer`):
+        Total number of Bytes of the CIM-XML responses.
+
+      times (:class:`py:dict`):
+        Total durations in seconds, by phase.
+
+      counts (:class:`py:dict`):
+        Number of calls in which the phase was measured, by phase. A phase
+        is not measured in calls that fail before reaching it, or that skip
+        it (e.g. ``'connect'`` for a reused connection, or the phases up to
+        ``'transfer'`` for a response that an operation hook provided).
+    """
+
+    def __init__(self, name, namespace, max_samples):
+        self.name = name
+        self.namespace = namespace
+        self.count = 0
+        self.exception_count = 0
+        self.request_bytes = 0
+        self.reply_bytes = 0
+        self.times = dict([(phase, 0.0) for phase in PHASES])
+        self.counts = dict([(phase, 0) for phase in PHASES])
+        self._samples = dict([(phase, deque(maxlen=max_samples))
+                              for phase in PHASES])
+
+    def __repr__(self):
+        return '%s(name=%r, namespace=%r, count=%r, exception_count=%r, ' \
+               'avg_total=%r)' % \
+               (self.__class__.__name__, self.name, self.namespace,
+                self.count, self.exception_count, self.avg_time('total'))
+
+    def _record(self, measurements, failed):
+        """Add the measurements of a call."""
+        self.count += 1
+        if failed:
+            self.exception_count += 1
+        self.request_bytes += measurements.get('request_bytes', 0)
+        self.reply_bytes += measurements.get('reply_bytes', 0)
+        for phase in PHASES:
+            secs = measurements.get(phase)
+            if secs is not None:
+                self.times[phase] += secs
+                self.counts[phase] += 1
+                self._samples[phase].append(secs)
+
+    def copy(self):
+        """Return a copy of the statistics."""
+        result = OperationStatistic(self.name, self.namespace,
+                                    self._samples['total'].maxlen)
+        result.count = self.count
+        result.exception_count = self.exception_count
+        result.request_bytes = self.request_bytes
+        result.reply_bytes = self.reply_bytes
+        result.times = self.times.copy()
+        result.counts = self.counts.copy()
+        for phase in PHASES:
+            result._samples[phase].extend(self._samples[phase])
+        return result
+
+    def avg_time(self, phase):
+        """
+        Return the average duration of a phase in seconds, over the calls in
+        which the phase was measured (see :attr:`counts`), or `None` if the
+        phase was not measured.
+        """
+        count = self.counts[phase]
+        if not count:
+            return None
+        return self.times[phase] / count
+
+    def percentile(self, phase, percent):
+        """
+        Return a percentile of the durations of a phase of the most recent
+        calls in seconds (nearest rank), or `None` if the phase was not
+        measured.
+
+        Parameters:
+
+          phase (:term:`string`):
+            The phase (e.g. ``'total'``).
+
+          percent (:term:`number`):
+            The percentile, from 0 to 100 (e.g. 50 for the median).
+        """
+        samples = sorted(self._samples[phase])
+        if not samples:
+            return None
+        rank = int(math.ceil(len(samples) * percent / 100.0))
+        return samples[min(max(rank, 1), len(samples)) - 1]
+
+
+class Statistics(object):
+    """
+    Statistics about the WBEM operations performed through a
+    :class:`~pywbem.WBEMConnection` object.
+
+    Attributes:
+
+      enabled (:class:`py:bool`):
+        Indicates whether the statistics are collected.
+    """
+
+    def __init__(self, enabled=False, max_samples=1000):
+        """
+        Parameters:
+
+          enabled (:class:`py:bool`):
+            Collect the statistics.
+
+          max_samples (:term:`integer`):
+            Maximum number of the most recent durations of each phase of each
+            operation that are kept for percentiles.
+        """
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._operations = {}
+
+    def __getstate__(self):
+        """
+        Return the state of the object for pickling and copying, without the
+        lock.
+        """
+        with self._lock:
+            state = self.__dict__.copy()
+            state['_operations'] = dict(self._operations)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '%s(enabled=%r, operations=%d)' % \
+               (self.__class__.__name__, self.enabled,
+                len(self._operations))
+
+    def _record(self, name, namespace, measurements, failed):
+        """
+        Add the measurements of a call of an operation.
+
+        `measurements` is a dictionary with the durations by phase in
+        seconds, and the ``'request_bytes'`` and ``'reply_bytes'`` items.
+        Phases that were not reached are missing.
+        """
+        key = (name, namespace)
+        with self._lock:
+            stat = self._operations.get(key)
+            if stat is None:
+                stat = OperationStatistic(name, namespace, self.max_samples)
+                self._operations[key] = stat
+            stat._record(measurements, failed)
+
+    def snapshot(self):
+        """
+        Return a copy of the current statistics.
+
+        Returns:
+
+            :class:`py:list` of :class:`~pywbem.OperationStatistic`: The
+            statistics of the operations, sorted by operation name and
+            namespace.
+        """
+        with self._lock:
+            return [self._operations[key].copy()
+                    for key in sorted(self._operations)]
+
+    def reset(self):
+        """
+        Discard the statistics collected so far.
+        """
+        with self._lock:
+            self._operations = {}
+
+    def formatted(self, percent=90):
+        """
+        Return the current statistics as a human readable table.
+
+        For each operation, the table shows the number of calls and of failed
+        calls, the average number of Bytes of the requests and responses, and
+        the average and the specified percentile of the durations of the
+        phases in milliseconds.
+
+        Parameters:
+
+          percent (:term:`number`):
+            The percentile of the durations, from 0 to 100.
+
+        Returns:
+
+            :term:`unicode string`: The table.
+        """
+        line = u'%-24s %-16s %7s %6s %9s %9s%s'
+        lines = [line % ('Operation', 'Namespace', 'Count', 'Exc',
+                         'ReqBytes', 'RepBytes',
+                         ''.join(['%14s' % phase for phase in PHASES])),
+                 line % ('', '', '', '', '', '',
+                         ''.join(['%14s' % ('avg/p%g' % percent)
+                                  for _ in PHASES]))]
+        for stat in self.snapshot():
+            times = []
+            for phase in PHASES:
+                pct = stat.percentile(phase, percent)
+                if pct is None:
+                    times.append('%14s' % '-')
+                else:
+                    times.append('%14s' % ('%.1f/%.1f' %
+                                           (stat.avg_time(phase) * 1000,
+                                            pct * 1000)))
+            lines.append(line % (stat.name, stat.namespace, stat.count,
+                                 stat.exception_count,
+                                 stat.request_bytes // stat.count,
+                                 stat.reply_bytes // stat.count,
+                                 ''.join(times)))
+        lines = [ln.rstrip() for ln in lines]
+        return u'\n'.join(lines) + u'\n'
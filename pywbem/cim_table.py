@@ -0,0 +1,352 @@
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+The :class:`~pywbem.InstanceTable` class represents a list of CIM instances
+in columnar form: One list of values per property, plus one column for the
+instance paths.
+
+This representation is meant for analysis of large result sets, where
+iterating through :class:`~pywbem.CIMInstance` objects and looking up their
+properties one by one is expensive. The tuple parser can fill an
+:class:`~pywbem.InstanceTable` object directly from the CIM-XML response,
+without creating :class:`~pywbem.CIMInstance` objects in the first place (see
+:meth:`~pywbem.WBEMConnection.EnumerateInstanceTable`).
+
+Numeric columns can optionally be converted to NumPy masked arrays, if the
+`numpy` package is installed. NumPy is not a prerequisite of pywbem; it is
+imported only when such a conversion is requested.
+"""
+
+from __future__ import absolute_import
+
+import six
+
+from .cim_obj import CIMInstance, CIMProperty, _ensure_unicode
+
+__all__ = ['InstanceTable']
+
+# Mapping of CIM type names to NumPy dtype names, for the CIM types whose
+# values can be represented in NumPy arrays.
+_NUMPY_DTYPES = {
+    'boolean': 'bool',
+    'uint8': 'uint8',
+    'sint8': 'int8',
+    'uint16': 'uint16',
+    'sint16': 'int16',
+    'uint32': 'uint32',
+    'sint32': 'int32',
+    'uint64': 'uint64',
+    'sint64': 'int64',
+    'real32': 'float32',
+    'real64': 'float64',
+}
+
+
+class _Column(object):
+    # pylint: disable=too-few-public-methods
+    """
+    A column of an :class:`~pywbem.InstanceTable`: The property values of
+    one property across all rows, and the property metadata that is needed
+    to re-create :class:`~pywbem.CIMProperty` objects.
+    """
+
+    __slots__ = ['name', 'type', 'is_array', 'reference_class',
+                 'embedded_object', 'values', 'absent']
+
+    def __init__(self, name, type_, is_array, reference_class,
+                 embedded_object, nrows):
+        # pylint: disable=too-many-arguments
+        self.name = name
+        self.type = type_
+        self.is_array = is_array
+        self.reference_class = reference_class
+        self.embedded_object = embedded_object
+        # Rows added before this column existed do not have the property.
+        self.values = [None] * nrows
+        self.absent = set(six.moves.range(nrows))
+
+
+class InstanceTable(object):
+    """
+    A columnar representation of a list of CIM instances.
+
+    Each property that occurs in any of the instances is represented as a
+    column, i.e. a list of the property values of all instances, in the order
+    in which the instances were added. A property that is NULL in an instance
+    is represented as `None` in its column. Rows that do not have a property
+    at all (e.g. instances of a subclass that adds properties) are also
+    represented as `None`, but they are remembered so that
+    :meth:`~pywbem.InstanceTable.row` does not invent properties for them.
+
+    Property names (that is, column names) are case-insensitive; the lexical
+    case of the first occurrence of a property is preserved.
+
+    Property qualifiers, class origin and propagation information are not
+    represented in the table.
+
+    Attributes:
+
+      classname (:term:`unicode string`):
+        Name of the class that was enumerated, or `None`.
+
+      namespace (:term:`unicode string`):
+        Name of the CIM namespace of the instances, or `None`.
+
+      paths (:class:`py:list` of :class:`~pywbem.CIMInstanceName`):
+        The path column: Instance paths of the rows. An item is `None` if the
+        instance of that row does not have a path.
+
+      classnames (:class:`py:list` of :term:`unicode string`):
+        Creation class names of the rows.
+    """
+
+    def __init__(self, classname=None, namespace=None):
+        """
+        Parameters:
+
+          classname (:term:`string`):
+            Name of the class that was enumerated, or `None`.
+
+          namespace (:term:`string`):
+            Name of the CIM namespace of the instances, or `None`.
+        """
+        self.classname = _ensure_unicode(classname)
+        self.namespace = _ensure_unicode(namespace)
+        self.paths = []
+        self.classnames = []
+        self._columns = []      # _Column objects, in order of appearance
+        self._index = {}        # lower-cased property name -> _Column
+
+    @classmethod
+    def from_instances(cls, instances, classname=None, namespace=None):
+        """
+        Create a new :class:`~pywbem.InstanceTable` object from existing
+        :class:`~pywbem.CIMInstance` objects.
+
+        Parameters:
+
+          instances (:term:`py:iterable` of :class:`~pywbem.CIMInstance`):
+            The instances that become the rows of the table.
+
+          classname (:term:`string`):
+            Name of the class that was enumerated, or `None`.
+
+          namespace (:term:`string`):
+            Name of the CIM namespace of the instances, or `None`.
+
+        Returns:
+
+          The new :class:`~pywbem.InstanceTable` object.
+        """
+        table = cls(classname, namespace)
+        for inst in instances:
+            table.append_instance(inst)
+        return table
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        """
+        Iterate through the rows of the table, as
+        :class:`~pywbem.CIMInstance` objects.
+        """
+        for index in six.moves.range(len(self.paths)):
+            yield self.row(index)
+
+    def __contains__(self, name):
+        return name.lower() in self._index
+
+    def __getitem__(self, name):
+        """
+        Return the column for a property name, as a :class:`py:list` of
+        property values. The returned list is the column itself and should
+        not be modified.
+
+        Raises:
+
+          KeyError: There is no column with that name.
+        """
+        return self._index[name.lower()].values
+
+    def __repr__(self):
+        return '%s(classname=%r, namespace=%r, rows=%d, columns=%r)' % \
+               (self.__class__.__name__, self.classname, self.namespace,
+                len(self.paths), self.column_names)
+
+    @property
+    def column_names(self):
+        """
+        :class:`py:list` of :term:`unicode string`: The property names of the
+        columns, in the order in which they were first encountered.
+        """
+        return [col.name for col in self._columns]
+
+    def column_type(self, name):
+        """
+        Return the CIM type name of a column (e.g. ``'uint64'``), and whether
+        its values are arrays, as a tuple (type, is_array).
+
+        Raises:
+
+          KeyError: There is no column with that name.
+        """
+        col = self._index[name.lower()]
+        return col.type, col.is_array
+
+    def _column(self, name, type_, is_array, reference_class=None,
+                embedded_object=None):
+        # pylint: disable=too-many-arguments
+        """Return the column for a property, creating it if needed."""
+        key = name.lower()
+        try:
+            return self._index[key]
+        except KeyError:
+            col = _Column(name, type_, is_array, reference_class,
+                          embedded_object, len(self.paths))
+            self._index[key] = col
+            self._columns.append(col)
+            return col
+
+    def append(self, path, classname, properties):
+        """
+        Append a row to the table.
+
+        This is the low-level method used by the tuple parser, which provides
+        the property values without creating :class:`~pywbem.CIMProperty`
+        objects.
+
+        Parameters:
+
+          path (:class:`~pywbem.CIMInstanceName`):
+            Instance path of the row, or `None`.
+
+          classname (:term:`string`):
+            Creation class name of the row.
+
+          properties (:term:`py:iterable` of :class:`py:tuple`):
+            The properties of the row, as tuples of (name, value, type,
+            is_array, reference_class, embedded_object), with the meaning of
+            the corresponding :class:`~pywbem.CIMProperty` attributes.
+        """
+        row = len(self.paths)
+        seen = set()
+        for name, value, type_, is_array, ref_class, emb_obj in properties:
+            col = self._column(name, type_, is_array, ref_class, emb_obj)
+            if id(col) in seen:
+                col.values[row] = value
+                continue
+            col.values.append(value)
+            seen.add(id(col))
+        for col in self._columns:
+            if id(col) not in seen:
+                col.values.append(None)
+                col.absent.add(row)
+        self.paths.append(path)
+        self.classnames.append(_ensure_unicode(classname))
+
+    def append_instance(self, instance):
+        """
+        Append a :class:`~pywbem.CIMInstance` object as a row to the table.
+
+        Parameters:
+
+          instance (:class:`~pywbem.CIMInstance`):
+            The instance to be added.
+        """
+        self.append(
+            instance.path, instance.classname,
+            [(p.name, p.value, p.type, p.is_array, p.reference_class,
+              p.embedded_object) for p in instance.properties.values()])
+
+    def row(self, index):
+        """
+        Return a row of the table as a new :class:`~pywbem.CIMInstance`
+        object.
+
+        Parameters:
+
+          index (:term:`integer`):
+            Index of the row, as for Python lists.
+
+        Returns:
+
+          A :class:`~pywbem.CIMInstance` object with the properties of the
+          row. Its `path` attribute is the object in the path column.
+        """
+        if index < 0:
+            index += len(self.paths)
+        if index < 0 or index >= len(self.paths):
+            raise IndexError('row index out of range: %s' % index)
+        inst = CIMInstance(self.classnames[index], path=self.paths[index])
+        props = inst.properties
+        for col in self._columns:
+            if index in col.absent:
+                continue
+            props[col.name] = CIMProperty(
+                col.name, col.values[index], type=col.type,
+                is_array=col.is_array, reference_class=col.reference_class,
+                embedded_object=col.embedded_object)
+        return inst
+
+    def to_instances(self):
+        """
+        Return all rows of the table as a :class:`py:list` of new
+        :class:`~pywbem.CIMInstance` objects.
+        """
+        return list(self)
+
+    def to_numpy(self, name):
+        """
+        Return a numeric column as a NumPy masked array, where NULL values
+        (and rows that do not have the property) are masked.
+
+        This requires the `numpy` package to be installed.
+
+        Parameters:
+
+          name (:term:`string`):
+            Name of the property (column).
+
+        Returns:
+
+          A :class:`numpy.ma.MaskedArray` object with a dtype corresponding
+          to the CIM type of the column (e.g. ``uint64`` for CIM type
+          ``uint64``, ``float64`` for CIM type ``real64``).
+
+        Raises:
+
+          KeyError: There is no column with that name.
+          TypeError: The column is an array property or its CIM type cannot
+            be represented in a NumPy array.
+          ImportError: The `numpy` package is not installed.
+        """
+        col = self._index[name.lower()]
+        try:
+            dtype = _NUMPY_DTYPES[col.type]
+        except KeyError:
+            raise TypeError('Column %r has CIM type %r, which cannot be '\
+                            'converted to a NumPy array' % (col.name, col.type))
+        if col.is_array:
+            raise TypeError('Column %r is an array property and cannot be '\
+                            'converted to a NumPy array' % col.name)
+
+        import numpy  # pylint: disable=import-error
+
+        mask = [value is None for value in col.values]
+        data = [0 if value is None else value for value in col.values]
+        return numpy.ma.MaskedArray(numpy.array(data, dtype=dtype), mask=mask)
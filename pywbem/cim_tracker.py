@@ -0,0 +1,336 @@
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+The :class:`~pywbem.ChangeTracker` class detects changes of the instances of
+a class, by periodically enumerating them and comparing the result with that
+of the previous enumeration.
+
+The enumerated instances are kept as a snapshot for each combination of
+namespace, class name and property list, and are compared with
+:func:`~pywbem.diff_instances`. The changes are reported as a list of
+:class:`~pywbem.ChangeEvent` objects.
+
+Optionally, the tracker hashes the raw CIM-XML of each instance in the
+response and skips the parsing of instances whose CIM-XML is unchanged since
+the previous enumeration. For an unchanged instance, the instance object
+from the previous snapshot is used again.
+"""
+
+# pylint: disable=protected-access
+
+from __future__ import absolute_import
+
+import re
+import hashlib
+
+from .cim_obj import CIMClassName
+from .cim_diff import diff_instances
+from .exceptions import ParseError
+
+__all__ = ['ChangeTracker', 'ChangeEvent']
+
+# A VALUE.NAMEDINSTANCE element in a CIM-XML response. These elements cannot
+# be nested: Embedded instances are represented as escaped text.
+_NAMEDINSTANCE_RE = re.compile(
+    br'<VALUE\.NAMEDINSTANCE\b.*?</VALUE\.NAMEDINSTANCE\s*>', re.DOTALL)
+
+
+class ChangeEvent(object):
+    # pylint: disable=too-few-public-methods
+    """
+    A change of an instance, as reported by
+    :meth:`~pywbem.ChangeTracker.poll`.
+
+    Attributes:
+
+      kind (:term:`string`):
+        The kind of change: ``'added'``, ``'removed'`` or ``'modified'``.
+
+      path (:class:`~pywbem.CIMInstanceName`):
+        Instance path of the instance.
+
+      instance (:class:`~pywbem.CIMInstance`):
+        The new instance, or for removed instances, the old instance.
+
+      properties (:class:`py:list` of :term:`unicode string`):
+        For modified instances, the names of the properties that were added,
+        removed or changed. `None` for other kinds of changes.
+    """
+
+    __slots__ = ['kind', 'path', 'instance', 'properties']
+
+    ADDED = 'added'
+    REMOVED = 'removed'
+    MODIFIED = 'modified'
+
+    def __init__(self, kind, instance, properties=None):
+        self.kind = kind
+        self.path = instance.path
+        self.instance = instance
+        self.properties = properties
+
+    def __repr__(self):
+        return '%s(kind=%r, path=%r, properties=%r)' % \
+               (self.__class__.__name__, self.kind, self.path,
+                self.properties)
+
+
+class _Snapshot(object):
+    # pylint: disable=too-few-public-methods
+    """
+    The instances of one enumeration, and if the raw CIM-XML is hashed, a
+    dictionary of these instances by the digests of their CIM-XML.
+    """
+
+    def __init__(self, instances, digests=None):
+        self.instances = instances
+        self.digests = digests
+
+
+class ChangeTracker(object):
+    """
+    Tracks changes of the instances of classes on a WBEM server.
+
+    Each call to :meth:`poll` enumerates the instances of a class and returns
+    the changes since the previous call for the same namespace, class name
+    and property list. The first call returns all instances as added.
+
+    The instance objects returned in the change events and by
+    :meth:`snapshot` are kept in the snapshots and must not be modified by
+    the caller.
+    """
+
+    def __init__(self, conn, hash_xml=False):
+        """
+        Parameters:
+
+          conn (:class:`~pywbem.WBEMConnection`):
+            The connection to the WBEM server.
+
+          hash_xml (:class:`py:bool`):
+            Hash the raw CIM-XML of each instance in the responses, and skip
+            the parsing of instances whose CIM-XML is unchanged.
+
+            This requires that the WBEM server represents unchanged instances
+            with the same CIM-XML in each response, which is normally the
+            case. Otherwise, the instances are parsed and compared as usual.
+        """
+        self.conn = conn
+        self.hash_xml = hash_xml
+        self._snapshots = {}
+
+    def __repr__(self):
+        return '%s(conn=%r, hash_xml=%r, snapshots=%d)' % \
+               (self.__class__.__name__, self.conn, self.hash_xml,
+                len(self._snapshots))
+
+    def _key(self, ClassName, namespace, PropertyList):
+        # pylint: disable=invalid-name
+        """
+        Return the namespace, the class name for the request, and the
+        snapshot key.
+        """
+        namespace = self.conn._iparam_namespace_from(namespace)
+        classname = self.conn._iparam_classname(ClassName)
+        if PropertyList is not None:
+            PropertyList = tuple(sorted(set(
+                p.lower() for p in PropertyList)))
+        key = (namespace.strip('/').lower(), classname.classname.lower(),
+               PropertyList)
+        return namespace, classname, key
+
+    def poll(self, ClassName, namespace=None, PropertyList=None, **extra):
+        # pylint: disable=invalid-name
+        """
+        Enumerate the instances of a class and return the changes since the
+        previous call for the same namespace, class name and property list.
+
+        The instances are enumerated with the EnumerateInstances operation,
+        as with :meth:`~pywbem.WBEMConnection.EnumerateInstances`. Any other
+        operation parameters should be the same for each call with the same
+        namespace, class name and property list.
+
+        Parameters:
+
+          ClassName (:term:`string` or :class:`~pywbem.CIMClassName`):
+            Name of the class to be enumerated, in any lexical case.
+
+          namespace (:term:`string`):
+            Name of the CIM namespace to be used, in any lexical case.
+
+            If `None`, the namespace of the `ClassName` parameter will be used,
+            if specified as a :class:`~pywbem.CIMClassName` object. If that is
+            also `None`, the default namespace of the connection will be used.
+
+          PropertyList (:term:`py:iterable` of :term:`string`):
+            The names of the properties to be included in the instances, in
+            any lexical case. The order of the names does not matter.
+
+            If `None`, all properties are included.
+
+        Keyword Arguments:
+
+          extra :
+            Additional operation parameters (e.g. `DeepInheritance`) that are
+            passed to the EnumerateInstances operation.
+
+        Returns:
+
+          :class:`py:list` of :class:`~pywbem.ChangeEvent`: The changes,
+          with the added instances first, followed by the modified instances,
+          both in the order of the response, followed by the removed
+          instances in the order of the previous response.
+
+        Raises:
+
+            Exceptions described in :class:`~pywbem.WBEMConnection`.
+        """
+        if namespace is None and isinstance(ClassName, CIMClassName):
+            namespace = ClassName.namespace
+        if PropertyList is not None:
+            PropertyList = list(PropertyList)
+        namespace, classname, key = self._key(ClassName, namespace,
+                                              PropertyList)
+        old = self._snapshots.get(key)
+        old_instances = old.instances if old is not None else []
+
+        if self.hash_xml:
+            new, parsed, reused = self._enumerate_hashed(
+                namespace, classname, PropertyList, old, extra)
+            if reused:
+                old_instances = [inst for inst in old_instances
+                                 if id(inst) not in reused]
+        else:
+            parsed = self._enumerate(namespace, classname, PropertyList,
+                                     None, extra)
+            new = _Snapshot(parsed)
+
+        diff = diff_instances(old_instances, parsed)
+        self._snapshots[key] = new
+
+        events = [ChangeEvent(ChangeEvent.ADDED, inst)
+                  for inst in diff.added]
+        events.extend(ChangeEvent(ChangeEvent.MODIFIED, change.new,
+                                  change.added_properties +
+                                  change.removed_properties +
+                                  change.changed_properties)
+                      for change in diff.changed)
+        events.extend(ChangeEvent(ChangeEvent.REMOVED, inst)
+                      for inst in diff.removed)
+        return events
+
+    def _enumerate(self, namespace, classname, PropertyList, reply_filter,
+                   extra):
+        # pylint: disable=invalid-name
+        """
+        Enumerate the instances, like WBEMConnection.EnumerateInstances()
+        does.
+        """
+        result = self.conn._imethodcall(
+            'EnumerateInstances',
+            namespace,
+            _reply_filter=reply_filter,
+            ClassName=classname,
+            PropertyList=PropertyList,
+            **extra)
+
+        instances = []
+        if result is not None:
+            instances = result[2]
+
+        for instance in instances:
+            instance.path.namespace = namespace
+
+        return instances
+
+    def _enumerate_hashed(self, namespace, classname, PropertyList, old,
+                          extra):
+        # pylint: disable=invalid-name,too-many-arguments
+        """
+        Enumerate the instances, parsing only those whose CIM-XML is not in
+        the old snapshot.
+
+        Returns a tuple of the new snapshot, the list of parsed instances, and
+        a set with the ids of the instances of the old snapshot that are used
+        again in the new snapshot.
+        """
+        old_digests = old.digests if old is not None else None
+        sequence = []   # digest of each instance, or None if it is parsed
+        parsed_digests = []
+
+        def reply_filter(reply_xml):
+            """Remove the instances with known digests from the response."""
+            pieces = []
+            pos = 0
+            for match in _NAMEDINSTANCE_RE.finditer(reply_xml):
+                digest = hashlib.sha1(match.group()).digest()
+                if old_digests is not None and digest in old_digests:
+                    pieces.append(reply_xml[pos:match.start()])
+                    pos = match.end()
+                    sequence.append(digest)
+                else:
+                    sequence.append(None)
+                    parsed_digests.append(digest)
+            pieces.append(reply_xml[pos:])
+            return b''.join(pieces)
+
+        parsed = self._enumerate(namespace, classname, PropertyList,
+                                 reply_filter, extra)
+        if len(parsed) != len(parsed_digests):
+            raise ParseError('Expecting %d instances in the response, got %d'
+                             % (len(parsed_digests), len(parsed)))
+
+        instances = []
+        digests = {}
+        reused = set()
+        parsed_iter = iter(zip(parsed_digests, parsed))
+        for digest in sequence:
+            if digest is None:
+                digest, inst = next(parsed_iter)
+            else:
+                inst = old_digests[digest]
+                reused.add(id(inst))
+            instances.append(inst)
+            digests[digest] = inst
+        return _Snapshot(instances, digests), parsed, reused
+
+    def snapshot(self, ClassName, namespace=None, PropertyList=None):
+        # pylint: disable=invalid-name
+        """
+        Return the instances of the last enumeration for a namespace, class
+        name and property list, or `None` if there was none.
+
+        The parameters are interpreted as for :meth:`poll`.
+
+        Returns:
+
+          :class:`py:list` of :class:`~pywbem.CIMInstance`: The instances.
+        """
+        if namespace is None and isinstance(ClassName, CIMClassName):
+            namespace = ClassName.namespace
+        key = self._key(ClassName, namespace, PropertyList)[2]
+        old = self._snapshots.get(key)
+        if old is None:
+            return None
+        return list(old.instances)
+
+    def clear(self):
+        """
+        Remove all snapshots, so that the next call to :meth:`poll` for any
+        class returns all instances as added.
+        """
+        self._snapshots.clear()
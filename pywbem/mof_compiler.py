@@ -44,22 +44,29 @@ from __future__ import print_function, absolute_import
 import sys
 import os
 import re
+import json
+import copy
+import hashlib
+import threading
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 from abc import ABCMeta, abstractmethod
 
 import six
-from ply import yacc, lex
 
 from .cim_obj import CIMInstance, CIMInstanceName, CIMClass, \
                      CIMProperty, CIMMethod, CIMParameter, \
                      CIMQualifier, CIMQualifierDeclaration, NocaseDict, \
-                     tocimobj
+                     tocimobj, mofstr, MOF_INDENT, MAX_MOF_LINE, _value2mof, \
+                     _mof_escape_re, _INTEGER_TYPES
 from .cim_operations import WBEMConnection
+from .cim_binary import CIMBinaryWriter, CIMBinaryReader
 from .cim_constants import *  # pylint: disable=wildcard-import
 from .cim_constants import _statuscode2string
 from .exceptions import Error, CIMError
 
 __all__ = ['MOFParseError', 'MOFWBEMConnection', 'MOFCompiler',
-           'BaseRepositoryConnection']
+           'BaseRepositoryConnection', 'MOFDependencyGraph', 'MOFWriter']
 
 # The following pylint is applied for the complete file because invalid
 # names are used throughout the file and about 200 flags generated if
@@ -174,7 +181,7 @@ utf8_4_1 = r'\xF0[\x90-\xBF][\x80-\xBF][\x80-\xBF]'
 utf8_4_2 = r'[\xF1-\xF3][\x80-\xBF][\x80-\xBF][\x80-\xBF]'
 utf8_4_3 = r'\xF4[\x80-\x8F][\x80-\xBF][\x80-\xBF]'
 
-utf8Char = r'(%s)|(%s)|(%s)|(%s)|(%s)|(%s)|(%s)|(%s)' % \
+utf8Char = r'(?:%s)|(?:%s)|(?:%s)|(?:%s)|(?:%s)|(?:%s)|(?:%s)|(?:%s)' % \
            (utf8_2, utf8_3_1, utf8_3_2, utf8_3_3, utf8_3_4, utf8_4_1,
             utf8_4_2, utf8_4_3)
 
@@ -184,8 +191,8 @@ def t_COMMENT(t):
     return  # discard token
 
 def t_MCOMMENT(t):
-    r'/\*(.|\n)*?\*/'
-    t.lineno += t.value.count('\n')
+    r'/\*(?:.|\n)*?\*/'
+    t.lexer.lineno += t.value.count('\n')
     return  # discard token
 
 # These simple tokens must also be defined as functions, in order to control
@@ -243,25 +250,39 @@ def t_decimalValue(t):
 
 simpleEscape = r"""[bfnrt'"\\]"""
 hexEscape = r'x[0-9a-fA-F]{1,4}'
-escapeSequence = r'[\\]((%s)|(%s))' % (simpleEscape, hexEscape)
-cChar = r"[^'\\\n\r]|(%s)" % escapeSequence
-sChar = r'[^"\\\n\r]|(%s)' % escapeSequence
-
-charvalue_re = r"'(%s)'" % cChar
-
-@lex.TOKEN(charvalue_re)
+escapeSequence = r'[\\](?:%s|%s)' % (simpleEscape, hexEscape)
+cChar = r"[^'\\\n\r]|(?:%s)" % escapeSequence
+sChar = r'[^"\\\n\r]|(?:%s)' % escapeSequence
+
+def _token(regex):
+    """Decorator for a token function that sets its regular expression,
+    like `ply.lex.TOKEN`, but without importing the `ply` package when
+    this module is imported."""
+    def set_regex(func):
+        func.regex = regex
+        func.__doc__ = regex
+        return func
+    return set_regex
+
+charvalue_re = r"'(?:%s)'" % cChar
+
+@_token(charvalue_re)
 def t_charValue(t):
     return t
 
-stringvalue_re = r'"(%s)*"' % sChar
+# The regular expressions for string values and identifiers match runs of
+# simple characters without repeating a group for each character, which is
+# much faster.
+stringvalue_re = r'"[^"\\\n\r]*(?:%s[^"\\\n\r]*)*"' % escapeSequence
 
-@lex.TOKEN(stringvalue_re)
+@_token(stringvalue_re)
 def t_stringValue(t):
     return t
 
-identifier_re = r'([a-zA-Z_]|(%s))([0-9a-zA-Z_]|(%s))*' % (utf8Char, utf8Char)
+identifier_re = r'(?:[a-zA-Z_]|%s)[0-9a-zA-Z_]*(?:(?:%s)[0-9a-zA-Z_]*)*' % \
+                (utf8Char, utf8Char)
 
-@lex.TOKEN(identifier_re)
+@_token(identifier_re)
 def t_IDENTIFIER(t):
     t.type = reserved.get(t.value.lower(), 'IDENTIFIER')
     return t
@@ -287,6 +308,174 @@ def t_error(t):
     t.lexer.parser.log(msg)
     t.lexer.skip(1)
 
+# The tokens for _MOFLexer, as one regular expression with a named group for
+# each kind of token. The characters in t_ignore are skipped before each
+# token, and newlines are matched like tokens. Any other character is matched
+# as a literal or as an invalid character, so that the regular expression
+# matches at every position up to the end of the input string. Trailing
+# t_ignore characters are matched by the empty `end` token, which must be
+# tried before the `error` token: otherwise, the last of them would be
+# matched as an invalid character.
+#
+# The LEX analyzer of PLY tries the token functions in the order of their
+# definition. Except for the numeric tokens, the kinds of tokens start with
+# different characters, so they are tried in the order that is the fastest
+# for typical MOF instead, with identifiers last. The numeric tokens keep
+# their order and are tried only for characters that can start them.
+_token_re = re.compile('[%s]*(?:%s)' % (t_ignore, '|'.join([
+    '(?P<literal>[%s])' % re.escape(literals),
+    r'(?P<newline>\n[%s\n]*)' % t_ignore,
+    '(?P<stringValue>%s)' % stringvalue_re,
+    '(?=[-+.0-9])(?:%s)' % '|'.join(
+        ['(?P<%s>%s)' % (func.__name__[2:], func.__doc__)
+         for func in [t_floatValue, t_hexValue, t_binaryValue, t_octalValue,
+                      t_decimalValue]]),
+    '(?P<COMMENT>%s)' % t_COMMENT.__doc__,
+    '(?P<MCOMMENT>%s)' % t_MCOMMENT.__doc__,
+    '(?P<charValue>%s)' % charvalue_re,
+    '(?P<IDENTIFIER>%s)' % identifier_re,
+    r'(?P<end>\Z)',
+    '(?P<error>.)'])), re.VERBOSE)
+
+# The kind of token by the index of the named group in _token_re. For a
+# match, this index is its `lastindex`, because the named group is the
+# outermost group.
+_token_kinds = [None] * (_token_re.groups + 1)
+for _kind, _index in _token_re.groupindex.items():
+    _token_kinds[_index] = _kind
+
+
+class _MOFToken(object):
+    # pylint: disable=too-few-public-methods
+    """A token returned by _MOFLexer, with the attributes of a token returned
+    by the LEX analyzer of PLY."""
+
+    __slots__ = ['type', 'value', 'lineno', 'lexpos', 'lexer']
+
+    def __init__(self, type_, value, lineno, lexpos):
+        self.type = type_
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+
+    def __repr__(self):
+        return 'LexToken(%s,%r,%d,%d)' % (self.type, self.value, self.lineno,
+                                          self.lexpos)
+
+
+class _MOFLexer(object):
+    """
+    The lexical analyzer of the MOF compiler.
+
+    It returns the same tokens as the LEX analyzer of PLY with the t_* token
+    functions of this module, with these differences in how they are found:
+
+    * All tokens are matched with a single regular expression, by iterating
+      over its matches in the input string.
+    * Whitespace is matched together with the next token. The line number is
+      updated only for matches of newlines and multi-line comments.
+    * Keywords are looked up without calling a token function. Only invalid
+      characters and binary and octal numbers are passed to t_error(),
+      t_binaryValue() and t_octalValue(), respectively, which report the
+      invalid ones.
+
+    The `lexpos` attribute is the position in the input string only while a
+    token function is called and at the end of the input string. Token
+    functions can change it with :meth:`skip`.
+    """
+
+    def __init__(self):
+        self.lexdata = None
+        self.lexpos = 0
+        self.lexlen = 0
+        self.lineno = 1
+        self.parser = None
+        self._tokens = iter(())
+
+    def clone(self):
+        """Return a copy of this lexer. Its input string must be set with
+        :meth:`input` before it is used."""
+        return copy.copy(self)
+
+    def input(self, data):
+        """Set the input string, and start at its beginning."""
+        self.lexdata = data
+        self.lexpos = 0
+        self.lexlen = len(data)
+        self._tokens = self._generate()
+
+    def skip(self, n):
+        """Skip the next n characters of the input string."""
+        self.lexpos += n
+
+    def token(self):
+        """Return the next token, or `None` at the end of the input
+        string."""
+        return next(self._tokens, None)
+
+    def _generate(self):
+        """Generate the tokens of the input string, starting at the current
+        position."""
+        # pylint: disable=too-many-branches
+        data = self.lexdata
+        lineno = self.lineno
+        kinds = _token_kinds
+        new = object.__new__
+        matches = _token_re.finditer(data, self.lexpos)
+        while True:
+            for m in matches:
+                index = m.lastindex
+                kind = kinds[index]
+                if kind == 'newline' or kind == 'MCOMMENT':
+                    lineno += data.count('\n', m.start(index), m.end())
+                    self.lineno = lineno
+                    continue
+                if kind == 'COMMENT' or kind == 'end':
+                    continue
+                value = m.group(index)
+                if kind == 'binaryValue' or kind == 'octalValue' or \
+                        kind == 'error':
+                    # The token functions report invalid tokens, and may skip
+                    # characters
+                    pos = m.start(index)
+                    end = m.end()
+                    if kind == 'error':
+                        tok = _MOFToken(kind, data[pos:], lineno, pos)
+                        self.lexpos = pos
+                    else:
+                        tok = _MOFToken(kind, value, lineno, pos)
+                        self.lexpos = end
+                    tok.lexer = self
+                    tok = globals()['t_' + kind](tok)
+                    if kind == 'error' and self.lexpos == pos:
+                        from ply.lex import LexError
+                        raise LexError("Scanning error. Illegal character "
+                                       "'%s'" % value, data[pos:])
+                    if self.lexpos != end:
+                        if tok:
+                            yield tok
+                        break
+                    if tok:
+                        yield tok
+                    continue
+                # This is the same as _MOFToken(...), but faster
+                tok = new(_MOFToken)
+                if kind == 'literal':
+                    tok.type = value
+                elif kind == 'IDENTIFIER':
+                    tok.type = reserved.get(value.lower(), kind)
+                else:
+                    tok.type = kind
+                tok.value = value
+                tok.lineno = lineno
+                tok.lexpos = m.start(index)
+                yield tok
+            else:
+                self.lexpos = self.lexlen + 1
+                return
+            matches = _token_re.finditer(data, self.lexpos)
+
+
 class MOFParseError(Error):
     """
     This exception is raised when MOF cannot be parsed correctly, e.g. for
@@ -389,6 +578,56 @@ def _create_ns(p, handle, ns):
         handle.CreateInstance(inst)
 
 
+class _NotDeferrable(Exception):
+    """Raised when MOF that is parsed in a worker process contains
+    productions that cannot be deferred to the main process."""
+    pass
+
+def _defer(p, rule):
+    """Record a production whose grammar rule has side effects on the
+    repository, when parsing MOF in a worker process. The rule is invoked
+    for the recorded production in the main process.
+
+    The qualifiers of a class are recorded with the production, because
+    their qualifier types are looked up in the main process. The class
+    contains placeholders for these qualifiers, whose positions are
+    recorded as the indexes of the qualifiers in the order of the
+    qualifier dictionaries of the class (see :func:`_qualifier_dicts`)."""
+
+    parser = p.parser
+    values = [p[i] for i in range(1, len(p))]
+    pending = parser.pending
+    slots = None
+    if pending:
+        index = dict((id(qual), i) for i, (qual, _) in enumerate(pending))
+        slots = [index.get(id(qual))
+                 for quals in _qualifier_dicts(values[0])
+                 for _, qual in sorted(quals.items(),
+                                       key=lambda item: item[0].lower())]
+    parser.deferred.append((rule, p.lexer.lineno, values,
+                            [info for _, info in pending], slots,
+                            parser.aliases))
+    parser.pending = []
+    parser.aliases = {}
+
+def _qualifier_dicts(cc):
+    """Return the qualifier dictionaries of a class and its properties,
+    methods and parameters, in an order that does not depend on the order
+    of the dictionaries."""
+
+    def ordered(objects):
+        """Return the values of a dictionary, ordered by lower-cased key."""
+        return [obj for _, obj in sorted(objects.items(),
+                                         key=lambda item: item[0].lower())]
+
+    dicts = [cc.qualifiers]
+    for prop in ordered(cc.properties):
+        dicts.append(prop.qualifiers)
+    for meth in ordered(cc.methods):
+        dicts.append(meth.qualifiers)
+        for param in ordered(meth.parameters):
+            dicts.append(param.qualifiers)
+    return dicts
 
 
 def p_mp_createClass(p):
@@ -398,8 +637,18 @@ def p_mp_createClass(p):
                       """
 
     #pylint: disable=too-many-branches,too-many-statements,too-many-locals
+    if p.parser.deferred is not None:
+        _defer(p, p_mp_createClass)
+        return
     ns = p.parser.handle.default_namespace
     cc = p[1]
+    graph = p.parser.mofcomp.dependencies
+    if cc.superclass:
+        graph.use_class(ns, cc.superclass)
+        if p.parser.search_paths:
+            _resolve_superclass(p, cc, ns)
+    for klass in _class_dependencies(cc):
+        graph.use_class(ns, klass)
     try:
         fixedNS = fixedRefs = fixedSuper = False
         while not fixedNS or not fixedRefs or not fixedSuper:
@@ -409,7 +658,7 @@ def p_mp_createClass(p):
                 p.parser.handle.CreateClass(cc)
                 if p.parser.verbose:
                     p.parser.log('Created class %s:%s' % (ns, cc.classname))
-                p.parser.classnames[ns].append(cc.classname.lower())
+                p.parser.classnames[ns].add(cc.classname.lower())
                 break
             except CIMError as ce:
                 ce.file_line = (p.parser.file, p.lexer.lineno)
@@ -445,27 +694,7 @@ def p_mp_createClass(p):
                     if not p.parser.qualcache[ns]:
                         # can't find qualifiers
                         raise
-                    objects = list(cc.properties.values())
-                    for meth in cc.methods.values():
-                        objects += list(meth.parameters.values())
-                    dep_classes = []
-                    for obj in objects:
-                        if obj.type not in ['reference', 'string']:
-                            continue
-                        if obj.type == 'reference':
-                            if obj.reference_class.lower() not in dep_classes:
-                                dep_classes.append(obj.reference_class.lower())
-                            continue
-                        # else obj.type is 'string'
-                        try:
-                            embedded_inst = obj.qualifiers['embeddedinstance']
-                        except KeyError:
-                            continue
-                        embedded_inst = embedded_inst.value.lower()
-                        if embedded_inst not in dep_classes:
-                            dep_classes.append(embedded_inst)
-                        continue
-                    for klass in dep_classes:
+                    for klass in _class_dependencies(cc):
                         if klass in p.parser.classnames[ns]:
                             continue
                         try:
@@ -477,13 +706,13 @@ def p_mp_createClass(p):
                             p.parser.handle.GetClass(klass,
                                                      LocalOnly=False,
                                                      IncludeQualifiers=True)
-                            p.parser.classnames[ns].append(klass)
+                            p.parser.classnames[ns].add(klass)
                         except CIMError:
                             moffile = p.parser.mofcomp.find_mof(klass)
                             if not moffile:
                                 raise
                             p.parser.mofcomp.compile_file(moffile, ns)
-                            p.parser.classnames[ns].append(klass)
+                            p.parser.classnames[ns].add(klass)
                     fixedRefs = True
                 else:
                     raise
@@ -499,10 +728,68 @@ def p_mp_createClass(p):
         except CIMError as ce:
             p.parser.log('Error Modifying class %s: %s, %s' % \
                          (cc.classname, ce.args[0], ce.args[1]))
+    graph.define_class(ns, cc.classname)
+
+def _referenced_class(obj):
+    """Return the lower-cased name of the class that is referenced by a
+    property or parameter of a class, as a reference or in an
+    EmbeddedInstance qualifier, or None."""
+
+    if obj.type == 'reference':
+        return obj.reference_class.lower()
+    if obj.type == 'string':
+        try:
+            return obj.qualifiers['embeddedinstance'].value.lower()
+        except KeyError:
+            pass
+    return None
+
+def _class_dependencies(cc):
+    """Return the lower-cased names of the classes that are referenced by
+    a class, in reference properties and parameters, or in EmbeddedInstance
+    qualifiers. The superclass is not included."""
+
+    objects = list(cc.properties.values())
+    for meth in cc.methods.values():
+        objects += list(meth.parameters.values())
+    dep_classes = []
+    for obj in objects:
+        name = _referenced_class(obj)
+        if name is not None and name not in dep_classes:
+            dep_classes.append(name)
+    return dep_classes
+
+def _resolve_superclass(p, cc, ns):
+    """Compile the MOF file of the superclass of a class before the class is
+    created, if the superclass does not exist yet. This avoids a failing
+    CreateClass operation. If the superclass cannot be resolved, this is
+    left to the error handling of CreateClass."""
+
+    superclass = cc.superclass.lower()
+    if superclass in p.parser.classnames[ns]:
+        return
+    try:
+        # The same check as in MOFWBEMConnection.CreateClass()
+        p.parser.handle.GetClass(superclass, LocalOnly=True,
+                                 IncludeQualifiers=False)
+    except CIMError as ce:
+        if ce.args[0] != CIM_ERR_NOT_FOUND:
+            return
+        moffile = p.parser.mofcomp.find_mof(superclass)
+        if not moffile or \
+                p.parser.mofcomp.dependencies.is_compiling(moffile, ns):
+            return
+        p.parser.mofcomp.compile_file(moffile, ns)
+    else:
+        p.parser.classnames[ns].add(superclass)
 
 def p_mp_createInstance(p):
     """mp_createInstance : instanceDeclaration"""
     inst = p[1]
+    if p.parser.instances is not None:
+        # The instances are returned by MOFCompiler.iter_instances()
+        p.parser.instances.append(inst)
+        return
     if p.parser.verbose:
         p.parser.log('Creating instance of %s.' % inst.classname)
     try:
@@ -528,9 +815,14 @@ def p_mp_createInstance(p):
         else:
             ce.file_line = (p.parser.file, p.lexer.lineno)
             raise
+    p.parser.mofcomp.dependencies.add_instance(
+        p.parser.handle.default_namespace, inst.path)
 
 def p_mp_setQualifier(p):
     """mp_setQualifier : qualifierDeclaration"""
+    if p.parser.deferred is not None:
+        _defer(p, p_mp_setQualifier)
+        return
     qualdecl = p[1]
     ns = p.parser.handle.default_namespace
     if p.parser.verbose:
@@ -557,16 +849,23 @@ def p_mp_setQualifier(p):
             ce.file_line = (p.parser.file, p.lexer.lineno)
             raise
     p.parser.qualcache[ns][qualdecl.name] = qualdecl
+    p.parser.mofcomp.dependencies.define_qualifier(ns, qualdecl.name)
 
 def p_compilerDirective(p):
     """compilerDirective : '#' PRAGMA pragmaName '(' pragmaParameter ')'"""
+    if p.parser.deferred is not None:
+        _defer(p, p_compilerDirective)
+        return
     directive = p[3].lower()
     param = p[5]
     if directive == 'include':
         fname = param
         if len(os.path.dirname(p.parser.file)) != 0:
             fname = os.path.dirname(p.parser.file) + '/' + fname
-        p.parser.mofcomp.compile_file(fname, p.parser.handle.default_namespace)
+        if p.parser.mofcomp.dependencies.include(
+                fname, p.parser.handle.default_namespace):
+            p.parser.mofcomp.compile_file(fname,
+                                          p.parser.handle.default_namespace)
     elif directive == 'namespace':
         p.parser.handle.default_namespace = param
         if param not in p.parser.qualcache:
@@ -762,9 +1061,7 @@ def p_qualifier(p):
                  | qualifierName qualifierParameter ':' flavorList
                  """
 
-    #pylint: disable=too-many-branches
     qname = p[1]
-    ns = p.parser.handle.default_namespace
     qval = None
     flavorlist = []
     if len(p) == 3:
@@ -774,6 +1071,20 @@ def p_qualifier(p):
     elif len(p) == 5:
         qval = p[2]
         flavorlist = p[4]
+    if p.parser.deferred is not None:
+        # The qualifier type is looked up when the class is created
+        p[0] = CIMQualifier(qname, None, type='string')
+        p.parser.pending.append(
+            (p[0], (qname, qval, flavorlist, p.lexer.lineno)))
+        return
+    p[0] = _build_qualifier(p, qname, qval, flavorlist)
+
+def _build_qualifier(p, qname, qval, flavorlist):
+    """Return the qualifier value for a qualifier specified in MOF, based on
+    its qualifier type."""
+
+    ns = p.parser.handle.default_namespace
+    p.parser.mofcomp.dependencies.use_qualifier(ns, qname)
     try:
         qualdecl = p.parser.qualcache[ns][qname]
     except KeyError:
@@ -809,8 +1120,8 @@ def p_qualifier(p):
             qval = qualdecl.value # default value
     else:
         qval = tocimobj(qualdecl.type, qval)
-    p[0] = CIMQualifier(qname, qval, type=qualdecl.type, **flavors)
     # TODO propagated?
+    return CIMQualifier(qname, qval, type=qualdecl.type, **flavors)
 
 def p_flavorList(p):
     """flavorList : flavor
@@ -1332,6 +1643,10 @@ def p_instanceDeclaration(p):
                            | qualifierList INSTANCE OF className alias '{' valueInitializerList '}' ';'
                            """
     # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+    if p.parser.deferred is not None:
+        # Instances depend on their class in the repository. Aliases of
+        # instance paths are not known in a worker process, either.
+        raise _NotDeferrable()
     alias = None
     quals = {}
     ns = p.parser.handle.default_namespace
@@ -1351,10 +1666,11 @@ def p_instanceDeclaration(p):
             props = p[7]
             alias = p[5]
 
+    p.parser.mofcomp.dependencies.use_class(ns, cname)
     try:
         cc = p.parser.handle.GetClass(cname, LocalOnly=False,
                                       IncludeQualifiers=True)
-        p.parser.classnames[ns].append(cc.classname.lower())
+        p.parser.classnames[ns].add(cc.classname.lower())
     except CIMError as ce:
         ce.file_line = (p.parser.file, p.lexer.lineno)
         if ce.args[0] == CIM_ERR_NOT_FOUND:
@@ -1380,8 +1696,10 @@ def p_instanceDeclaration(p):
         pname = prop[1]
         pval = prop[2]
         try:
-            cprop = inst.properties[pname]
+            # The property objects are shared with the class
+            cprop = inst.properties[pname].copy()
             cprop.value = tocimobj(cprop.type, pval)
+            inst.properties[pname] = cprop
         except KeyError:
             ce = CIMError(CIM_ERR_INVALID_PARAMETER,
                           'Invalid property: %s' % pname)
@@ -1666,6 +1984,69 @@ class BaseRepositoryConnection(object):
 BaseRepositoryConnection.register(WBEMConnection)
 
 
+class _ClassNames(object):
+    """
+    An ordered set of class names, with case-insensitive lookup.
+
+    The class names are kept in the order in which they were added, and in
+    their original lexical case. Adding and removing a class name, and testing
+    whether a class name is in the set, take constant time on average.
+    """
+
+    def __init__(self, names=None):
+        self._names = []    # class names in order, or None if removed
+        self._index = {}    # indexes into _names by lower-cased class name
+        if names is not None:
+            for name in names:
+                self.add(name)
+
+    def add(self, name):
+        """Add a class name, if it is not in the set yet."""
+        key = name.lower()
+        if key not in self._index:
+            self._index[key] = len(self._names)
+            self._names.append(name)
+
+    def discard(self, name):
+        """Remove a class name, if it is in the set."""
+        i = self._index.pop(name.lower(), None)
+        if i is None:
+            return
+        self._names[i] = None
+        if len(self._index) < len(self._names) // 2:
+            self._names = [n for n in self._names if n is not None]
+            self._index = dict((n.lower(), i)
+                               for i, n in enumerate(self._names))
+
+    def __contains__(self, name):
+        return name.lower() in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return (name for name in self._names if name is not None)
+
+    def __reversed__(self):
+        return (name for name in reversed(self._names) if name is not None)
+
+    def __eq__(self, other):
+        if not isinstance(other, _ClassNames):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, list(self))
+
+
 class MOFWBEMConnection(BaseRepositoryConnection):
     """
     A repository connection that stores CIM elements locally in the
@@ -1701,6 +2082,9 @@ class MOFWBEMConnection(BaseRepositoryConnection):
         self.qualifiers = {}
         self.instances = {}
         self.classes = {}
+        # Classes with inherited properties and methods, by namespace and
+        # class name (see _get_resolved_class()).
+        self._resolved = {}
         if conn is None:
             # This instance variable is used only to make get/set
             # of 'default_namespace' behave as it should, in the case
@@ -1772,6 +2156,12 @@ class MOFWBEMConnection(BaseRepositoryConnection):
 
         For a description of the parameters, see
         :meth:`pywbem.WBEMConnection.GetClass`.
+
+        If `LocalOnly` is specified as `False`, the returned class includes
+        the properties and methods inherited from its superclasses. Such
+        classes are cached, until a class in their superclass chain is
+        created, replaced or removed in the local repository. They are
+        shared between callers and must not be modified.
         """
 
         cname = len(args) > 0 and args[0] or kwargs['ClassName']
@@ -1795,15 +2185,50 @@ class MOFWBEMConnection(BaseRepositoryConnection):
                     pass
                 if len(args) > 0:
                     args = args[1:]
-                super_ = self.GetClass(cc.superclass, *args, **kwargs)
-                for prop in super_.properties.values():
-                    if prop.name not in cc.properties:
-                        cc.properties[prop.name] = prop
-                for meth in super_.methods.values():
-                    if meth.name not in cc.methods:
-                        cc.methods[meth.name] = meth
+                cc = self._get_resolved_class(cc, args, kwargs)
         return cc
 
+    def _get_resolved_class(self, cc, args, kwargs):
+        """Return a copy of a class that includes the properties and methods
+        inherited from its superclasses, from the cache of resolved classes
+        if it is up to date.
+
+        The cache stores the resolved class together with the classes of its
+        superclass chain, and is up to date if these are still the classes in
+        the local repository."""
+
+        classes = self.classes[self.default_namespace]
+        try:
+            resolved_classes = self._resolved[self.default_namespace]
+        except KeyError:
+            resolved_classes = NocaseDict()
+            self._resolved[self.default_namespace] = resolved_classes
+        try:
+            resolved, chain = resolved_classes[cc.classname]
+        except KeyError:
+            pass
+        else:
+            for klass in chain:
+                if classes.get(klass.classname) is not klass:
+                    break
+            else:
+                return resolved
+
+        super_ = self.GetClass(cc.superclass, *args, **kwargs)
+        resolved = cc.copy()
+        for prop in super_.properties.values():
+            if prop.name not in resolved.properties:
+                resolved.properties[prop.name] = prop
+        for meth in super_.methods.values():
+            if meth.name not in resolved.methods:
+                resolved.methods[meth.name] = meth
+        if super_.superclass:
+            chain = [cc] + resolved_classes[super_.classname][1]
+        else:
+            chain = [cc, super_]
+        resolved_classes[cc.classname] = (resolved, chain)
+        return resolved
+
     def ModifyClass(self, *args, **kwargs): #pylint: disable=no-self-use
         """This method is used by the MOF compiler only in the course of
         handling CIM_ERR_ALREADY_EXISTS after trying to create a class.
@@ -1843,9 +2268,10 @@ class MOFWBEMConnection(BaseRepositoryConnection):
         # self.conn.GetClass()?  Do we want to create a class
         # that already existed?
         try:
-            self.class_names[self.default_namespace].append(cc.classname)
+            self.class_names[self.default_namespace].add(cc.classname)
         except KeyError:
-            self.class_names[self.default_namespace] = [cc.classname]
+            self.class_names[self.default_namespace] = \
+                    _ClassNames([cc.classname])
 
     def DeleteClass(self, *args, **kwargs):
         """This method is only invoked by :meth:`rollback` (on the underlying
@@ -1929,8 +2355,7 @@ class MOFWBEMConnection(BaseRepositoryConnection):
                     print('     %s %s' % (ce.args[0], ce.args[1]))
         for ns, cnames in self.class_names.items():
             self.default_namespace = ns
-            cnames.reverse()
-            for cname in cnames:
+            for cname in reversed(cnames):
                 try:
                     if verbose:
                         print('Deleting class %s:%s' % (ns, cname))
@@ -1940,12 +2365,914 @@ class MOFWBEMConnection(BaseRepositoryConnection):
                     print('     %s %s' % (ce.args[0], ce.args[1]))
         # TODO: We want rollback to do something with qualifiers?
 
+    def upload(self, workers=1, verbose=False):
+        """
+        Create or update the CIM elements of the local repository of this
+        class in the underlying repository.
+
+        This supports compiling MOF files in bulk: The MOF files are first
+        compiled into the local repository, and the result is then uploaded
+        with this method. The underlying repository must be a
+        :class:`~pywbem.WBEMConnection` object.
+
+        The qualifier types are uploaded first, then the classes, and then the
+        instances. A class is uploaded after its superclass and after the
+        classes it references, if these are in the local repository. For
+        classes that reference each other in a cycle, one class is first
+        created without the properties and methods that close the cycle, and
+        is modified to its full definition once the classes it references
+        have been created.
+
+        Qualifier types and classes that already exist unchanged in the
+        underlying repository are skipped. They are determined with one
+        EnumerateQualifiers and one EnumerateClasses operation per namespace,
+        instead of one operation per element. Their local definitions are
+        compared, ignoring the inherited elements, class origins and
+        unspecified qualifier flavors that a WBEM server adds to them.
+
+        Parameters:
+
+          workers (:term:`integer`):
+            The number of operations that are performed concurrently, each
+            with its own copy of the underlying connection. Classes are
+            uploaded in groups, where a group is uploaded only after the
+            classes it depends on.
+
+          verbose (:class:`py:bool`):
+            Print a message for each uploaded CIM element.
+
+        Returns:
+
+          A tuple of the number of created or modified CIM elements, and the
+          number of skipped CIM elements that already existed unchanged.
+
+        Raises:
+
+            Exceptions described in :class:`~pywbem.WBEMConnection`. The first
+            failed operation ends the upload, after the operations that are
+            already in progress.
+        """
+        local = threading.local()
+
+        def connection():
+            """Return the underlying connection for the current thread."""
+            if workers <= 1:
+                return self.conn
+            try:
+                return local.conn
+            except AttributeError:
+                local.conn = copy.copy(self.conn)
+                return local.conn
+
+        def set_qualifier(item):
+            """Create or modify a qualifier type."""
+            ns, qual = item
+            if verbose:
+                print('Setting qualifier %s:%s' % (ns, qual.name))
+            connection().SetQualifier(qual, namespace=ns)
+
+        def create_class(item):
+            """Create or modify a class."""
+            ns, cc, modify = item
+            if modify:
+                if verbose:
+                    print('Modifying class %s:%s' % (ns, cc.classname))
+                connection().ModifyClass(cc, namespace=ns)
+            else:
+                if verbose:
+                    print('Creating class %s:%s' % (ns, cc.classname))
+                connection().CreateClass(cc, namespace=ns)
+
+        def create_instance(item):
+            """Create an instance, or modify it if it already exists."""
+            ns, inst = item
+            conn = connection()
+            if verbose:
+                print('Creating instance of %s:%s' % (ns, inst.classname))
+            try:
+                conn.CreateInstance(inst, namespace=ns)
+            except CIMError as ce:
+                if ce.args[0] != CIM_ERR_ALREADY_EXISTS:
+                    raise
+                inst = inst.copy()
+                inst.path.namespace = ns
+                if verbose:
+                    print('Modifying instance %s' % inst.path)
+                try:
+                    conn.ModifyInstance(inst)
+                except CIMError as ce:
+                    if ce.args[0] != CIM_ERR_NOT_SUPPORTED:
+                        raise
+                    conn.DeleteInstance(inst.path)
+                    conn.CreateInstance(inst, namespace=ns)
+
+        quals = []
+        levels = []
+        num_classes = 0
+        skipped = 0
+        for ns in sorted(set(self.qualifiers) | set(self.class_names)):
+            existing = NocaseDict()
+            if self.qualifiers.get(ns):
+                for qual in self.conn.EnumerateQualifiers(namespace=ns):
+                    existing[qual.name] = qual
+            for qual in self.qualifiers.get(ns, {}).values():
+                old = existing.get(qual.name)
+                if old is not None and _same_definition(old, qual):
+                    skipped += 1
+                else:
+                    quals.append((ns, qual))
+
+            existing = NocaseDict()
+            if self.class_names.get(ns):
+                for cc in self.conn.EnumerateClasses(
+                        namespace=ns, DeepInheritance=True, LocalOnly=True,
+                        IncludeQualifiers=True, IncludeClassOrigin=True):
+                    existing[cc.classname] = cc
+            classes = []
+            for cname in self.class_names.get(ns, []):
+                cc = self.classes[ns][cname]
+                old = existing.get(cname)
+                if old is not None and _same_definition(old, cc):
+                    skipped += 1
+                else:
+                    classes.append(cc)
+            num_classes += len(classes)
+            for i, level in enumerate(_upload_levels(classes, existing)):
+                if i == len(levels):
+                    levels.append([])
+                levels[i].extend((ns, cc, modify) for cc, modify in level)
+        insts = [(ns, inst) for ns in sorted(self.instances)
+                 for inst in self.instances[ns]]
+
+        if workers > 1:
+            pool = ThreadPool(workers)
+            map_ = pool.map
+        else:
+            pool = None
+            map_ = lambda func, items: [func(item) for item in items]
+        try:
+            map_(set_qualifier, quals)
+            for level in levels:
+                map_(create_class, level)
+            map_(create_instance, insts)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return len(quals) + num_classes + len(insts), skipped
+
+
+def _same_flavors(obj1, obj2):
+    """Return whether two qualifier values or qualifier types have the same
+    flavors, comparing only the flavors that both specify, and ignoring the
+    ToInstance flavor (see _same_definition())."""
+
+    for flavor in ('overridable', 'tosubclass', 'translatable'):
+        flavor1 = getattr(obj1, flavor)
+        flavor2 = getattr(obj2, flavor)
+        if flavor1 is not None and flavor2 is not None and \
+                flavor1 != flavor2:
+            return False
+    return True
+
+def _same_qualifiers(quals1, quals2):
+    """Return whether two dictionaries of qualifier values have the same
+    local qualifiers, as described for _same_definition()."""
+
+    def local(quals):
+        """Return the qualifiers that are not propagated, by lower-cased
+        name."""
+        return dict([(qual.name.lower(), qual) for qual in quals.values()
+                     if not qual.propagated])
+
+    quals1 = local(quals1)
+    quals2 = local(quals2)
+    if set(quals1) != set(quals2):
+        return False
+    for name, qual1 in quals1.items():
+        qual2 = quals2[name]
+        if qual1.type != qual2.type or qual1.value != qual2.value or \
+                not _same_flavors(qual1, qual2):
+            return False
+    return True
+
+def _same_definition(obj1, obj2):
+    """Return whether two qualifier types, classes, or properties, methods
+    or parameters of classes, have the same local definition.
+
+    Unlike the == operator, this ignores the differences between an element
+    compiled from MOF and the same element returned by a WBEM server: The
+    properties, methods and qualifiers that are propagated from the
+    superclass, the class origin and propagation of properties and methods,
+    and qualifier flavors that are not specified on both sides (the compiler
+    leaves them unspecified if the MOF does not specify them, while a server
+    returns the effective flavors) are ignored, and so is the deprecated
+    ToInstance flavor. Names are compared case-insensitively."""
+
+    def lower(name):
+        """Return a name in lower case, passing None through."""
+        return name.lower() if name is not None else None
+
+    children = ()
+    if isinstance(obj1, CIMQualifierDeclaration):
+        values = [(obj.type, obj.value, obj.is_array, obj.array_size,
+                   set([scope.lower() for scope, value in obj.scopes.items()
+                        if value]))
+                  for obj in (obj1, obj2)]
+        return values[0] == values[1] and _same_flavors(obj1, obj2)
+    if isinstance(obj1, CIMClass):
+        values = [lower(obj.superclass) for obj in (obj1, obj2)]
+        children = ('properties', 'methods')
+    elif isinstance(obj1, CIMMethod):
+        values = [obj.return_type for obj in (obj1, obj2)]
+        children = ('parameters',)
+    elif isinstance(obj1, CIMProperty):
+        values = [(obj.type, obj.value, obj.is_array, obj.array_size,
+                   lower(obj.reference_class)) for obj in (obj1, obj2)]
+    else:
+        values = [(obj.type, obj.is_array, obj.array_size,
+                   lower(obj.reference_class)) for obj in (obj1, obj2)]
+    if values[0] != values[1]:
+        return False
+    for name in children:
+        elements = [dict([(key.lower(), elem) for key, elem in
+                          getattr(obj, name).items()
+                          if not getattr(elem, 'propagated', None)])
+                    for obj in (obj1, obj2)]
+        if set(elements[0]) != set(elements[1]):
+            return False
+        for key, elem in elements[0].items():
+            if not _same_definition(elem, elements[1][key]):
+                return False
+    return _same_qualifiers(obj1.qualifiers, obj2.qualifiers)
+
+def _dependency_depths(keys, deps):
+    """Return a tuple (depths, cycles) for a graph of dependencies, where
+    `deps` is a dictionary with the list of dependencies of each of the
+    keys. `depths` is a dictionary with the depth of each key, which is
+    greater than the depths of its dependencies. `cycles` is a list of the
+    dependencies (key, dependency) that were ignored because they close a
+    cycle. Dependencies that are not in `deps` are ignored."""
+
+    depth = {}
+    cycles = []
+    for key in keys:
+        if key in depth:
+            continue
+        # Depth-first search, with None as the depth of the keys on the
+        # stack
+        depth[key] = None
+        stack = [(key, iter(deps[key]))]
+        while stack:
+            key, names = stack[-1]
+            for name in names:
+                if name not in deps:
+                    continue
+                if name not in depth:
+                    depth[name] = None
+                    stack.append((name, iter(deps[name])))
+                    break
+                if depth[name] is None:
+                    cycles.append((key, name))
+            else:
+                stack.pop()
+                depth[key] = max([depth[name] + 1 for name in deps[key]
+                                  if depth.get(name) is not None] or [0])
+    return depth, cycles
+
+def _without_references(cc, names):
+    """Return a copy of a class without the properties and methods that
+    reference one of the classes with the given lower-cased names (see
+    _class_dependencies())."""
+
+    result = cc.copy()
+    result.properties = NocaseDict(
+        [(name, prop) for name, prop in cc.properties.items()
+         if _referenced_class(prop) not in names])
+    result.methods = NocaseDict(
+        [(name, meth) for name, meth in cc.methods.items()
+         if not names.intersection([_referenced_class(param) for param in
+                                    meth.parameters.values()])])
+    return result
+
+def _upload_levels(classes, existing=()):
+    """Return the CreateClass and ModifyClass operations that upload the
+    given classes, as a list of lists of tuples (class, modify), where the
+    operations of a list depend only on the operations of earlier lists.
+    `existing` are the names of the classes that exist in the underlying
+    repository.
+
+    A class is uploaded after its superclass and the classes it references,
+    if these are among the given classes. The classes in a cycle of
+    references cannot all be created after the classes they reference, so
+    the references that close a cycle and reference a class that does not
+    exist yet are cut: The class with the reference is first created
+    without the properties and methods with the cut references, and is
+    modified to its full definition after the referenced classes have been
+    created, and before its subclasses are uploaded. Within each list, the
+    classes keep their order."""
+
+    existing = set([name.lower() for name in existing])
+    refs = {}
+    superclasses = {}
+    for cc in classes:
+        key = cc.classname.lower()
+        refs[key] = [name for name in _class_dependencies(cc) if name != key]
+        superclasses[key] = cc.superclass.lower() if cc.superclass else None
+    deps = dict([(key, refs[key] + [superclasses[key]]) for key in refs])
+    cuts = {}
+    for key, name in _dependency_depths(
+            [cc.classname.lower() for cc in classes], deps)[1]:
+        if name in refs[key] and name not in existing:
+            cuts.setdefault(key, set()).add(name)
+
+    # The upload of a class is the step (key, False), and its completion
+    # after references were cut is the step (key, True)
+    steps = []
+    deps = {}
+    for cc in classes:
+        key = cc.classname.lower()
+        step = (key, False)
+        steps.append((step, cc, key in existing))
+        superclass = superclasses[key]
+        deps[step] = [(name, False) for name in refs[key]
+                      if name not in cuts.get(key, ())] + \
+                     [(superclass, superclass in cuts)]
+    for cc in classes:
+        key = cc.classname.lower()
+        if key in cuts:
+            step = (key, True)
+            steps.append((step, cc, True))
+            deps[step] = [(key, False)] + \
+                         [(name, False) for name in cuts[key]]
+    depth = _dependency_depths([step for step, _, _ in steps], deps)[0]
+
+    levels = []
+    for step, cc, modify in steps:
+        level = depth[step]
+        while len(levels) <= level:
+            levels.append([])
+        key, complete = step
+        if key in cuts and not complete:
+            cc = _without_references(cc, cuts[key])
+        levels[level].append((cc, modify))
+    return levels
+
+
+class MOFWriter(object):
+    """
+    Writes CIM qualifier types, classes and instances as MOF to a text
+    file-like object, for example to dump the local repository of a
+    :class:`~pywbem.MOFWBEMConnection` object.
+
+    The MOF of each object is the same as the result of its ``tomof()``
+    method, and is followed by an empty line. The MOF of instances is
+    generated by the writer itself, and the MOF of many instances is
+    collected in a list and written in larger pieces, so that writing many
+    instances is faster than concatenating the results of
+    :meth:`pywbem.CIMInstance.tomof`.
+    """
+
+    # Number of collected MOF fragments after which they are written
+    _flush_parts = 4096
+
+    def __init__(self, stream):
+        """
+        Parameters:
+
+          stream (file-like object):
+            A file-like object opened for writing in text mode. Only its
+            ``write()`` method is used.
+        """
+        self._stream = stream
+
+    def write(self, obj):
+        """
+        Write the MOF of one object.
+
+        Parameters:
+
+          obj:
+            The object to be written, as a
+            :class:`~pywbem.CIMQualifierDeclaration`,
+            :class:`~pywbem.CIMClass` or :class:`~pywbem.CIMInstance` object.
+
+        Raises:
+
+          TypeError: The object has an unsupported type.
+        """
+        if isinstance(obj, CIMInstance):
+            self.write_instances([obj])
+        elif isinstance(obj, (CIMClass, CIMQualifierDeclaration)):
+            mof = obj.tomof()
+            self._stream.write(mof + ('\n' if mof.endswith('\n') else '\n\n'))
+        else:
+            raise TypeError("Cannot write an object of type %s as MOF" % \
+                            type(obj))
+
+    def write_qualifiers(self, qualifiers):
+        """
+        Write the MOF of qualifier types.
+
+        Parameters:
+
+          qualifiers (:term:`py:iterable` of
+            :class:`~pywbem.CIMQualifierDeclaration`):
+            The qualifier types to be written.
+        """
+        for qualdecl in qualifiers:
+            self.write(qualdecl)
+
+    def write_classes(self, classes):
+        """
+        Write the MOF of classes, in an order in which they can be compiled:
+        Each class is written after its superclass and the classes it
+        references in reference properties and parameters or in
+        EmbeddedInstance qualifiers, if these are among the classes being
+        written and the references are not cyclic. Otherwise, the classes
+        are written in the given order.
+
+        Parameters:
+
+          classes (:term:`py:iterable` of :class:`~pywbem.CIMClass`):
+            The classes to be written.
+        """
+        classes = list(classes)
+        # No references are cut (as if all classes existed already), so that
+        # each class is written once, with its full definition.
+        for level in _upload_levels(classes,
+                                    [cc.classname for cc in classes]):
+            for cc, _ in level:
+                self.write(cc)
+
+    def write_instances(self, instances):
+        """
+        Write the MOF of instances.
+
+        Parameters:
+
+          instances (:term:`py:iterable` of :class:`~pywbem.CIMInstance`):
+            The instances to be written. They are consumed one by one, so
+            this may be a generator, e.g. the result of
+            :meth:`~pywbem.mof_compiler.MOFCompiler.iter_instances`.
+        """
+        # This generates the same MOF as CIMInstance.tomof(), with indent=0.
+        # Short strings without characters to be escaped, and integers are
+        # formatted without calling _value2mof().
+        parts = []
+        append = parts.append
+        maxlen = MAX_MOF_LINE - MOF_INDENT
+        maxstr = maxlen - 2
+        escape = _mof_escape_re.search
+        for inst in instances:
+            append('instance of %s {\n' % inst.classname)
+            for prop in inst.properties.values():
+                value = prop.value
+                if value is None:
+                    append('    %s = NULL;\n' % prop.name)
+                    continue
+                type_ = prop.type
+                embedded_object = prop.embedded_object
+                if not prop.is_array:
+                    if type_ == 'string':
+                        if embedded_object is None and \
+                                len(value) <= maxstr and not escape(value):
+                            append('    %s = "%s";\n' % (prop.name, value))
+                            continue
+                    elif type_ in _INTEGER_TYPES:
+                        append('    %s = %d;\n' % (prop.name, value))
+                        continue
+                    append('    %s = %s;\n' % \
+                           (prop.name, _value2mof(value, type_,
+                                                  embedded_object, 4)))
+                    continue
+                if type_ == 'string' and embedded_object is None:
+                    mof = ', '.join(
+                        ['"%s"' % val if len(val) <= maxstr and
+                         not escape(val) else mofstr(val, 4)
+                         for val in value])
+                elif type_ in _INTEGER_TYPES:
+                    mof = ', '.join(['%d' % val for val in value])
+                else:
+                    mof = ', '.join([_value2mof(val, type_, embedded_object,
+                                                4) for val in value])
+                if len(mof) > maxlen:
+                    # One array element per line
+                    mof = '\n        ' + ',\n        '.join(
+                        [_value2mof(val, type_, embedded_object, 8)
+                         for val in value])
+                append('    %s = {%s};\n' % (prop.name, mof))
+            append('};\n\n')
+            if len(parts) >= self._flush_parts:
+                self._stream.write(''.join(parts))
+                del parts[:]
+        if parts:
+            self._stream.write(''.join(parts))
+
+    def write_repository(self, repo):
+        """
+        Write the MOF of the local repository of a
+        :class:`~pywbem.MOFWBEMConnection` object: For each namespace, a
+        namespace pragma, followed by the qualifier types, the classes (see
+        :meth:`write_classes`) and the instances in the namespace.
+
+        Parameters:
+
+          repo (:class:`~pywbem.MOFWBEMConnection`):
+            The repository connection whose local repository is written.
+            Its underlying repository is not used.
+        """
+        namespaces = []
+        for dict_ in (repo.qualifiers, repo.classes, repo.instances):
+            namespaces.extend([ns for ns in dict_ if ns not in namespaces])
+        for ns in namespaces:
+            self._stream.write('#pragma namespace ("%s")\n\n' % ns)
+            self.write_qualifiers(repo.qualifiers.get(ns, {}).values())
+            self.write_classes(repo.classes.get(ns, {}).values())
+            self.write_instances(repo.instances.get(ns, []))
+
 
 def _print_logger(msg):
     """Print the msg argument to stdout."""
     print(msg)
 
 
+def _digest(mof):
+    """Return the digest of the contents of a MOF file, as a string."""
+    if isinstance(mof, six.text_type):
+        mof = mof.encode('utf-8')
+    return hashlib.sha1(mof).hexdigest()
+
+
+def _mtime(path):
+    """Return the modification time of a file or directory, or `None` if it
+    does not exist."""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class _MOFFile(object):
+    # pylint: disable=too-few-public-methods
+    """
+    A node of the dependency graph: A MOF file compiled into a namespace.
+
+    The definitions and uses are sets of tuples (kind, namespace, name),
+    where kind is 'class' or 'qualifier', and name is lower-cased.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.seq = 0            # completion order of the compilation
+        self.definitions = set()
+        self.uses = set()
+        self.includes = []      # keys of the included files
+        self.instances = []     # tuples (namespace, instance path)
+
+
+class MOFDependencyGraph(object):
+    """
+    The dependencies between the MOF files compiled by a MOF compiler.
+
+    The graph is built while MOF files are compiled with
+    :meth:`~pywbem.mof_compiler.MOFCompiler.compile_file`. Its nodes are the
+    compiled MOF files, identified by tuples (filename, namespace) of the
+    absolute path name of the file and the namespace it was compiled into. A
+    file depends on the files that define the classes and qualifier types it
+    uses: superclasses, classes referenced by reference properties and
+    parameters or by EmbeddedInstance qualifiers, classes of instances, and
+    qualifier types. A file that includes other files with `#pragma include`
+    also contains them.
+
+    Each MOF compiler maintains a graph in its
+    :attr:`~pywbem.mof_compiler.MOFCompiler.dependencies` attribute. It is
+    used by :meth:`~pywbem.mof_compiler.MOFCompiler.recompile_files`.
+    """
+
+    def __init__(self):
+        self._nodes = {}        # _MOFFile objects by key
+        self._definers = {}     # keys of defining files by definition
+        self._compiling = []    # nodes of the files being compiled
+        self._current = set()   # keys of files not to be compiled again
+        self._seq = 0
+
+    def __repr__(self):
+        return '%s(files=%d)' % (self.__class__.__name__, len(self._nodes))
+
+    def begin_file(self, filename, namespace):
+        """
+        Record that the compilation of a MOF file starts. Any information
+        from a previous compilation of the file into the namespace is
+        discarded.
+        """
+        key = (os.path.abspath(filename), namespace)
+        old = self._nodes.get(key)
+        if old is not None:
+            for definition in old.definitions:
+                if self._definers.get(definition) == key:
+                    del self._definers[definition]
+        node = _MOFFile(key)
+        self._nodes[key] = node
+        self._compiling.append(node)
+
+    def end_file(self):
+        """Record that the compilation of the current MOF file has ended."""
+        node = self._compiling.pop()
+        self._seq += 1
+        node.seq = self._seq
+
+    def is_compiling(self, filename, namespace):
+        """
+        Return whether a MOF file is currently being compiled into a
+        namespace (e.g. because it includes the current file).
+        """
+        key = (os.path.abspath(filename), namespace)
+        return any(node.key == key for node in self._compiling)
+
+    def _define(self, kind, namespace, name):
+        """Record a definition in the current MOF file."""
+        if self._compiling:
+            definition = (kind, namespace, name.lower())
+            node = self._compiling[-1]
+            node.definitions.add(definition)
+            self._definers[definition] = node.key
+
+    def _use(self, kind, namespace, name):
+        """Record a use in the current MOF file."""
+        if self._compiling:
+            self._compiling[-1].uses.add((kind, namespace, name.lower()))
+
+    def define_class(self, namespace, classname):
+        """Record that the current MOF file defines a class."""
+        self._define('class', namespace, classname)
+
+    def define_qualifier(self, namespace, name):
+        """Record that the current MOF file defines a qualifier type."""
+        self._define('qualifier', namespace, name)
+
+    def use_class(self, namespace, classname):
+        """Record that the current MOF file uses a class."""
+        self._use('class', namespace, classname)
+
+    def use_qualifier(self, namespace, name):
+        """Record that the current MOF file uses a qualifier type."""
+        self._use('qualifier', namespace, name)
+
+    def include(self, filename, namespace):
+        """
+        Record that the current MOF file includes a MOF file, and return
+        whether the included file needs to be compiled. It does not need to
+        be compiled again if it is not affected by the changes being
+        recompiled with
+        :meth:`~pywbem.mof_compiler.MOFCompiler.recompile_files`.
+        """
+        key = (os.path.abspath(filename), namespace)
+        if self._compiling:
+            self._compiling[-1].includes.append(key)
+        return key not in self._current
+
+    def add_instance(self, namespace, path):
+        """Record that the current MOF file creates an instance."""
+        if self._compiling:
+            self._compiling[-1].instances.append((namespace, path))
+
+    def files(self):
+        """
+        Return the compiled MOF files, in the order in which their
+        compilation has ended.
+
+        Returns:
+
+          :class:`py:list` of :class:`py:tuple` (filename, namespace)
+        """
+        nodes = sorted(self._nodes.values(), key=lambda node: node.seq)
+        return [node.key for node in nodes]
+
+    def dependencies(self, filename, namespace):
+        """
+        Return the compiled MOF files that a compiled MOF file directly
+        depends on.
+
+        Returns:
+
+          :class:`py:set` of :class:`py:tuple` (filename, namespace)
+        """
+        node = self._nodes[(os.path.abspath(filename), namespace)]
+        deps = set()
+        for use in node.uses:
+            definer = self._definers.get(use)
+            if definer is not None and definer != node.key:
+                deps.add(definer)
+        return deps
+
+    def affected(self, filenames):
+        """
+        Return the compiled MOF files that are affected by changes of MOF
+        files, in the order in which they need to be compiled.
+
+        The affected files are the changed files (in any namespace), and the
+        files that directly or indirectly depend on them. Files that depend
+        on each other are returned in the order in which their compilation
+        has ended.
+
+        Parameters:
+
+          filenames (:term:`py:iterable` of :term:`string`):
+            Path names of the changed MOF files.
+
+        Returns:
+
+          :class:`py:list` of :class:`py:tuple` (filename, namespace)
+        """
+        changed = set(os.path.abspath(f) for f in filenames)
+        dependents = {}
+        for key in self._nodes:
+            for dep in self.dependencies(*key):
+                dependents.setdefault(dep, set()).add(key)
+
+        affected = set()
+        todo = [key for key in self._nodes if key[0] in changed]
+        while todo:
+            key = todo.pop()
+            if key in affected:
+                continue
+            affected.add(key)
+            todo.extend(dependents.get(key, ()))
+
+        # Topological sort, preferring the original completion order, and
+        # breaking dependency cycles in that order.
+        deps = dict((key, self.dependencies(*key) & affected)
+                    for key in affected)
+        order = []
+        remaining = sorted(affected, key=lambda key: self._nodes[key].seq)
+        while remaining:
+            for i, key in enumerate(remaining):
+                if not deps[key]:
+                    break
+            else:
+                i = 0
+            key = remaining.pop(i)
+            order.append(key)
+            for dependent in dependents.get(key, ()):
+                if dependent in deps:
+                    deps[dependent].discard(key)
+        return order
+
+    def _records(self):
+        """Return the graph as a list, for storing it in a binary stream."""
+        return [[node.key[0], node.key[1], node.seq,
+                 [list(d) for d in node.definitions],
+                 [list(u) for u in node.uses],
+                 [list(i) for i in node.includes],
+                 [list(i) for i in node.instances]]
+                for node in self._nodes.values()]
+
+    def _load_records(self, records):
+        """Restore the graph from the result of :meth:`_records`."""
+        self._nodes = {}
+        self._definers = {}
+        self._seq = 0
+        for filename, namespace, seq, definitions, uses, includes, \
+                instances in records:
+            node = _MOFFile((filename, namespace))
+            node.seq = seq
+            node.definitions = set(tuple(d) for d in definitions)
+            node.uses = set(tuple(u) for u in uses)
+            node.includes = [tuple(i) for i in includes]
+            node.instances = [tuple(i) for i in instances]
+            self._nodes[node.key] = node
+            self._seq = max(self._seq, seq)
+        for node in sorted(self._nodes.values(), key=lambda node: node.seq):
+            for definition in node.definitions:
+                self._definers[definition] = node.key
+
+
+class _Production(object):
+    """
+    A production that has been recorded when parsing MOF in a worker process
+    (see :func:`_defer`), with the interface of a YACC production that is
+    used by the grammar rules.
+    """
+
+    def __init__(self, parser, lineno, values=()):
+        self.parser = parser
+        # The grammar rules use the lexer only for the current line number
+        self.lexer = self
+        self.lineno = lineno
+        self._values = [None] + list(values)
+
+    def __getitem__(self, n):
+        return self._values[n]
+
+    def __setitem__(self, n, value):
+        self._values[n] = value
+
+    def __len__(self):
+        return len(self._values)
+
+
+# The MOF compiler of a worker process for parsing MOF files
+_worker_compiler = None
+
+def _parse_deferred(filename):
+    """
+    Parse a MOF file in a worker process, recording the productions that
+    modify the repository (see :func:`_defer`).
+
+    Returns a tuple (mof, deferred) with the MOF and the list of recorded
+    productions, or `None` if the MOF cannot be parsed this way or has
+    errors. Such MOF is parsed again in the calling process when it is
+    compiled, so that errors are reported in the same way.
+    """
+
+    global _worker_compiler  # pylint: disable=global-statement
+    if _worker_compiler is None:
+        _worker_compiler = MOFCompiler(MOFWBEMConnection())
+    parser = _worker_compiler.parser
+    messages = []
+    parser.log = messages.append
+    parser.deferred = []
+    parser.pending = []
+    parser.aliases = {}
+    lexer = _worker_compiler.lexer.clone()
+    lexer.parser = parser
+    try:
+        with open(filename, 'r') as fp:
+            mof = fp.read()
+        parser.file = filename
+        parser.mof = mof
+        parser.parse(mof, lexer=lexer)
+    except Exception:  # pylint: disable=broad-except
+        return None
+    if messages:
+        # The lexer has reported errors
+        return None
+    return mof, parser.deferred
+
+
+# The parts of MOF that matter for finding the end of a declaration, in
+# _mof_declarations(). The `incomplete` group matches strings, character
+# values and comments that may continue after the end of the text read so
+# far.
+_declaration_re = re.compile(r'''
+    "(?:[^"\\\n\r]|\\.)*"
+  | '(?:[^'\\\n\r]|\\.)*'
+  | //[^\n]*\n
+  | /\*[\s\S]*?\*/
+  | (?P<incomplete>"(?:[^"\\\n\r]|\\.)*\\?\Z
+                  | '(?:[^'\\\n\r]|\\.)*\\?\Z
+                  | //[^\n]*\Z
+                  | /\*[\s\S]*\Z
+                  | /\Z)
+  | (?P<brace>[{}])
+  | (?P<end>;)
+  | [^"'/{};]+
+  | [\s\S]
+  ''', re.VERBOSE)
+
+def _mof_declarations(fp, blocksize=65536):
+    """
+    Generate the MOF in a file object in pieces that end after a declaration
+    (i.e. after a semicolon that is not in braces, strings or comments), and
+    that can be parsed one after the other. The file is read in blocks of
+    `blocksize` characters, so that only the current declaration and the
+    current block are held in memory.
+
+    The pieces are returned as strings, and together they are the complete
+    MOF, including whitespace and comments.
+    """
+
+    buf = ''
+    start = 0  # start of the current declaration in buf
+    pos = 0  # position up to which buf has been scanned
+    depth = 0
+    eof = False
+    while True:
+        for m in _declaration_re.finditer(buf, pos):
+            if m.lastgroup == 'incomplete' and not eof:
+                pos = m.start()
+                break
+            pos = m.end()
+            if m.lastgroup == 'brace':
+                depth += 1 if m.group() == '{' else -1
+            elif m.lastgroup == 'end' and depth <= 0:
+                depth = 0
+                yield buf[start:pos]
+                start = pos
+        if eof:
+            if start < len(buf):
+                yield buf[start:]
+            return
+        data = fp.read(blocksize)
+        if data:
+            buf = buf[start:] + data
+            pos -= start
+            start = 0
+        else:
+            eof = True
+
+
 class MOFCompiler(object):
     """
     A MOF compiler.
@@ -1963,7 +3290,8 @@ class MOFCompiler(object):
     """
 
     def __init__(self, handle, search_paths=None, verbose=False,
-                 log_func=_print_logger):
+                 log_func=_print_logger, index_file=None, cache_dir=None,
+                 processes=1):
         """
         Parameters:
 
@@ -1986,24 +3314,79 @@ class MOFCompiler(object):
             A logger function that is invoked for each compiler message.
             The logger function must take one parameter of string type.
             The default logger prints to stdout.
+
+          index_file (:term:`string`):
+            Path name of a file in which the index of the MOF files in the
+            search path (see :meth:`find_mof`) is persisted, so that it
+            can be used again by later MOF compilers with the same search
+            path. The persisted index is used only if none of the directories
+            in the search path has been modified since it was built.
+
+            `None` means that the index is not persisted.
+
+          cache_dir (:term:`string`):
+            Path name of an existing directory in which the results of
+            :meth:`compile_file` are cached, so that they can be used
+            again by later MOF compilers. See :meth:`compile_file` for
+            details.
+
+            `None` means that the results are not cached.
+
+          processes (:term:`integer`):
+            Number of worker processes in which MOF files are parsed by
+            :meth:`compile_file`, in parallel to the compilation of the
+            previously parsed MOF files into the repository.
+
+            `None` means the number of CPUs. 1 means that MOF files are
+            parsed in the calling process, without worker processes.
         """
 
-        self.parser = _yacc(verbose)
+        self.parser = _parser(verbose)
         self.parser.search_paths = search_paths if search_paths else []
         self.handle = handle
         self.parser.handle = handle
-        self.lexer = _lex(verbose)
+        self.lexer = _lexer(verbose)
         self.lexer.parser = self.parser
         self.parser.qualcache = {}
         self.parser.classnames = {}
         if handle:
             default_namespace = handle.default_namespace
             self.parser.qualcache[default_namespace] = NocaseDict()
-            self.parser.classnames[default_namespace] = []
+            self.parser.classnames[default_namespace] = _ClassNames()
         self.parser.mofcomp = self
         self.parser.verbose = verbose
         self.parser.log = log_func
         self.parser.aliases = {}
+        self.parser.deferred = None
+        # The list to which the instances of the MOF are appended instead of
+        # creating them in the repository, or `None` (see iter_instances()).
+        self.parser.instances = None
+        self.index_file = index_file
+        self._mof_index = None
+        self.dependencies = MOFDependencyGraph()
+        self._mof_index_paths = None
+
+        # The compilation cache is used only with a local repository that
+        # starts out empty. _cache_key identifies the state of the repository
+        # as the sequence of files compiled into it, and is `None` if the
+        # state cannot be identified (e.g. after compile_string() was used).
+        self.cache_dir = cache_dir
+        self._cache_key = None
+        if cache_dir is not None and isinstance(handle, MOFWBEMConnection) \
+                and handle.conn is None and not handle.classes and \
+                not handle.qualifiers and not handle.instances:
+            self._cache_key = ''
+        # Input files and MOF file lookups of the compile_file() call that
+        # is being cached, or `None`.
+        self._cache_files = None
+        self._cache_lookups = None
+
+        # The pool of worker processes while compile_file() runs with more
+        # than one process, and the results of parsing the MOF files in the
+        # worker processes by (filename, namespace).
+        self.processes = processes
+        self._pool = None
+        self._parsed = {}
 
     def compile_string(self, mof, ns, filename=None):
         """
@@ -2031,6 +3414,22 @@ class MOFCompiler(object):
           : Any exceptions that are raised by the repository connection class.
         """
 
+        return self._compile(mof, ns, filename)
+
+    def _compile(self, mof, ns, filename, deferred=None):
+        """
+        Compile a string of MOF statements, see :meth:`compile_string`.
+
+        If `deferred` is not `None`, the MOF has been parsed in a worker
+        process, and `deferred` is the list of the productions recorded for
+        it. These productions are applied to the repository instead of
+        parsing the MOF again.
+        """
+
+        if self._cache_files is None:
+            # The resulting state of the repository is not cached
+            self._cache_key = None
+
         lexer = self.lexer.clone()
         lexer.parser = self.parser
         try:
@@ -2043,39 +3442,67 @@ class MOFCompiler(object):
         except AttributeError:
             oldmof = None
         self.parser.mof = mof
-        self.parser.handle.default_namespace = ns
-        if ns not in self.parser.qualcache:
-            self.parser.qualcache[ns] = NocaseDict()
-        if ns not in self.parser.classnames:
-            self.parser.classnames[ns] = []
+        # The instances of included MOF files are created in the repository
+        oldinstances = self.parser.instances
+        self.parser.instances = None
+        self._set_namespace(ns)
         try:
-            rv = self.parser.parse(mof, lexer=lexer)
+            if deferred is None:
+                rv = self.parser.parse(mof, lexer=lexer)
+            else:
+                rv = self._apply_deferred(deferred)
             self.parser.file = oldfile
             self.parser.mof = oldmof
+            self.parser.instances = oldinstances
             return rv
-        except MOFParseError as pe:
-            self.parser.log('Syntax error:')
-            if hasattr(pe, 'file') and hasattr(pe, 'lineno'):
-                self.parser.log('%s:%s:' % (pe.file, pe.lineno))
-            if hasattr(pe, 'context'):
-                self.parser.log('\n'.join(pe.context))
-            if str(pe):
-                self.parser.log(str(pe))
+        except (MOFParseError, CIMError) as exc:
+            self._log_error(exc)
             raise
-        except CIMError as ce:
-            if hasattr(ce, 'file_line'):
-                self.parser.log('Fatal Error: %s:%s' % (ce.file_line[0],
-                                                        ce.file_line[1]))
+
+    def _set_namespace(self, ns):
+        """Make a namespace the target of the compilation."""
+        self.parser.handle.default_namespace = ns
+        if ns not in self.parser.qualcache:
+            self.parser.qualcache[ns] = NocaseDict()
+        if ns not in self.parser.classnames:
+            self.parser.classnames[ns] = _ClassNames()
+
+    def _log_error(self, exc):
+        """Log a syntax error or a CIM error of a compilation."""
+        if isinstance(exc, MOFParseError):
+            self.parser.log('Syntax error:')
+            if hasattr(exc, 'file') and hasattr(exc, 'lineno'):
+                self.parser.log('%s:%s:' % (exc.file, exc.lineno))
+            if hasattr(exc, 'context'):
+                self.parser.log('\n'.join(exc.context))
+            if str(exc):
+                self.parser.log(str(exc))
+        else:
+            if hasattr(exc, 'file_line'):
+                self.parser.log('Fatal Error: %s:%s' % (exc.file_line[0],
+                                                        exc.file_line[1]))
             else:
                 self.parser.log('Fatal Error:')
-            self.parser.log('%s%s' % (_statuscode2string(ce.args[0]),
-                                      ce.args[1] and ': '+ce.args[1] or ''))
-            raise
+            self.parser.log('%s%s' % (_statuscode2string(exc.args[0]),
+                                      exc.args[1] and ': '+exc.args[1] or ''))
 
     def compile_file(self, filename, ns):
         """
         Compile a MOF file into a namespace of the associated CIM repository.
 
+        If the MOF compiler has a cache directory, the associated repository
+        is a :class:`~pywbem.MOFWBEMConnection` object without underlying
+        repository, and all MOF has been compiled into the repository with
+        this method, the state of the repository after the compilation is
+        cached in the cache directory. A later MOF compiler that compiles the
+        same sequence of files restores the cached state instead of compiling
+        the file, unless any of the files that were read during the
+        compilation (including files compiled because of `#pragma include`
+        directives or for resolving dependencies) has been changed, or a
+        lookup of MOF files in the search path (see :meth:`find_mof`) has a
+        different result. Files are considered changed if their contents
+        have changed.
+
         Parameters:
 
           filename (:term:`string`):
@@ -2094,14 +3521,508 @@ class MOFCompiler(object):
           : Any exceptions that are raised by the repository connection class.
         """
 
+        if self._cache_key is not None and self._cache_files is None:
+            return self._compile_file_cached(filename, ns)
+        if self.processes != 1 and self._pool is None:
+            return self._compile_file_parallel(filename, ns)
+
         if self.parser.verbose:
             self.parser.log('Compiling file ' + filename)
 
-        f = open(filename, 'r')
-        mof = f.read()
-        f.close()
+        if self._cache_files is not None:
+            stat = os.stat(filename)
+        parsed = self._take_parsed(filename, ns)
+        if parsed is not None:
+            mof, deferred = parsed
+        else:
+            deferred = None
+            f = open(filename, 'r')
+            mof = f.read()
+            f.close()
+        if self._cache_files is not None:
+            self._cache_files[os.path.abspath(filename)] = \
+                (stat.st_mtime, stat.st_size, _digest(mof))
+
+        self.dependencies.begin_file(filename, ns)
+        try:
+            if deferred is None:
+                return self.compile_string(mof, ns, filename=filename)
+            return self._compile(mof, ns, filename, deferred)
+        finally:
+            self.dependencies.end_file()
+
+    def stream_file(self, filename, ns, callback=None):
+        """
+        Compile a MOF file into a namespace of the associated CIM repository,
+        reading and compiling one declaration at a time.
+
+        Unlike :meth:`compile_file`, this method does not read the complete
+        MOF file into memory. The memory needed for compiling a large MOF
+        file with many instance declarations is therefore determined by the
+        largest declaration and by the classes and qualifier types in the
+        repository. Note that a :class:`~pywbem.MOFWBEMConnection`
+        repository connection keeps all instances it creates for
+        :meth:`rollback`; to keep the memory bounded, compile into a
+        connection to the target repository, or pass a `callback`.
+
+        The compilation is neither cached nor recorded for
+        :meth:`recompile_files`. MOF files that are included or compiled
+        for resolving dependencies are compiled with :meth:`compile_file`.
+
+        Parameters:
+
+          filename (:term:`string`):
+            The path name of the MOF file containing the MOF statements to be
+            compiled.
+
+          ns (:term:`string`):
+            The name of the CIM namespace in the associated CIM repository
+            that is used for lookup of any dependent CIM elements, and that
+            is also the target of the compilation.
+
+          callback (:term:`callable`):
+            A function that is invoked with each CIM instance
+            (:class:`~pywbem.CIMInstance`) declared in the MOF file as soon
+            as its declaration has been compiled, instead of creating the
+            instance in the repository.
+
+            `None` means that the instances are created in the repository.
+
+        Raises:
+
+          MOFParseError: Syntax error in the MOF.
+
+          : Any exceptions that are raised by the repository connection class.
+        """
+
+        if callback is None:
+            for _ in self._stream_file(filename, ns, None):
+                pass
+        else:
+            for inst in self.iter_instances(filename, ns):
+                callback(inst)
+
+    def iter_instances(self, filename, ns):
+        """
+        Compile a MOF file like :meth:`stream_file`, and generate the CIM
+        instances declared in it instead of creating them in the repository.
+
+        The MOF file is compiled while the generator is iterated. Classes and
+        qualifier types declared in the MOF file are created in the
+        repository, because the instance declarations depend on them.
+
+        Parameters:
+
+          filename (:term:`string`):
+            The path name of the MOF file containing the MOF statements to be
+            compiled.
+
+          ns (:term:`string`):
+            The name of the CIM namespace in the associated CIM repository
+            that is used for lookup of any dependent CIM elements, and that
+            is also the target of the compilation.
+
+        Returns:
+
+          A generator of :class:`~pywbem.CIMInstance` objects, in the order
+          of their declarations. Their paths are set, including the
+          namespace.
+
+        Raises:
+
+          MOFParseError: Syntax error in the MOF.
+
+          : Any exceptions that are raised by the repository connection class.
+        """
+
+        instances = []
+        for _ in self._stream_file(filename, ns, instances):
+            for inst in instances:
+                yield inst
+            del instances[:]
+
+    def _stream_file(self, filename, ns, instances):
+        """
+        Compile a MOF file one declaration at a time, see
+        :meth:`stream_file`, and yield after each declaration.
+
+        If `instances` is not `None`, the instances of the MOF file are
+        appended to this list instead of creating them in the repository.
+        """
+
+        if self.parser.verbose:
+            self.parser.log('Streaming file ' + filename)
+
+        # The resulting state of the repository is not cached
+        self._cache_key = None
+
+        lexer = self.lexer.clone()
+        lexer.parser = self.parser
+        parser = self.parser
+        with open(filename, 'r') as fp:
+            for mof in _mof_declarations(fp):
+                # The target namespace may have been changed by a namespace
+                # pragma, or by the caller while the generator was suspended
+                self._set_namespace(ns)
+                old = (getattr(parser, 'file', None),
+                       getattr(parser, 'mof', None), parser.instances)
+                parser.file = filename
+                parser.mof = mof
+                parser.instances = instances
+                try:
+                    parser.parse(mof, lexer=lexer)
+                except (MOFParseError, CIMError) as exc:
+                    self._log_error(exc)
+                    raise
+                finally:
+                    parser.file, parser.mof, parser.instances = old
+                ns = parser.handle.default_namespace
+                yield
+
+    def _compile_file_parallel(self, filename, ns):
+        """
+        Compile a MOF file, parsing it and the MOF files it includes in a pool
+        of worker processes.
+
+        The worker processes parse the MOF without access to the repository,
+        and record the productions that modify the repository. These
+        productions are applied to the repository in the calling process, in
+        the same order as when parsing the MOF in the calling process.
+        Qualifier types are looked up only when applying the productions.
+        MOF files that cannot be parsed this way (e.g. because they contain
+        instances, or have syntax errors) are parsed in the calling process
+        when they are compiled.
+        """
+
+        self._pool = multiprocessing.Pool(self.processes)
+        try:
+            self._parse_async(filename, ns)
+            return self.compile_file(filename, ns)
+        finally:
+            self._pool.terminate()
+            self._pool = None
+            self._parsed = {}
+
+    def _parse_async(self, filename, ns):
+        """Start parsing a MOF file in a worker process."""
+
+        key = (os.path.abspath(filename), ns)
+        if key not in self._parsed:
+            self._parsed[key] = self._pool.apply_async(_parse_deferred,
+                                                       (filename,))
+
+    def _take_parsed(self, filename, ns):
+        """
+        Return the result of parsing a MOF file in a worker process as a
+        tuple (mof, deferred), or `None` if the MOF file has not been parsed
+        in a worker process or could not be parsed there.
+
+        The included MOF files are started to be parsed in worker processes.
+        """
+
+        result = self._parsed.pop((os.path.abspath(filename), ns), None)
+        if result is None:
+            return None
+        result = result.get()
+        if result is None:
+            return None
+        for rule, _, values, _, _, _ in result[1]:
+            if rule is p_compilerDirective:
+                # See p_compilerDirective()
+                directive = values[2].lower()
+                if directive == 'include':
+                    fname = values[4]
+                    if len(os.path.dirname(filename)) != 0:
+                        fname = os.path.dirname(filename) + '/' + fname
+                    self._parse_async(fname, ns)
+                elif directive == 'namespace':
+                    ns = values[4]
+        return result
+
+    def _apply_deferred(self, deferred):
+        """Apply the productions recorded when parsing MOF in a worker
+        process, see :func:`_defer`."""
+
+        parser = self.parser
+        for rule, lineno, values, pending, slots, aliases in deferred:
+            if pending:
+                resolved = [_build_qualifier(_Production(parser, qlineno),
+                                             qname, qval, flavorlist)
+                            for qname, qval, flavorlist, qlineno in pending]
+                slots = iter(slots)
+                for quals in _qualifier_dicts(values[0]):
+                    for name in sorted(quals.keys(), key=lambda n: n.lower()):
+                        i = next(slots)
+                        if i is not None:
+                            quals[name] = resolved[i]
+            parser.aliases.update(aliases)
+            rule(_Production(parser, lineno, values))
+
+    def recompile_files(self, filenames):
+        """
+        Recompile changed MOF files that have been compiled before with this
+        MOF compiler, and the compiled MOF files that are affected by the
+        changes.
+
+        The affected files are determined and ordered with the dependency
+        graph of the MOF compiler (see
+        :meth:`~pywbem.mof_compiler.MOFDependencyGraph.affected`). Files that
+        are included by another affected file are compiled as part of that
+        file.
+
+        If the associated repository is a :class:`~pywbem.MOFWBEMConnection`
+        object, the classes, qualifier types and instances defined by the
+        affected files are removed from it before the files are compiled
+        again. Otherwise, they are modified in the repository as usual when
+        compiling MOF for existing elements. Files included by affected files
+        with `#pragma include` are not compiled again unless they are
+        affected themselves.
+
+        Parameters:
+
+          filenames (:term:`py:iterable` of :term:`string`):
+            Path names of the changed MOF files.
+
+        Returns:
+
+          :class:`py:list` of :class:`py:tuple` (filename, namespace): The
+          affected files, in the order in which they were compiled.
+
+        Raises:
+
+          MOFParseError: Syntax error in the MOF.
+
+          : Any exceptions that are raised by the repository connection class.
+        """
 
-        return self.compile_string(mof, ns, filename=filename)
+        # The resulting state of the repository is not cached
+        self._cache_key = None
+        return self._recompile(filenames)
+
+    def _recompile(self, filenames):
+        """Recompile changed MOF files, see :meth:`recompile_files`."""
+
+        graph = self.dependencies
+        affected = graph.affected(filenames)
+        included = set()
+        for key in affected:
+            included.update(graph._nodes[key].includes)
+        if isinstance(self.handle, MOFWBEMConnection):
+            for key in affected:
+                self._remove_definitions(graph._nodes[key])
+        # Included files that are not affected are not compiled again
+        graph._current = set(graph._nodes).difference(affected)
+        try:
+            for key in affected:
+                if key not in included:
+                    self.compile_file(*key)
+        finally:
+            graph._current = set()
+        return affected
+
+    def _remove_definitions(self, node):
+        """Remove the elements defined by a compiled MOF file from the local
+        repository."""
+
+        handle = self.handle
+        parser = self.parser
+        for kind, ns, name in node.definitions:
+            if kind == 'class':
+                classes = handle.classes.get(ns)
+                if classes is not None and name in classes:
+                    del classes[name]
+                if ns in handle.class_names:
+                    handle.class_names[ns].discard(name)
+                if ns in parser.classnames:
+                    parser.classnames[ns].discard(name)
+            else:
+                for quals in (handle.qualifiers.get(ns),
+                              parser.qualcache.get(ns)):
+                    if quals is not None and name in quals:
+                        del quals[name]
+        for ns, path in node.instances:
+            if ns in handle.instances:
+                handle.instances[ns] = [inst for inst in handle.instances[ns]
+                                        if inst.path != path]
+
+    def _compile_file_cached(self, filename, ns):
+        """
+        Compile a MOF file, or restore the resulting state of the repository
+        from the cache. If only some of the files read during the
+        compilation have changed, the cached state is restored and the
+        affected files are recompiled.
+        """
+
+        key = hashlib.sha1(('%s\0%s\0%s' % (
+            self._cache_key, os.path.abspath(filename), ns)).encode('utf-8'))
+        key = key.hexdigest()
+        cache_file = os.path.join(self.cache_dir, key + '.bin')
+        entry = self._load_cache(cache_file)
+        if entry is not None and not entry[2]:
+            if self.parser.verbose:
+                self.parser.log('Restored compilation of file %s from %s' %
+                                (filename, cache_file))
+            self._cache_key = key
+            return None
+
+        # If the compilation fails, the state of the repository is unknown
+        self._cache_key = None
+        rv = None
+        try:
+            if entry is None:
+                self._cache_files = {}
+                self._cache_lookups = {}
+                rv = self.compile_file(filename, ns)
+            else:
+                files, lookups, changed = entry
+                if self.parser.verbose:
+                    self.parser.log('Restored compilation of file %s from %s, '
+                                    'recompiling changed files %s' %
+                                    (filename, cache_file,
+                                     ', '.join(changed)))
+                for path in changed:
+                    del files[path]
+                self._cache_files = files
+                self._cache_lookups = lookups
+                self._recompile(changed)
+        finally:
+            files = self._cache_files
+            lookups = self._cache_lookups
+            self._cache_files = None
+            self._cache_lookups = None
+        self._save_cache(cache_file, files, lookups)
+        self._cache_key = key
+        return rv
+
+    def _load_cache(self, cache_file):
+        """
+        Restore the state of the repository and the dependency graph from a
+        cache file.
+
+        Returns `None` if the cache file does not exist or cannot be used
+        because a lookup of MOF files has a different result. Otherwise,
+        returns a tuple of the dictionary of files and the dictionary of
+        lookups of the cache file, and the list of changed files.
+        """
+
+        files = {}
+        changed = []
+        try:
+            with open(cache_file, 'rb') as fp:
+                reader = CIMBinaryReader(fp)
+                paths, mtimes, sizes, digests = reader.read()
+                for path, mtime, size, digest in \
+                        zip(paths, mtimes, sizes, digests):
+                    files[path] = (mtime, size, digest)
+                    stat = os.stat(path)
+                    if stat.st_mtime == mtime and stat.st_size == size:
+                        continue
+                    with open(path, 'r') as mof_fp:
+                        if _digest(mof_fp.read()) != digest:
+                            changed.append(path)
+                names, results = reader.read()
+                for name, result in zip(names, results):
+                    if self.find_mof(name) != result:
+                        return None
+                graph = reader.read()
+                state = list(reader)
+        except (IOError, OSError, EOFError, ValueError, Error):
+            return None
+
+        self.dependencies._load_records(graph)
+        handle = self.handle
+        parser = self.parser
+        handle.classes = {}
+        handle.class_names = {}
+        handle.qualifiers = {}
+        handle.instances = {}
+        parser.qualcache = {}
+        parser.classnames = {}
+        default_namespace, alias_names, alias_objects = state[0]
+        parser.aliases = dict(zip(alias_names, alias_objects))
+        for ns, classes, class_names, qualifiers, instances, qualcache, \
+                classnames in state[1:]:
+            if classes is not None:
+                handle.classes[ns] = NocaseDict(
+                    [(cc.classname, cc) for cc in classes])
+            if class_names is not None:
+                handle.class_names[ns] = _ClassNames(class_names)
+            if qualifiers is not None:
+                handle.qualifiers[ns] = NocaseDict(
+                    [(qual.name, qual) for qual in qualifiers])
+            if instances is not None:
+                handle.instances[ns] = instances
+            if qualcache is not None:
+                parser.qualcache[ns] = NocaseDict(
+                    [(qual.name, qual) for qual in qualcache])
+            if classnames is not None:
+                parser.classnames[ns] = _ClassNames(classnames)
+        handle.default_namespace = default_namespace
+        return files, dict(zip(names, results)), changed
+
+    def _save_cache(self, cache_file, files, lookups):
+        """
+        Save the state of the repository in a cache file, together with the
+        information for checking whether the cache file is up to date.
+        """
+
+        handle = self.handle
+        parser = self.parser
+        namespaces = set(handle.classes) | set(handle.class_names) | \
+            set(handle.qualifiers) | set(handle.instances) | \
+            set(parser.qualcache) | set(parser.classnames)
+
+        def values(dict_, ns):
+            """Return the values of a dictionary in the state."""
+            try:
+                return list(dict_[ns].values())
+            except KeyError:
+                return None
+
+        def name_list(dict_, ns):
+            """Return the class names of a set in the state."""
+            try:
+                return list(dict_[ns])
+            except KeyError:
+                return None
+
+        paths = sorted(files)
+        names = sorted(lookups)
+        records = [
+            [paths, [files[p][0] for p in paths], [files[p][1] for p in paths],
+             [files[p][2] for p in paths]],
+            [names, [lookups[n] for n in names]],
+            self.dependencies._records(),
+            [handle.default_namespace, list(parser.aliases.keys()),
+             list(parser.aliases.values())]]
+        for ns in sorted(namespaces):
+            records.append([ns, values(handle.classes, ns),
+                            name_list(handle.class_names, ns),
+                            values(handle.qualifiers, ns),
+                            handle.instances.get(ns),
+                            values(parser.qualcache, ns),
+                            name_list(parser.classnames, ns)])
+
+        # Write to a temporary file that is renamed, so that concurrent MOF
+        # compilers never see a partially written cache file.
+        tmp_file = '%s.%d.tmp' % (cache_file, os.getpid())
+        try:
+            with open(tmp_file, 'wb') as fp:
+                writer = CIMBinaryWriter(fp)
+                for record in records:
+                    writer.write(record)
+            try:
+                os.rename(tmp_file, cache_file)
+            except OSError:
+                # On Windows, existing files are not replaced
+                os.remove(cache_file)
+                os.rename(tmp_file, cache_file)
+        except (IOError, OSError, TypeError) as exc:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            if self.parser.verbose:
+                self.parser.log('Cannot write compilation cache file %s: %s' %
+                                (cache_file, exc))
 
     def find_mof(self, classname):
         """
@@ -2114,6 +4035,12 @@ class MOFCompiler(object):
         Example: The class "CIM_ComputerSystem" is expected to be in a file
         "CIM_ComputerSystem.mof".
 
+        The MOF files are looked up in an index of the search path that is
+        built when this method is first called (or loaded from the index file
+        of the MOF compiler), and when the search path has been changed since
+        then. MOF files that are added to the directories later are found only
+        after calling :meth:`refresh_mof_index`.
+
         Parameters:
 
           classame (:term:`string`):
@@ -2125,14 +4052,74 @@ class MOFCompiler(object):
           `None`, otherwise.
         """
 
+        if self._mof_index is None or \
+                self._mof_index_paths != list(self.parser.search_paths):
+            self._mof_index_paths = list(self.parser.search_paths)
+            self._mof_index = self._load_mof_index()
+            if self._mof_index is None:
+                self.refresh_mof_index()
         classname = classname.lower()
-        for search in self.parser.search_paths:
+        moffile = self._mof_index.get(classname)
+        if self._cache_lookups is not None:
+            self._cache_lookups[classname] = moffile
+        return moffile
+
+    def refresh_mof_index(self):
+        """
+        Rebuild the index of the MOF files in the search path that is used by
+        :meth:`find_mof`, and persist it in the index file of the MOF
+        compiler, if one was specified.
+        """
+
+        search_paths = list(self.parser.search_paths)
+        index = {}
+        dirs = {}
+        for search in search_paths:
+            # Missing directories are recorded as well, so that the persisted
+            # index gets out of date when they are created.
+            dirs[search] = _mtime(search)
             for root, dummy_dirs, files in os.walk(search):
+                dirs[root] = _mtime(root)
                 for file_ in files:
-                    if file_.endswith('.mof') and \
-                            file_[:-4].lower() == classname:
-                        return root + '/' + file_
-        return None
+                    if file_.endswith('.mof'):
+                        # The first file found for a class name wins, as in
+                        # a search of the directories in walk order.
+                        index.setdefault(file_[:-4].lower(),
+                                         root + '/' + file_)
+        self._mof_index_paths = search_paths
+        self._mof_index = index
+
+        if self.index_file is not None:
+            data = {'search_paths': search_paths, 'dirs': dirs,
+                    'files': index}
+            try:
+                with open(self.index_file, 'w') as fp:
+                    json.dump(data, fp)
+            except (IOError, OSError) as exc:
+                if self.parser.verbose:
+                    self.parser.log('Cannot write MOF index file %s: %s' %
+                                    (self.index_file, exc))
+
+    def _load_mof_index(self):
+        """
+        Return the index of MOF files persisted in the index file, or `None`
+        if there is no index file, or if the index is out of date.
+        """
+
+        if self.index_file is None:
+            return None
+        try:
+            with open(self.index_file, 'r') as fp:
+                data = json.load(fp)
+            if data['search_paths'] != self._mof_index_paths:
+                return None
+            for dir_, mtime in six.iteritems(data['dirs']):
+                if _mtime(dir_) != mtime:
+                    return None
+            return data['files']
+        except (IOError, OSError, ValueError, KeyError, TypeError,
+                AttributeError):
+            return None
 
     def rollback(self, verbose=False):
         """
@@ -2144,6 +4131,55 @@ class MOFCompiler(object):
         self.handle.rollback(verbose=verbose)
 
 
+# The parser that is shared by the MOF compilers in this process. Each MOF
+# compiler uses its own copy of it (see _parser()).
+_shared_parser = None
+
+def _parser(verbose=False):
+    """Return a new YACC parser object for a MOF compiler.
+
+    The parsing tables are loaded only once per process, and are shared by
+    the parser objects.
+    """
+
+    global _shared_parser  # pylint: disable=global-statement
+    if _shared_parser is None:
+        _shared_parser = _load_yacc()
+        if _shared_parser is None:
+            _shared_parser = _yacc(verbose)
+    return copy.copy(_shared_parser)
+
+def _lexer(verbose=False):  # pylint: disable=unused-argument
+    """Return a new lexical analyzer object for a MOF compiler.
+
+    The lexical analyzer is a :class:`_MOFLexer` object. The LEX analyzer of
+    PLY that is returned by :func:`_lex` returns the same tokens, but is
+    slower.
+    """
+
+    return _MOFLexer()
+
+def _load_yacc():
+    """Return a YACC parser object that uses the existing YACC table module
+    for the MOF compiler, or `None` if the table module does not exist or its
+    table version does not match the installed version of the `ply` package.
+
+    Unlike yacc.yacc(), this does not inspect the grammar rules in the
+    docstrings of the p_* functions, but only checks that the functions of
+    the productions in the table module exist. As with yacc.yacc() in
+    optimized mode, the table module is assumed to be up to date with the
+    grammar rules.
+    """
+
+    from ply import yacc
+    lrtab = yacc.LRTable()
+    try:
+        lrtab.read_table('%s.%s' % (__name__.rpartition('.')[0], _tabmodule))
+        lrtab.bind_callables(globals())
+    except (ImportError, yacc.YaccError, KeyError):
+        return None
+    return yacc.LRParser(lrtab, p_error)
+
 def _build(verbose=False):
     """Build the LEX and YACC table modules for the MOF compiler, if they do
     not exist yet, or if their table versions do not match the installed
@@ -2164,13 +4200,18 @@ def _yacc(verbose=False):
     the installed version of the `ply` package.
     """
 
+    from ply import yacc
+
     # In yacc(), the 'debug' parameter controls the main error
     # messages to the 'errorlog' in addition to the debug messages
     # to the 'debuglog'. Because we want to see the error messages,
     # we enable debug but set the debuglog to the NullLogger.
+    # The table module is not written if the package directory is read-only
+    # (e.g. in a system-wide installation).
     return yacc.yacc(optimize=_optimize,
                      tabmodule=_tabmodule,
                      outputdir=_tabdir,
+                     write_tables=os.access(_tabdir, os.W_OK),
                      debug=True,
                      debuglog=yacc.NullLogger(),
                      errorlog=yacc.PlyLogger(sys.stdout))
@@ -2183,6 +4224,8 @@ def _lex(verbose=False):
     the installed version of the `ply` package.
     """
 
+    from ply import lex
+
     return lex.lex(optimize=_optimize,
                    lextab=_lextab,
                    outputdir=_tabdir,
@@ -1711,6 +1711,96 @@ def unpack_value(tup_tree):
     else:
         return tocimobj(valtype, raw_val)
 
+def _instance_table_row(tup_tree):
+    """Parse the properties of an INSTANCE element into the row tuples
+    expected by :meth:`~pywbem.InstanceTable.append`, without creating
+    CIMProperty or CIMInstance objects.
+
+    Qualifiers (on the instance and on its properties) are ignored.
+    """
+
+    check_node(tup_tree, 'INSTANCE', ['CLASSNAME'],
+               ['QUALIFIER', 'PROPERTY', 'PROPERTY.ARRAY',
+                'PROPERTY.REFERENCE'])
+
+    row = []
+    for node in kids(tup_tree):
+        nodename = name(node)
+        if nodename == 'PROPERTY.REFERENCE':
+            prop = parse_property_reference(node)
+            row.append((prop.name, prop.value, 'reference', False,
+                        prop.reference_class, None))
+            continue
+        if nodename not in ('PROPERTY', 'PROPERTY.ARRAY'):
+            continue
+        attrl = attrs(node)
+        if 'NAME' not in attrl or 'TYPE' not in attrl:
+            raise ParseError('%s element is missing NAME or TYPE attribute' %\
+                             nodename)
+        try:
+            val = unpack_value(node)
+        except ValueError as exc:
+            raise ParseError('Cannot parse value for property "%s": %s' %\
+                             (attrl['NAME'], str(exc)))
+        embedded_object = attrl.get('EmbeddedObject',
+                                    attrl.get('EMBEDDEDOBJECT'))
+        if embedded_object is not None:
+            val = parse_embeddedObject(val)
+        row.append((attrl['NAME'], val, attrl['TYPE'],
+                    nodename == 'PROPERTY.ARRAY',
+                    attrl.get('REFERENCECLASS'), embedded_object))
+
+    return attrs(tup_tree)['CLASSNAME'], row
+
+def fill_instance_table(tup_tree, table):
+    """Move the instances in the IRETURNVALUE element of a CIM-XML response
+    into an :class:`~pywbem.InstanceTable` object.
+
+    `tup_tree` is the unparsed tupletree of the complete response (as
+    returned by :func:`~pywbem.tupletree.dom_to_tupletree`). The
+    VALUE.NAMEDINSTANCE and INSTANCE elements are appended as rows to `table`
+    and are then removed from the tupletree, so that the remaining response
+    can be parsed with :func:`parse_cim` without creating CIMInstance
+    objects. If the response does not have the expected structure (e.g. if
+    it is an error response), the tupletree is left unchanged, so that
+    :func:`parse_cim` can report the problem.
+
+    Returns the number of rows appended.
+    """
+
+    node = tup_tree
+    for nodename in ('CIM', 'MESSAGE', 'SIMPLERSP', 'IMETHODRESPONSE',
+                     'IRETURNVALUE'):
+        if node is None or name(node) != nodename:
+            return 0
+        if nodename == 'IRETURNVALUE':
+            break
+        children = kids(node)
+        node = children[0] if len(children) == 1 else None
+
+    count = 0
+    remaining = []
+    for child in node[2]:
+        if isinstance(child, tuple) and \
+                name(child) in ('VALUE.NAMEDINSTANCE', 'INSTANCE'):
+            if name(child) == 'VALUE.NAMEDINSTANCE':
+                k = kids(child)
+                if len(k) != 2:
+                    raise ParseError('expecting (INSTANCENAME, INSTANCE), '\
+                                     'got %r' % k)
+                path = parse_instancename(k[0])
+                classname, row = _instance_table_row(k[1])
+            else:
+                path = None
+                classname, row = _instance_table_row(child)
+            table.append(path, classname, row)
+            count += 1
+        else:
+            remaining.append(child)
+    node[2][:] = remaining
+
+    return count
+
 def unpack_boolean(data):
     """Unpack a boolean, represented as "TRUE" or "FALSE" in CIM."""
 
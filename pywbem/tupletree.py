@@ -28,7 +28,9 @@ object structures rather than text documents.  Direct mapping to Python
 classes may not be a good match either.
 
 tupletrees may be created from an in-memory DOM using
-dom_to_tupletree(), or from a string using xml_to_tupletree().
+dom_to_tupletree(), or from a string using xml_to_tupletree(). The latter
+builds the tuple tree directly from the events of the expat parser, without
+creating a DOM first.
 
 Since the Python XML libraries deal mostly with Unicode strings they
 are also returned here.  If plain Strings are passed in they will be
@@ -50,7 +52,7 @@ The fourth element is reserved.
 
 from __future__ import absolute_import
 
-import xml.dom.minidom
+from xml.parsers import expat
 
 import six
 
@@ -95,7 +97,78 @@ def dom_to_tupletree(node):
     return (name, attrs, contents, None)
 
 
+class _TupleTreeBuilder(object):
+    # pylint: disable=too-few-public-methods
+    """Build a tuple tree from the events of an expat parser.
+
+    The resulting tuple tree is the same as the one returned by
+    dom_to_tupletree() for a DOM parsed by xml.dom.minidom: Adjacent
+    character data is merged into one string, and each CDATA section is a
+    separate string. Comments and processing instructions are ignored.
+    """
+
+    def __init__(self):
+        self.root = None
+        self._stack = []
+        # Contents list of the current element
+        self._contents = None
+        # Whether the last item of the current contents is a string that
+        # the next character data is appended to
+        self._text = False
+
+    def start_element(self, name, attrs):
+        """Handle the start of an element."""
+        contents = []
+        node = (name, attrs, contents, None)
+        if self._contents is None:
+            self.root = node
+        else:
+            self._contents.append(node)
+        self._stack.append(self._contents)
+        self._contents = contents
+        self._text = False
+
+    def end_element(self, name):
+        # pylint: disable=unused-argument
+        """Handle the end of an element."""
+        self._contents = self._stack.pop()
+        self._text = False
+
+    def character_data(self, data):
+        """Handle character data, including the data of CDATA sections."""
+        contents = self._contents
+        if self._text:
+            contents[-1] += data
+        else:
+            contents.append(data)
+            self._text = True
+
+    def start_cdata(self):
+        """Handle the start of a CDATA section."""
+        self._text = False
+
+    def end_cdata(self):
+        """Handle the end of a CDATA section."""
+        self._text = False
+
+
 def xml_to_tupletree(xml_string):
-    """Parse XML straight into tupletree."""
-    dom_xml = xml.dom.minidom.parseString(xml_string)
-    return dom_to_tupletree(dom_xml)
+    """Parse XML straight into tupletree.
+
+    The XML string is parsed with the expat parser, and the tuple tree is
+    built while parsing, without creating a DOM.
+
+    Raises:
+
+      xml.parsers.expat.ExpatError: The XML string is not well-formed.
+    """
+    builder = _TupleTreeBuilder()
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = builder.start_element
+    parser.EndElementHandler = builder.end_element
+    parser.CharacterDataHandler = builder.character_data
+    parser.StartCdataSectionHandler = builder.start_cdata
+    parser.EndCdataSectionHandler = builder.end_cdata
+    parser.Parse(xml_string, True)
+    return builder.root
@@ -0,0 +1,217 @@
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+Generators for CIM-XML replies of a WBEM server, for the tests and the
+benchmarks.
+
+The replies contain instances of a generated class `PyWBEM_Disk`, with
+properties of most CIM data types: strings with characters that need to be
+escaped, all integer types, reals, booleans, datetimes, arrays, NULL values,
+references, and optionally embedded instances. The instance paths of
+associated instances can have keybindings with references that are nested to
+a specified depth.
+
+The replies are generated from string templates, so that replies with many
+instances (e.g. 500000) are generated quickly. They are UTF-8 encoded byte
+strings that can be parsed by `xml_to_tupletree()` or served by the mock
+CIMOM in `mock_cimom.py`.
+"""
+
+from __future__ import absolute_import
+
+from xml.sax.saxutils import escape
+
+CLASSNAME = 'PyWBEM_Disk'
+
+REPLY = """\
+<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0">
+<MESSAGE ID="1001" PROTOCOLVERSION="1.0">
+<SIMPLERSP>
+%s
+</SIMPLERSP>
+</MESSAGE>
+</CIM>
+"""
+
+IMETHODRESPONSE = """\
+<IMETHODRESPONSE NAME="%s">
+<IRETURNVALUE>
+%s
+</IRETURNVALUE>
+</IMETHODRESPONSE>"""
+
+INSTANCENAME = """\
+<INSTANCENAME CLASSNAME="%(classname)s">
+<KEYBINDING NAME="DeviceID"><KEYVALUE VALUETYPE="string">disk%(i)d\
+</KEYVALUE></KEYBINDING>
+<KEYBINDING NAME="SystemName"><KEYVALUE VALUETYPE="string">\
+system%(system)d</KEYVALUE></KEYBINDING>%(parent)s
+</INSTANCENAME>"""
+
+PARENT_KEYBINDING = """
+<KEYBINDING NAME="Parent"><VALUE.REFERENCE>
+%s
+</VALUE.REFERENCE></KEYBINDING>"""
+
+INSTANCE = """\
+<INSTANCE CLASSNAME="%(classname)s">
+<PROPERTY NAME="DeviceID" TYPE="string"><VALUE>disk%(i)d</VALUE></PROPERTY>
+<PROPERTY NAME="SystemName" TYPE="string"><VALUE>system%(system)d</VALUE>\
+</PROPERTY>
+<PROPERTY NAME="ElementName" TYPE="string"><VALUE>Disk %(i)d of \
+&quot;rack&quot; &lt;%(rack)d&gt; &amp; spare</VALUE></PROPERTY>
+<PROPERTY NAME="Health" TYPE="uint8"><VALUE>%(health)d</VALUE></PROPERTY>
+<PROPERTY NAME="Priority" TYPE="sint16"><VALUE>-%(tier)d</VALUE></PROPERTY>
+<PROPERTY NAME="BlockSize" TYPE="uint32"><VALUE>%(block_size)d</VALUE>\
+</PROPERTY>
+<PROPERTY NAME="NumberOfBlocks" TYPE="uint64"><VALUE>%(blocks)d</VALUE>\
+</PROPERTY>
+<PROPERTY NAME="Offset" TYPE="sint64"><VALUE>-%(blocks)d</VALUE></PROPERTY>
+<PROPERTY NAME="Ratio" TYPE="real32"><VALUE>%(ratio).3f</VALUE></PROPERTY>
+<PROPERTY NAME="Load" TYPE="real64"><VALUE>%(load)r</VALUE></PROPERTY>
+<PROPERTY NAME="Online" TYPE="boolean"><VALUE>TRUE</VALUE></PROPERTY>
+<PROPERTY NAME="InstallDate" TYPE="datetime">\
+<VALUE>20160101%(hour)02d0000.000000+000</VALUE></PROPERTY>
+<PROPERTY.ARRAY NAME="OperationalStatus" TYPE="uint16"><VALUE.ARRAY>\
+<VALUE>2</VALUE><VALUE>5</VALUE></VALUE.ARRAY></PROPERTY.ARRAY>
+<PROPERTY.ARRAY NAME="Tags" TYPE="string"><VALUE.ARRAY><VALUE>ssd</VALUE>\
+<VALUE>rack%(rack)d</VALUE><VALUE>tier-%(tier)d</VALUE></VALUE.ARRAY>\
+</PROPERTY.ARRAY>
+<PROPERTY NAME="Location" TYPE="string"></PROPERTY>
+<PROPERTY.REFERENCE NAME="Controller" REFERENCECLASS="PyWBEM_Controller">\
+<VALUE.REFERENCE><INSTANCENAME CLASSNAME="PyWBEM_Controller">\
+<KEYBINDING NAME="DeviceID"><KEYVALUE VALUETYPE="string">ctrl%(rack)d\
+</KEYVALUE></KEYBINDING></INSTANCENAME></VALUE.REFERENCE>\
+</PROPERTY.REFERENCE>%(embedded)s
+</INSTANCE>"""
+
+EMBEDDED_PROPERTY = """
+<PROPERTY NAME="LastJob" TYPE="string" EmbeddedObject="instance">\
+<VALUE>%s</VALUE></PROPERTY>"""
+
+EMBEDDED_INSTANCE = """\
+<INSTANCE CLASSNAME="PyWBEM_Job">\
+<PROPERTY NAME="InstanceID" TYPE="string"><VALUE>job%(i)d</VALUE></PROPERTY>\
+<PROPERTY NAME="Name" TYPE="string"><VALUE>Scrub of disk%(i)d &amp; \
+&quot;spare&quot;</VALUE></PROPERTY>\
+<PROPERTY NAME="PercentComplete" TYPE="uint16"><VALUE>%(percent)d</VALUE>\
+</PROPERTY>\
+<PROPERTY.ARRAY NAME="Messages" TYPE="string"><VALUE.ARRAY>\
+<VALUE>started</VALUE><VALUE>running</VALUE></VALUE.ARRAY></PROPERTY.ARRAY>\
+</INSTANCE>"""
+
+INSTANCEPATH = """\
+<INSTANCEPATH><NAMESPACEPATH><HOST>%s</HOST><LOCALNAMESPACEPATH>%s\
+</LOCALNAMESPACEPATH></NAMESPACEPATH>
+%s
+</INSTANCEPATH>"""
+
+METHODRESPONSE = """\
+<METHODRESPONSE NAME="%s">
+<RETURNVALUE PARAMTYPE="uint32"><VALUE>0</VALUE></RETURNVALUE>
+<PARAMVALUE NAME="Job" PARAMTYPE="reference"><VALUE.REFERENCE>
+%s
+</VALUE.REFERENCE></PARAMVALUE>
+<PARAMVALUE NAME="Jobs" PARAMTYPE="string" EmbeddedObject="instance">\
+<VALUE.ARRAY>%s</VALUE.ARRAY></PARAMVALUE>
+</METHODRESPONSE>"""
+
+
+def instance_name(i, depth=0, classname=CLASSNAME):
+    """Return the CIM-XML of an INSTANCENAME element for the instance with
+    index `i`. If `depth` is not 0, it has a `Parent` keybinding with a
+    reference to an instance name of the same form, with the depth reduced
+    by one."""
+    parent = ''
+    if depth:
+        parent = PARENT_KEYBINDING % instance_name(i // 2, depth - 1,
+                                                   classname)
+    return INSTANCENAME % dict(classname=classname, i=i, system=i // 1000,
+                               parent=parent)
+
+
+def instance(i, embedded=False, classname=CLASSNAME):
+    """Return the CIM-XML of an INSTANCE element for the instance with index
+    `i`. If `embedded` is true, the instance has a property with an embedded
+    instance."""
+    embedded_property = ''
+    if embedded:
+        embedded_property = EMBEDDED_PROPERTY % escape(
+            EMBEDDED_INSTANCE % dict(i=i, percent=i % 101))
+    return INSTANCE % dict(
+        classname=classname, i=i, system=i // 1000, rack=i // 40,
+        tier=i % 3, health=i % 256, block_size=512 << (i % 4),
+        blocks=i * 2048, ratio=i % 1000 / 1000.0, load=i / 7.0,
+        hour=i % 24, embedded=embedded_property)
+
+
+def reply(response):
+    """Return the CIM-XML reply with the IMETHODRESPONSE or METHODRESPONSE
+    element, as a UTF-8 encoded byte string."""
+    return (REPLY % response).encode('utf-8')
+
+
+def enumerate_instances_reply(num_instances, embedded=False):
+    """Return the CIM-XML reply of an EnumerateInstances operation with the
+    specified number of instances."""
+    named_instances = []
+    for i in range(num_instances):
+        named_instances.append('<VALUE.NAMEDINSTANCE>\n%s\n%s\n'
+                               '</VALUE.NAMEDINSTANCE>' %
+                               (instance_name(i), instance(i, embedded)))
+    return reply(IMETHODRESPONSE % ('EnumerateInstances',
+                                    '\n'.join(named_instances)))
+
+
+def enumerate_instance_names_reply(num_instances, depth=0):
+    """Return the CIM-XML reply of an EnumerateInstanceNames operation with
+    the specified number of instance names."""
+    return reply(IMETHODRESPONSE % (
+        'EnumerateInstanceNames',
+        '\n'.join([instance_name(i, depth) for i in range(num_instances)])))
+
+
+def get_instance_reply(embedded=False):
+    """Return the CIM-XML reply of a GetInstance operation."""
+    return reply(IMETHODRESPONSE % ('GetInstance', instance(42, embedded)))
+
+
+def associators_reply(num_instances, depth=3, host='acme.com',
+                      namespace='root/cimv2'):
+    """Return the CIM-XML reply of an Associators operation with the
+    specified number of instances. The instance paths have references in
+    their keybindings, that are nested to the specified depth."""
+    local_namespace = ''.join(['<NAMESPACE NAME="%s"/>' % ns
+                               for ns in namespace.split('/')])
+    objects = []
+    for i in range(num_instances):
+        path = INSTANCEPATH % (host, local_namespace, instance_name(i, depth))
+        objects.append('<VALUE.OBJECTWITHPATH>\n%s\n%s\n'
+                       '</VALUE.OBJECTWITHPATH>' % (path, instance(i)))
+    return reply(IMETHODRESPONSE % ('Associators', '\n'.join(objects)))
+
+
+def invoke_method_reply(methodname, num_instances=10):
+    """Return the CIM-XML reply of an InvokeMethod operation for the
+    specified method. It has a return value, a reference output parameter
+    and an output parameter with an array of the specified number of
+    embedded instances."""
+    jobs = ''.join(['<VALUE>%s</VALUE>' %
+                    escape(EMBEDDED_INSTANCE % dict(i=i, percent=i % 101))
+                    for i in range(num_instances)])
+    return reply(METHODRESPONSE % (methodname, instance_name(0, 1), jobs))
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.
+#
+
+"""
+A local mock CIMOM for the tests and the benchmarks.
+
+The mock CIMOM is a threaded HTTP or HTTPS server on the local host, that
+returns recorded CIM-XML replies for CIM-XML requests. The reply is selected
+by the CIM method name in the `CIMMethod` header of the request (e.g.
+`EnumerateInstances`, or the name of the method for InvokeMethod). The
+replies can be generated with the functions in `cimxml_replies.py`.
+
+When run as a script, the mock CIMOM serves the replies of the generators
+with the specified number of instances, until it is interrupted.
+
+Usage: python testsuite/mock_cimom.py [PORT [NUM_INSTANCES]]
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+import threading
+
+import six
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import unquote
+
+__all__ = ['MockCIMOM']
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                           BaseHTTPServer.HTTPServer):
+    """HTTP server that handles each request in a new thread."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class _CIMOMRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Handler for CIM-XML requests, that returns the recorded replies of the
+    mock CIMOM of the server."""
+
+    # Keep the connections open for further requests (HTTP keep-alive), and
+    # send the headers and body of the replies without waiting for the ACK
+    # of the client
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        """Complete the TLS handshake of an HTTPS request."""
+        if hasattr(self.request, 'do_handshake'):
+            self.request.do_handshake()
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+
+    answered = False
+
+    def do_POST(self):
+        # pylint: disable=invalid-name
+        """Handle a CIM-XML request."""
+        cimom = self.server.cimom
+        if cimom.close_idle and self.answered:
+            # Close the connection without a response, like a server whose
+            # keep-alive timeout expires while the request arrives
+            self.close_connection = True
+            return
+        self.answered = True
+        length = int(self.headers.get('Content-length', 0))
+        self.rfile.read(length)
+        methodname = unquote(self.headers.get('CIMMethod', ''))
+        reply = cimom.replies.get(methodname)
+        with cimom.lock:
+            cimom.requests[methodname] = cimom.requests.get(methodname, 0) + 1
+        if reply is None:
+            self.send_response(501)
+            self.send_header('CIMError', 'unsupported-operation')
+            self.send_header('Content-length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-type', 'application/xml; charset="utf-8"')
+        self.send_header('Content-length', str(len(reply)))
+        self.send_header('CIMOperation', 'MethodResponse')
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        # pylint: disable=redefined-builtin
+        """Do not log requests."""
+        pass
+
+
+class MockCIMOM(object):
+    """
+    A local mock CIMOM that returns recorded CIM-XML replies.
+
+    The server is started by :meth:`start`, or by using the object as a
+    context manager, and serves requests in a background thread.
+
+    If the `close_idle` attribute is set to `True`, the server closes a
+    connection without returning a response when a second request arrives
+    on it.
+    """
+
+    def __init__(self, replies, port=0, certfile=None):
+        """
+        Parameters:
+
+          replies (:class:`py:dict`):
+            CIM-XML replies as UTF-8 encoded byte strings, by CIM method name.
+
+          port (:term:`integer`):
+            Port number on the local host. 0 selects a free port.
+
+          certfile (:term:`string`):
+            Path name of a PEM file with the private key and certificate of
+            the server. If not `None`, the server uses HTTPS.
+        """
+        self.replies = replies
+        self.requests = {}
+        self.close_idle = False
+        self.lock = threading.Lock()
+        self._server = _ThreadingHTTPServer(('localhost', port),
+                                            _CIMOMRequestHandler)
+        self._server.cimom = self
+        self._thread = None
+        self.scheme = 'http'
+        if certfile is not None:
+            import ssl
+            context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+            context.load_cert_chain(certfile)
+            # The handshake is done in the request threads (see setup() of
+            # the request handler), so that a client that does not complete
+            # it does not block the server.
+            self._server.socket = context.wrap_socket(
+                self._server.socket, server_side=True,
+                do_handshake_on_connect=False)
+            self.scheme = 'https'
+
+    @property
+    def url(self):
+        """URL of the mock CIMOM, for a :class:`~pywbem.WBEMConnection`."""
+        return '%s://localhost:%d' % (self.scheme,
+                                      self._server.server_address[1])
+
+    def start(self):
+        """Start serving requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving requests, and close the server socket."""
+        self._server.shutdown()
+        self._thread.join()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main(port, num_instances):
+    """Serve the generated replies until interrupted."""
+    # pylint: disable=wrong-import-position
+    import cimxml_replies
+    replies = {
+        'EnumerateInstances':
+            cimxml_replies.enumerate_instances_reply(num_instances),
+        'EnumerateInstanceNames':
+            cimxml_replies.enumerate_instance_names_reply(num_instances),
+        'GetInstance': cimxml_replies.get_instance_reply(),
+        'Associators': cimxml_replies.associators_reply(num_instances),
+        'Scrub': cimxml_replies.invoke_method_reply('Scrub'),
+    }
+    cimom = MockCIMOM(replies, port)
+    print('Mock CIMOM serving %s at %s' %
+          (', '.join(sorted(replies)), cimom.url))
+    cimom.start()
+    try:
+        while True:
+            cimom._thread.join(1)  # pylint: disable=protected-access
+    except KeyboardInterrupt:
+        pass
+    cimom.stop()
+    print('Requests: %s' % ', '.join(['%s=%d' % item for item in
+                                      sorted(six.iteritems(cimom.requests))]))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5988,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
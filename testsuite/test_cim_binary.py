@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+
+"""
+Test the binary representation of CIM objects (module `cim_binary`), and
+pickling of CIM objects.
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=invalid-name,missing-docstring,protected-access
+import copy
+import pickle
+import unittest
+from io import BytesIO
+from datetime import datetime, timedelta
+
+from pywbem import CIMInstance, CIMInstanceName, CIMClass, CIMClassName, \
+                   CIMProperty, CIMMethod, CIMParameter, CIMQualifier, \
+                   CIMQualifierDeclaration, CIMDateTime, MinutesFromUTC, \
+                   Uint8, Sint8, Uint16, Sint16, Uint32, Sint32, Uint64, \
+                   Sint64, Real32, Real64, ParseError, \
+                   CIMBinaryWriter, CIMBinaryReader, tobinary, frombinary
+from pywbem.cim_obj import NocaseDict
+
+
+def _instance():
+    path = CIMInstanceName('PyWBEM_Foo',
+                           {'Name': 'foo', 'Num': 42, 'Flag': True,
+                            'Ref': CIMInstanceName('PyWBEM_Bar',
+                                                   {'Id': Uint32(7)})},
+                           namespace='root/cimv2', host='woot.com')
+    embedded = CIMInstance('PyWBEM_Emb', properties={'S': u'\u20ac uro'})
+    return CIMInstance(
+        'PyWBEM_Foo',
+        properties=NocaseDict([
+            ('Name', 'foo'),
+            ('U8', Uint8(255)), ('S8', Sint8(-128)),
+            ('U16', Uint16(65535)), ('S16', Sint16(-1)),
+            ('U32', Uint32(0)), ('S32', Sint32(-2**31)),
+            ('U64', Uint64(2**64-1)), ('S64', Sint64(-2**63)),
+            ('R32', Real32(0.1)), ('R64', Real64(-1.5e300)),
+            ('Bool', False),
+            ('Null', CIMProperty('Null', None, 'uint16')),
+            ('When', CIMDateTime(datetime(2016, 3, 31, 19, 30, 40, 654321,
+                                          MinutesFromUTC(-90)))),
+            ('Naive', CIMDateTime(datetime(2016, 3, 31))),
+            ('Interval', CIMDateTime(timedelta(days=3, seconds=7,
+                                               microseconds=5))),
+            ('Array', [Uint8(1), None, Uint8(3)]),
+            ('EmptyArray', CIMProperty('EmptyArray', [], 'string')),
+            ('Ref', path['Ref']),
+            ('Emb', CIMProperty('Emb', embedded,
+                                embedded_object='instance')),
+        ]),
+        path=path)
+
+
+def _class():
+    quals = {'Key': CIMQualifier('Key', True, overridable=False,
+                                 tosubclass=True),
+             'Description': CIMQualifier('Description', 'blah')}
+    return CIMClass(
+        'PyWBEM_Foo', superclass='PyWBEM_Base',
+        properties={
+            'Name': CIMProperty('Name', None, 'string', qualifiers=quals,
+                                class_origin='PyWBEM_Foo',
+                                propagated=False),
+            'Sizes': CIMProperty('Sizes', None, 'uint64', is_array=True,
+                                 array_size=4),
+            'Ref': CIMProperty('Ref', None, reference_class='PyWBEM_Bar'),
+        },
+        methods={
+            'Reset': CIMMethod(
+                'Reset', 'uint32',
+                parameters={
+                    'Force': CIMParameter('Force', 'boolean'),
+                    'Names': CIMParameter('Names', 'string', is_array=True),
+                    'Target': CIMParameter('Target', 'reference',
+                                           reference_class='PyWBEM_Bar'),
+                },
+                qualifiers={'Static': CIMQualifier('Static', True)}),
+        },
+        qualifiers={'Abstract': CIMQualifier('Abstract', True)})
+
+
+def _qualifierdecl():
+    return CIMQualifierDeclaration('ValueMap', 'string', is_array=True,
+                                   scopes={'PROPERTY': True, 'METHOD': False},
+                                   overridable=True, tosubclass=True,
+                                   translatable=False)
+
+
+class Roundtrip(unittest.TestCase):
+
+    def _roundtrip(self, obj):
+        result = frombinary(tobinary(obj))
+        self.assertEqual(result, obj)
+        return result
+
+    def test_instance(self):
+        result = self._roundtrip(_instance())
+        self.assertEqual(type(result['U64']), Uint64)
+        self.assertEqual(type(result['R32']), Real32)
+        self.assertEqual(result['When'].minutes_from_utc, -90)
+        self.assertEqual(result['Naive'].datetime.utcoffset(), None)
+        self.assertEqual(result['Interval'].timedelta,
+                         timedelta(days=3, seconds=7, microseconds=5))
+        self.assertEqual(result.properties['Emb'].embedded_object, 'instance')
+        self.assertEqual(result.path.host, 'woot.com')
+        self.assertEqual(type(result.path['Num']), int)
+
+    def test_instancename(self):
+        self._roundtrip(_instance().path)
+
+    def test_class(self):
+        result = self._roundtrip(_class())
+        self.assertEqual(result.properties['Sizes'].array_size, 4)
+        self.assertEqual(result.properties['Name'].qualifiers['Key'].value,
+                         True)
+
+    def test_classname(self):
+        self._roundtrip(CIMClassName('PyWBEM_Foo', host='h', namespace='ns'))
+
+    def test_qualifierdecl(self):
+        self._roundtrip(_qualifierdecl())
+
+    def test_plain_values(self):
+        for value in [None, True, u'abc', b'abc', 0, -1, 2**100, 1.25,
+                      [1, [u'a', None]], (Uint8(1),)]:
+            result = frombinary(tobinary(value))
+            if isinstance(value, tuple):
+                value = list(value)
+            self.assertEqual(result, value)
+            self.assertEqual(type(result), type(value))
+
+    def test_unsupported_type(self):
+        self.assertRaises(TypeError, tobinary, object())
+        inst = CIMInstance('C', properties={'P': u'x'})
+        inst.path = object()
+        self.assertRaises(TypeError, tobinary, inst)
+
+
+class Stream(unittest.TestCase):
+
+    def test_records(self):
+        objs = [_instance(), _class(), _qualifierdecl(), _instance()]
+        stream = BytesIO()
+        writer = CIMBinaryWriter(stream)
+        for obj in objs:
+            writer.write(obj)
+        data = stream.getvalue()
+
+        # The string table is shared, so the second instance costs less
+        self.assertTrue(len(data) < len(tobinary(objs[0])) * 2 +
+                        len(tobinary(objs[1])) + len(tobinary(objs[2])))
+
+        reader = CIMBinaryReader(BytesIO(data))
+        self.assertEqual(list(reader), objs)
+        self.assertRaises(EOFError, reader.read)
+
+    def test_unique_values(self):
+        # String values are not kept in the string tables, so the tables
+        # do not grow with the records of a long stream (they contain the
+        # class name, the property name and the type 'string')
+        stream = BytesIO()
+        writer = CIMBinaryWriter(stream)
+        for i in range(100):
+            writer.write(CIMInstance('PyWBEM_Foo',
+                                     properties={'Name': u'foo%d' % i}))
+            writer.write(('data%d' % i).encode())
+        self.assertEqual(len(writer._encoder._strings), 3)
+
+        reader = CIMBinaryReader(BytesIO(stream.getvalue()))
+        objs = list(reader)
+        self.assertEqual(len(reader._decoder._strings), 3)
+        self.assertEqual(objs[198]['Name'], u'foo99')
+        self.assertEqual(objs[199], b'data99')
+
+    def test_failed_write(self):
+        # A record that cannot be written does not disturb the stream
+        stream = BytesIO()
+        writer = CIMBinaryWriter(stream)
+        self.assertRaises(TypeError, writer.write,
+                          [u'new string', object()])
+        writer.write([u'new string', u'other'])
+        reader = CIMBinaryReader(BytesIO(stream.getvalue()))
+        self.assertEqual(reader.read(), [u'new string', u'other'])
+
+    def test_bad_header(self):
+        self.assertRaises(ParseError, frombinary, b'')
+        self.assertRaises(ParseError, frombinary, b'<CIM>not binary</CIM>')
+        data = bytearray(tobinary(u'x'))
+        data[8] += 1
+        self.assertRaises(ParseError, frombinary, bytes(data))
+
+    def test_truncated(self):
+        data = tobinary(_instance())
+        self.assertRaises(ParseError, frombinary, data[:9])
+        self.assertRaises(ParseError, frombinary, data[:-1])
+
+    def test_corrupt(self):
+        data = bytearray(tobinary(u'x'))
+        data[10] = 0xFF     # type code of the record
+        self.assertRaises(ParseError, frombinary, bytes(data))
+
+
+class Pickle(unittest.TestCase):
+
+    def test_pickle(self):
+        for obj in [_instance(), _instance().path, _class(),
+                    _qualifierdecl()]:
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                result = pickle.loads(pickle.dumps(obj, protocol))
+                self.assertEqual(result, obj)
+                self.assertEqual(type(result), type(obj))
+
+    def test_pickle_list(self):
+        objs = [_instance() for _ in range(3)]
+        self.assertEqual(pickle.loads(pickle.dumps(objs)), objs)
+
+    def test_pickle_subclass(self):
+        # pylint: disable=attribute-defined-outside-init
+        obj = _MyInstance('PyWBEM_Foo', properties={'Name': u'x'})
+        obj.extra = 42
+        result = pickle.loads(pickle.dumps(obj, 2))
+        self.assertEqual(type(result), _MyInstance)
+        self.assertEqual(result.extra, 42)
+        self.assertEqual(result['Name'], u'x')
+
+    def test_copy(self):
+        # copy.copy() makes the shallow copy of the copy() method, not a
+        # binary round trip
+        inst = _instance()
+        result = copy.copy(inst)
+        self.assertEqual(result, inst)
+        self.assertTrue(result.properties['Name'] is inst.properties['Name'])
+        cls = _class()
+        result = copy.copy(cls)
+        self.assertTrue(result.methods['Reset'] is cls.methods['Reset'])
+        path = _instance().path
+        result = copy.copy(path)
+        self.assertTrue(result['Ref'] is path['Ref'])
+        qd = _qualifierdecl()
+        self.assertEqual(copy.copy(qd), qd)
+
+    def test_deepcopy(self):
+        inst = _instance()
+        result = copy.deepcopy(inst)
+        self.assertEqual(result, inst)
+        self.assertFalse(result.properties['Name'] is inst.properties['Name'])
+
+    def test_copy_subclass(self):
+        # pylint: disable=attribute-defined-outside-init
+        obj = _MyInstance('PyWBEM_Foo', properties={'Name': u'x'})
+        obj.extra = [42]
+        result = copy.copy(obj)
+        self.assertEqual(type(result), _MyInstance)
+        self.assertTrue(result.extra is obj.extra)
+        self.assertTrue(result.properties['Name'] is obj.properties['Name'])
+
+
+class _MyInstance(CIMInstance):
+    pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+"""
+Test the cache of CIM-XML responses (module `cim_cache`).
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=invalid-name,missing-docstring,protected-access
+import time
+import unittest
+
+import httpretty
+
+from pywbem import WBEMConnection, ResponseCache, CIMInstanceName, \
+                   CIMInstance, CIMError
+
+REPLY = """\
+<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0"><MESSAGE ID="1001" \
+PROTOCOLVERSION="1.0"><SIMPLERSP><IMETHODRESPONSE NAME="%s">%s\
+</IMETHODRESPONSE></SIMPLERSP></MESSAGE></CIM>
+"""
+
+INSTANCE = """\
+<INSTANCE CLASSNAME="%s"><PROPERTY NAME="Name" TYPE="string">\
+<VALUE>%s</VALUE></PROPERTY></INSTANCE>"""
+
+
+class ResponseCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = WBEMConnection('http://acme.com:80')
+        self.cache = ResponseCache(ttl=60, class_ttls={'PyWBEM_Job': 0})
+        self.conn.hooks.append(self.cache)
+        self.requests = []
+        self.error = None
+
+    def register(self):
+        """Register a mock WBEM server that returns a new value of the Name
+        property with each response."""
+
+        def reply(request, uri, headers):
+            # pylint: disable=unused-argument
+            methodname = request.headers['CIMMethod']
+            self.requests.append(methodname)
+            if self.error is not None:
+                body = '<ERROR CODE="%d"/>' % self.error
+            elif methodname.endswith('Instance'):
+                body = '<IRETURNVALUE>%s</IRETURNVALUE>' % \
+                       (INSTANCE % ('PyWBEM_Person',
+                                    'Fritz%d' % len(self.requests)))
+            else:
+                body = ''
+            return (200, headers, REPLY % (methodname, body))
+
+        httpretty.httpretty.allow_net_connect = False
+        httpretty.register_uri(method='POST', uri='http://acme.com:80/cimom',
+                               body=reply)
+
+    @httpretty.activate
+    def test_hit(self):
+        self.register()
+        path = CIMInstanceName('PyWBEM_Person', {'Name': 'Fritz', 'Id': '1'})
+
+        inst1 = self.conn.GetInstance(path)
+        inst2 = self.conn.GetInstance(
+            CIMInstanceName('PyWBEM_Person', {'Id': '1', 'Name': 'Fritz'}))
+        self.conn.GetInstance(path, PropertyList=['Name'])
+
+        self.assertEqual(self.requests, ['GetInstance', 'GetInstance'])
+        self.assertEqual(inst1['Name'], 'Fritz1')
+        self.assertEqual(inst2['Name'], 'Fritz1')
+        self.assertFalse(inst1 is inst2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+        self.assertAlmostEqual(self.cache.hit_rate, 1.0 / 3)
+        self.assertEqual(len(self.cache), 2)
+
+    @httpretty.activate
+    def test_users(self):
+        # Connections of different users do not share cached responses
+        self.register()
+        path = CIMInstanceName('PyWBEM_Person', {'Id': '1'})
+        self.conn.creds = ('fritz', 'secret')
+        conn2 = WBEMConnection('http://acme.com:80', ('hans', 'secret'))
+        conn3 = WBEMConnection('http://acme.com:80', ['hans', 'secret'],
+                               x509={'cert_file': 'hans.pem'})
+        for conn in (conn2, conn3):
+            conn.hooks.append(self.cache)
+
+        names = [conn.GetInstance(path)['Name']
+                 for conn in (self.conn, conn2, conn3, conn2, self.conn)]
+
+        self.assertEqual(names, ['Fritz1', 'Fritz2', 'Fritz3', 'Fritz2',
+                                 'Fritz1'])
+        self.assertEqual(len(self.requests), 3)
+
+    @httpretty.activate
+    def test_class_ttl(self):
+        self.register()
+        path = CIMInstanceName('PyWBEM_Job', {'Id': '1'})
+
+        self.conn.GetInstance(path)
+        self.conn.GetInstance(path)
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.cache.hit_rate, None)
+
+    @httpretty.activate
+    def test_expiry(self):
+        self.register()
+        self.cache.ttl = 0.01
+        path = CIMInstanceName('PyWBEM_Person', {'Id': '1'})
+
+        self.conn.GetInstance(path)
+        time.sleep(0.02)
+        inst = self.conn.GetInstance(path)
+
+        self.assertEqual(inst['Name'], 'Fritz2')
+        self.assertEqual(len(self.cache), 1)
+
+    @httpretty.activate
+    def test_invalidation(self):
+        self.register()
+        path = CIMInstanceName('PyWBEM_Person', {'Id': '1'})
+        other = CIMInstanceName('PyWBEM_Person', {'Id': '1'},
+                                namespace='root/interop')
+
+        self.conn.GetInstance(path)
+        self.conn.GetInstance(other)
+        self.conn.ModifyInstance(CIMInstance('PyWBEM_Person', path=path,
+                                             properties={'Name': 'Hans'}))
+        inst = self.conn.GetInstance(path)
+        self.conn.GetInstance(other)
+
+        self.assertEqual(inst['Name'], 'Fritz4')
+        self.assertEqual(self.cache.invalidations, 1)
+        self.assertEqual(self.requests, ['GetInstance', 'GetInstance',
+                                         'ModifyInstance', 'GetInstance'])
+
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
+
+    @httpretty.activate
+    def test_errors_not_cached(self):
+        self.register()
+        self.error = 6
+        path = CIMInstanceName('PyWBEM_Person', {'Id': '1'})
+
+        self.assertRaises(CIMError, self.conn.GetInstance, path)
+        self.assertRaises(CIMError, self.conn.GetInstance, path)
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(len(self.cache), 0)
+
+    @httpretty.activate
+    def test_eviction(self):
+        self.register()
+        paths = [CIMInstanceName('PyWBEM_Person', {'Id': str(i)})
+                 for i in range(3)]
+        self.conn.GetInstance(paths[0])
+        self.cache.max_bytes = self.cache.size * 2
+
+        self.conn.GetInstance(paths[1])
+        self.conn.GetInstance(paths[0])
+        self.conn.GetInstance(paths[2])
+
+        # paths[1] was the least recently used response
+        self.assertEqual(self.cache.evictions, 1)
+        self.conn.GetInstance(paths[0])
+        self.conn.GetInstance(paths[2])
+        self.assertEqual(len(self.requests), 3)
+        self.conn.GetInstance(paths[1])
+        self.assertEqual(len(self.requests), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+"""
+Test the capturing of WBEM operations for debugging (module `cim_capture`).
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=invalid-name,missing-docstring
+import unittest
+
+import httpretty
+
+from pywbem import WBEMConnection, DebugCapture, OperationHook, \
+                   CIMInstanceName, CIMError
+
+GETINSTANCE_REPLY = b"""\
+<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0"><MESSAGE ID="1001" \
+PROTOCOLVERSION="1.0"><SIMPLERSP><IMETHODRESPONSE NAME="GetInstance">\
+<IRETURNVALUE><INSTANCE CLASSNAME="PyWBEM_Person"><PROPERTY NAME="Name" \
+TYPE="string"><VALUE>Fritz</VALUE></PROPERTY></INSTANCE></IRETURNVALUE>\
+</IMETHODRESPONSE></SIMPLERSP></MESSAGE></CIM>
+"""
+
+ERROR_REPLY = b"""\
+<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0"><MESSAGE ID="1001" \
+PROTOCOLVERSION="1.0"><SIMPLERSP><IMETHODRESPONSE NAME="GetInstance">\
+<ERROR CODE="6" DESCRIPTION="Not found"/></IMETHODRESPONSE></SIMPLERSP>\
+</MESSAGE></CIM>
+"""
+
+PATH = CIMInstanceName('PyWBEM_Person', {'Name': 'Fritz'})
+
+
+class DebugCaptureTests(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = WBEMConnection('http://acme.com:80')
+
+    @staticmethod
+    def register(*bodies):
+        httpretty.httpretty.allow_net_connect = False
+        httpretty.register_uri(
+            method='POST', uri='http://acme.com:80/cimom',
+            responses=[httpretty.Response(body=body, status=200)
+                       for body in bodies])
+
+    @httpretty.activate
+    def test_failed(self):
+        self.register(GETINSTANCE_REPLY, ERROR_REPLY)
+        capture = DebugCapture()
+        self.conn.hooks.append(capture)
+
+        self.conn.GetInstance(PATH)
+        self.assertRaises(CIMError, self.conn.GetInstance, PATH)
+
+        operations = capture.operations()
+        self.assertEqual(len(operations), 1)
+        op = operations[0]
+        self.assertEqual(op.reason, 'failed')
+        self.assertEqual(op.operation, 'GetInstance')
+        self.assertEqual(op.namespace, 'root/cimv2')
+        self.assertTrue(isinstance(op.exception, CIMError))
+        self.assertEqual(op.reply, ERROR_REPLY)
+        self.assertTrue(b'<IMETHODCALL NAME="GetInstance">' in op.request)
+        self.assertTrue('total' in op.timings)
+
+        # The prettified XML is created on access
+        self.assertEqual(op._pretty_reply, None)
+        self.assertTrue(u'\n        <ERROR CODE="6"' in op.pretty_reply)
+        self.assertTrue(u'\n    <SIMPLEREQ>' in op.pretty_request)
+
+        capture.clear()
+        self.assertEqual(capture.operations(), [])
+
+    @httpretty.activate
+    def test_sampled_and_slow(self):
+        self.register(*([GETINSTANCE_REPLY] * 4))
+        sampled = DebugCapture(sample_rate=1.0, capture_failed=False,
+                               max_operations=3)
+        slow = DebugCapture(slow_threshold=0.0)
+        none = DebugCapture(slow_threshold=3600)
+        self.conn.hooks.extend([sampled, slow, none])
+
+        for _ in range(4):
+            self.conn.GetInstance(PATH)
+
+        self.assertEqual([op.reason for op in sampled.operations()],
+                         ['sampled'] * 3)
+        self.assertEqual([op.reason for op in slow.operations()],
+                         ['slow'] * 4)
+        self.assertEqual(none.operations(), [])
+
+    def test_invalid_reply(self):
+        capture = DebugCapture()
+        self.conn.hooks.append(capture)
+        self.conn.hooks.append(_ReplyHook(b'<CIM>\xc3\xa4'))
+
+        self.assertRaises(Exception, self.conn.GetInstance, PATH)
+
+        op = capture.operations()[0]
+        self.assertEqual(op.pretty_reply, u'<CIM>\xe4')
+
+
+class _ReplyHook(OperationHook):
+    """Hook that provides the reply instead of the WBEM server."""
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    def before(self, context):
+        context.reply = self.reply
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+"""
+Test the comparison of lists of CIM instances (module `cim_diff`).
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=invalid-name,missing-docstring
+import unittest
+
+from pywbem import CIMInstance, CIMInstanceName, CIMProperty, CIMQualifier, \
+                   Uint32, diff_instances
+from pywbem.cim_obj import NocaseDict
+
+
+def _instance(name, **props):
+    path = CIMInstanceName('PyWBEM_Disk', {'Name': name},
+                           namespace='root/cimv2')
+    properties = NocaseDict([('Name', name)])
+    properties.update(sorted(props.items()))
+    return CIMInstance('PyWBEM_Disk', properties=properties, path=path)
+
+
+def _snapshot():
+    return [_instance('sda', Size=Uint32(10), Tags=['a']),
+            _instance('sdb', Size=Uint32(20), Tags=['b']),
+            _instance('sdc', Size=Uint32(30), Tags=['c'])]
+
+
+class DiffInstances(unittest.TestCase):
+
+    def test_equal(self):
+        diff = diff_instances(_snapshot(), _snapshot())
+        self.assertFalse(diff)
+        self.assertEqual((diff.added, diff.removed, diff.changed),
+                         ([], [], []))
+
+    def test_added_removed(self):
+        old = _snapshot()
+        new = _snapshot()[1:] + [_instance('sdd', Size=Uint32(40))]
+        diff = diff_instances(old, new)
+        self.assertTrue(diff)
+        self.assertEqual(diff.added, [new[-1]])
+        self.assertEqual(diff.removed, [old[0]])
+        self.assertEqual(diff.changed, [])
+
+    def test_changed_properties(self):
+        old = _snapshot()
+        new = _snapshot()
+        new[0]['Size'] = Uint32(11)
+        new[1]['Tags'] = ['b', 'x']
+        del new[2]['Tags']
+        new[2]['Model'] = 'ACME'
+
+        diff = diff_instances(old, new)
+        self.assertEqual(diff.added, [])
+        self.assertEqual(diff.removed, [])
+        self.assertEqual(
+            [(c.path['Name'], c.added_properties, c.removed_properties,
+              c.changed_properties) for c in diff.changed],
+            [('sda', [], [], ['Size']),
+             ('sdb', [], [], ['Tags']),
+             ('sdc', ['Model'], ['Tags'], [])])
+        self.assertTrue(diff.changed[0].old is old[0])
+        self.assertTrue(diff.changed[0].new is new[0])
+
+    def test_changed_qualifiers(self):
+        old = _snapshot()
+        new = _snapshot()
+        new[0].qualifiers['Description'] = CIMQualifier('Description', 'x')
+        diff = diff_instances(old, new)
+        self.assertEqual(len(diff.changed), 1)
+        self.assertEqual(diff.changed[0].changed_properties, [])
+
+    def test_path_matching(self):
+        # Paths are matched case-insensitively in the class name and host,
+        # like the == operator of CIMInstanceName does.
+        old = _snapshot()
+        new = _snapshot()
+        for inst in new:
+            inst.path.classname = 'pywbem_disk'
+        self.assertFalse(diff_instances(old, new))
+
+    def test_repeated_diff(self):
+        # The new snapshot of one diff becomes the old snapshot of the next
+        # one, with its cached fingerprints.
+        snap1 = _snapshot()
+        snap2 = _snapshot()
+        snap3 = _snapshot()
+        self.assertFalse(diff_instances(snap1, snap2))
+        snap3[2]['Size'] = Uint32(31)
+        diff = diff_instances(snap2, snap3)
+        self.assertEqual([c.changed_properties for c in diff.changed],
+                         [['Size']])
+
+    def test_modified_after_diff(self):
+        # Modifications of instances after their fingerprints have been
+        # cached are detected, including in-place modification of array
+        # values.
+        old = _snapshot()
+        new = _snapshot()
+        self.assertFalse(diff_instances(old, new))
+        new[0].properties['Size'].value = Uint32(12)
+        new[1].properties['Tags'].value.append('y')
+        new[2].path['Name'] = 'sdz'
+        diff = diff_instances(old, new)
+        self.assertEqual([c.changed_properties for c in diff.changed],
+                         [['Size'], ['Tags']])
+        self.assertEqual(diff.added, [new[2]])
+        self.assertEqual(diff.removed, [old[2]])
+
+    def test_no_path(self):
+        inst = CIMInstance('PyWBEM_Disk', properties={'Name': 'sda'})
+        self.assertRaises(ValueError, diff_instances, [inst], [])
+        self.assertRaises(ValueError, diff_instances, [], [inst])
+
+    def test_embedded_instances(self):
+        def snapshot(value):
+            emb = CIMInstance('PyWBEM_Emb', properties={'V': value})
+            inst = _instance('sda')
+            inst['Emb'] = CIMProperty('Emb', emb, embedded_object='instance')
+            return [inst]
+        old = snapshot('a')
+        self.assertFalse(diff_instances(old, snapshot('a')))
+        diff = diff_instances(old, snapshot('b'))
+        self.assertEqual(diff.changed[0].changed_properties, ['Emb'])
+
+
+if __name__ == '__main__':
+    unittest.main()
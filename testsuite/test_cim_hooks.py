@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+
+"""
+Test the operation hooks of WBEMConnection (module `cim_hooks`).
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=invalid-name,missing-docstring
+import unittest
+
+import httpretty
+
+from pywbem import WBEMConnection, OperationHook, CIMInstanceName, \
+                   CIMError, ParseError
+
+GETINSTANCE_REPLY = b"""\
+<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0">
+  <MESSAGE ID="1001" PROTOCOLVERSION="1.0">
+    <SIMPLERSP>
+      <IMETHODRESPONSE NAME="GetInstance">
+        <IRETURNVALUE>
+          <INSTANCE CLASSNAME="PyWBEM_Person">
+            <PROPERTY NAME="Name" TYPE="string">
+              <VALUE>%s</VALUE>
+            </PROPERTY>
+          </INSTANCE>
+        </IRETURNVALUE>
+      </IMETHODRESPONSE>
+    </SIMPLERSP>
+  </MESSAGE>
+</CIM>
+"""
+
+ERROR_REPLY = b"""\
+<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0">
+  <MESSAGE ID="1001" PROTOCOLVERSION="1.0">
+    <SIMPLERSP>
+      <IMETHODRESPONSE NAME="GetInstance">
+        <ERROR CODE="6" DESCRIPTION="Not found"/>
+      </IMETHODRESPONSE>
+    </SIMPLERSP>
+  </MESSAGE>
+</CIM>
+"""
+
+METHOD_REPLY = b"""\
+<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0">
+  <MESSAGE ID="1001" PROTOCOLVERSION="1.0">
+    <SIMPLERSP>
+      <METHODRESPONSE NAME="Reset">
+        <RETURNVALUE PARAMTYPE="uint32">
+          <VALUE>0</VALUE>
+        </RETURNVALUE>
+      </METHODRESPONSE>
+    </SIMPLERSP>
+  </MESSAGE>
+</CIM>
+"""
+
+PATH = CIMInstanceName('PyWBEM_Person', {'Name': 'Fritz'})
+
+
+class RecordingHook(OperationHook):
+    """Hook that records its calls."""
+
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    def before(self, context):
+        self.calls.append((self.name, 'before', context.operation,
+                           context.request is not None,
+                           context.reply is not None))
+
+    def after(self, context):
+        self.calls.append((self.name, 'after', context.operation,
+                           context.reply, 'total' in context.timings))
+
+    def error(self, context):
+        self.calls.append((self.name, 'error', context.operation,
+                           type(context.exception)))
+
+
+class ReplyHook(OperationHook):
+    """Hook that provides the reply instead of the WBEM server."""
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    def before(self, context):
+        context.reply = self.reply
+
+
+class HooksTests(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = WBEMConnection('http://acme.com:80')
+        self.calls = []
+
+    @staticmethod
+    def register(*bodies):
+        httpretty.httpretty.allow_net_connect = False
+        httpretty.register_uri(
+            method='POST', uri='http://acme.com:80/cimom',
+            responses=[httpretty.Response(body=body, status=200)
+                       for body in bodies])
+
+    @httpretty.activate
+    def test_order(self):
+        reply = GETINSTANCE_REPLY % b'Fritz'
+        self.register(reply)
+        self.conn.hooks.append(RecordingHook('outer', self.calls))
+        self.conn.hooks.append(RecordingHook('inner', self.calls))
+
+        inst = self.conn.GetInstance(PATH)
+
+        self.assertEqual(inst['Name'], 'Fritz')
+        self.assertEqual(self.calls, [
+            ('outer', 'before', 'GetInstance', True, False),
+            ('inner', 'before', 'GetInstance', True, False),
+            ('inner', 'after', 'GetInstance', reply, True),
+            ('outer', 'after', 'GetInstance', reply, True)])
+
+    @httpretty.activate
+    def test_error(self):
+        self.register(ERROR_REPLY)
+        self.conn.hooks.append(RecordingHook('outer', self.calls))
+        self.conn.hooks.append(RecordingHook('inner', self.calls))
+
+        self.assertRaises(CIMError, self.conn.GetInstance, PATH)
+
+        self.assertEqual(self.calls, [
+            ('outer', 'before', 'GetInstance', True, False),
+            ('inner', 'before', 'GetInstance', True, False),
+            ('inner', 'error', 'GetInstance', CIMError),
+            ('outer', 'error', 'GetInstance', CIMError)])
+
+    @httpretty.activate
+    def test_reply_from_hook(self):
+        self.register(GETINSTANCE_REPLY % b'Fritz')
+        self.conn.hooks.append(ReplyHook(GETINSTANCE_REPLY % b'Hans'))
+        self.conn.hooks.append(RecordingHook('inner', self.calls))
+
+        inst = self.conn.GetInstance(PATH)
+
+        self.assertEqual(inst['Name'], 'Hans')
+        self.assertEqual(self.calls[0],
+                         ('inner', 'before', 'GetInstance', True, True))
+        self.assertFalse(httpretty.has_request())
+
+    @httpretty.activate
+    def test_invalid_reply_from_hook(self):
+        self.conn.hooks.append(ReplyHook(b'<CIM'))
+        self.conn.hooks.append(RecordingHook('inner', self.calls))
+
+        self.assertRaises(ParseError, self.conn.GetInstance, PATH)
+        self.assertEqual(self.calls[-1],
+                         ('inner', 'error', 'GetInstance', ParseError))
+
+    @httpretty.activate
+    def test_methodcall(self):
+        self.register(METHOD_REPLY)
+        contexts = []
+
+        class ContextHook(OperationHook):
+            def after(self, context):
+                contexts.append(context)
+
+        self.conn.hooks.append(ContextHook())
+
+        result = self.conn.InvokeMethod('Reset', PATH, [('Force', True)],
+                                        Delay='10')
+
+        self.assertEqual(result[0], 0)
+        context = contexts[0]
+        self.assertEqual(context.operation, 'Reset')
+        self.assertEqual(context.namespace, 'root/cimv2')
+        self.assertEqual(context.object.keybindings, PATH.keybindings)
+        self.assertEqual(context.params, {'Force': True, 'Delay': '10'})
+        self.assertEqual(context.reply, METHOD_REPLY)
+        self.assertTrue(b'<METHODCALL NAME="Reset">' in context.request)
+        self.assertEqual(context.timings['reply_bytes'], len(METHOD_REPLY))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,9 +4,14 @@
 
 from __future__ import absolute_import
 
+# pylint: disable=protected-access
 import unittest
 
-from pywbem import cim_http
+from pywbem import cim_http, WBEMConnection, CIMInstanceName, \
+                   ConnectionError  # pylint: disable=redefined-builtin
+
+import cimxml_replies
+from mock_cimom import MockCIMOM
 
 
 class Parse_url(unittest.TestCase):  # pylint: disable=invalid-name
@@ -196,5 +201,76 @@ class Parse_url(unittest.TestCase):  # pylint: disable=invalid-name
                          default_ssl)
 
 
+class ConnectionPool(unittest.TestCase):  # pylint: disable=invalid-name
+    """
+    Test the reuse of HTTP connections from the connection pool.
+    """
+
+    def setUp(self):
+        self.cimom = MockCIMOM({
+            'EnumerateInstanceNames':
+                cimxml_replies.enumerate_instance_names_reply(3),
+            'Scrub': cimxml_replies.invoke_method_reply('Scrub', 1),
+        })
+        self.cimom.start()
+        self.conn = WBEMConnection(self.cimom.url)
+
+    def tearDown(self):
+        self.conn.close()
+        self.cimom.stop()
+
+    def test_reused(self):
+        """Test that the connection is used for the second request"""
+        self.conn.statistics.enabled = True
+        self.conn.EnumerateInstanceNames('PyWBEM_Disk')
+        self.conn.EnumerateInstanceNames('PyWBEM_Disk')
+
+        stat = self.conn.statistics.snapshot()[0]
+        self.assertEqual(stat.count, 2)
+        self.assertEqual(len(stat._samples['connect']), 1)
+
+    def test_closed_idle(self):
+        """Test that a read-only operation is sent again on a new connection
+        if the server closes the idle connection when the request arrives"""
+        self.cimom.close_idle = True
+
+        for _ in range(2):
+            paths = self.conn.EnumerateInstanceNames('PyWBEM_Disk')
+            self.assertEqual(len(paths), 3)
+        self.assertEqual(self.cimom.requests['EnumerateInstanceNames'], 2)
+
+    def test_closed_idle_method(self):
+        """Test that a method invocation does not use an idle connection,
+        which the server may close when the request arrives"""
+        self.cimom.close_idle = True
+        path = CIMInstanceName('PyWBEM_Disk', {'DeviceID': 'disk1'})
+
+        for _ in range(2):
+            result = self.conn.InvokeMethod('Scrub', path)
+            self.assertEqual(result[0], 0)
+        self.assertEqual(self.cimom.requests['Scrub'], 2)
+
+    def test_no_keep_alive(self):
+        """Test that the connections are not kept open without keep-alive"""
+        conn = WBEMConnection(self.cimom.url, keep_alive=False)
+        conn.statistics.enabled = True
+        conn.EnumerateInstanceNames('PyWBEM_Disk')
+        conn.EnumerateInstanceNames('PyWBEM_Disk')
+
+        stat = conn.statistics.snapshot()[0]
+        self.assertEqual(len(stat._samples['connect']), 2)
+        self.assertEqual(conn._connection_pool._idle, {})
+
+    def test_close(self):
+        """Test that closing the connection closes the idle connections"""
+        with WBEMConnection(self.cimom.url) as conn:
+            conn.EnumerateInstanceNames('PyWBEM_Disk')
+            self.assertEqual(len(conn._connection_pool._idle), 1)
+        self.assertEqual(conn._connection_pool._idle, {})
+
+        # The connection can still be used
+        self.assertEqual(len(conn.EnumerateInstanceNames('PyWBEM_Disk')), 3)
+        conn.close()
+
 if __name__ == '__main__':
     unittest.main()
@@ -842,6 +842,40 @@ class CopyCIMInstance(unittest.TestCase):
         self.assertEqual(i.qualifiers['Key'], CIMQualifier('Key', True))
         self.assertEqual(i.path, CIMInstanceName('CIM_Foo', {'Name': 'Foo'}))
 
+    def test_isolation(self):
+
+        # Property and qualifier storage is shared copy-on-write, so
+        # modifications of either object do not show in the other one.
+
+        i = CIMInstance('CIM_Foo',
+                        properties={'Name': 'Foo', 'Chicken': 'Ham'},
+                        qualifiers={'Key': CIMQualifier('Key', True)},
+                        path=CIMInstanceName('CIM_Foo', {'Name': 'Foo'}))
+
+        c = i.copy()
+
+        c['Name'] = 'Bar'
+        c['Egg'] = 'Spam'
+        del c['Chicken']
+        c.qualifiers['Key'] = CIMQualifier('Key', False)
+        c.path['Name'] = 'Bar'
+
+        self.assertEqual(i['Name'], 'Foo')
+        self.assertEqual(i['Chicken'], 'Ham')
+        self.assertFalse('Egg' in i)
+        self.assertEqual(i.qualifiers['Key'].value, True)
+        self.assertEqual(i.path['Name'], 'Foo')
+
+        c = i.copy()
+
+        i['Name'] = 'Baz'
+        i.properties['Ham'] = CIMProperty('Ham', 'Eggs')
+        del i.qualifiers['Key']
+
+        self.assertEqual(c['Name'], 'Foo')
+        self.assertFalse('Ham' in c)
+        self.assertTrue('Key' in c.qualifiers)
+
         # Test copy when path is None
 
         i = CIMInstance('CIM_Foo',
@@ -1018,6 +1052,130 @@ class CIMInstanceCompare(unittest.TestCase):
         # TODO Implement ordering comparison test for CIMInstance
         raise AssertionError("test not implemented")
 
+class CIMInstanceFingerprint(unittest.TestCase):
+    """
+    Test the structural fingerprints of `CIMInstance`, `CIMInstanceName` and
+    `CIMProperty` objects, and their use by the `==` and `!=` operators.
+    """
+    # pylint: disable=protected-access
+
+    @staticmethod
+    def _instance(**props):
+        props.setdefault('Name', 'Foo')
+        return CIMInstance(
+            'CIM_Foo', properties=props,
+            path=CIMInstanceName('CIM_Foo', {'Name': props['Name']},
+                                 namespace='root/cimv2'))
+
+    def test_equal_objects(self):
+        # Equal objects have equal fingerprints, also where the comparison
+        # is case-insensitive or between different numeric types.
+        inst1 = CIMInstance('CIM_Foo', properties={'Size': Uint8(1)},
+                            path=CIMInstanceName('CIM_Foo', {'Name': 'x'}))
+        inst2 = CIMInstance('cim_foo', properties={'size': Uint8(1)},
+                            path=CIMInstanceName('CIM_FOO', {'name': 'x'}))
+        self.assertEqual(inst1, inst2)
+        self.assertEqual(inst1._fingerprint(), inst2._fingerprint())
+
+    def test_unequal_objects(self):
+        inst1 = self._instance(Size=Uint32(1))
+        inst2 = self._instance(Size=Uint32(2))
+        self.assertNotEqual(inst1._fingerprint(), inst2._fingerprint())
+        self.assertFalse(inst1 == inst2)
+        self.assertTrue(inst1 != inst2)
+
+    def test_invalidation(self):
+        inst1 = self._instance(Size=Uint32(1), Tags=['a'])
+        inst2 = self._instance(Size=Uint32(2), Tags=['a'])
+        inst1._fingerprint()
+        inst2._fingerprint()
+
+        inst2.properties['Size'].value = Uint32(1)
+        self.assertEqual(inst1, inst2)
+        inst2.properties['Tags'].value.append('b')
+        self.assertNotEqual(inst1, inst2)
+        inst2.properties['Tags'].value.pop()
+        self.assertEqual(inst1, inst2)
+
+        inst1._fingerprint()
+        inst2._fingerprint()
+        inst2.path['Name'] = 'Bar'
+        self.assertNotEqual(inst1, inst2)
+        inst2.path = inst1.path.copy()
+        self.assertEqual(inst1, inst2)
+
+        inst1._fingerprint()
+        inst2._fingerprint()
+        del inst2['Size']
+        self.assertNotEqual(inst1, inst2)
+        inst2['Size'] = Uint32(1)
+        self.assertEqual(inst1, inst2)
+
+    def test_per_object(self):
+        # Modifying an object does not invalidate the cached fingerprints of
+        # other objects
+        inst1 = self._instance(Size=Uint32(1))
+        inst2 = self._instance(Size=Uint32(2))
+        fp1 = inst1._fingerprint()
+        inst2._fingerprint()
+        inst2['Size'] = Uint32(3)
+        inst2.path.namespace = 'root/interop'
+        self.assertEqual(inst1._cached_fingerprint(), fp1)
+        self.assertEqual(inst2._cached_fingerprint(), None)
+
+        # A property shared by two instances invalidates both of them
+        shared = inst1.properties['Size']
+        inst2['Size'] = shared
+        inst2._fingerprint()
+        shared.value = Uint32(4)
+        self.assertEqual(inst1._cached_fingerprint(), None)
+        self.assertEqual(inst2._cached_fingerprint(), None)
+
+    def test_other_attributes(self):
+        # Setting an attribute that is not compared keeps the fingerprint
+        inst = self._instance(Size=Uint32(1))
+        fp = inst._fingerprint()
+        inst.property_list = ['size']
+        inst.properties['Size'].embedded_object = None
+        self.assertEqual(inst._cached_fingerprint(), fp)
+        inst.properties['Size'].class_origin = 'CIM_Foo'
+        self.assertEqual(inst._cached_fingerprint(), None)
+
+    def test_qualifiers_modified(self):
+        # Qualifiers can be modified in place, so their fingerprints are not
+        # cached
+        inst1 = self._instance(Size=Uint32(1))
+        inst2 = self._instance(Size=Uint32(1))
+        for inst in (inst1, inst2):
+            inst.properties['Size'].qualifiers['Units'] = \
+                CIMQualifier('Units', 'Bytes')
+            inst._fingerprint()
+        self.assertEqual(inst1._cached_fingerprint(), None)
+        inst2.properties['Size'].qualifiers['Units'].value = 'KiloBytes'
+        self.assertNotEqual(inst1, inst2)
+
+    def test_copy(self):
+        inst = self._instance(Size=Uint32(1))
+        inst._fingerprint()
+        cp = inst.copy()
+        cp['Size'] = Uint32(2)
+        self.assertNotEqual(inst, cp)
+
+        # The copy of a property has its own qualifiers
+        prop = inst.properties['Size']
+        prop_cp = prop.copy()
+        prop_cp.qualifiers['Key'] = CIMQualifier('Key', True)
+        self.assertNotEqual(prop, prop_cp)
+        del prop_cp.qualifiers['Key']
+        self.assertEqual(prop, prop_cp)
+
+    def test_pickle(self):
+        inst = self._instance(Size=Uint32(1))
+        inst._fingerprint()
+        self.assertFalse('_fp' in inst.properties.__getstate__())
+        self.assertFalse('_fp' in inst.path.__getstate__())
+
+
 class CIMInstanceSort(unittest.TestCase):
     """
     Test the sorting of `CIMInstance` objects.
@@ -1960,6 +2118,26 @@ class CopyCIMProperty(unittest.TestCase, CIMObjectMixin):
         self.assertCIMProperty(p, 'Spotty', 'Foot', type_='string',
                                qualifiers={})
 
+    def test_isolation(self):
+
+        p = CIMProperty('Spotty', [Uint8(1), Uint8(2)],
+                        qualifiers={'Key': CIMQualifier('Key', True)},
+                        embedded_object=None)
+        c = p.copy()
+
+        c.value.append(Uint8(3))
+        c.qualifiers['Description'] = CIMQualifier('Description', 'x')
+        del c.qualifiers['Key']
+
+        self.assertEqual(p.value, [1, 2])
+        self.assertEqual(list(p.qualifiers.keys()), ['Key'])
+
+    def test_embedded_object(self):
+
+        p = CIMProperty('Emb', None, embedded_object='object')
+        self.assertEqual(p.copy().embedded_object, 'object')
+        self.assertEqual(p.copy(), p)
+
 class CIMPropertyAttrs(unittest.TestCase, CIMObjectMixin):
 
     def test_all(self):
@@ -2276,6 +2454,26 @@ class CopyCIMClass(unittest.TestCase):
         self.assertTrue(c.methods['Delete'])
         self.assertTrue(c.qualifiers['Key'])
 
+    def test_isolation(self):
+
+        c = CIMClass('CIM_Foo',
+                     properties={'Name': CIMProperty('Name', None, 'string')},
+                     methods={'Delete': CIMMethod('Delete')},
+                     qualifiers={'Key': CIMQualifier('Value', True)})
+
+        co = c.copy()
+
+        c.properties['Size'] = CIMProperty('Size', None, 'uint64')
+        del c.methods['Delete']
+        c.qualifiers['Abstract'] = CIMQualifier('Abstract', True)
+
+        self.assertEqual(list(co.properties.keys()), ['Name'])
+        self.assertTrue('Delete' in co.methods)
+        self.assertEqual(list(co.qualifiers.keys()), ['Key'])
+
+        co.properties['Name'] = CIMProperty('Name', None, 'uint8')
+        self.assertEqual(c.properties['Name'].type, 'string')
+
 class CIMClassAttrs(unittest.TestCase):
 
     def test_all(self):
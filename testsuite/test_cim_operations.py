@@ -7,9 +7,18 @@ Test functions in cim_operations
 
 from __future__ import print_function, absolute_import
 
+import copy
+import pickle
+import time
+import threading
 import unittest
 
-from pywbem.cim_operations import check_utf8_xml_chars, ParseError
+import httpretty
+
+from pywbem import WBEMConnection, CIMInstanceName, CIMClassName, Uint8
+from pywbem import cim_operations
+from pywbem.cim_operations import check_utf8_xml_chars, ParseError, \
+                                  _request_key
 
 #################################################################
 # Test check_utf8_xml_chars function
@@ -91,6 +100,264 @@ class Test_check_utf8_xml_chars(unittest.TestCase):
         self._run_single(b'<V>a\xF1\x80\xC2\x81c</V>', False)
 
 
+#################################################################
+# Test the request cache
+#################################################################
+
+GETINSTANCE_REPLY = b"""\
+<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0">
+  <MESSAGE ID="1001" PROTOCOLVERSION="1.0">
+    <SIMPLERSP>
+      <IMETHODRESPONSE NAME="GetInstance">
+        <IRETURNVALUE>
+          <INSTANCE CLASSNAME="PyWBEM_Person">
+            <PROPERTY NAME="Name" TYPE="string">
+              <VALUE>Fritz</VALUE>
+            </PROPERTY>
+          </INSTANCE>
+        </IRETURNVALUE>
+      </IMETHODRESPONSE>
+    </SIMPLERSP>
+  </MESSAGE>
+</CIM>
+"""
+
+
+class Test_request_cache(unittest.TestCase):
+    """Test the caching of intrinsic operation requests"""
+
+    def test_request_key(self):
+        """Test the _request_key() function"""
+
+        path = CIMInstanceName('PyWBEM_Person', {'Name': 'Fritz'},
+                               namespace='root/cimv2')
+        key = _request_key('GetInstance', 'root/cimv2',
+                           dict(InstanceName=path, LocalOnly=False,
+                                PropertyList=['Name', 'Address'],
+                                IncludeQualifiers=None))
+        self.assertEqual(key, _request_key(
+            'GetInstance', 'root/cimv2',
+            dict(PropertyList=('Name', 'Address'), LocalOnly=False,
+                 InstanceName=path.copy())))
+
+        # The keys of different requests must differ
+        self.assertNotEqual(key, _request_key(
+            'GetInstance', 'root/cimv2',
+            dict(InstanceName=path, LocalOnly=True,
+                 PropertyList=['Name', 'Address'])))
+        self.assertNotEqual(key, _request_key(
+            'GetInstance', 'root/cimv2',
+            dict(InstanceName=path, LocalOnly=False,
+                 PropertyList=['Name'])))
+        self.assertNotEqual(key, _request_key(
+            'GetInstance', 'root/interop',
+            dict(InstanceName=path, LocalOnly=False,
+                 PropertyList=['Name', 'Address'])))
+        self.assertNotEqual(
+            _request_key('GetInstance', 'root/cimv2',
+                         dict(InstanceName=CIMInstanceName(
+                             'PyWBEM_Person', {'Id': Uint8(1)}))),
+            _request_key('GetInstance', 'root/cimv2',
+                         dict(InstanceName=CIMInstanceName(
+                             'PyWBEM_Person', {'Id': True}))))
+        self.assertNotEqual(
+            _request_key('EnumerateInstances', 'root/cimv2',
+                         dict(ClassName=CIMClassName('PyWBEM_Person'))),
+            _request_key('EnumerateInstances', 'root/cimv2',
+                         dict(ClassName=CIMClassName('PyWBEM_Address'))))
+
+        # Requests with other parameter values are not cached
+        self.assertEqual(_request_key('GetInstance', 'root/cimv2',
+                                      dict(InstanceName=path, Foo=1.5)),
+                         None)
+
+    @httpretty.activate
+    def test_cache(self):
+        """Test that repeated requests are taken from the cache"""
+
+        httpretty.httpretty.allow_net_connect = False
+        httpretty.register_uri(
+            method='POST', uri='http://acme.com:80/cimom',
+            body=GETINSTANCE_REPLY, status=200,
+            adding_headers={'CIMOperation': 'MethodResponse'})
+
+        conn = WBEMConnection('http://acme.com:80')
+        path = CIMInstanceName('PyWBEM_Person', {'Name': 'Fritz'})
+        requests = []
+        for local_only in (False, False, True):
+            inst = conn.GetInstance(path, LocalOnly=local_only,
+                                    PropertyList=['Name'])
+            self.assertEqual(inst['Name'], 'Fritz')
+            request = httpretty.last_request()
+            requests.append((request.body, request.headers['CIMObject']))
+
+        self.assertEqual(len(conn._request_cache), 2)
+        self.assertEqual(requests[0], requests[1])
+        self.assertNotEqual(requests[0][0], requests[2][0])
+
+        # In debug mode, the request is built each time
+        conn.debug = True
+        conn.GetInstance(path, LocalOnly=False, PropertyList=['Name'])
+        self.assertEqual(httpretty.last_request().body, requests[0][0])
+        self.assertTrue('<IMETHODCALL NAME="GetInstance">' in
+                        conn.last_raw_request)
+
+
+#################################################################
+# Test the coalescing of concurrent identical requests
+#################################################################
+
+class Test_coalesce_requests(unittest.TestCase):
+    """Test the coalescing of concurrent identical read-only operations"""
+
+    def run_concurrently(self, conn, func, num_threads=8):
+        """Call func in the specified number of threads while the WBEM
+        server holds back the first response until all threads have been
+        started, and return the results and exceptions of the threads, and
+        the number of requests received by the server."""
+
+        entered = threading.Event()
+        release = threading.Event()
+        requests = []
+
+        def reply(request, uri, headers):
+            # pylint: disable=unused-argument
+            requests.append(request)
+            entered.set()
+            release.wait(5)
+            return (200, headers, GETINSTANCE_REPLY)
+
+        httpretty.httpretty.allow_net_connect = False
+        httpretty.register_uri(method='POST', uri='http://acme.com:80/cimom',
+                               body=reply)
+
+        results = {}
+
+        def run(index):
+            try:
+                results[index] = func()
+            except Exception as exc:  # pylint: disable=broad-except
+                results[index] = exc
+
+        threads = [threading.Thread(target=run, args=(i,))
+                   for i in range(num_threads)]
+        threads[0].start()
+        self.assertTrue(entered.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        return [results[i] for i in range(num_threads)], len(requests)
+
+    @httpretty.activate
+    def test_coalesced(self):
+        """Test that concurrent GetInstance operations send one request"""
+
+        conn = WBEMConnection('http://acme.com:80')
+        conn.coalesce_requests = True
+        path = CIMInstanceName('PyWBEM_Person', {'Name': 'Fritz'})
+
+        results, num_requests = self.run_concurrently(
+            conn, lambda: conn.GetInstance(path, PropertyList=['Name']))
+
+        self.assertEqual(num_requests, 1)
+        for inst in results:
+            self.assertEqual(inst['Name'], 'Fritz')
+            self.assertEqual(inst.path, results[0].path)
+        self.assertEqual(len(set([id(inst) for inst in results])),
+                         len(results))
+        self.assertEqual(conn._inflight, {})
+
+        # Modifying a result does not affect the other results
+        results[1]['Name'] = 'Hans'
+        results[1].path.namespace = 'root/interop'
+        self.assertEqual(results[2]['Name'], 'Fritz')
+        self.assertEqual(results[2].path.namespace, 'root/cimv2')
+
+        # Modifying a property object of a result in place does not affect
+        # the other results either, including the result of the first thread
+        results[0].properties['Name'].value = 'Anna'
+        results[3].properties['Name'].qualifiers['Key'] = True
+        for inst in results[2:]:
+            self.assertEqual(inst.properties['Name'].value, 'Fritz')
+        self.assertFalse('Key' in results[2].properties['Name'].qualifiers)
+
+    @httpretty.activate
+    def test_not_copied(self):
+        """Test that the result of an operation that no other thread waits
+        for is not copied"""
+
+        conn = WBEMConnection('http://acme.com:80')
+        conn.coalesce_requests = True
+        path = CIMInstanceName('PyWBEM_Person', {'Name': 'Fritz'})
+        copied = []
+
+        def copy_result(value):
+            copied.append(value)
+            return copy_result.orig(value)
+        copy_result.orig = cim_operations._copy_result
+        cim_operations._copy_result = copy_result
+        try:
+            results, num_requests = self.run_concurrently(
+                conn, lambda: conn.GetInstance(path), num_threads=1)
+        finally:
+            cim_operations._copy_result = copy_result.orig
+        self.assertEqual(num_requests, 1)
+        self.assertEqual(results[0]['Name'], 'Fritz')
+        self.assertEqual(copied, [])
+        self.assertEqual(conn._inflight, {})
+
+    @httpretty.activate
+    def test_not_coalesced(self):
+        """Test that operations are not coalesced by default"""
+
+        conn = WBEMConnection('http://acme.com:80')
+        path = CIMInstanceName('PyWBEM_Person', {'Name': 'Fritz'})
+
+        results, num_requests = self.run_concurrently(
+            conn, lambda: conn.GetInstance(path), num_threads=3)
+
+        self.assertEqual(num_requests, 3)
+        self.assertEqual([inst['Name'] for inst in results], ['Fritz'] * 3)
+
+
+#################################################################
+# Test pickling and copying of connections
+#################################################################
+
+class Test_pickle(unittest.TestCase):
+    """Test that WBEMConnection objects can be pickled and copied"""
+
+    @httpretty.activate
+    def test_pickle(self):
+        """Test pickling and deep copying a connection that has been used"""
+
+        httpretty.httpretty.allow_net_connect = False
+        httpretty.register_uri(method='POST', uri='http://acme.com:80/cimom',
+                               body=GETINSTANCE_REPLY)
+        conn = WBEMConnection('http://acme.com:80', ('fritz', 'secret'),
+                              keep_alive=False)
+        conn.statistics.enabled = True
+        conn.debug = True
+        path = CIMInstanceName('PyWBEM_Person', {'Name': 'Fritz'})
+        conn.GetInstance(path)
+
+        for conn2 in (pickle.loads(pickle.dumps(conn)),
+                      copy.deepcopy(conn)):
+            self.assertEqual(conn2.creds, ('fritz', 'secret'))
+            self.assertEqual(conn2.keep_alive, False)
+            self.assertEqual(conn2.statistics.snapshot()[0].count, 1)
+            # The last request of a thread is not kept
+            self.assertEqual(conn2.last_raw_request, None)
+            conn2.GetInstance(path)
+            self.assertTrue(conn2.last_raw_request is not None)
+            self.assertEqual(conn2.statistics.snapshot()[0].count, 2)
+        self.assertEqual(conn.statistics.snapshot()[0].count, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
 
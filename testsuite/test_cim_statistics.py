@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+
+"""
+Test the statistics about WBEM operations (module `cim_statistics`).
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=invalid-name,missing-docstring,protected-access
+import unittest
+
+import httpretty
+
+from pywbem import WBEMConnection, Statistics, CIMInstanceName, CIMError
+
+GETINSTANCE_REPLY = b"""\
+<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0">
+  <MESSAGE ID="1001" PROTOCOLVERSION="1.0">
+    <SIMPLERSP>
+      <IMETHODRESPONSE NAME="GetInstance">
+        <IRETURNVALUE>
+          <INSTANCE CLASSNAME="PyWBEM_Person">
+            <PROPERTY NAME="Name" TYPE="string">
+              <VALUE>Fritz</VALUE>
+            </PROPERTY>
+          </INSTANCE>
+        </IRETURNVALUE>
+      </IMETHODRESPONSE>
+    </SIMPLERSP>
+  </MESSAGE>
+</CIM>
+"""
+
+ERROR_REPLY = b"""\
+<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0">
+  <MESSAGE ID="1001" PROTOCOLVERSION="1.0">
+    <SIMPLERSP>
+      <IMETHODRESPONSE NAME="GetInstance">
+        <ERROR CODE="6" DESCRIPTION="Not found"/>
+      </IMETHODRESPONSE>
+    </SIMPLERSP>
+  </MESSAGE>
+</CIM>
+"""
+
+PHASES = ('build', 'connect', 'server', 'transfer', 'parse', 'objects',
+          'total')
+
+
+class StatisticsTests(unittest.TestCase):
+
+    def test_record(self):
+        stats = Statistics(enabled=True, max_samples=10)
+        for i in range(20):
+            stats._record('GetInstance', 'root/cimv2',
+                          {'build': 0.001, 'total': 0.001 * (i + 1),
+                           'request_bytes': 100, 'reply_bytes': 1000},
+                          i % 4 == 0)
+        stats._record('GetInstance', 'root/interop', {'total': 0.5}, True)
+        stats._record('EnumerateInstances', 'root/cimv2', {'total': 0.1},
+                      False)
+
+        snapshot = stats.snapshot()
+        self.assertEqual([(s.name, s.namespace) for s in snapshot],
+                         [('EnumerateInstances', 'root/cimv2'),
+                          ('GetInstance', 'root/cimv2'),
+                          ('GetInstance', 'root/interop')])
+        stat = snapshot[1]
+        self.assertEqual(stat.count, 20)
+        self.assertEqual(stat.exception_count, 5)
+        self.assertEqual(stat.request_bytes, 2000)
+        self.assertEqual(stat.reply_bytes, 20000)
+        self.assertAlmostEqual(stat.avg_time('build'), 0.001)
+        self.assertAlmostEqual(stat.avg_time('total'), 0.0105)
+
+        # The percentiles are computed from the 10 most recent samples
+        self.assertAlmostEqual(stat.percentile('total', 0), 0.011)
+        self.assertAlmostEqual(stat.percentile('total', 50), 0.015)
+        self.assertAlmostEqual(stat.percentile('total', 90), 0.019)
+        self.assertAlmostEqual(stat.percentile('total', 100), 0.020)
+        self.assertEqual(stat.percentile('parse', 50), None)
+
+        # The snapshot is not affected by later calls
+        stats._record('GetInstance', 'root/cimv2', {'total': 1.0}, False)
+        self.assertEqual(stat.count, 20)
+        self.assertEqual(stats.snapshot()[1].count, 21)
+
+        table = stats.formatted(percent=50)
+        self.assertEqual(len(table.splitlines()), 5)
+        self.assertTrue('avg/p50' in table)
+
+        stats.reset()
+        self.assertEqual(stats.snapshot(), [])
+
+    def test_unmeasured_phases(self):
+        # The averages are computed over the calls that measured the phase,
+        # like the percentiles
+        stats = Statistics(enabled=True)
+        stats._record('GetInstance', 'root/cimv2',
+                      {'build': 0.002, 'connect': 0.01, 'server': 0.02,
+                       'total': 0.04}, False)
+        stats._record('GetInstance', 'root/cimv2',
+                      {'build': 0.002, 'server': 0.01, 'total': 0.02}, False)
+        stats._record('GetInstance', 'root/cimv2',
+                      {'build': 0.005, 'total': 0.006}, True)
+
+        stat = stats.snapshot()[0]
+        self.assertEqual(stat.count, 3)
+        self.assertEqual(stat.counts,
+                         {'build': 3, 'connect': 1, 'server': 2,
+                          'transfer': 0, 'parse': 0, 'objects': 0,
+                          'total': 3})
+        self.assertAlmostEqual(stat.avg_time('build'), 0.003)
+        self.assertAlmostEqual(stat.avg_time('connect'), 0.01)
+        self.assertAlmostEqual(stat.avg_time('connect'),
+                               stat.percentile('connect', 50))
+        self.assertAlmostEqual(stat.avg_time('server'), 0.015)
+        self.assertEqual(stat.avg_time('parse'), None)
+        self.assertEqual(stat.percentile('parse', 50), None)
+        self.assertTrue('-' in stats.formatted().splitlines()[2])
+
+
+class ConnectionStatisticsTests(unittest.TestCase):
+
+    @httpretty.activate
+    def test_connection(self):
+        httpretty.httpretty.allow_net_connect = False
+        httpretty.register_uri(
+            method='POST', uri='http://acme.com:80/cimom',
+            responses=[
+                httpretty.Response(body=GETINSTANCE_REPLY, status=200),
+                httpretty.Response(body=GETINSTANCE_REPLY, status=200),
+                httpretty.Response(body=ERROR_REPLY, status=200)])
+
+        conn = WBEMConnection('http://acme.com:80')
+        path = CIMInstanceName('PyWBEM_Person', {'Name': 'Fritz'})
+        self.assertFalse(conn.statistics.enabled)
+        conn.GetInstance(path)
+        self.assertEqual(conn.statistics.snapshot(), [])
+
+        conn.statistics.enabled = True
+        conn.GetInstance(path)
+        self.assertRaises(CIMError, conn.GetInstance, path)
+
+        snapshot = conn.statistics.snapshot()
+        self.assertEqual(len(snapshot), 1)
+        stat = snapshot[0]
+        self.assertEqual((stat.name, stat.namespace),
+                         ('GetInstance', 'root/cimv2'))
+        self.assertEqual(stat.count, 2)
+        self.assertEqual(stat.exception_count, 1)
+        self.assertEqual(stat.reply_bytes,
+                         len(GETINSTANCE_REPLY) + len(ERROR_REPLY))
+        self.assertTrue(stat.request_bytes > 0)
+        for phase in PHASES:
+            self.assertTrue(stat.avg_time(phase) >= 0, phase)
+        self.assertTrue(stat.avg_time('total') >= stat.avg_time('server'))
+
+
+if __name__ == '__main__':
+    unittest.main()
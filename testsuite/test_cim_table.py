@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+
+"""
+Test the columnar representation of CIM instances (`InstanceTable`) and
+the filling of such tables by the tuple parser.
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=invalid-name,missing-docstring
+import unittest
+
+import pytest
+import httpretty
+
+from pywbem import tupletree, tupleparse
+from pywbem import InstanceTable, WBEMConnection, CIMInstance, \
+                   CIMInstanceName, CIMProperty, Uint64, Real64
+
+try:
+    import numpy  # pylint: disable=unused-import
+    _HAVE_NUMPY = True
+except ImportError:
+    _HAVE_NUMPY = False
+
+RESPONSE = """<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0">
+  <MESSAGE ID="1000" PROTOCOLVERSION="1.0">
+    <SIMPLERSP>
+      <IMETHODRESPONSE NAME="EnumerateInstances">
+        <IRETURNVALUE>
+          <VALUE.NAMEDINSTANCE>
+            <INSTANCENAME CLASSNAME="PyWBEM_Disk">
+              <KEYBINDING NAME="Name">
+                <KEYVALUE VALUETYPE="string">sda</KEYVALUE>
+              </KEYBINDING>
+            </INSTANCENAME>
+            <INSTANCE CLASSNAME="PyWBEM_Disk">
+              <PROPERTY NAME="Name" TYPE="string">
+                <VALUE>sda</VALUE>
+              </PROPERTY>
+              <PROPERTY NAME="Size" TYPE="uint64">
+                <VALUE>1024</VALUE>
+              </PROPERTY>
+              <PROPERTY NAME="Load" TYPE="real64">
+                <VALUE>0.5</VALUE>
+              </PROPERTY>
+              <PROPERTY.ARRAY NAME="Tags" TYPE="string">
+                <VALUE.ARRAY><VALUE>a</VALUE><VALUE>b</VALUE></VALUE.ARRAY>
+              </PROPERTY.ARRAY>
+            </INSTANCE>
+          </VALUE.NAMEDINSTANCE>
+          <VALUE.NAMEDINSTANCE>
+            <INSTANCENAME CLASSNAME="PyWBEM_SSD">
+              <KEYBINDING NAME="Name">
+                <KEYVALUE VALUETYPE="string">sdb</KEYVALUE>
+              </KEYBINDING>
+            </INSTANCENAME>
+            <INSTANCE CLASSNAME="PyWBEM_SSD">
+              <PROPERTY NAME="Name" TYPE="string">
+                <VALUE>sdb</VALUE>
+              </PROPERTY>
+              <PROPERTY NAME="Size" TYPE="uint64"/>
+              <PROPERTY NAME="Load" TYPE="real64">
+                <VALUE>0.25</VALUE>
+              </PROPERTY>
+              <PROPERTY NAME="Wear" TYPE="uint64">
+                <VALUE>3</VALUE>
+              </PROPERTY>
+            </INSTANCE>
+          </VALUE.NAMEDINSTANCE>
+        </IRETURNVALUE>
+      </IMETHODRESPONSE>
+    </SIMPLERSP>
+  </MESSAGE>
+</CIM>
+"""
+
+
+def _instances():
+    return [
+        CIMInstance('PyWBEM_Disk',
+                    properties={'Name': 'sda', 'Size': Uint64(1024)},
+                    path=CIMInstanceName('PyWBEM_Disk', {'Name': 'sda'})),
+        CIMInstance('PyWBEM_Disk',
+                    properties={'name': 'sdb',
+                                'Size': CIMProperty('Size', None, 'uint64')},
+                    path=CIMInstanceName('PyWBEM_Disk', {'Name': 'sdb'})),
+    ]
+
+
+class InstanceTableFromInstances(unittest.TestCase):
+
+    def test_columns(self):
+        table = InstanceTable.from_instances(_instances(), 'PyWBEM_Disk')
+        self.assertEqual(len(table), 2)
+        self.assertEqual(sorted(table.column_names), ['Name', 'Size'])
+        self.assertEqual(table['NAME'], ['sda', 'sdb'])
+        self.assertEqual(table['size'], [1024, None])
+        self.assertEqual(table.column_type('Size'), ('uint64', False))
+        self.assertTrue('name' in table)
+        self.assertFalse('Foo' in table)
+        self.assertEqual(table.paths[1].keybindings['Name'], 'sdb')
+
+    def test_roundtrip(self):
+        instances = _instances()
+        table = InstanceTable.from_instances(instances)
+        self.assertEqual(table.to_instances(), instances)
+        self.assertEqual(table.row(-1), instances[-1])
+        with self.assertRaises(IndexError):
+            table.row(2)
+
+    def test_absent_properties(self):
+        table = InstanceTable()
+        table.append_instance(CIMInstance('C', properties={'A': 'x'}))
+        table.append_instance(CIMInstance('C', properties={'B': 'y'}))
+        self.assertEqual(table['A'], ['x', None])
+        self.assertEqual(table['B'], [None, 'y'])
+        self.assertEqual(list(table.row(0).properties.keys()), ['A'])
+        self.assertEqual(list(table.row(1).properties.keys()), ['B'])
+
+
+class InstanceTableToNumpy(unittest.TestCase):
+
+    def setUp(self):
+        self.table = InstanceTable()
+        self.table.append_instance(CIMInstance(
+            'C', properties={'Size': Uint64(7), 'Load': Real64(0.5),
+                             'Name': 'a'}))
+        self.table.append_instance(CIMInstance(
+            'C', properties={'Size': CIMProperty('Size', None, 'uint64'),
+                             'Load': Real64(1.5), 'Name': 'b'}))
+
+    @pytest.mark.skipif(not _HAVE_NUMPY, reason="numpy not installed")
+    def test_masked(self):
+        size = self.table.to_numpy('Size')
+        self.assertEqual(str(size.dtype), 'uint64')
+        self.assertEqual(list(size.mask), [False, True])
+        self.assertEqual(int(size[0]), 7)
+        load = self.table.to_numpy('load')
+        self.assertEqual(str(load.dtype), 'float64')
+        self.assertEqual(float(load.sum()), 2.0)
+
+    def test_non_numeric(self):
+        with self.assertRaises(TypeError):
+            self.table.to_numpy('Name')
+
+
+class FillInstanceTable(unittest.TestCase):
+
+    def test_fill(self):
+        tt = tupletree.xml_to_tupletree(RESPONSE)
+        table = InstanceTable()
+        self.assertEqual(tupleparse.fill_instance_table(tt, table), 2)
+
+        self.assertEqual(table.classnames, ['PyWBEM_Disk', 'PyWBEM_SSD'])
+        self.assertEqual(table['Size'], [1024, None])
+        self.assertEqual(table['Load'], [0.5, 0.25])
+        self.assertEqual(table['Wear'], [None, 3])
+        self.assertEqual(table['Tags'], [['a', 'b'], None])
+        self.assertEqual(table.column_type('Tags'), ('string', True))
+        self.assertFalse('Wear' in table.row(0))
+        self.assertTrue('Size' in table.row(1))
+
+        # The parsed rows are identical to what the normal parser produces
+        result = tupleparse.parse_cim(tupletree.xml_to_tupletree(RESPONSE))
+        instances = result[2][2][0][2][2][2]
+        self.assertEqual(table.to_instances(), instances)
+
+        # The instances have been consumed from the tupletree
+        result = tupleparse.parse_cim(tt)
+        self.assertEqual(result[2][2][0][2][2][2], [])
+
+    def test_no_ireturnvalue(self):
+        xml = '<CIM CIMVERSION="2.0" DTDVERSION="2.0"><MESSAGE ID="1" '\
+              'PROTOCOLVERSION="1.0"><SIMPLERSP><IMETHODRESPONSE '\
+              'NAME="EnumerateInstances"><ERROR CODE="5"/></IMETHODRESPONSE>'\
+              '</SIMPLERSP></MESSAGE></CIM>'
+        table = InstanceTable()
+        tt = tupletree.xml_to_tupletree(xml)
+        self.assertEqual(tupleparse.fill_instance_table(tt, table), 0)
+        self.assertEqual(len(table), 0)
+
+
+class EnumerateInstanceTable(unittest.TestCase):
+
+    @httpretty.activate
+    def test_enumerate(self):
+        httpretty.httpretty.allow_net_connect = False
+        httpretty.register_uri(
+            method='POST', uri='http://acme.com:80/cimom', body=RESPONSE,
+            adding_headers={'CIMOperation': 'MethodResponse'}, status=200)
+
+        conn = WBEMConnection('http://acme.com:80', ('user', 'pw'),
+                              default_namespace='root/cimv2')
+        table = conn.EnumerateInstanceTable('PyWBEM_Disk')
+
+        self.assertEqual(table.classname, 'PyWBEM_Disk')
+        self.assertEqual(table.namespace, 'root/cimv2')
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table['Name'], ['sda', 'sdb'])
+        self.assertEqual(table.paths[0].namespace, 'root/cimv2')
+        self.assertIn(b'EnumerateInstances',
+                      httpretty.last_request().body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+
+"""
+Test the tracking of instance changes (module `cim_tracker`).
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=invalid-name,missing-docstring
+import unittest
+
+import httpretty
+
+from pywbem import WBEMConnection, ChangeTracker, ChangeEvent, CIMInstance, \
+                   CIMInstanceName, CIMClassName, CIMError, ParseError
+
+RESPONSE = """<?xml version="1.0" encoding="utf-8" ?>
+<CIM CIMVERSION="2.0" DTDVERSION="2.0">
+  <MESSAGE ID="1000" PROTOCOLVERSION="1.0">
+    <SIMPLERSP>
+      <IMETHODRESPONSE NAME="EnumerateInstances">
+        <IRETURNVALUE>
+%s
+        </IRETURNVALUE>
+      </IMETHODRESPONSE>
+    </SIMPLERSP>
+  </MESSAGE>
+</CIM>
+"""
+
+NAMEDINSTANCE = """\
+          <VALUE.NAMEDINSTANCE>
+            <INSTANCENAME CLASSNAME="PyWBEM_Disk">
+              <KEYBINDING NAME="Name">
+                <KEYVALUE VALUETYPE="string">%(name)s</KEYVALUE>
+              </KEYBINDING>
+            </INSTANCENAME>
+            <INSTANCE CLASSNAME="PyWBEM_Disk">
+              <PROPERTY NAME="Name" TYPE="string">
+                <VALUE>%(name)s</VALUE>
+              </PROPERTY>
+              <PROPERTY NAME="Size" TYPE="uint64">
+                <VALUE>%(size)s</VALUE>
+              </PROPERTY>
+            </INSTANCE>
+          </VALUE.NAMEDINSTANCE>"""
+
+ERROR_RESPONSE = '<?xml version="1.0" encoding="utf-8" ?>'\
+    '<CIM CIMVERSION="2.0" DTDVERSION="2.0"><MESSAGE ID="1" '\
+    'PROTOCOLVERSION="1.0"><SIMPLERSP><IMETHODRESPONSE '\
+    'NAME="EnumerateInstances"><ERROR CODE="5"/></IMETHODRESPONSE>'\
+    '</SIMPLERSP></MESSAGE></CIM>'
+
+
+def _response(disks):
+    """Return an EnumerateInstances response for (name, size) tuples."""
+    return RESPONSE % '\n'.join(NAMEDINSTANCE % dict(name=name, size=size)
+                                for name, size in disks)
+
+
+def _register(*bodies):
+    httpretty.httpretty.allow_net_connect = False
+    httpretty.register_uri(
+        method='POST', uri='http://acme.com:80/cimom',
+        responses=[httpretty.Response(
+            body=body, status=200,
+            adding_headers={'CIMOperation': 'MethodResponse'})
+                   for body in bodies])
+
+
+def _conn():
+    return WBEMConnection('http://acme.com:80', ('user', 'pw'),
+                          default_namespace='root/cimv2')
+
+
+def _summary(events):
+    return [(e.kind, e.path['Name'], e.properties) for e in events]
+
+
+class ChangeTrackerTests(unittest.TestCase):
+
+    hash_xml = False
+
+    def _tracker(self):
+        return ChangeTracker(_conn(), hash_xml=self.hash_xml)
+
+    @httpretty.activate
+    def test_poll(self):
+        _register(_response([('sda', 1), ('sdb', 2), ('sdc', 3)]),
+                  _response([('sda', 1), ('sdb', 2), ('sdc', 3)]),
+                  _response([('sdb', 20), ('sdc', 3), ('sdd', 4)]))
+        tracker = self._tracker()
+
+        events = tracker.poll('PyWBEM_Disk')
+        self.assertEqual(_summary(events),
+                         [('added', 'sda', None), ('added', 'sdb', None),
+                          ('added', 'sdc', None)])
+        self.assertEqual(events[0].instance['Size'], 1)
+        self.assertEqual(events[0].path.namespace, 'root/cimv2')
+
+        self.assertEqual(tracker.poll('PyWBEM_Disk'), [])
+
+        events = tracker.poll('PyWBEM_Disk')
+        self.assertEqual(_summary(events),
+                         [('added', 'sdd', None),
+                          ('modified', 'sdb', ['Size']),
+                          ('removed', 'sda', None)])
+        self.assertEqual(events[1].instance['Size'], 20)
+        self.assertEqual(events[2].instance['Size'], 1)
+
+        self.assertEqual([inst['Name'] for inst in
+                          tracker.snapshot('pywbem_disk')],
+                         ['sdb', 'sdc', 'sdd'])
+
+    @httpretty.activate
+    def test_snapshot_keys(self):
+        # Snapshots are kept per namespace, class name and property list.
+        # Class names and property lists are matched case-insensitively, and
+        # the order in the property list does not matter.
+        _register(*[_response([('sda', 1)])] * 5)
+        tracker = self._tracker()
+
+        self.assertEqual(len(tracker.poll('PyWBEM_Disk')), 1)
+        self.assertEqual(len(tracker.poll('PyWBEM_Disk', 'root/other')), 1)
+        self.assertEqual(
+            len(tracker.poll('PyWBEM_Disk', PropertyList=['Name', 'Size'])),
+            1)
+        self.assertEqual(
+            tracker.poll(CIMClassName('pywbem_disk', namespace='root/other')),
+            [])
+        self.assertEqual(
+            tracker.poll('PyWBEM_Disk', PropertyList=iter(['size', 'NAME'])),
+            [])
+        self.assertEqual(tracker.snapshot('PyWBEM_Disk', 'root/none'), None)
+
+        tracker.clear()
+        self.assertEqual(tracker.snapshot('PyWBEM_Disk'), None)
+
+    @httpretty.activate
+    def test_error(self):
+        # A failed enumeration leaves the snapshot unchanged
+        _register(_response([('sda', 1)]), ERROR_RESPONSE,
+                  _response([('sda', 2)]))
+        tracker = self._tracker()
+        tracker.poll('PyWBEM_Disk')
+        self.assertRaises(CIMError, tracker.poll, 'PyWBEM_Disk')
+        self.assertEqual(_summary(tracker.poll('PyWBEM_Disk')),
+                         [('modified', 'sda', ['Size'])])
+
+
+class HashedChangeTrackerTests(ChangeTrackerTests):
+
+    hash_xml = True
+
+    @httpretty.activate
+    def test_reuse(self):
+        # Instances with unchanged CIM-XML are not parsed again
+        _register(_response([('sda', 1), ('sdb', 2)]),
+                  _response([('sda', 1), ('sdb', 3)]))
+        tracker = self._tracker()
+        tracker.poll('PyWBEM_Disk')
+        sda, sdb = tracker.snapshot('PyWBEM_Disk')
+
+        events = tracker.poll('PyWBEM_Disk')
+        self.assertEqual(_summary(events), [('modified', 'sdb', ['Size'])])
+        new_sda, new_sdb = tracker.snapshot('PyWBEM_Disk')
+        self.assertTrue(new_sda is sda)
+        self.assertFalse(new_sdb is sdb)
+
+    def test_count_mismatch(self):
+        # A response whose instances cannot be matched with the hashed
+        # elements is rejected
+        tracker = self._tracker()
+        tracker.conn._imethodcall = lambda *args, **kwargs: None
+        self.assertEqual(tracker.poll('PyWBEM_Disk'), [])
+
+        def imethodcall(*args, **kwargs):
+            kwargs['_reply_filter'](_response([('sda', 1)]).encode('utf-8'))
+        tracker.conn._imethodcall = imethodcall
+        self.assertRaises(ParseError, tracker.poll, 'PyWBEM_Disk')
+
+
+class EventTests(unittest.TestCase):
+
+    def test_repr(self):
+        inst = CIMInstance('PyWBEM_Disk',
+                           path=CIMInstanceName('PyWBEM_Disk',
+                                                {'Name': 'sda'}))
+        event = ChangeEvent(ChangeEvent.MODIFIED, inst, ['Size'])
+        self.assertTrue(repr(event).startswith(
+            "ChangeEvent(kind='modified', path=CIMInstanceName("))
+
+
+if __name__ == '__main__':
+    unittest.main()
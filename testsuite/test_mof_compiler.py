@@ -5,6 +5,8 @@ from __future__ import print_function, absolute_import
 
 import sys
 import os
+import shutil
+import tempfile
 from time import time
 from zipfile import ZipFile
 from tempfile import TemporaryFile
@@ -23,8 +25,9 @@ from ply import lex
 from pywbem.cim_operations import CIMError
 from pywbem.mof_compiler import MOFCompiler, MOFWBEMConnection, MOFParseError
 from pywbem.cim_constants import *
-from pywbem.cim_obj import CIMClass, CIMProperty, CIMQualifier
-from pywbem import mof_compiler
+from pywbem.cim_obj import CIMClass, CIMProperty, CIMQualifier, CIMInstance
+from pywbem.cim_types import Uint32, Uint64
+from pywbem import mof_compiler, tupleparse, tupletree
 
 from unittest_extensions import CIMObjectMixin
 
@@ -177,6 +180,835 @@ class TestSchemaSearch(MOFTest):
         self.assertEqual(cele.properties['RequestedState'].type, 'uint16')
 
 
+class TestFindMof(unittest.TestCase):
+    """Test the index of MOF files used by MOFCompiler.find_mof()."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.mofdir = os.path.join(self.tmpdir, 'mof')
+        os.makedirs(os.path.join(self.mofdir, 'System'))
+        self._touch('qualifiers.mof')
+        self._touch('System', 'CIM_ComputerSystem.mof')
+        self._touch('System', 'README')
+        self.index_file = os.path.join(self.tmpdir, 'index.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _touch(self, *path):
+        with open(os.path.join(self.mofdir, *path), 'w') as fp:
+            fp.write('// empty\n')
+
+    def _mofcomp(self, **kwargs):
+        return MOFCompiler(MOFWBEMConnection(), search_paths=[self.mofdir],
+                           log_func=lambda msg: None, **kwargs)
+
+    def test_find(self):
+        mofcomp = self._mofcomp()
+        self.assertEqual(mofcomp.find_mof('cim_computersystem'),
+                         os.path.join(self.mofdir, 'System') +
+                         '/CIM_ComputerSystem.mof')
+        self.assertEqual(mofcomp.find_mof('Qualifiers'),
+                         self.mofdir + '/qualifiers.mof')
+        self.assertEqual(mofcomp.find_mof('README'), None)
+
+        # Files added later are found after refreshing the index
+        self._touch('System', 'CIM_System.mof')
+        self.assertEqual(mofcomp.find_mof('CIM_System'), None)
+        mofcomp.refresh_mof_index()
+        self.assertEqual(mofcomp.find_mof('CIM_System'),
+                         os.path.join(self.mofdir, 'System') +
+                         '/CIM_System.mof')
+
+        # Changing the search path rebuilds the index
+        mofcomp.parser.search_paths = []
+        self.assertEqual(mofcomp.find_mof('CIM_System'), None)
+
+    def test_index_file(self):
+        mofcomp = self._mofcomp(index_file=self.index_file)
+        self.assertTrue(mofcomp.find_mof('CIM_ComputerSystem') is not None)
+        self.assertTrue(os.path.exists(self.index_file))
+
+        # A new compiler uses the persisted index without walking the
+        # directories
+        mofcomp = self._mofcomp(index_file=self.index_file)
+        walk = os.walk
+        os.walk = None
+        try:
+            self.assertTrue(mofcomp.find_mof('CIM_ComputerSystem')
+                            is not None)
+        finally:
+            os.walk = walk
+
+        # A modified directory makes the persisted index out of date
+        self._touch('System', 'CIM_System.mof')
+        mtime = os.stat(os.path.join(self.mofdir, 'System')).st_mtime
+        os.utime(os.path.join(self.mofdir, 'System'), (mtime + 2, mtime + 2))
+        mofcomp = self._mofcomp(index_file=self.index_file)
+        self.assertTrue(mofcomp.find_mof('CIM_System') is not None)
+
+        # A corrupt index file is ignored
+        with open(self.index_file, 'w') as fp:
+            fp.write('{')
+        mofcomp = self._mofcomp(index_file=self.index_file)
+        self.assertTrue(mofcomp.find_mof('CIM_System') is not None)
+
+
+class MOFTreeTest(unittest.TestCase):
+    """A MOF schema in a temporary directory."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cachedir = os.path.join(self.tmpdir, 'cache')
+        os.mkdir(self.cachedir)
+        self._write('qualifiers.mof',
+                    'Qualifier Key : boolean = false, '
+                    'Scope(property, reference), '
+                    'Flavor(DisableOverride, ToSubclass);\n'
+                    'Qualifier Description : string = null, Scope(any), '
+                    'Flavor(EnableOverride, ToSubclass, Translatable);\n')
+        self._write('PyWBEM_Base.mof',
+                    '[Description ("Base")]\n'
+                    'class PyWBEM_Base {\n'
+                    '    [Key] string InstanceID;\n'
+                    '};\n')
+        self._write('PyWBEM_Sub.mof',
+                    'class PyWBEM_Sub : PyWBEM_Base {\n'
+                    '    uint32 Size;\n'
+                    '};\n')
+        # PyWBEM_Base.mof is compiled because it is found in the search path
+        self._write('schema.mof',
+                    '#pragma include ("qualifiers.mof")\n'
+                    '#pragma include ("PyWBEM_Sub.mof")\n'
+                    'instance of PyWBEM_Sub as $Sub {\n'
+                    '    InstanceID = "a";\n'
+                    '    Size = 1;\n'
+                    '};\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, filename, mof):
+        with open(os.path.join(self.tmpdir, filename), 'w') as fp:
+            fp.write(mof)
+
+
+class TestCompileCache(MOFTreeTest):
+    """Test the caching of the results of MOFCompiler.compile_file()."""
+
+    def _compile(self, cached=None):
+        """Compile schema.mof with a new MOF compiler, and return the
+        compiler. If `cached` is not `None`, assert whether the result was
+        restored from the cache."""
+        mofcomp = MOFCompiler(MOFWBEMConnection(),
+                              search_paths=[self.tmpdir],
+                              log_func=lambda msg: None,
+                              cache_dir=self.cachedir)
+        compile_string = mofcomp.compile_string
+        compiled = []
+
+        def compile_string_wrapper(*args, **kwargs):
+            compiled.append(args)
+            return compile_string(*args, **kwargs)
+        mofcomp.compile_string = compile_string_wrapper
+        mofcomp.compile_file(os.path.join(self.tmpdir, 'schema.mof'),
+                             NAME_SPACE)
+        if cached is not None:
+            self.assertEqual(not compiled, cached)
+        return mofcomp
+
+    @staticmethod
+    def _state(mofcomp):
+        handle = mofcomp.handle
+        return (handle.classes, handle.class_names, handle.qualifiers,
+                handle.instances, handle.default_namespace,
+                mofcomp.parser.qualcache, mofcomp.parser.classnames,
+                mofcomp.parser.aliases)
+
+    def test_cached(self):
+        state = self._state(self._compile(cached=False))
+        self.assertEqual(len(os.listdir(self.cachedir)), 1)
+        mofcomp = self._compile(cached=True)
+        self.assertEqual(self._state(mofcomp), state)
+        self.assertEqual(
+            mofcomp.handle.instances[NAME_SPACE][0]['Size'], 1)
+
+        # A file whose modification time changed without changing its
+        # contents does not invalidate the cache
+        path = os.path.join(self.tmpdir, 'PyWBEM_Base.mof')
+        mtime = os.stat(path).st_mtime
+        os.utime(path, (mtime + 2, mtime + 2))
+        self._compile(cached=True)
+
+    def test_changed_file(self):
+        self._compile(cached=False)
+        self._write('PyWBEM_Base.mof',
+                    'class PyWBEM_Base {\n'
+                    '    [Key] string InstanceID;\n'
+                    '    string Caption;\n'
+                    '};\n')
+        mofcomp = self._compile(cached=False)
+        self.assertTrue('Caption' in mofcomp.handle.classes[NAME_SPACE]
+                        ['PyWBEM_Base'].properties)
+        self._compile(cached=True)
+
+    def test_incremental(self):
+        # Only the changed file and its dependents are recompiled
+        self._compile(cached=False)
+        self._write('PyWBEM_Sub.mof',
+                    'class PyWBEM_Sub : PyWBEM_Base {\n'
+                    '    uint32 Size;\n'
+                    '    uint32 Count;\n'
+                    '};\n')
+        mofcomp = self._compile()
+        self.assertEqual(
+            [os.path.basename(key[0]) for key in
+             mofcomp.dependencies.affected(
+                 [os.path.join(self.tmpdir, 'PyWBEM_Sub.mof')])],
+            ['PyWBEM_Sub.mof', 'schema.mof'])
+        self.assertTrue('Count' in mofcomp.handle.classes[NAME_SPACE]
+                        ['PyWBEM_Sub'].properties)
+        self.assertEqual(len(mofcomp.handle.instances[NAME_SPACE]), 1)
+        self.assertEqual(len(os.listdir(self.cachedir)), 1)
+        self.assertEqual(self._state(self._compile(cached=True)),
+                         self._state(mofcomp))
+
+    def test_changed_lookup(self):
+        # A new file in the search path that would be found by a lookup
+        # invalidates the cache. Without the include, the compiler looks up
+        # the qualifiers.mof and qualifiers_optional.mof files.
+        self._write('schema.mof',
+                    '#pragma include ("PyWBEM_Sub.mof")\n')
+        self._compile(cached=False)
+        self._compile(cached=True)
+        self._write('qualifiers_optional.mof',
+                    'Qualifier Deprecated : string[], Scope(any), '
+                    'Flavor(EnableOverride, Restricted);\n')
+        mofcomp = self._compile(cached=False)
+        self.assertTrue('Deprecated' in mofcomp.handle.qualifiers[NAME_SPACE])
+        self._compile(cached=True)
+
+    def test_sequence(self):
+        # The cache is used only for the same sequence of compiled files
+        self._write('other.mof',
+                    'class PyWBEM_Other : PyWBEM_Base {\n'
+                    '};\n')
+        mofcomp = self._compile(cached=False)
+        mofcomp.compile_file(os.path.join(self.tmpdir, 'other.mof'),
+                             NAME_SPACE)
+        self.assertEqual(len(os.listdir(self.cachedir)), 2)
+
+        mofcomp = MOFCompiler(MOFWBEMConnection(),
+                              search_paths=[self.tmpdir],
+                              log_func=lambda msg: None,
+                              cache_dir=self.cachedir)
+        mofcomp.compile_string('class PyWBEM_Foo {\n};\n', NAME_SPACE)
+        mofcomp.compile_file(os.path.join(self.tmpdir, 'schema.mof'),
+                             NAME_SPACE)
+        self.assertTrue('PyWBEM_Foo' in mofcomp.handle.classes[NAME_SPACE])
+        self.assertEqual(len(os.listdir(self.cachedir)), 2)
+
+
+class TestDependencies(MOFTreeTest):
+    """Test the dependency graph of MOFCompiler and
+    MOFCompiler.recompile_files()."""
+
+    def setUp(self):
+        super(TestDependencies, self).setUp()
+        self.mofcomp = MOFCompiler(MOFWBEMConnection(),
+                                   search_paths=[self.tmpdir],
+                                   log_func=lambda msg: None)
+        self.mofcomp.compile_file(os.path.join(self.tmpdir, 'schema.mof'),
+                                  NAME_SPACE)
+
+    def _key(self, filename):
+        return (os.path.join(self.tmpdir, filename), NAME_SPACE)
+
+    def test_graph(self):
+        graph = self.mofcomp.dependencies
+        self.assertEqual([key[0] for key in graph.files()],
+                         [self._key(f)[0] for f in
+                          ['qualifiers.mof', 'PyWBEM_Base.mof',
+                           'PyWBEM_Sub.mof', 'schema.mof']])
+        self.assertEqual(graph.dependencies(*self._key('PyWBEM_Sub.mof')),
+                         set([self._key('PyWBEM_Base.mof')]))
+        self.assertEqual(graph.dependencies(*self._key('PyWBEM_Base.mof')),
+                         set([self._key('qualifiers.mof')]))
+        self.assertEqual(graph.dependencies(*self._key('schema.mof')),
+                         set([self._key('PyWBEM_Sub.mof')]))
+        self.assertEqual(graph.affected([self._key('PyWBEM_Base.mof')[0]]),
+                         [self._key('PyWBEM_Base.mof'),
+                          self._key('PyWBEM_Sub.mof'),
+                          self._key('schema.mof')])
+        self.assertEqual(graph.affected([self._key('schema.mof')[0]]),
+                         [self._key('schema.mof')])
+
+    def test_recompile(self):
+        self._write('PyWBEM_Base.mof',
+                    'class PyWBEM_Base {\n'
+                    '    [Key] string InstanceID;\n'
+                    '    string Caption;\n'
+                    '};\n')
+        handle = self.mofcomp.handle
+        compiled = []
+        compile_file = self.mofcomp.compile_file
+
+        def compile_file_wrapper(filename, ns):
+            compiled.append(os.path.basename(filename))
+            return compile_file(filename, ns)
+        self.mofcomp.compile_file = compile_file_wrapper
+        self.mofcomp.recompile_files(
+            [os.path.join(self.tmpdir, 'PyWBEM_Base.mof')])
+
+        # PyWBEM_Sub.mof is compiled as part of schema.mof, and the
+        # qualifiers.mof file included by schema.mof is not compiled again
+        self.assertEqual(compiled, ['PyWBEM_Base.mof', 'schema.mof',
+                                    'PyWBEM_Sub.mof'])
+        sub = handle.GetClass('PyWBEM_Sub', LocalOnly=False)
+        self.assertTrue('Caption' in sub.properties)
+        self.assertEqual(list(handle.class_names[NAME_SPACE]),
+                         ['PyWBEM_Base', 'PyWBEM_Sub'])
+        self.assertEqual(len(handle.instances[NAME_SPACE]), 1)
+
+
+class TestParallel(MOFTreeTest):
+    """Test MOFCompiler.compile_file() with MOF files parsed in worker
+    processes."""
+
+    def setUp(self):
+        super(TestParallel, self).setUp()
+        self._write('instances.mof',
+                    'instance of PyWBEM_Sub as $Sub {\n'
+                    '    InstanceID = "a";\n'
+                    '    Size = 1;\n'
+                    '};\n')
+        # PyWBEM_Base.mof is compiled because it is found in the search path,
+        # and instances.mof is parsed in the calling process
+        self._write('classes.mof',
+                    '#pragma include ("qualifiers.mof")\n'
+                    '#pragma include ("PyWBEM_Sub.mof")\n'
+                    '#pragma include ("instances.mof")\n')
+
+    def _compile(self, processes, filename='classes.mof'):
+        """Compile a MOF file with a new MOF compiler, and return the
+        compiler."""
+        mofcomp = MOFCompiler(MOFWBEMConnection(),
+                              search_paths=[self.tmpdir],
+                              log_func=lambda msg: None,
+                              processes=processes)
+        mofcomp.compile_file(os.path.join(self.tmpdir, filename), NAME_SPACE)
+        return mofcomp
+
+    def test_same_result(self):
+        serial = self._compile(1)
+        parallel = self._compile(2)
+        self.assertEqual(TestCompileCache._state(parallel),
+                         TestCompileCache._state(serial))
+        self.assertEqual(parallel.dependencies.files(),
+                         serial.dependencies.files())
+        for key in serial.dependencies.files():
+            self.assertEqual(parallel.dependencies.dependencies(*key),
+                             serial.dependencies.dependencies(*key))
+        self.assertTrue(parallel._pool is None)
+
+    def test_errors(self):
+        self._write('PyWBEM_Sub.mof',
+                    'class PyWBEM_Sub : PyWBEM_Base {\n'
+                    '    [Bogus] uint32 Size;\n'
+                    '};\n')
+        for processes in (1, 2):
+            try:
+                self._compile(processes)
+            except CIMError as ce:
+                self.assertEqual(ce.file_line,
+                                 (os.path.join(self.tmpdir, 'PyWBEM_Sub.mof'),
+                                  2))
+            else:
+                self.fail('CIMError not raised')
+
+        self._write('PyWBEM_Sub.mof',
+                    'class PyWBEM_Sub : PyWBEM_Base {\n'
+                    '    uint32 Size\n'
+                    '};\n')
+        contexts = []
+        for processes in (1, 2):
+            try:
+                self._compile(processes)
+            except MOFParseError as pe:
+                self.assertEqual(pe.lineno, 3)
+                contexts.append(pe.context)
+            else:
+                self.fail('MOFParseError not raised')
+        self.assertEqual(contexts[0], contexts[1])
+
+    def test_trailing_whitespace(self):
+        # Whitespace at the end of a file is not reported as an invalid
+        # token, so the file is parsed in a worker process
+        self._write('PyWBEM_Sub.mof',
+                    'class PyWBEM_Sub : PyWBEM_Base {\n'
+                    '    uint32 Size;\n'
+                    '}; \t')
+        result = mof_compiler._parse_deferred(
+            os.path.join(self.tmpdir, 'PyWBEM_Sub.mof'))
+        self.assertTrue(result is not None)
+        self.assertEqual(len(result[1]), 1)
+
+
+class TestStreaming(MOFTreeTest):
+    """Test MOFCompiler.stream_file() and MOFCompiler.iter_instances()."""
+
+    def setUp(self):
+        super(TestStreaming, self).setUp()
+        self._write('instances.mof',
+                    '#pragma include ("qualifiers.mof")\n'
+                    '/* The end of a declaration is a semicolon; */\n'
+                    'instance of PyWBEM_Sub {\n'
+                    '    InstanceID = "a;}";\n'
+                    '    Size = 1;\n'
+                    '};\n'
+                    '// or a semicolon after braces: { };\n'
+                    'instance of PyWBEM_Sub {\n'
+                    '    InstanceID = "b\\";{";\n'
+                    '    Size = 2;\n'
+                    '};\n')
+
+    def _compiler(self):
+        return MOFCompiler(MOFWBEMConnection(), search_paths=[self.tmpdir],
+                           log_func=lambda msg: None)
+
+    def _path(self, filename):
+        return os.path.join(self.tmpdir, filename)
+
+    def test_declarations(self):
+        with open(self._path('instances.mof')) as fp:
+            mof = fp.read()
+        for blocksize in (1, 2, 3, 5, 8, 65536):
+            with open(self._path('instances.mof')) as fp:
+                pieces = list(mof_compiler._mof_declarations(fp, blocksize))
+            self.assertEqual(''.join(pieces), mof)
+            self.assertEqual([piece.split('\n')[-1] for piece in pieces],
+                             ['};', '};', ''])
+
+    def test_stream_file(self):
+        expected = self._compiler()
+        expected.compile_file(self._path('instances.mof'), NAME_SPACE)
+        mofcomp = self._compiler()
+        mofcomp.stream_file(self._path('instances.mof'), NAME_SPACE)
+        self.assertEqual(TestCompileCache._state(mofcomp),
+                         TestCompileCache._state(expected))
+        self.assertEqual(len(mofcomp.handle.instances[NAME_SPACE]), 2)
+
+    def test_iter_instances(self):
+        mofcomp = self._compiler()
+        instances = mofcomp.iter_instances(self._path('instances.mof'),
+                                           NAME_SPACE)
+        inst = next(instances)
+        self.assertEqual(inst.path.keybindings['InstanceID'], 'a;}')
+        self.assertEqual(inst.path.namespace, NAME_SPACE)
+        self.assertEqual([inst['Size'] for inst in instances], [2])
+        self.assertEqual(mofcomp.handle.instances, {})
+        self.assertTrue('PyWBEM_Sub' in mofcomp.handle.classes[NAME_SPACE])
+
+        # The instances of included MOF files are created in the repository
+        self._write('all.mof', '#pragma include ("instances.mof")\n')
+        mofcomp = self._compiler()
+        instances = list(mofcomp.iter_instances(self._path('all.mof'),
+                                                NAME_SPACE))
+        self.assertEqual(len(instances), 0)
+        self.assertEqual(len(mofcomp.handle.instances[NAME_SPACE]), 2)
+        self.assertEqual(mofcomp.parser.instances, None)
+
+    def test_callback(self):
+        mofcomp = self._compiler()
+        instances = []
+        mofcomp.stream_file(self._path('instances.mof'), NAME_SPACE,
+                            callback=instances.append)
+        self.assertEqual([inst['Size'] for inst in instances], [1, 2])
+        self.assertEqual(mofcomp.handle.instances, {})
+
+    def test_errors(self):
+        self._write('instances.mof',
+                    '#pragma include ("qualifiers.mof")\n'
+                    'instance of PyWBEM_Sub {\n'
+                    '    InstanceID = "a";\n'
+                    '};\n'
+                    'instance of PyWBEM_Sub {\n'
+                    '    InstanceID = "b"\n'
+                    '    Size = 2;\n'
+                    '};\n')
+        try:
+            self._compiler().stream_file(self._path('instances.mof'),
+                                         NAME_SPACE)
+        except MOFParseError as pe:
+            self.assertEqual(pe.file, self._path('instances.mof'))
+            self.assertEqual(pe.lineno, 7)
+            self.assertEqual(pe.context[-2], '    Size = 2;')
+        else:
+            self.fail('MOFParseError not raised')
+
+
+class TestMOFWriter(MOFTreeTest):
+    """Test MOFWriter."""
+
+    def _compile(self, filename):
+        mofcomp = MOFCompiler(MOFWBEMConnection(), search_paths=[self.tmpdir],
+                              log_func=lambda msg: None)
+        mofcomp.compile_file(os.path.join(self.tmpdir, filename), NAME_SPACE)
+        return mofcomp
+
+    def test_instances(self):
+        instances = [
+            CIMInstance('PyWBEM_Sub',
+                        properties={'InstanceID': 'a "quoted"\nvalue',
+                                    'Size': Uint32(1)}),
+            CIMInstance('PyWBEM_Sub',
+                        properties={'InstanceID': 'x' * 100,
+                                    'Size': CIMProperty('Size', None,
+                                                        type='uint32')}),
+            CIMInstance('PyWBEM_Array',
+                        properties={'Names': ['a', 'b'],
+                                    'Sizes': [Uint64(1), Uint64(2)],
+                                    'Long': ['long value %d' % i
+                                             for i in range(10)],
+                                    'Flags': [True, False]})]
+        stream = six.StringIO()
+        mof_compiler.MOFWriter(stream).write_instances(iter(instances))
+        self.assertEqual(stream.getvalue(),
+                         ''.join([inst.tomof() + '\n'
+                                  for inst in instances]))
+        self.assertTrue('    Names = {"a", "b"};\n' in stream.getvalue())
+
+    def test_classes(self):
+        mofcomp = self._compile('schema.mof')
+        classes = mofcomp.handle.classes[NAME_SPACE]
+        stream = six.StringIO()
+        mof_compiler.MOFWriter(stream).write_classes(
+            [classes['PyWBEM_Sub'], classes['PyWBEM_Base']])
+        self.assertEqual(stream.getvalue(),
+                         classes['PyWBEM_Base'].tomof() + '\n' +
+                         classes['PyWBEM_Sub'].tomof() + '\n')
+        self.assertRaises(TypeError, mof_compiler.MOFWriter(stream).write,
+                          CIMQualifier('Key', True))
+
+    def test_repository(self):
+        # The MOF of a repository compiles into the same repository
+        mofcomp = self._compile('schema.mof')
+        with open(os.path.join(self.tmpdir, 'dump.mof'), 'w') as fp:
+            mof_compiler.MOFWriter(fp).write_repository(mofcomp.handle)
+        dumped = self._compile('dump.mof')
+        self.assertEqual(dumped.handle.qualifiers, mofcomp.handle.qualifiers)
+        self.assertEqual(dumped.handle.classes, mofcomp.handle.classes)
+        self.assertEqual(dumped.handle.instances, mofcomp.handle.instances)
+
+
+class TestResolvedClasses(unittest.TestCase):
+    """Test MOFWBEMConnection.GetClass() with LocalOnly=False."""
+
+    QUALIFIERS = 'Qualifier Key : boolean = false, ' \
+                 'Scope(property, reference), ' \
+                 'Flavor(DisableOverride, ToSubclass);\n'
+
+    def setUp(self):
+        self.mofcomp = MOFCompiler(MOFWBEMConnection(),
+                                   log_func=lambda msg: None)
+        self.mofcomp.compile_string(
+            self.QUALIFIERS +
+            'class PyWBEM_A { [Key] string K; uint32 V = 7; };\n'
+            'class PyWBEM_B : PyWBEM_A { uint32 W; };\n'
+            'class PyWBEM_C : PyWBEM_B { };\n', NAME_SPACE)
+        self.handle = self.mofcomp.handle
+
+    def _get(self, classname):
+        return self.handle.GetClass(classname, LocalOnly=False,
+                                    IncludeQualifiers=True)
+
+    def test_cached(self):
+        resolved = self._get('PyWBEM_C')
+        self.assertEqual(sorted(resolved.properties.keys()), ['K', 'V', 'W'])
+        self.assertTrue(self._get('pywbem_c') is resolved)
+        # The classes in the repository are not modified
+        self.assertEqual(
+            len(self.handle.classes[NAME_SPACE]['PyWBEM_C'].properties), 0)
+
+        # Replacing a class in the superclass chain invalidates the cache
+        self.mofcomp.compile_string(
+            'class PyWBEM_A { [Key] string K; uint32 X; };\n', NAME_SPACE)
+        resolved = self._get('PyWBEM_C')
+        self.assertEqual(sorted(resolved.properties.keys()), ['K', 'W', 'X'])
+
+    def test_instances(self):
+        # Instances do not share property values with each other or with
+        # the class
+        self.mofcomp.compile_string(
+            'instance of PyWBEM_C { K = "a"; V = 1; };\n'
+            'instance of PyWBEM_C { K = "b"; };\n', NAME_SPACE)
+        insts = self.handle.instances[NAME_SPACE]
+        self.assertEqual([(inst['K'], inst['V']) for inst in insts],
+                         [('a', 1), ('b', 7)])
+        self.assertEqual(self._get('PyWBEM_C').properties['V'].value, 7)
+
+
+class TestClassNames(unittest.TestCase):
+    """Test the ordered set of class names of the MOF compiler."""
+
+    def test_all(self):
+        names = mof_compiler._ClassNames(['CIM_B', 'CIM_A'])
+        names.add('cim_b')
+        names.add('CIM_C')
+        self.assertTrue('cim_a' in names)
+        self.assertFalse('CIM_D' in names)
+        self.assertEqual(list(names), ['CIM_B', 'CIM_A', 'CIM_C'])
+        self.assertEqual(list(reversed(names)), ['CIM_C', 'CIM_A', 'CIM_B'])
+
+        names.discard('cim_b')
+        names.discard('CIM_D')
+        self.assertFalse('CIM_B' in names)
+        self.assertEqual(len(names), 2)
+        self.assertEqual(names, mof_compiler._ClassNames(['CIM_A', 'CIM_C']))
+        names.discard('CIM_A')
+        names.add('CIM_A')
+        self.assertEqual(list(names), ['CIM_C', 'CIM_A'])
+
+
+def _server_element(obj):
+    """Return a class or qualifier type as a WBEM server returns it for
+    EnumerateClasses (with LocalOnly and IncludeClassOrigin) or
+    EnumerateQualifiers: Parsed from CIM-XML, with the class origin and
+    propagation of the properties and methods, and the effective qualifier
+    flavors."""
+    if isinstance(obj, CIMClass):
+        obj = obj.copy()
+        for name, elem in list(obj.properties.items()) + \
+                list(obj.methods.items()):
+            elem = elem.copy()
+            elem.class_origin = obj.classname
+            elem.propagated = False
+            getattr(obj, 'properties' if isinstance(elem, CIMProperty)
+                    else 'methods')[name] = elem
+    else:
+        # The CIM-XML parser does not support the ANY scope
+        obj = obj.copy()
+        obj.scopes = dict([(scope, value) for scope, value in
+                           obj.scopes.items() if scope != 'ANY' or value])
+    xml = obj.tocimxml().toxml()
+    return tupleparse.parse_any(tupletree.xml_to_tupletree(xml))
+
+
+class _UploadConnection(object):
+    """A fake underlying connection that records the uploaded elements.
+    Like a WBEM server, it rejects classes whose superclass or referenced
+    classes do not exist, and the modification of classes with subclasses.
+    Copies of it share the recorded operations."""
+
+    def __init__(self, qualifiers, classes, instance_names):
+        self.default_namespace = NAME_SPACE
+        self.qualifiers = qualifiers
+        self.classes = classes
+        self.instance_names = instance_names
+        self.class_names = set([cc.classname.lower() for cc in classes])
+        self.superclasses = set([cc.superclass.lower() for cc in classes
+                                 if cc.superclass])
+        self.ops = []
+
+    def EnumerateQualifiers(self, namespace=None):
+        return list(self.qualifiers)
+
+    def EnumerateClasses(self, namespace=None, **kwargs):
+        self.ops.append(('EnumerateClasses', namespace,
+                         kwargs['DeepInheritance'], kwargs['LocalOnly']))
+        return list(self.classes)
+
+    def SetQualifier(self, qual, namespace=None):
+        self.ops.append(('SetQualifier', namespace, qual.name))
+
+    def _check_class(self, cc):
+        names = mof_compiler._class_dependencies(cc)
+        if cc.superclass:
+            names.append(cc.superclass.lower())
+        for name in names:
+            if name not in self.class_names and \
+                    name != cc.classname.lower():
+                raise CIMError(CIM_ERR_INVALID_PARAMETER,
+                               '%s: Class %s not found' % (cc.classname, name))
+
+    def CreateClass(self, cc, namespace=None):
+        self._check_class(cc)
+        self.class_names.add(cc.classname.lower())
+        if cc.superclass:
+            self.superclasses.add(cc.superclass.lower())
+        self.ops.append(('CreateClass', namespace, cc.classname))
+
+    def ModifyClass(self, cc, namespace=None):
+        self._check_class(cc)
+        if cc.classname.lower() in self.superclasses:
+            raise CIMError(CIM_ERR_CLASS_HAS_CHILDREN)
+        self.ops.append(('ModifyClass', namespace, cc.classname))
+
+    def CreateInstance(self, inst, namespace=None):
+        if inst['Name'] in self.instance_names:
+            raise CIMError(CIM_ERR_ALREADY_EXISTS)
+        self.ops.append(('CreateInstance', namespace, inst['Name']))
+
+    def ModifyInstance(self, inst):
+        self.ops.append(('ModifyInstance', inst.path.namespace, inst['Name']))
+
+
+def _reference(name, classname):
+    return CIMProperty(name, None, type='reference', reference_class=classname)
+
+
+class TestUpload(unittest.TestCase):
+    """Test MOFWBEMConnection.upload()."""
+
+    MOF = 'Qualifier Key : boolean = false, Scope(property, reference), ' \
+          'Flavor(DisableOverride, ToSubclass);\n' \
+          'Qualifier Description : string = null, Scope(class, property);\n' \
+          '[Description ("a")] class PyWBEM_A { [Key] string Name; };\n' \
+          'class PyWBEM_B : PyWBEM_A { };\n' \
+          'class PyWBEM_C : PyWBEM_B { PyWBEM_D REF D; };\n' \
+          'class PyWBEM_D : PyWBEM_A { [Description ("d")] uint32 V; };\n' \
+          'class PyWBEM_E : PyWBEM_A { PyWBEM_F REF F; };\n' \
+          'class PyWBEM_F : PyWBEM_A { PyWBEM_E REF E; };\n' \
+          'class PyWBEM_G : PyWBEM_F { };\n' \
+          'instance of PyWBEM_B { Name = "b1"; };\n' \
+          'instance of PyWBEM_D { Name = "d1"; V = 1; };\n'
+
+    def _upload(self, workers):
+        # The server has the same Key qualifier and PyWBEM_A class, and a
+        # different PyWBEM_D class
+        server = MOFCompiler(MOFWBEMConnection(), log_func=lambda msg: None)
+        server.compile_string(self.MOF.replace('"d"', '"old"'), NAME_SPACE)
+        repo = server.handle
+        conn = _UploadConnection(
+            [_server_element(repo.qualifiers[NAME_SPACE]['Key'])],
+            [_server_element(repo.classes[NAME_SPACE]['PyWBEM_A']),
+             _server_element(repo.classes[NAME_SPACE]['PyWBEM_D'])],
+            ['d1'])
+
+        handle = MOFWBEMConnection(conn=conn)
+        mofcomp = MOFCompiler(handle, log_func=lambda msg: None)
+        mofcomp.compile_string(self.MOF, NAME_SPACE)
+        self.assertEqual(conn.ops, [])
+        self.assertEqual(handle.upload(workers=workers), (9, 2))
+
+        # One class of the PyWBEM_E and PyWBEM_F cycle is created without
+        # its reference, and modified after the other one was created
+        ops = conn.ops
+        self.assertEqual(len(ops), 11)
+        self.assertEqual(ops[:2],
+                         [('EnumerateClasses', NAME_SPACE, True, True),
+                          ('SetQualifier', NAME_SPACE, 'Description')])
+        class_ops = set(ops[2:9])
+        self.assertTrue(
+            set([('CreateClass', NAME_SPACE, 'PyWBEM_B'),
+                 ('CreateClass', NAME_SPACE, 'PyWBEM_C'),
+                 ('ModifyClass', NAME_SPACE, 'PyWBEM_D'),
+                 ('CreateClass', NAME_SPACE, 'PyWBEM_E'),
+                 ('CreateClass', NAME_SPACE, 'PyWBEM_F'),
+                 ('CreateClass', NAME_SPACE, 'PyWBEM_G')]) < class_ops)
+        self.assertTrue(('ModifyClass', NAME_SPACE, 'PyWBEM_E') in class_ops or
+                        ('ModifyClass', NAME_SPACE, 'PyWBEM_F') in class_ops)
+        self.assertEqual(ops[9:],
+                         [('CreateInstance', NAME_SPACE, 'b1'),
+                          ('ModifyInstance', NAME_SPACE, 'd1')])
+
+    def test_sequential(self):
+        self._upload(1)
+
+    def test_workers(self):
+        self._upload(4)
+
+    def test_same_definition(self):
+        mofcomp = MOFCompiler(MOFWBEMConnection(), log_func=lambda msg: None)
+        mofcomp.compile_string(self.MOF, NAME_SPACE)
+        classes = mofcomp.handle.classes[NAME_SPACE]
+        local = classes['PyWBEM_D']
+        server = _server_element(local)
+        self.assertNotEqual(server, local)
+        self.assertTrue(mof_compiler._same_definition(server, local))
+        self.assertTrue(mof_compiler._same_definition(local, server))
+
+        # Inherited properties are ignored
+        prop = classes['PyWBEM_A'].properties['Name'].copy()
+        prop.propagated = True
+        server.properties['Name'] = prop
+        self.assertTrue(mof_compiler._same_definition(server, local))
+
+        server.properties['v'].qualifiers['Description'].value = 'old'
+        self.assertFalse(mof_compiler._same_definition(server, local))
+        # Flavors are compared if both qualifiers specify them
+        local = classes['PyWBEM_A']
+        server = _server_element(local)
+        self.assertTrue(mof_compiler._same_definition(server, local))
+        server.properties['Name'].qualifiers['Key'].overridable = True
+        self.assertFalse(mof_compiler._same_definition(server, local))
+        server = _server_element(local)
+        server.superclass = 'PyWBEM_B'
+        self.assertFalse(mof_compiler._same_definition(server, local))
+
+        qual = mofcomp.handle.qualifiers[NAME_SPACE]['Description']
+        server = _server_element(qual)
+        self.assertNotEqual(server, qual)
+        self.assertTrue(mof_compiler._same_definition(server, qual))
+
+    def test_levels(self):
+        classes = [CIMClass('PyWBEM_A'),
+                   CIMClass('PyWBEM_B', superclass='pywbem_a'),
+                   CIMClass('PyWBEM_C', superclass='PyWBEM_X')]
+        levels = mof_compiler._upload_levels(classes, ['PyWBEM_C'])
+        self.assertEqual([[(cc.classname, modify) for cc, modify in level]
+                          for level in levels],
+                         [[('PyWBEM_A', False), ('PyWBEM_C', True)],
+                          [('PyWBEM_B', False)]])
+
+    def test_levels_cycle(self):
+        classes = [CIMClass('PyWBEM_E',
+                            properties={'F': _reference('F', 'PyWBEM_F')}),
+                   CIMClass('PyWBEM_F',
+                            properties={'E': _reference('E', 'PyWBEM_E')}),
+                   CIMClass('PyWBEM_G', superclass='PyWBEM_F')]
+
+        def levels(existing):
+            return [[(cc.classname, modify,
+                      [prop.name for prop in cc.properties.values()])
+                     for cc, modify in level]
+                    for level in mof_compiler._upload_levels(classes,
+                                                             existing)]
+
+        # PyWBEM_G is created after PyWBEM_F has its full definition
+        self.assertEqual(levels([]),
+                         [[('PyWBEM_F', False, [])],
+                          [('PyWBEM_E', False, ['F'])],
+                          [('PyWBEM_F', True, ['E'])],
+                          [('PyWBEM_G', False, [])]])
+        # References to existing classes do not need to be cut
+        self.assertEqual(levels(['PyWBEM_E']),
+                         [[('PyWBEM_F', False, ['E'])],
+                          [('PyWBEM_E', True, ['F']),
+                           ('PyWBEM_G', False, [])]])
+
+
+class TestParserConstruction(unittest.TestCase):
+    """Test the construction of the parser and lexer of the MOF compiler."""
+
+    def test_shared(self):
+        mofcomp1 = MOFCompiler(MOFWBEMConnection())
+        mofcomp2 = MOFCompiler(MOFWBEMConnection())
+        self.assertFalse(mofcomp1.parser is mofcomp2.parser)
+        self.assertFalse(mofcomp1.lexer is mofcomp2.lexer)
+        self.assertTrue(mofcomp1.parser.action is mofcomp2.parser.action)
+        self.assertTrue(mofcomp1.lexer.parser is mofcomp1.parser)
+        self.assertTrue(mofcomp2.lexer.parser is mofcomp2.parser)
+
+    def test_load(self):
+        # The parser loaded from the table module has the same productions
+        # as the one built by yacc()
+        parser = mof_compiler._load_yacc()
+        self.assertTrue(parser is not None)
+        self.assertEqual(len(parser.productions),
+                         len(mof_compiler._yacc().productions))
+
+
 class TestParseError(MOFTest):
 
     def test_all(self):
@@ -480,6 +1312,16 @@ class TestLexerSimple(BaseTestLexer):
         ]
         self.run_assert_lexer(input_data, exp_tokens)
 
+    def test_comments(self):
+        """Test that comments are skipped and newlines are counted."""
+        input_data = "a // b\n/* c\n\n d */ e\r\n\n f"
+        exp_tokens = [
+            self.lex_token('IDENTIFIER', 'a', 1, 0),
+            self.lex_token('IDENTIFIER', 'e', 4, 19),
+            self.lex_token('IDENTIFIER', 'f', 6, 24),
+        ]
+        self.run_assert_lexer(input_data, exp_tokens)
+
 class TestLexerNumber(BaseTestLexer):
     """Number testcases for the lexical analyzer."""
 
@@ -955,5 +1797,61 @@ class TestLexerChar(BaseTestLexer):
         self.run_assert_lexer(input_data, exp_tokens)
 
 
+class TestLexerPLY(unittest.TestCase):
+    """Test that the lexical analyzer of the MOF compiler returns the same
+    tokens as the LEX analyzer of PLY."""
+
+    MOF = '// comment\r\n' \
+          '#pragma include ("x.mof")\n' \
+          '/* multi\n   line */ [Key, Description ("a \\"b\\" \\x41"), ' \
+          'ValueMap {"1", ".."}]\n' \
+          'class CIM_Foo : CIM_Bar { sint32 X = -12; real64 Y = +1.5e3;\n' \
+          '  uint8 Z = 0x1F; uint8 B = 101b; uint8 C = 012b; uint8 O = 017;\n' \
+          '  uint8 P = 019; char16 Q = \'a\'; char16 R = \'\\n\';\n' \
+          '  string S = "x" "y\\q"; boolean T = TRUE; @ ~ ref REF $alias\n' \
+          '  Reference Qualifier Scope Flavor AS instance of OF null;\n' \
+          '}; 0 .5 07 a_b1 _x\n\n' \
+          '/* unterminated'
+
+    @staticmethod
+    def _tokens(lexer, mof):
+        """Return the tokens, messages and final line number."""
+        class Parser(object):  # pylint: disable=too-few-public-methods
+            """The attributes of the parser that are used by the lexer."""
+            def __init__(self):
+                self.mof = mof
+                self.messages = []
+                self.log = self.messages.append
+        lexer.parser = Parser()
+        lexer.input(mof)
+        tokens = [(tok.type, tok.value, tok.lineno, tok.lexpos)
+                  for tok in iter(lexer.token, None)]
+        return tokens, lexer.parser.messages, lexer.lineno
+
+    def test_same(self):
+        exp = self._tokens(mof_compiler._lex(), self.MOF)
+        act = self._tokens(mof_compiler._MOFLexer(), self.MOF)
+        self.assertEqual(act, exp)
+        self.assertEqual(len(act[1]), 9)
+
+    def test_trailing_ignore(self):
+        # Ignored characters at the end of the input are not tokens
+        for mof in ['}; \t', 'a \r', ' ', '\t\t', 'a\n \t',
+                    'a /* x */ \t', '@ \t', '-\r', '']:
+            exp = self._tokens(mof_compiler._lex(), mof)
+            act = self._tokens(mof_compiler._MOFLexer(), mof)
+            self.assertEqual(act, exp)
+
+    def test_clone(self):
+        lexer = mof_compiler._MOFLexer()
+        lexer.input('a b')
+        self.assertEqual(lexer.token().value, 'a')
+        lexer2 = lexer.clone()
+        lexer2.input('c')
+        self.assertEqual(lexer2.token().value, 'c')
+        self.assertEqual(lexer.token().value, 'b')
+        self.assertEqual(lexer.token(), None)
+
+
 if __name__ == '__main__':
     unittest.main()
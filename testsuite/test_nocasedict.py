@@ -228,6 +228,50 @@ class TestCopy(BaseTest):
         self.assertTrue(self.dic['Dog'] == 'Cat')
         self.assertTrue(cp['Dog'] == 'Kitten')
 
+class TestCopyOnWrite(BaseTest):
+
+    def test_modify_original(self):
+        cp = self.dic.copy()
+        self.dic['Dog'] = 'Kitten'
+        self.dic['Cow'] = 'Beef'
+        del self.dic['Budgie']
+        self.assertEqual(cp, NocaseDict({'Dog': 'Cat', 'Budgie': 'Fish'}))
+        self.assertEqual(self.dic, NocaseDict({'Dog': 'Kitten', 'Cow': 'Beef'}))
+
+    def test_modify_copy(self):
+        cp = self.dic.copy()
+        cp.update(Dog='Kitten')
+        cp.setdefault('Cow', 'Beef')
+        del cp['budgie']
+        self.assertEqual(self.dic, NocaseDict({'Dog': 'Cat', 'Budgie': 'Fish'}))
+        self.assertEqual(cp, NocaseDict({'Dog': 'Kitten', 'Cow': 'Beef'}))
+
+    def test_clear(self):
+        cp = self.dic.copy()
+        cp.clear()
+        self.assertEqual(len(self.dic), 2)
+        self.dic.clear()
+        self.assertEqual(len(cp), 0)
+        cp['Dog'] = 'Cat'
+        self.assertEqual(len(self.dic), 0)
+
+    def test_chained_copies(self):
+        cp1 = self.dic.copy()
+        cp2 = cp1.copy()
+        cp3 = NocaseDict(cp2)
+        cp2['Dog'] = 'Kitten'
+        self.assertEqual(self.dic['Dog'], 'Cat')
+        self.assertEqual(cp1['Dog'], 'Cat')
+        self.assertEqual(cp3['Dog'], 'Cat')
+        del cp3['Dog']
+        self.assertEqual(cp1['Dog'], 'Cat')
+        self.assertEqual(cp2['Dog'], 'Kitten')
+
+    def test_failed_delete(self):
+        cp = self.dic.copy()
+        self.assertRaises(KeyError, cp.__delitem__, 'Cow')
+        self.assertEqual(cp, self.dic)
+
 class TestGet(BaseTest):
 
     def test_all(self):
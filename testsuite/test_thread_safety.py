@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+"""
+Stress test for a WBEMConnection object that is shared by many threads,
+against the local mock CIMOM in `mock_cimom.py`.
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=invalid-name,missing-docstring,protected-access
+import threading
+import unittest
+
+from pywbem import WBEMConnection, CIMInstanceName, ResponseCache, \
+                   DebugCapture
+
+import cimxml_replies
+from mock_cimom import MockCIMOM
+
+NUM_THREADS = 16
+NUM_ITERATIONS = 20
+NUM_INSTANCES = 20
+
+
+class SharedConnectionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cimom = MockCIMOM({
+            'EnumerateInstances':
+                cimxml_replies.enumerate_instances_reply(NUM_INSTANCES),
+            'GetInstance': cimxml_replies.get_instance_reply(),
+            'Scrub': cimxml_replies.invoke_method_reply('Scrub', 2),
+        })
+        self.cimom.start()
+        self.conn = WBEMConnection(self.cimom.url)
+
+    def tearDown(self):
+        self.conn.close()
+        self.cimom.stop()
+
+    def run_threads(self, func):
+        """Call func(thread_index, iteration) in all threads, and fail with
+        the first exception raised in a thread."""
+        errors = []
+        start = threading.Event()
+
+        def run(index):
+            start.wait()
+            try:
+                for iteration in range(NUM_ITERATIONS):
+                    func(index, iteration)
+            except Exception as exc:  # pylint: disable=broad-except
+                errors.append(exc)
+
+        threads = [threading.Thread(target=run, args=(i,))
+                   for i in range(NUM_THREADS)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join(60)
+            self.assertFalse(thread.is_alive())
+        if errors:
+            raise errors[0]
+
+    def operations(self, index, iteration):
+        """Perform a mix of operations and check their results."""
+        path = CIMInstanceName('PyWBEM_Disk', {'DeviceID': 'disk%d' % index})
+        choice = (index + iteration) % 3
+        if choice == 0:
+            instances = self.conn.EnumerateInstances('PyWBEM_Disk')
+            self.assertEqual(len(instances), NUM_INSTANCES)
+            self.assertEqual(instances[-1]['DeviceID'],
+                             'disk%d' % (NUM_INSTANCES - 1))
+        elif choice == 1:
+            instance = self.conn.GetInstance(path)
+            self.assertEqual(instance['DeviceID'], 'disk42')
+            self.assertEqual(instance.path['DeviceID'], 'disk%d' % index)
+        else:
+            result = self.conn.InvokeMethod('Scrub', path, Mode='full')
+            self.assertEqual(result[0], 0)
+            self.assertEqual(len(result[1]['Jobs']), 2)
+
+    def test_operations(self):
+        self.conn.statistics.enabled = True
+        capture = DebugCapture(sample_rate=0.1, max_operations=10)
+        self.conn.hooks.append(capture)
+
+        self.run_threads(self.operations)
+
+        total = NUM_THREADS * NUM_ITERATIONS
+        stats = self.conn.statistics.snapshot()
+        self.assertEqual(sum([stat.count for stat in stats]), total)
+        self.assertEqual(sum([stat.exception_count for stat in stats]), 0)
+        self.assertEqual(sum(self.cimom.requests.values()), total)
+        self.assertTrue(len(capture.operations()) <= 10)
+
+        # The HTTP connections are used for more than one request
+        num_connects = sum([len(stat._samples['connect']) for stat in stats])
+        self.assertTrue(num_connects < total)
+        pool = self.conn._connection_pool
+        idle = list(pool._idle.values())
+        self.assertTrue(0 < len(idle[0]) <= pool.max_idle)
+
+    def test_debug(self):
+        self.conn.debug = True
+
+        def get_instance(index, iteration):
+            # pylint: disable=unused-argument
+            path = CIMInstanceName('PyWBEM_Disk',
+                                   {'DeviceID': 'disk%d' % index})
+            self.conn.GetInstance(path)
+            self.assertTrue('disk%d<' % index in self.conn.last_raw_request)
+            self.assertTrue(b'disk42<' in self.conn.last_raw_reply)
+            self.assertTrue('disk%d<' % index in self.conn.last_request)
+
+        self.run_threads(get_instance)
+        # The main thread did not perform any operations
+        self.assertEqual(self.conn.last_request, None)
+
+    def test_coalesce_and_cache(self):
+        self.conn.coalesce_requests = True
+        cache = ResponseCache(ttl=60)
+        self.conn.hooks.append(cache)
+
+        self.run_threads(self.operations)
+
+        # One GetInstance per thread, one EnumerateInstances, and no
+        # caching of the extrinsic method calls
+        requests = self.cimom.requests
+        self.assertEqual(requests['EnumerateInstances'], 1)
+        self.assertEqual(requests['GetInstance'], NUM_THREADS)
+        self.assertTrue(requests['Scrub'] > NUM_THREADS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,6 +12,8 @@ produce an object that is identical to the one we started with.
 from __future__ import absolute_import
 
 import unittest
+from xml.dom import minidom
+from xml.parsers.expat import ExpatError
 
 from pywbem import tupletree, tupleparse
 from pywbem import CIMInstance, CIMInstanceName, CIMClass, \
@@ -195,6 +197,12 @@ class ParseCIMProperty(TupleTest):
         self._run_single(CIMProperty('Foo', inst))
         self._run_single(CIMProperty('Foo', [inst]))
 
+        inst = CIMInstance('Foo_Class',
+                           {'Text': u'<a href="x">&amp; \u20ac</a>\n',
+                            'Names': ['a&b', ']]>', '<![CDATA[c]]>']})
+        self._run_single(CIMProperty('Foo', inst))
+        self._run_single(CIMProperty('Foo', [inst, inst]))
+
 # TODO 2/16 KS: Extend for all data types.
 class ParseCIMParameter(TupleTest):
     """Test parsing of CIMParameter objects."""
@@ -255,6 +263,33 @@ class ParseCIMParameter(TupleTest):
                                                                       True)}))
 
 
+class XMLToTupleTree(unittest.TestCase):
+    """Test that xml_to_tupletree() returns the same tuple tree as
+    dom_to_tupletree() for a DOM."""
+
+    def _run_single(self, xml):
+
+        result = tupletree.xml_to_tupletree(xml)
+        exp_result = tupletree.dom_to_tupletree(minidom.parseString(xml))
+        self.assertEqual(result, exp_result)
+
+    def test_all(self):
+
+        self._run_single('<A/>')
+        self._run_single(
+            '<?xml version="1.0" encoding="utf-8" ?>\n'
+            '<A X="1" Y="&amp;&lt;&quot;">\n  <B>b1&amp;b2&#x41;</B>\n'
+            '  <C><![CDATA[<c>]]><![CDATA[d]]>e&gt;<D/>f</C>\n</A>\n')
+        self._run_single(u'<A>\u20ac \U00010122</A>')
+        self._run_single(u'<A>\u20ac</A>'.encode('utf-8'))
+
+    def test_error(self):
+
+        self.assertRaises(ExpatError, tupletree.xml_to_tupletree, '<A>')
+        self.assertRaises(ExpatError, tupletree.xml_to_tupletree,
+                          '<A>&#0;</A>')
+
+
 class ParseXMLKeyValue(RawXMLTest):
 
     def test_all(self):